@@ -1,8 +1,21 @@
 import os
 import copy
+import threading
 import numpy as np
 from src.logger import log
 
+# Kênh 2-9 (xúc giác): up, down, left, right, up-left, up-right, down-left, down-right
+_SENSOR_DIRECTIONS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1),
+                               (-1, -1), (-1, 1), (1, -1), (1, 1)], dtype=np.int64)
+
+_ACTION_DELTAS = {
+    'up': (-1, 0), 'down': (1, 0), 'left': (0, -1), 'right': (0, 1),
+    'up-left': (-1, -1), 'up-right': (-1, 1), 'down-left': (1, -1), 'down-right': (1, 1),
+}
+
+# Occupancy codes của self._blocked
+_FREE, _STATIC, _DYNAMIC = 0, 1, 2
+
 class GridWorld:
     """
     The Grid World environment supports multiple agents and complex logic mazes.
@@ -35,6 +48,8 @@ class GridWorld:
         self.wall_penalty = env_config.get("wall_penalty", -0.5)
         
         self.base_grid = self._create_base_grid()
+        self._build_occupancy_layers()
+        self._sensor_lock = threading.Lock()
         self.broadcast_events = [] # Danh sách sự kiện để "thần giao cách cảm"
         self.reset()
 
@@ -54,6 +69,45 @@ class GridWorld:
                     log(self, "debug", f"DEBUG: Cannot place switch at ({r}, {c}), occupied by '{grid[r][c]}'")
         return grid
 
+    def _build_occupancy_layers(self):
+        """
+        Occupancy layers NumPy (padding 1 ô, viền = tường tĩnh để khỏi check biên):
+        static walls, switches, và một mask cho mỗi gate động.
+
+        NOTE: Ô nằm ngoài grid trong config bị bỏ qua (giống check biên cũ).
+        """
+        padded = self.size + 2
+
+        def _layer(cells):
+            layer = np.zeros((padded, padded), dtype=bool)
+            for r, c in cells:
+                if 0 <= r < self.size and 0 <= c < self.size:
+                    layer[r + 1, c + 1] = True
+            return layer
+
+        self._static_layer = _layer(self.static_walls)
+        self._static_layer[[0, -1], :] = True
+        self._static_layer[:, [0, -1]] = True
+        self._switch_layer = _layer(self.switches.keys())
+        self._gate_ids = list(self.dynamic_walls.keys())
+        self._gate_layers = np.stack([_layer(self.dynamic_walls[g]) for g in self._gate_ids]) \
+            if self._gate_ids else np.zeros((0, padded, padded), dtype=bool)
+
+    def _refresh_dynamic_layers(self):
+        """Gộp mask các gate đang đóng → lưới chặn di chuyển + lưới giá trị xúc giác. Chỉ chạy khi gate đổi."""
+        closed = np.array([self.dynamic_wall_states.get(g, False) for g in self._gate_ids], dtype=bool)
+        dynamic = self._gate_layers[closed].any(axis=0) if closed.any() else np.zeros_like(self._static_layer)
+
+        # Ưu tiên: tường tĩnh > (di chuyển) tường động
+        self._blocked = np.where(self._static_layer, _STATIC,
+                                 np.where(dynamic, _DYNAMIC, _FREE)).astype(np.int8)
+        # Cảm nhận: 0=trống, 0.3=tường tĩnh, 0.6=tường động, 1.0=công tắc (công tắc đè tường động)
+        self._tactile = np.where(self._static_layer, 0.3,
+                                 np.where(self._switch_layer, 1.0,
+                                          np.where(dynamic, 0.6, 0.0))).astype(np.float32)
+        # Lưới xúc giác đổi → mọi agent phải tính lại
+        self._sensor_dirty = np.ones(len(self.agent_positions), dtype=bool)
+
     def _update_dynamic_walls(self):
         s = self.switch_states
         for wall_id, rule in self.dynamic_wall_rules.items():
@@ -74,6 +128,7 @@ class GridWorld:
                 active_inputs = sum(1 for switch_id in inputs if s.get(switch_id, False))
                 is_closed = not (active_inputs % 2 == 1)
             self.dynamic_wall_states[wall_id] = is_closed
+        self._refresh_dynamic_layers()
 
     def reset(self):
         # --- Thay đổi cho Đa tác nhân ---
@@ -83,6 +138,8 @@ class GridWorld:
         self.broadcast_events = []
         self.switch_states = {switch_id: False for switch_id in self.switches.values()}
         self.dynamic_wall_states = {wall_id: True for wall_id in self.dynamic_walls.keys()}
+        # Phần sensor phụ thuộc vị trí/va chạm của từng agent (kênh 0-9, 12-13)
+        self._sensor_rows = np.zeros((len(self.agent_positions), 16), dtype=np.float32)
         self._update_dynamic_walls()
         
         # FIX INC-003: Theo dõi va chạm mở rộng (Extended Proprioceptive Feedback)
@@ -103,88 +160,68 @@ class GridWorld:
         Returns:
             vector: np.ndarray shape (16,)
         """
-        import numpy as np
-        
-        vector = np.zeros(16, dtype=np.float32)
-        pos = self.agent_positions[agent_id]
-        idx = 0
-        
+        with self._sensor_lock:
+            if self._sensor_dirty[agent_id]:
+                self._refresh_sensor_rows()
+            vector = self._sensor_rows[agent_id].copy()
+        self._fill_global_channels(vector[None])
+        return vector
+
+    def get_sensor_vectors(self) -> 'np.ndarray':
+        """Vector cảm biến của mọi agent, shape (num_agents, 16)."""
+        with self._sensor_lock:
+            if self._sensor_dirty.any():
+                self._refresh_sensor_rows()
+            vectors = self._sensor_rows.copy()
+        self._fill_global_channels(vectors)
+        return vectors
+
+    def _refresh_sensor_rows(self):
+        """
+        Tính lại (một gather batched) các hàng sensor bị dirty.
+
+        NOTE: Di chuyển chỉ làm dirty hàng của agent đó; đổi gate làm dirty mọi hàng.
+        """
+        ids = np.flatnonzero(self._sensor_dirty)
+        pos = np.array([self.agent_positions[i] for i in ids], dtype=np.int64).reshape(-1, 2)
+        rows = self._sensor_rows[ids]
+
         # Kênh 0-1: Proprioception (vị trí tương đối, normalized)
-        if idx < 16:
-            vector[idx] = pos[0] / self.size
-            idx += 1
-        if idx < 16:
-            vector[idx] = pos[1] / self.size
-            idx += 1
-        
-        # Kênh 2-9: Tactile (xúc giác 8 hướng xung quanh)
-        # up, down, left, right, up-left, up-right, down-left, down-right
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), 
-                      (-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for dr, dc in directions:
-            if idx >= 16:
-                break
-            
-            neighbor = (pos[0] + dr, pos[1] + dc)
-            sensor_value = 0.0
-            
-            # Cảm nhận: 0=trống, 0.3=tường tĩnh, 0.6=tường động, 1.0=công tắc
-            
-            # Kiểm tra out of bounds
-            if not (0 <= neighbor[0] < self.size and 0 <= neighbor[1] < self.size):
-                sensor_value = 0.3  # Coi như tường
-            # Kiểm tra tường tĩnh
-            elif neighbor in self.static_walls:
-                sensor_value = 0.3
-            else:
-                # Kiểm tra tường động
-                for gate_id, is_closed in self.dynamic_wall_states.items():
-                    if is_closed and neighbor in self.dynamic_walls.get(gate_id, []):
-                        sensor_value = 0.6
-                        break
-                
-                # Kiểm tra công tắc (ưu tiên cao nhất)
-                if neighbor in self.switches:
-                    sensor_value = 1.0
-            
-            vector[idx] = sensor_value
-            idx += 1
-        
+        rows[:, 0:2] = pos / self.size
+
+        # Kênh 2-9: Tactile (xúc giác 8 hướng). Ngoài biên rơi vào viền = tường tĩnh.
+        neighbors = np.clip(pos[:, None, :] + 1 + _SENSOR_DIRECTIONS, 0, self.size + 1)
+        rows[:, 2:10] = self._tactile[neighbors[..., 0], neighbors[..., 1]]
+
+        # Kênh 12-13: Extended Proprioceptive (INC-003) - va chạm tường tĩnh / gate động
+        bumps = [self.last_bump_types.get(int(i)) for i in ids]
+        rows[:, 12] = [b == 'static' for b in bumps]
+        rows[:, 13] = [b == 'dynamic' for b in bumps]
+
+        self._sensor_rows[ids] = rows
+        self._sensor_dirty[ids] = False
+
+    def _fill_global_channels(self, vectors):
+        """Các kênh chung cho mọi agent trong bước hiện tại (10-11, 14-15)."""
         # Kênh 10-11: "Auditory" (nghe broadcast events gần đây)
-        if idx < 16 and self.broadcast_events:
+        if self.broadcast_events:
             # Có event trong bước này
-            vector[idx] = 1.0
-            idx += 1
-            
+            vectors[:, 10] = 1.0
             # Loại event (switch vs gate)
-            if idx < 16:
-                for event in self.broadcast_events:
-                    if event.get('type') == 'switch_toggle':
-                        vector[idx] = 0.5
-                        break
-                    elif event.get('type') == 'gate_changed':
-                        vector[idx] = 1.0
-                        break
-                idx += 1
+            for event in self.broadcast_events:
+                if event.get('type') == 'switch_toggle':
+                    vectors[:, 11] = 0.5
+                    break
+                elif event.get('type') == 'gate_changed':
+                    vectors[:, 11] = 1.0
+                    break
         
-        # Kênh 12-15: Extended Proprioceptive & Arousal (INC-003 Extended)
-        # Kênh 12: Static Wall Bump
-        if self.last_bump_types.get(agent_id) == 'static':
-            vector[12] = 1.0
-            
-        # Kênh 13: Dynamic Gate Bump (Cảm giác về vật thể di động chặn đường)
-        if self.last_bump_types.get(agent_id) == 'dynamic':
-            vector[13] = 1.0
-            
         # Kênh 14: Action Strobe (SNN Nhịp sinh học)
-        vector[14] = 1.0
+        vectors[:, 14] = 1.0
         
         # Kênh 15: Internal Pressure / Time Urgency (Pain Signal)
         # Tín hiệu tăng dần từ 0.0 đến 1.0 khi tiến gần max_steps
-        vector[15] = min(1.0, self.current_step / max(1, self.max_steps))
-        
-        return vector
+        vectors[:, 15] = min(1.0, self.current_step / max(1, self.max_steps))
     
     def get_observation(self, agent_id: int):
         # --- Thay đổi cho Đa tác nhân ---
@@ -198,50 +235,41 @@ class GridWorld:
     
     def get_all_observations(self):
         # --- Hàm mới cho Đa tác nhân ---
-        return {i: self.get_observation(i) for i in range(self.num_agents)}
+        vectors = self.get_sensor_vectors()
+        return {
+            i: {
+                'agent_pos': tuple(self.agent_positions[i]),
+                'step_count': self.current_step,
+                'global_events': self.broadcast_events,
+                'sensor_vector': vectors[i]
+            }
+            for i in range(self.num_agents)
+        }
 
     def perform_action(self, agent_id: int, action: str):
         # --- Thay đổi cho Đa tác nhân ---
         # self.current_step += 1 # Xóa dòng này, việc tăng step sẽ do main.py quản lý
         
         r, c = self.agent_positions[agent_id]
-        if action == 'up':
-            r -= 1
-        elif action == 'down':
-            r += 1
-        elif action == 'left':
-            c -= 1
-        elif action == 'right':
-            c += 1
-        elif action == 'up-left':
-            r -= 1
-            c -= 1
-        elif action == 'up-right':
-            r -= 1
-            c += 1
-        elif action == 'down-left':
-            r += 1
-            c -= 1
-        elif action == 'down-right':
-            r += 1
-            c += 1
+        dr, dc = _ACTION_DELTAS.get(action, (0, 0))
+        r += dr
+        c += dc
         new_pos = (r, c)
 
         is_valid_move = True
         bump_type = None
         
-        if not (0 <= r < self.size and 0 <= c < self.size):
+        # Out of bounds / tường tĩnh / gate đóng: một lookup trên lưới occupancy (viền = tường tĩnh)
+        if not (-1 <= r <= self.size and -1 <= c <= self.size):
+            occupancy = _STATIC
+        else:
+            occupancy = self._blocked[r + 1, c + 1]
+        if occupancy == _STATIC:
             is_valid_move = False
             bump_type = 'static' # Out of bounds is static boundary
-        elif new_pos in self.static_walls:
+        elif occupancy == _DYNAMIC:
             is_valid_move = False
-            bump_type = 'static'
-        else:
-            for wall_id, is_closed in self.dynamic_wall_states.items():
-                if is_closed and new_pos in self.dynamic_walls.get(wall_id, []):
-                    is_valid_move = False
-                    bump_type = 'dynamic'
-                    break
+            bump_type = 'dynamic'
         
         # Base reward
         reward = -0.1  # Step penalty
@@ -297,6 +325,7 @@ class GridWorld:
         
         # FIX INC-003: Lưu phân loại va chạm để truyền vào sensor bước sau
         self.last_bump_types[agent_id] = bump_type
+        self._sensor_dirty[agent_id] = True
 
         # Goal reward (highest priority)
         if tuple(self.agent_positions[agent_id]) == self.goal_pos:
@@ -343,3 +372,120 @@ class GridWorld:
             print(' '.join(row))
         print("-" * 20)
         print("Switch States:", {k: "ON" if v else "OFF" for k, v in self.switch_states.items()})
+
+
+class VectorGridWorld:
+    """
+    E GridWorld độc lập (seed / layout riêng) sau cùng interface của GridWorld,
+    để một coordinator chạy E×A agents mỗi tick thay vì E process riêng.
+
+    Agent toàn cục g = e * agents_per_env + a (a: agent_id trong env e).
+    advance() tăng step của mọi env và auto-reset env nào is_done();
+    kết quả episode lưu trong các mảng (E,) / (E, A).
+    """
+    def __init__(self, settings_list):
+        if not settings_list:
+            raise ValueError("VectorGridWorld cần ít nhất một environment settings")
+        self.envs = [GridWorld(settings) for settings in settings_list]
+        agent_counts = {env.num_agents for env in self.envs}
+        if len(agent_counts) != 1:
+            raise ValueError(f"Mọi env phải có cùng num_agents, nhận {sorted(agent_counts)}")
+        self.num_envs = len(self.envs)
+        self.agents_per_env = agent_counts.pop()
+        self.num_agents = self.num_envs * self.agents_per_env
+        self.max_steps = max(env.max_steps for env in self.envs)
+
+        # Thống kê episode (array-backed)
+        self.episode_counts = np.zeros(self.num_envs, dtype=np.int64)
+        self.episode_returns = np.zeros((self.num_envs, self.agents_per_env), dtype=np.float64)
+        self.episode_success = np.zeros((self.num_envs, self.agents_per_env), dtype=bool)
+        self.last_episode_returns = np.zeros_like(self.episode_returns)
+        self.last_episode_success = np.zeros_like(self.episode_success)
+        self.last_episode_steps = np.zeros(self.num_envs, dtype=np.int64)
+
+    @classmethod
+    def from_settings(cls, settings, num_envs: int):
+        """
+        E env cùng settings. `settings['environment_configs']` (list, nếu có)
+        thay environment_config cho từng env → sweep nhiều layout maze.
+        """
+        layouts = settings.get('environment_configs') or [settings.get('environment_config', {})]
+        settings_list = []
+        for e in range(num_envs):
+            env_settings = dict(settings)
+            env_settings['environment_config'] = copy.deepcopy(layouts[e % len(layouts)])
+            settings_list.append(env_settings)
+        return cls(settings_list)
+
+    def locate(self, agent_id: int):
+        """Agent toàn cục → (env index, agent_id trong env)."""
+        return divmod(int(agent_id), self.agents_per_env)
+
+    def reset(self):
+        for env in self.envs:
+            env.reset()
+        self.episode_returns.fill(0.0)
+        self.episode_success.fill(False)
+        return self.get_all_observations()
+
+    def new_step(self):
+        for env in self.envs:
+            env.new_step()
+
+    def perform_action(self, agent_id: int, action: str):
+        e, a = self.locate(agent_id)
+        env = self.envs[e]
+        reward = env.perform_action(a, action)
+        self.episode_returns[e, a] += reward
+        if tuple(env.agent_positions[a]) == env.goal_pos:
+            self.episode_success[e, a] = True
+        return reward
+
+    def get_observation(self, agent_id: int):
+        e, a = self.locate(agent_id)
+        return self.envs[e].get_observation(a)
+
+    def get_sensor_vector(self, agent_id: int) -> 'np.ndarray':
+        e, a = self.locate(agent_id)
+        return self.envs[e].get_sensor_vector(a)
+
+    def get_sensor_vectors(self) -> 'np.ndarray':
+        """Vector cảm biến của mọi agent toàn cục, shape (E*A, 16)."""
+        return np.concatenate([env.get_sensor_vectors()[:self.agents_per_env] for env in self.envs])
+
+    def get_all_observations(self):
+        observations = {}
+        for e, env in enumerate(self.envs):
+            for a, obs in env.get_all_observations().items():
+                observations[e * self.agents_per_env + a] = obs
+        return observations
+
+    def dones(self) -> 'np.ndarray':
+        return np.array([env.is_done() for env in self.envs], dtype=bool)
+
+    def env_done(self, agent_id: int) -> bool:
+        return self.envs[self.locate(agent_id)[0]].is_done()
+
+    def is_done(self):
+        # NOTE: Với auto-reset, chỉ True khi mọi env cùng kết thúc trước advance()
+        return bool(self.dones().all())
+
+    def advance(self) -> 'np.ndarray':
+        """
+        Kết thúc tick: tăng current_step mọi env, auto-reset env đã xong.
+
+        Returns:
+            Index các env vừa kết thúc episode (đã được reset).
+        """
+        for env in self.envs:
+            env.current_step += 1
+        finished = np.flatnonzero(self.dones())
+        for e in finished:
+            self.last_episode_returns[e] = self.episode_returns[e]
+            self.last_episode_success[e] = self.episode_success[e]
+            self.last_episode_steps[e] = self.envs[e].current_step
+            self.episode_counts[e] += 1
+            self.episode_returns[e] = 0.0
+            self.episode_success[e] = False
+            self.envs[e].reset()
+        return finished
@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.core.snn_context_theus import SNNGlobalContext, SNNDomainContext, SNNSystemContext, NeuronState, SynapseState
 from src.tools.brain_biopsy_theus import BrainBiopsyTheus
+from src.utils.snn_persistence import agent_checkpoint_path
 
 # Find latest checkpoint
 chkpts = glob.glob('results/multi_agent_complex_maze/checkpoint_ep_*')
@@ -21,7 +22,7 @@ def get_ep(p):
     except: return -1
 
 latest_chkpt = max(chkpts, key=get_ep)
-snn_file = os.path.join(latest_chkpt, 'agent_0_snn.json')
+snn_file = agent_checkpoint_path(latest_chkpt, 0)
 if not os.path.exists(snn_file):
     print(f'SNN file not found: {snn_file}')
     exit()
@@ -45,19 +46,7 @@ for i in range(1024):
 snn_ctx = SNNSystemContext(global_ctx=global_ctx, domain_ctx=domain_ctx)
 
 try:
-    with open(snn_file, 'r') as f:
-        data = json.load(f)
-    if 'synapses' in data:
-        for s in data['synapses']:
-            # Dựng lại bộ khung synapses từ checkpoint để bypass lỗi thiếu khớp nối
-            synapse = SynapseState(
-                synapse_id=s['synapse_id'],
-                pre_neuron_id=s['pre_neuron_id'],
-                post_neuron_id=s.get('post_neuron_id', 0),
-                weight=s.get('weight', 0.5)
-            )
-            domain_ctx.synapses.append(synapse)
-            
+    # NOTE: Checkpoint chứa toàn bộ connectome → load dựng lại synapses
     # Tiến hành Hydration (Đổ dữ liệu)
     BrainBiopsyTheus.load_agent_checkpoint(snn_file, snn_ctx)
     print("Checkpoint loaded successfully.\n")
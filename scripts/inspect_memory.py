@@ -1,5 +1,10 @@
 import json
 import os
+import sys
+
+sys.path.append('.')
+
+from src.utils.snn_persistence import agent_checkpoint_path, open_snn_checkpoint
 
 def inspect_memory():
     # Find latest checkpoint
@@ -8,39 +13,39 @@ def inspect_memory():
         print(f"Directory not found: {res_dir}")
         return
 
-    filepath = os.path.join(res_dir, "agent_0_snn.json")
+    # Binary checkpoint (agent_0_snn/) hoặc JSON cũ (agent_0_snn.json)
+    filepath = agent_checkpoint_path(res_dir, 0)
     if not os.path.exists(filepath):
         print(f"File not found: {filepath}")
         return
 
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    # NOTE: Cột được mmap → chỉ đọc những synapse được in ra
+    ckpt = open_snn_checkpoint(filepath)
 
     print("\n=== BRAIN DUMP: AGENT 0 ===")
     
     print("\n[1] METADATA")
-    print(json.dumps(data['metadata'], indent=2))
+    print(json.dumps(ckpt.metadata, indent=2))
     
     print("\n[2] PROCEDURAL MEMORY (SNN Synapses)")
-    synapses = data['synapses']
-    print(f"Total Synapses: {len(synapses)}")
-    if synapses:
+    print(f"Total Synapses: {ckpt.num_synapses}")
+    if ckpt.num_synapses:
         print("Sample Synapse [0]:")
-        print(json.dumps(synapses[0], indent=2))
+        print(json.dumps(ckpt.synapse_record(0), indent=2))
     
     print("\n[3] PROCEDURAL MEMORY (Q-Table)")
-    q_table = data.get('memory', {}).get('q_table', {})
+    q_table = ckpt.q_table()
     print(f"Known States: {len(q_table)}")
     # Print first few entries
     for k, v in list(q_table.items())[:3]:
         print(f"  State {k}: {v}")
 
     print("\n[4] SEMANTIC MEMORY (Beliefs)")
-    beliefs = data.get('memory', {}).get('beliefs', {})
+    beliefs = ckpt.memory.get('beliefs', {})
     print(json.dumps(beliefs, indent=2))
     
     print("\n[5] EPISODIC/SHORT-TERM (Recent Buffer)")
-    stm = data.get('memory', {}).get('short_term', [])
+    stm = ckpt.memory.get('short_term', [])
     for event in stm:
         print(f"  {event}")
         
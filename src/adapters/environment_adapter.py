@@ -1,5 +1,5 @@
 from typing import Dict, Any
-from environment import GridWorld
+from environment import GridWorld, VectorGridWorld
 
 class EnvironmentAdapter:
     """
@@ -64,3 +64,19 @@ class EnvironmentAdapter:
         """
         # Placeholder nếu cần
         return {}
+
+
+class VectorEnvironmentAdapter(EnvironmentAdapter):
+    """
+    Adapter cho VectorGridWorld: cùng interface với EnvironmentAdapter,
+    agent_id là id toàn cục (e * agents_per_env + a).
+    """
+    def __init__(self, env: VectorGridWorld):
+        super().__init__(env)
+
+    def step(self, agent_id: int, action: str):
+        """Như EnvironmentAdapter.step, nhưng `done` là của env chứa agent."""
+        reward = self.env.perform_action(agent_id, action)
+        next_obs = self.env.get_observation(agent_id)
+        done = self.env.env_done(agent_id)
+        return next_obs, reward, done, {}
@@ -13,6 +13,8 @@ from typing import Dict, Any, Optional
 from theus.engine import TheusEngine
 from src.core.context import SystemContext
 from src.models.gated_integration import GatedIntegrationNetwork
+from src.models.replay_buffer import ReplayBuffer
+from src.processes.rl_processes import train_gated_batch
 from src.adapters.environment_adapter import EnvironmentAdapter
 from src.utils.snn_recorder import SNNRecorder
 
@@ -89,13 +91,49 @@ class RLAgent:
             lr=gated_lr
         )
         
+        # Replay Memory (optional): train mỗi K transitions trên minibatch B
+        # thay vì một bước Adam cho mỗi transition
+        replay_capacity = model_cfg.get('replay_capacity', 0)
+        self.replay_buffer = None
+        if replay_capacity > 0:
+            self.replay_buffer = ReplayBuffer(
+                capacity=replay_capacity,
+                obs_dim=obs_dim,
+                emotion_dim=emotion_dim,
+                snn_state_dim=snn_state_dim,
+                batch_size=model_cfg.get('replay_batch_size', 32),
+                train_every=model_cfg.get('replay_train_every', 4),
+                warmup=model_cfg.get('replay_warmup')
+            )
+        
         # Link state to Domain Context (Safe Mutation)
         with self.engine.edit():
             self.domain_ctx.heavy_gated_network = self.gated_network
             self.domain_ctx.heavy_gated_optimizer = self.optimizer
+            self.domain_ctx.heavy_replay_buffer = self.replay_buffer
         
         
         
+        # Trusted fast path: từng stage của step (và learning) chạy trực tiếp trên
+        # rl_ctx; writes được đối chiếu contract của chính stage đó mỗi
+        # `contract_audit_every` bước (vi phạm → AuditSystem).
+        # NOTE: Không trust run_agent_step_pipeline — outputs 'domain_ctx' của
+        # composite cho phép mọi write, và audit lồng nhau sẽ tắt audit của stages.
+        from src.processes.agent_step_pipeline import AGENT_STEP_STAGES
+        from src.processes.rl_snn_integration import combine_rewards
+        from src.processes.rl_processes import update_q_learning
+        audit_every = getattr(self.global_ctx, 'contract_audit_every', 0)
+        for proc in AGENT_STEP_STAGES + (combine_rewards, update_q_learning):
+            self.engine.trust(proc, every=audit_every)
+
+        # Latency profiling: profiler của engine dùng chung cho pipeline stages (_run_stages)
+        if getattr(self.global_ctx, 'latency_profiling', False):
+            profiler = self.engine.enable_profiling(
+                capture=getattr(self.global_ctx, 'latency_profile_capture', None)
+            )
+            with self.engine.edit():
+                self.domain_ctx.heavy_latency_profiler = profiler
+
         # === AUDIT RECIPE LOADING (Activated by User) ===
         # We load specs/snn_audit_recipe.yaml manually here
         from theus.config import AuditRecipe
@@ -248,6 +286,8 @@ class RLAgent:
                 if full_reset:
                     if 'last_fire_times' in t:
                          t['last_fire_times'].fill(-1000)
+                    if 'fire_counts' in t:
+                         t['fire_counts'].fill(0)
                     if 'thresholds' in t:
                          initial_th = getattr(self.global_ctx, 'initial_threshold', 0.05)
                          t['thresholds'].fill(initial_th)
@@ -280,6 +320,10 @@ class RLAgent:
                 for key in self.snn_ctx.domain_ctx.pid_state:
                     self.snn_ctx.domain_ctx.pid_state[key]['error_integral'] = 0.0
                     self.snn_ctx.domain_ctx.pid_state[key]['error_prev'] = 0.0
+
+            # NOTE: Neurons / metrics bị sửa in-place (không qua setattr)
+            # → đánh dấu để edit() đồng bộ snn_context lên Core
+            self.domain_ctx.mark_dirty('snn_context')
     
     def step(self, env_adapter: EnvironmentAdapter) -> int:
         """
@@ -291,15 +335,15 @@ class RLAgent:
         Returns:
             Selected action (0-3)
         """
-        # NOTE: Gọi trực tiếp thay vì qua engine.execute_sync.
+        # NOTE: Gọi trực tiếp (trusted mode) thay vì qua engine.execute_sync.
         # execute_sync dùng asyncio, nhưng method này được gọi từ ThreadPoolExecutor
         # (multi_agent_coordinator.py). asyncio event loop không có trong worker threads
-        # → sẽ deadlock hoặc fail. Direct call là cách đúng ở đây.
+        # → sẽ deadlock hoặc fail. run_trusted gọi thẳng process, chỉ audit mẫu (per stage).
         with self.engine.edit():
             self.domain_ctx.env_adapter = env_adapter
 
         from src.processes.agent_step_pipeline import run_agent_step_pipeline
-        run_agent_step_pipeline(self.rl_ctx)
+        self.engine.run_trusted(run_agent_step_pipeline, ctx=self.rl_ctx, engine=self.engine)
         
         # Update metrics
         self.episode_metrics['steps'] += 1
@@ -311,6 +355,47 @@ class RLAgent:
             
         return self.domain_ctx.last_action
     
+    def begin_step(self, env_adapter: EnvironmentAdapter):
+        """
+        Nửa đầu của step(): pipeline trước SNN Cycle.
+
+        Dùng cùng finish_step() khi coordinator chạy SNN Cycle của cả
+        population bằng PopulationSNNKernel (use_population_kernel).
+        """
+        with self.engine.edit():
+            self.domain_ctx.env_adapter = env_adapter
+
+        from src.processes.agent_step_pipeline import run_agent_pre_snn_stage
+        run_agent_pre_snn_stage(self.rl_ctx, engine=self.engine)
+
+    def finish_step(self) -> int:
+        """Nửa sau của step(): pipeline sau SNN Cycle. Returns: action."""
+        from src.processes.agent_step_pipeline import run_agent_post_snn_stage
+        run_agent_post_snn_stage(self.rl_ctx, engine=self.engine)
+
+        self.episode_metrics['steps'] += 1
+        return self.domain_ctx.last_action
+
+    def prepare_action(self, run_snn_cycle: bool = True):
+        """
+        Phần giữa của step() khi action được chọn bên ngoài agent
+        (coordinator batched_action_selection): SNN Cycle (trừ khi
+        PopulationSNNKernel đã chạy) + các stage trước select_action_gated.
+        """
+        from src.processes.agent_step_pipeline import _run_stages, run_agent_pre_action_stage
+        if run_snn_cycle:
+            from src.processes.snn_composite_theus import process_snn_cycle
+            _run_stages(self.rl_ctx, [(process_snn_cycle, {})], engine=self.engine)
+        run_agent_pre_action_stage(self.rl_ctx, engine=self.engine)
+
+    def complete_step(self) -> int:
+        """Nửa cuối của step() sau khi last_action đã được ghi. Returns: action."""
+        from src.processes.agent_step_pipeline import run_agent_post_action_stage
+        run_agent_post_action_stage(self.rl_ctx, engine=self.engine)
+
+        self.episode_metrics['steps'] += 1
+        return self.domain_ctx.last_action
+
     def observe_reward_and_learn(self, extrinsic_reward: float, next_obs: Dict[str, Any]):
         """
         Receive extrinsic reward and next observation, then update SNN/RL models.
@@ -338,8 +423,8 @@ class RLAgent:
                 if k.startswith('domain_ctx.'): k = k.replace('domain_ctx.', '')
                 setattr(self.domain_ctx, k, v)
 
-        _apply(combine_rewards(self.rl_ctx))
-        _apply(update_q_learning(self.rl_ctx))
+        _apply(self.engine.run_trusted(combine_rewards, ctx=self.rl_ctx))
+        _apply(self.engine.run_trusted(update_q_learning, ctx=self.rl_ctx))
         
         # 2. Accumulate metrics from updated context
         reward_dict = self.domain_ctx.last_reward
@@ -350,6 +435,82 @@ class RLAgent:
         self.episode_metrics['intrinsic_reward_total'] += intrinsic
         self.episode_metrics['extrinsic_reward_total'] += extrinsic_reward
     
+    # ------------------------------------------------------------------
+    # Sharded Execution (src/coordination/sharded_agent_pool.py)
+    # ------------------------------------------------------------------
+
+    # Fields không đi qua process boundary: adapter là object của process kia,
+    # snn_context/heavy_tensors được xử lý riêng (SHM manifest).
+    # NOTE: snn_context là property alias — field thật trong vars() là heavy_snn_context.
+    _SHARD_SKIP_FIELDS = ('env_adapter', 'heavy_snn_context')
+    # episode_metrics do worker cập nhật (learn); success/steps_to_goal do parent ghi khi acting
+    _SHARD_WORKER_METRICS = ('total_reward', 'intrinsic_reward_total', 'extrinsic_reward_total', 'steps')
+
+    def export_shard_state(self) -> bytes:
+        """
+        Serialize state của agent (phía worker) để parent import lại.
+
+        NOTE: heavy_tensors không bị pickle — chỉ gửi manifest (tên SHM
+        segments), parent attach by name nếu worker đã re-alloc.
+        """
+        import pickle
+        from src.utils.shm_tensor_store import export_tensor_manifest
+
+        snn_domain = self.snn_ctx.domain_ctx
+        state = {
+            'domain': {k: v for k, v in vars(self.domain_ctx).items()
+                       if not k.startswith('_') and k not in self._SHARD_SKIP_FIELDS},
+            'snn_domain': {k: v for k, v in vars(snn_domain).items()
+                           if not k.startswith('_') and k != 'heavy_tensors'},
+            'heavy_tensors': export_tensor_manifest(snn_domain.heavy_tensors),
+            'episode_metrics': {k: self.episode_metrics[k] for k in self._SHARD_WORKER_METRICS
+                                if k in self.episode_metrics},
+        }
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def import_shard_state(self, blob: bytes):
+        """Áp state từ export_shard_state() (worker) vào agent này (parent)."""
+        import pickle
+        from src.utils.shm_tensor_store import adopt_tensor_manifest
+
+        state = pickle.loads(blob)
+        snn_domain = self.snn_ctx.domain_ctx
+        adopt_tensor_manifest(snn_domain.heavy_tensors, state['heavy_tensors'])
+        for k, v in state['snn_domain'].items():
+            setattr(snn_domain, k, v)
+        with self.engine.edit():
+            for k, v in state['domain'].items():
+                setattr(self.domain_ctx, k, v)
+
+        self.episode_metrics.update(state['episode_metrics'])
+        # gated network / optimizer / replay là object mới sau unpickle
+        self.gated_network = self.domain_ctx.heavy_gated_network
+        self.optimizer = self.domain_ctx.heavy_gated_optimizer
+        self.replay_buffer = self.domain_ctx.heavy_replay_buffer
+
+    def discard_shard_state(self):
+        """
+        Worker chết trước sync_back: SHM heavy_tensors đã bị worker sửa in-place
+        trong khi objects/connectome store ở parent vẫn là state đầu episode.
+        Build lại tensors từ objects/store để cache khớp source of truth.
+        """
+        from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_to_heavy_tensors
+
+        t = self.snn_ctx.domain_ctx.heavy_tensors
+        if not t:
+            return
+        # Synapse tensors + similarity cache build lại theo store/prototypes
+        # NOTE: Không pop connectome_version — version None được coi là cache mới,
+        # tensors cũ (đã bị worker sửa) sẽ được giữ. 0 không bao giờ được cấp.
+        t['connectome_version'] = 0
+        t.pop('similarity_key', None)
+        # Không có bản object: spike buffer đầu episode luôn rỗng (reset), traces về 0
+        for key in ('spike_buffer', 'firing_traces'):
+            if key in t:
+                t[key].fill(0)
+        sync_to_heavy_tensors(self.snn_ctx)
+        ensure_heavy_tensors_initialized(self.snn_ctx)
+
     def get_metrics(self) -> Dict[str, Any]:
         """
         Get current metrics.
@@ -372,15 +533,28 @@ class RLAgent:
             }
         }
     
-    def train_gated_network(self, batch_size: int = 32):
+    def train_gated_network(self, batch_size: int = 32, num_batches: int = 1) -> Optional[float]:
         """
-        Train Gated Integration Network (optional).
+        Train Gated Integration Network trên minibatch từ replay memory.
         
-        NOTE: Hiện tại network học online qua gradient descent.
-        Method này cho batch training nếu cần.
+        NOTE: update_q_learning đã tự train theo lịch (replay_train_every).
+        Method này cho các bước train bổ sung (e.g. cuối episode).
         
         Args:
             batch_size: Batch size for training
+            num_batches: Số bước gradient
+            
+        Returns:
+            Loss trung bình, hoặc None nếu chưa có replay memory / chưa đủ transitions
         """
-        # TODO: Implement batch training nếu cần
-        pass
+        replay = self.domain_ctx.heavy_replay_buffer
+        if replay is None or len(replay) < batch_size:
+            return None
+        losses = [
+            train_gated_batch(self.gated_network, self.optimizer, replay.sample(batch_size))
+            for _ in range(max(1, int(num_batches)))
+        ]
+        loss = float(np.mean(losses))
+        with self.engine.edit():
+            self.domain_ctx.metrics = {**self.domain_ctx.metrics, 'neural_loss': loss}
+        return loss
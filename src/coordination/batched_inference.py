@@ -0,0 +1,146 @@
+"""
+Batched Policy Inference
+========================
+Chọn action cho cả population trong một lần forward thay vì mỗi agent
+một forward batch-1 (select_action_gated) trong thread pool.
+
+- Agents dùng chung một network object → stack input, một forward (B, ·).
+- Agents có weights riêng (trường hợp thường gặp) → stack parameters
+  (torch.func.stack_module_state) rồi vmap(functional_call) trên cả nhóm.
+  Stacked params được cache; chỉ row của agent có optimizer step mới
+  được copy lại (in-place), nên ở replay mode (train mỗi K steps) giữa
+  các lần train không có copy weights nào.
+
+Kết quả (last_action, heavy_last_q_values) được trả về từng agent như
+delta của select_action_gated; RNG epsilon-greedy gọi theo thứ tự agent.
+
+Author: Do Huy Hoang
+Date: 2026-03-28
+"""
+import copy
+from typing import Any, Dict, List, Sequence
+
+import torch
+from torch.func import functional_call, stack_module_state, vmap
+
+from src.processes.rl_processes import prepare_action_inputs, choose_action, select_action_gated
+
+
+def _network_signature(net) -> tuple:
+    """Networks cùng kiến trúc (cùng shapes) mới stack được với nhau."""
+    return (type(net),) + tuple((name, tuple(p.shape)) for name, p in net.named_parameters())
+
+
+def _optimizer_steps(opt) -> int:
+    """Tổng số bước optimizer (đổi khi weights đổi qua opt.step())."""
+    if opt is None:
+        return 0
+    total = 0
+    for state in opt.state.values():
+        step = state.get('step', 0)
+        total += int(step.item() if torch.is_tensor(step) else step)
+        break  # NOTE: Mọi param cùng số step → chỉ cần param đầu
+    return total
+
+
+class BatchedPolicyInference:
+    """
+    Inference service của coordinator cho Phase Thinking.
+
+    Usage:
+        inference = BatchedPolicyInference()
+        actions = inference.select_actions([agent.rl_ctx for agent in agents])
+    """
+
+    def __init__(self):
+        # signature → (net ids, params, buffers, optimizer steps của từng row)
+        self._stacks: Dict[tuple, tuple] = {}
+        # signature → module ở device 'meta' (chỉ cấu trúc, cho functional_call)
+        self._templates: Dict[tuple, Any] = {}
+
+    def invalidate(self):
+        """Bỏ cache stacked params (e.g. sau load checkpoint / import state)."""
+        self._stacks.clear()
+
+    def _stacked(self, signature: tuple, nets: List[Any], opts: List[Any]):
+        ids = tuple(id(net) for net in nets)
+        steps = [_optimizer_steps(opt) for opt in opts]
+        cached = self._stacks.get(signature)
+        if cached is None or cached[0] != ids:
+            params, buffers = stack_module_state(nets)
+            cached = (ids, params, buffers, steps)
+            self._stacks[signature] = cached
+        else:
+            # NOTE: Chỉ copy lại row của agent vừa train (in-place) thay vì
+            # stack lại cả nhóm — tránh cấp phát A bộ weights mỗi lần train
+            _, params, buffers, cached_steps = cached
+            for row, (net, step) in enumerate(zip(nets, steps)):
+                if step == cached_steps[row]:
+                    continue
+                for name, p in net.named_parameters():
+                    params[name][row].copy_(p)
+                for name, b in net.named_buffers():
+                    buffers[name][row].copy_(b)
+                cached_steps[row] = step
+        if signature not in self._templates:
+            # NOTE: eval() như select_action_gated (inference mode)
+            self._templates[signature] = copy.deepcopy(nets[0]).to('meta').eval()
+        return cached[1], cached[2], self._templates[signature]
+
+    def _forward_group(self, signature: tuple, nets: List[Any], opts: List[Any],
+                       obs: torch.Tensor, emo: torch.Tensor, snn: torch.Tensor) -> torch.Tensor:
+        """Q-values (B, action_dim) cho một nhóm agents cùng kiến trúc."""
+        if all(net is nets[0] for net in nets):
+            nets[0].eval()
+            q_values = nets[0](obs, emo, snn)
+            nets[0].train()
+            return q_values.unsqueeze(0) if q_values.dim() == 1 else q_values
+
+        params, buffers, template = self._stacked(signature, nets, opts)
+
+        def _call(p, b, o, e, s):
+            return functional_call(template, (p, b), (o, e, s))
+
+        return vmap(_call)(params, buffers, obs, emo, snn)
+
+    def select_actions(self, contexts: Sequence[Any]) -> List[int]:
+        """
+        Chọn action cho mọi agent (contexts = rl SystemContexts) và ghi
+        last_action / heavy_last_q_values vào domain_ctx. Returns: actions.
+        """
+        inputs = {}
+        groups: Dict[tuple, List[int]] = {}
+        for i, ctx in enumerate(contexts):
+            net = ctx.domain_ctx.heavy_gated_network
+            if net is None:
+                continue
+            inputs[i] = prepare_action_inputs(ctx.domain_ctx, net)
+            groups.setdefault(_network_signature(net), []).append(i)
+
+        q_rows: Dict[int, torch.Tensor] = {}
+        with torch.no_grad():
+            for signature, members in groups.items():
+                nets = [contexts[i].domain_ctx.heavy_gated_network for i in members]
+                opts = [contexts[i].domain_ctx.heavy_gated_optimizer for i in members]
+                obs = torch.stack([inputs[i][0].float() for i in members])
+                emo = torch.stack([inputs[i][1].float() for i in members])
+                snn = torch.stack([inputs[i][2].float() for i in members])
+                q_values = self._forward_group(signature, nets, opts, obs, emo, snn)
+                for row, i in enumerate(members):
+                    q_rows[i] = q_values[row]
+
+        # Epsilon-greedy theo thứ tự agent (RNG tuần tự, tái lập được)
+        actions = []
+        for i, ctx in enumerate(contexts):
+            if i in q_rows:
+                delta = {
+                    'last_action': choose_action(q_rows[i], inputs[i][3]),
+                    'heavy_last_q_values': q_rows[i].clone()
+                }
+            else:
+                # Không có network → fallback random + log lỗi của select_action_gated
+                delta = select_action_gated(ctx)
+            ctx.domain_ctx.last_action = delta['last_action']
+            ctx.domain_ctx.heavy_last_q_values = delta['heavy_last_q_values']
+            actions.append(delta['last_action'])
+        return actions
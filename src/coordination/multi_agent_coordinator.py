@@ -17,6 +17,7 @@ from concurrent.futures import ThreadPoolExecutor
 from src.core.context import GlobalContext, DomainContext, SystemContext
 from src.core.snn_context_theus import SNNGlobalContext, create_snn_context_theus
 from src.adapters.environment_adapter import EnvironmentAdapter
+from environment import VectorGridWorld
 from src.coordination.revolution_protocol import RevolutionProtocolManager
 from theus.config import ConfigFactory
 from src.utils.shm_tensor_store import ShmTensorStore
@@ -98,7 +99,9 @@ class MultiAgentCoordinator:
                 seed=snn_global_ctx.seed + i,
                 initial_threshold=snn_global_ctx.initial_threshold,
                 tau_decay=snn_global_ctx.tau_decay,
-                threshold_min=snn_global_ctx.threshold_min
+                threshold_min=snn_global_ctx.threshold_min,
+                weight_backend=snn_global_ctx.weight_backend,
+                sparse_backend_min_neurons=snn_global_ctx.sparse_backend_min_neurons
             )
             # NOTE: Inject ShmTensorStore vao SNN context.
             # Dict-like interface, backing bằng SharedMemory.
@@ -146,6 +149,31 @@ class MultiAgentCoordinator:
         # Parallel Execution Engine
         self._executor = ThreadPoolExecutor(max_workers=num_agents)
         
+        # NOTE: Population kernel: SNN Cycle của mọi agent chạy như một batch
+        # (A·N,) thay vì A temporal loops nhỏ song song trong thread pool.
+        self._population_kernel = None
+        if getattr(snn_global_ctx, 'use_population_kernel', False):
+            from src.processes.snn_population_theus import PopulationSNNKernel
+            self._population_kernel = PopulationSNNKernel()
+        
+        # NOTE: Process sharding: agents chạy trên worker processes (fork mỗi episode).
+        # Không kết hợp với population kernel (kernel cần mọi agent trong một process).
+        from src.coordination.sharded_agent_pool import fork_available
+        self._process_workers = int(getattr(global_ctx, 'process_workers', 0) or 0)
+        if self._process_workers > 0 and (self._population_kernel is not None or not fork_available()):
+            log(self, "info", "⚠️ [Coordinator] process_workers ignored (population kernel active or fork unavailable).")
+            self._process_workers = 0
+        
+        # NOTE: Batched action selection: một forward Gated Network cho cả population
+        # (BatchedPolicyInference) thay vì A forward batch-1 trong thread pool.
+        self._batched_inference = None
+        if getattr(global_ctx, 'batched_action_selection', False):
+            if self._process_workers > 0:
+                log(self, "info", "⚠️ [Coordinator] batched_action_selection ignored (process_workers active).")
+            else:
+                from src.coordination.batched_inference import BatchedPolicyInference
+                self._batched_inference = BatchedPolicyInference()
+        
         self.ancestor_weights: np.ndarray = None # Deprecated, use snn_global_ctx.domain_ctx.ancestor_weights
         
         # Revolution Protocol Manager (with cooldown)
@@ -157,17 +185,50 @@ class MultiAgentCoordinator:
         )
 
     
+    def _population_step(self, env_adapter: EnvironmentAdapter) -> List[int]:
+        """
+        Phase 1 với PopulationSNNKernel: pre-SNN stages song song,
+        SNN Cycle batched cho cả population, rồi post-SNN stages song song.
+        """
+        for f in [self._executor.submit(agent.begin_step, env_adapter) for agent in self.agents]:
+            f.result()
+        self._population_kernel.run_cycle([agent.rl_ctx for agent in self.agents])
+        futures = [self._executor.submit(agent.finish_step) for agent in self.agents]
+        return [f.result() for f in futures]
+    
+    def _batched_action_step(self, env_adapter: EnvironmentAdapter) -> List[int]:
+        """
+        Phase 1 với BatchedPolicyInference: stages song song tới trước
+        select_action_gated, chọn action cho cả population trong một forward,
+        rồi các stage còn lại song song. Kết hợp được với PopulationSNNKernel.
+        """
+        for f in [self._executor.submit(agent.begin_step, env_adapter) for agent in self.agents]:
+            f.result()
+        kernel_cycle = self._population_kernel is not None
+        if kernel_cycle:
+            self._population_kernel.run_cycle([agent.rl_ctx for agent in self.agents])
+        for f in [self._executor.submit(agent.prepare_action, not kernel_cycle) for agent in self.agents]:
+            f.result()
+        self._batched_inference.select_actions([agent.rl_ctx for agent in self.agents])
+        futures = [self._executor.submit(agent.complete_step) for agent in self.agents]
+        return [f.result() for f in futures]
+    
     def run_episode(self, env, env_adapter: EnvironmentAdapter):
         """
         Run one episode for all agents (Parallelized Thinking/Learning).
         
         Args:
-            env: GridWorld environment
+            env: GridWorld environment, hoặc VectorGridWorld (E env × A agents mỗi tick,
+                 coordinator phải có E*A agents)
             env_adapter: Environment adapter
             
         Returns:
             Episode metrics
         """
+        vectorized = isinstance(env, VectorGridWorld)
+        if vectorized and env.num_agents != self.num_agents:
+            raise ValueError(f"VectorGridWorld có {env.num_agents} agents, coordinator có {self.num_agents}")
+
         # Reset environment
         obs_dict = env.reset()
         
@@ -179,6 +240,29 @@ class MultiAgentCoordinator:
                  agent.snn_ctx.domain_ctx.metrics['accumulated_spikes'] = 0
                  agent.snn_ctx.domain_ctx.metrics['accumulated_ticks'] = 0
         
+        # Weights có thể đã bị thay ngoài optimizer (revolution, load checkpoint)
+        if self._batched_inference is not None:
+            self._batched_inference.invalidate()
+        
+        # Process sharding: fork workers sau reset (workers thừa hưởng state mới)
+        # NOTE: Vector mode reset agents giữa chừng (auto-reset) → không dùng worker processes
+        pool = None
+        if self._process_workers > 0 and not vectorized:
+            from src.coordination.sharded_agent_pool import ShardedAgentPool
+            pool = ShardedAgentPool(self.agents, self._process_workers, allocator=self._shm_allocator).start()
+        
+        try:
+            if vectorized:
+                return self._run_vector_steps(env, env_adapter)
+            return self._run_episode_steps(env, env_adapter, pool)
+        finally:
+            if pool is not None and pool.started:
+                # Đường bình thường đã sync_back trong _run_episode_steps; sync ở đây chỉ
+                # còn tác dụng khi episode dừng sớm (circuit breaker, exception)
+                pool.close(sync=True)
+    
+    def _run_episode_steps(self, env, env_adapter: EnvironmentAdapter, pool=None):
+        """Vòng lặp step của run_episode (pool: ShardedAgentPool hoặc None = threads)."""
         # Run episode
         step_count = 0
         consecutive_errors = 0 # Circuit Breaker
@@ -191,11 +275,7 @@ class MultiAgentCoordinator:
             # --- PHASE 1: Parallel Thinking (SNN Inference) ---
             try:
                 # Mỗi agent tính toán hành động dựa trên quan sát hiện tại
-                futures_step = [
-                    self._executor.submit(agent.step, env_adapter)
-                    for agent in self.agents
-                ]
-                actions = [f.result() for f in futures_step]
+                actions = self._select_actions(env_adapter, pool)
             except Exception as e:
                 import traceback
                 print(f"CRITICAL ERROR in Parallel Thinking: {e}")
@@ -252,13 +332,7 @@ class MultiAgentCoordinator:
 
             # --- PHASE 3: Parallel Learning (RL Optimization) ---
             try:
-                futures_learn = [
-                    self._executor.submit(self.agents[i].observe_reward_and_learn, step_results[i][0], step_results[i][1])
-                    for i in range(self.num_agents)
-                ]
-                # Wait for all learning tasks to finish
-                for f in futures_learn:
-                    f.result()
+                self._learn(step_results, pool)
             except Exception as e:
                 print(f"Error in Parallel Learning: {e}")
 
@@ -270,6 +344,10 @@ class MultiAgentCoordinator:
             if env.is_done():
                 break
         
+        # Workers cộng dồn total_reward/connectome khi learn → kéo về trước khi đọc metrics
+        if pool is not None and pool.started:
+            pool.sync_back()
+
         # Collect population metrics
         self._collect_population_metrics()
         self.episode_count += 1
@@ -282,6 +360,109 @@ class MultiAgentCoordinator:
         
         return self.get_episode_metrics()
 
+    def _select_actions(self, env_adapter: EnvironmentAdapter, pool=None) -> List[int]:
+        """Phase 1: action của mọi agent cho observation hiện tại."""
+        if pool is not None:
+            return pool.step([env_adapter.get_observation(i) for i in range(self.num_agents)])
+        if self._batched_inference is not None:
+            return self._batched_action_step(env_adapter)
+        if self._population_kernel is not None:
+            return self._population_step(env_adapter)
+        futures_step = [
+            self._executor.submit(agent.step, env_adapter)
+            for agent in self.agents
+        ]
+        return [f.result() for f in futures_step]
+
+    def _learn(self, step_results, pool=None):
+        """Phase 3: mọi agent nhận (reward, next_obs) và học."""
+        if pool is not None:
+            pool.learn(step_results)
+            return
+        futures_learn = [
+            self._executor.submit(self.agents[i].observe_reward_and_learn, step_results[i][0], step_results[i][1])
+            for i in range(self.num_agents)
+        ]
+        # Wait for all learning tasks to finish
+        for f in futures_learn:
+            f.result()
+
+    def _run_vector_steps(self, venv: VectorGridWorld, env_adapter: EnvironmentAdapter):
+        """
+        Vòng lặp tick của run_episode cho VectorGridWorld: mỗi tick E×A agents
+        think → act → learn. Env nào kết thúc được auto-reset (agents của nó
+        reset theo) và tiếp tục chạy cho tới khi mọi env xong ít nhất một episode.
+
+        Metrics (avg_reward, success...) lấy từ episode đầu tiên của mỗi env.
+        """
+        A = venv.agents_per_env
+        first_episode = {}  # env index -> [(total_reward, success)] theo agent
+        ticks = 0
+        
+        while len(first_episode) < venv.num_envs and ticks <= venv.max_steps:
+            venv.new_step()
+            
+            # --- PHASE 1: Parallel Thinking (E×A agents) ---
+            try:
+                actions = self._select_actions(env_adapter)
+            except Exception as e:
+                import traceback
+                print(f"CRITICAL ERROR in Parallel Thinking: {e}")
+                traceback.print_exc()
+                break
+            
+            # --- PHASE 2: Acting (tuần tự trong từng env, env độc lập nhau) ---
+            step_results = []
+            for g, action in enumerate(actions):
+                reward = venv.perform_action(g, self._action_to_string(action))
+                step_results.append((reward, venv.get_observation(g)))
+                e, a = venv.locate(g)
+                if venv.episode_success[e, a] and not self.agents[g].episode_metrics.get('success', False):
+                    self.agents[g].episode_metrics['success'] = True
+                    self.agents[g].episode_metrics['steps_to_goal'] = venv.envs[e].current_step
+            
+            # --- PHASE 3: Parallel Learning ---
+            try:
+                self._learn(step_results)
+            except Exception as e:
+                print(f"Error in Parallel Learning: {e}")
+            
+            # Auto-reset env đã xong; agents của env đó bắt đầu episode mới
+            ticks += 1
+            for e in venv.advance():
+                env_agents = self.agents[e * A:(e + 1) * A]
+                if e not in first_episode:
+                    first_episode[e] = [
+                        (agent.episode_metrics['total_reward'], agent.episode_metrics.get('success', False))
+                        for agent in env_agents
+                    ]
+                for a, agent in enumerate(env_agents):
+                    agent.reset(venv.get_observation(e * A + a), full_reset=False)
+        
+        results = [first_episode.get(e, [(agent.episode_metrics['total_reward'], agent.episode_metrics.get('success', False))
+                                         for agent in self.agents[e * A:(e + 1) * A]])
+                   for e in range(venv.num_envs)]
+        agent_rewards = [reward for env_results in results for reward, _ in env_results]
+        agent_success = [success for env_results in results for _, success in env_results]
+        
+        avg_reward = sum(agent_rewards) / len(agent_rewards)
+        self._record_population_reward(avg_reward)
+        self.last_success_rate = sum(agent_success) / len(agent_success)
+        self.episode_count += 1
+        gc.collect()
+        
+        return {
+            'episode': self.episode_count,
+            'avg_reward': avg_reward,
+            'success_rate': self.last_success_rate,
+            'agent_rewards': agent_rewards,
+            'agent_success': agent_success,
+            'num_envs': venv.num_envs,
+            'env_success_rate': [sum(s for _, s in env_results) / A for env_results in results],
+            'env_episodes_completed': int(venv.episode_counts.sum()),
+            'env_ticks': ticks,
+        }
+
     def _collect_population_metrics(self):
         """Collect metrics from all agents."""
         total_reward = sum(
@@ -304,6 +485,12 @@ class MultiAgentCoordinator:
         # Sync to SNN Global Context (Source of Truth for Revolution Protocol)
         # Note: We append only if the process hasn't already (to avoid duplicates if process runs in loop)
         # Actually, let the Coordinator be the one to push the metric.
+        self._record_population_reward(avg_reward)
+        
+        self.last_success_rate = success_rate # Store for immediate retrieval
+
+    def _record_population_reward(self, avg_reward: float):
+        """Append avg reward của episode vào history (coordinator + leader SNN context)."""
         if self.agents:
              # Use Agent 0 as the "Leader" / Storage for Population State
              # This allows the Revolution Process (running on Agent 0 context) to see history
@@ -320,8 +507,6 @@ class MultiAgentCoordinator:
         # === MEMORY LEAK FIX: Limit coordinator's history too ===
         if len(self.population_performance) > 200:
             self.population_performance = self.population_performance[-200:]
-        
-        self.last_success_rate = success_rate # Store for immediate retrieval
 
     def get_episode_metrics(self) -> Dict[str, Any]:
         """Get metrics for last episode."""
@@ -389,6 +574,15 @@ class MultiAgentCoordinator:
         }
         return mapping.get(action_id, 'stay')
 
+    def sleep(self, steps: int):
+        """
+        Toàn bộ sleep cycle (REM) của population qua fused sleep engine.
+        Agents chạy song song trên thread pool khi `parallel_sleep` bật.
+        """
+        from src.processes.snn_sleep_engine_theus import run_sleep_cycle
+        executor = self._executor if getattr(self.snn_global_ctx, 'parallel_sleep', False) else None
+        run_sleep_cycle([agent.rl_ctx for agent in self.agents], steps, executor=executor)
+
     def cleanup(self):
         """Release shared memory resources."""
         if self._shm_allocator is not None:
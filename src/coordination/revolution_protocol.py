@@ -9,6 +9,9 @@ Date: 2025-12-25
 import numpy as np
 from typing import Dict, Any, TYPE_CHECKING
 
+from src.core.connectome import AncestorWeights
+from src.core.snn_context_theus import gather_synapse_tensors
+
 if TYPE_CHECKING:
     from src.coordination.multi_agent_coordinator import MultiAgentCoordinator
 
@@ -97,8 +100,8 @@ class RevolutionProtocolManager:
 
         Steps:
         1. Identify top elite agents
-        2. Extract their synapse weights
-        3. Compute weighted average
+        2. Gather their synapse weights (keyed by pre, post)
+        3. Compute masked mean over elites
         4. Update ancestor in all agents
         5. Update Baseline
         """
@@ -107,33 +110,17 @@ class RevolutionProtocolManager:
         num_elite = max(1, int(len(rankings) * self.elite_ratio))
         elite_ids = [r[0] for r in rankings[:num_elite]]
 
-        # Collect weights from elite (as Dicts)
-        all_weights_dicts = []
-        all_synapse_ids = set()
-
-        for elite_id in elite_ids:
-            agent = self.coordinator.agents[elite_id]
-            # Use Dict {id: weight}
-            weights_dict = {
-                s.synapse_id: s.weight
-                for s in agent.snn_ctx.domain_ctx.synapses
-            }
-            all_weights_dicts.append(weights_dict)
-            all_synapse_ids.update(weights_dict.keys())
-
-        if not all_weights_dicts:
+        if not elite_ids:
             return
 
-        # Compute average (ancestor) per Synapse ID
-        ancestor_weights = {}
-        for syn_id in all_synapse_ids:
-            values = []
-            for w_dict in all_weights_dicts:
-                if syn_id in w_dict:
-                    values.append(w_dict[syn_id])
-
-            if values:
-                ancestor_weights[syn_id] = float(np.mean(values))
+        # Masked mean theo (pre, post) qua connectome của elites
+        elite_stores = []
+        for elite_id in elite_ids:
+            domain = self.coordinator.agents[elite_id].snn_ctx.domain_ctx
+            # NOTE: Weights mới nhất nằm trong compute tensors (STDP)
+            gather_synapse_tensors(domain)
+            elite_stores.append(domain.synapses)
+        ancestor_weights = AncestorWeights.from_stores(elite_stores)
 
         # Update all agents
         for agent in self.coordinator.agents:
@@ -151,7 +138,7 @@ class RevolutionProtocolManager:
             'episode': self.coordinator.episode_count,
             'elite_ids': elite_ids,
             'num_weights': len(ancestor_weights),
-            'avg_weight': float(np.mean(np.abs(list(ancestor_weights.values())))),
+            'avg_weight': float(np.mean(np.abs(ancestor_weights.values()))) if ancestor_weights else 0.0,
             'new_baseline': self.dynamic_baseline
         })
 
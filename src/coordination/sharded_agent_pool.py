@@ -0,0 +1,226 @@
+"""
+Sharded Agent Pool
+==================
+Chạy agents trên một pool worker processes thay vì ThreadPoolExecutor
+(tránh tranh chấp GIL giữa các agent step).
+
+Mô hình:
+- Workers được fork ở đầu episode → thừa hưởng agents (copy-on-write).
+  heavy_tensors trong ShmTensorStore là SharedMemory (mmap MAP_SHARED) nên
+  worker ghi thẳng vào cùng buffer với parent — không copy tensors.
+- Mỗi step parent chỉ gửi observations / (reward, next_obs) và nhận actions.
+  Phase Acting (env.perform_action) vẫn tuần tự ở parent.
+- Cuối episode: worker export state không thuộc SHM (connectome store,
+  Q-table, metrics...) + tensor manifest, parent import vào agents gốc.
+- Worker crash: parent terminate pool, unlink segments do worker cấp
+  (theus:{session}:{pid}:*). Object state ở parent vẫn là state đầu episode
+  nhưng SHM tensors đã bị worker sửa dở → agent.discard_shard_state()
+  build lại tensors từ objects/connectome store.
+
+Author: Do Huy Hoang
+Date: 2026-03-23
+"""
+import multiprocessing as mp
+import traceback
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.utils.shm_tensor_store import unlink_process_segments
+
+
+class ShardWorkerError(RuntimeError):
+    """Worker process chết hoặc agent trong shard raise exception."""
+
+
+class ObservationFeed:
+    """
+    EnvironmentAdapter phía worker: trả về observation mà parent đã đọc từ
+    môi trường thật. Agent step pipeline chỉ cần get_observation (Perception).
+    """
+
+    def __init__(self, observations: Dict[int, Any]):
+        self._observations = observations
+
+    def get_observation(self, agent_id: int):
+        return self._observations[int(agent_id)]
+
+
+def fork_available() -> bool:
+    return 'fork' in mp.get_all_start_methods()
+
+
+def _shard_worker(conn, agents: List[Any], agent_ids: List[int], allocator):
+    """Vòng lặp lệnh của một worker: step / learn / export / close."""
+    by_id = dict(zip(agent_ids, agents))
+    try:
+        while True:
+            cmd, payload = conn.recv()
+            if cmd == 'close':
+                break
+            try:
+                if cmd == 'step':
+                    feed = ObservationFeed(payload)
+                    reply = {i: by_id[i].step(feed) for i in agent_ids}
+                elif cmd == 'learn':
+                    for i, (reward, next_obs) in payload.items():
+                        by_id[i].observe_reward_and_learn(reward, next_obs)
+                    reply = None
+                elif cmd == 'export':
+                    reply = {i: by_id[i].export_shard_state() for i in agent_ids}
+                else:
+                    raise ValueError(f"Unknown shard command: {cmd!r}")
+                conn.send(('ok', reply))
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # NOTE: Process con thoát bằng os._exit → atexit không chạy.
+        # cleanup() chỉ unlink segments do chính worker cấp (creator pid).
+        if allocator is not None:
+            allocator.cleanup()
+        conn.close()
+
+
+class ShardedAgentPool:
+    """
+    Partition agents thành `num_workers` shards liên tiếp, mỗi shard một process.
+
+    Usage:
+        with ShardedAgentPool(agents, num_workers=4, allocator=alloc) as pool:
+            actions = pool.step(observations)
+            pool.learn(step_results)
+        # __exit__ kéo state về agents gốc (sync) rồi đóng workers
+    """
+
+    def __init__(self, agents: Sequence[Any], num_workers: int, allocator=None):
+        if not fork_available():
+            raise RuntimeError("ShardedAgentPool requires the 'fork' start method")
+        self.agents = list(agents)
+        self.num_workers = max(1, min(int(num_workers), len(self.agents)))
+        self.allocator = allocator
+        self._workers = []  # [(process, conn, agent_ids)]
+        self._dirty = False  # Workers có state chưa kéo về parent
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(sync=exc_type is None)
+        return False
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> 'ShardedAgentPool':
+        ctx = mp.get_context('fork')
+        for shard in np.array_split(np.arange(len(self.agents)), self.num_workers):
+            ids = shard.tolist()
+            if not ids:
+                continue
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(child_conn, [self.agents[i] for i in ids], ids, self.allocator),
+                daemon=True
+            )
+            proc.start()
+            child_conn.close()
+            self._workers.append((proc, parent_conn, ids))
+        return self
+
+    def close(self, sync: bool = True):
+        """
+        Đóng pool. sync=True: import state từ workers vào agents gốc trước
+        (bỏ qua nếu không có step/learn nào kể từ lần sync_back cuối).
+        """
+        if not self._workers:
+            return
+        try:
+            if sync and self._dirty:
+                self.sync_back()
+            for _, conn, _ in self._workers:
+                conn.send(('close', None))
+            for proc, conn, _ in self._workers:
+                proc.join(timeout=10)
+                conn.close()
+            self._workers = []
+        finally:
+            if self._workers:
+                self._teardown()
+
+    def _teardown(self):
+        """
+        Dừng mọi worker, dọn SHM segments mà chúng cấp, rồi cho agents bỏ
+        tensors SHM mà worker đã sửa in-place (không có sync_back).
+        """
+        workers, self._workers = self._workers, []
+        for proc, conn, _ in workers:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+            conn.close()
+            if self.allocator is not None:
+                unlink_process_segments(self.allocator, proc.pid)
+        for agent in self.agents:
+            discard = getattr(agent, 'discard_shard_state', None)
+            if discard is not None:
+                discard()
+
+    # ------------------------------------------------------------------
+    # Per-Step Exchange
+    # ------------------------------------------------------------------
+
+    def _round_trip(self, cmd: str, payloads: List[Any]) -> List[Any]:
+        if not self._workers:
+            raise ShardWorkerError("Shard pool is not running")
+        # Gửi tất cả trước rồi mới nhận → shards chạy song song
+        replies = []
+        try:
+            for (_, conn, _), payload in zip(self._workers, payloads):
+                conn.send((cmd, payload))
+            for proc, conn, _ in self._workers:
+                status, reply = conn.recv()
+                if status == 'error':
+                    raise ShardWorkerError(f"Shard worker {proc.pid} failed on '{cmd}':\n{reply}")
+                replies.append(reply)
+        except (EOFError, BrokenPipeError, ConnectionResetError) as e:
+            dead = [p.pid for p, _, _ in self._workers if not p.is_alive()]
+            self._teardown()
+            raise ShardWorkerError(f"Shard worker crashed during '{cmd}' (dead pids: {dead})") from e
+        except ShardWorkerError:
+            self._teardown()
+            raise
+        return replies
+
+    def step(self, observations: Sequence[Any]) -> List[int]:
+        """Phase Thinking: observations[i] cho agent i → actions theo thứ tự agents."""
+        payloads = [{i: observations[i] for i in ids} for _, _, ids in self._workers]
+        self._dirty = True
+        actions = [None] * len(self.agents)
+        for reply in self._round_trip('step', payloads):
+            for i, action in reply.items():
+                actions[i] = action
+        return actions
+
+    def learn(self, step_results: Sequence[tuple]):
+        """Phase Learning: step_results[i] = (reward, next_obs) của agent i."""
+        payloads = [{i: step_results[i] for i in ids} for _, _, ids in self._workers]
+        self._dirty = True
+        self._round_trip('learn', payloads)
+
+    def sync_back(self):
+        """Kéo state của agents từ workers về agents gốc ở parent."""
+        for reply in self._round_trip('export', [None] * len(self._workers)):
+            for i, state in reply.items():
+                self.agents[i].import_shard_state(state)
+        self._dirty = False
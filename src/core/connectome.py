@@ -0,0 +1,752 @@
+"""
+Connectome Store (Struct-of-Arrays)
+===================================
+Lưu trữ toàn bộ synapses của một agent dưới dạng các cột NumPy liên tục
+thay vì hàng trăm nghìn `SynapseState` dataclass instances.
+
+- Mỗi field của `SynapseState` là một cột (S,) với dtype cố định.
+- `SynapseView` là view lazy cho từng synapse (object-style access) dành
+  cho các caller ít gặp (biopsy, social transfer, tests).
+- Store giữ giao diện sequence (len, iter, [i], append, extend) để code
+  cũ dùng `domain.synapses` vẫn chạy được.
+
+NOTE: Store là SOURCE OF TRUTH cho connectome. Các ma trận (N, N) trong
+`heavy_tensors` chỉ là compute cache, được scatter/gather bằng numpy.
+
+NOTE: Xóa lẻ tẻ (Darwinism GC, Pruning) dùng tombstone + free-list: slot
+chết được trung hòa (weight=0, REVOKED) và tái sử dụng cho synapse mới,
+nên cột giữ nguyên độ dài và các cache aligned theo slot được vá O(k)
+thay vì rebuild. `compact()` dọn tombstones theo chu kỳ.
+
+Author: Do Huy Hoang
+Date: 2026-03-18
+"""
+import itertools
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+# ============================================================================
+# Schema
+# ============================================================================
+
+# (field, dtype, default) — thứ tự khớp với SynapseState
+SYNAPSE_SCHEMA = (
+    ('synapse_id', np.int64, 0),
+    ('pre_neuron_id', np.int32, 0),
+    ('post_neuron_id', np.int32, 0),
+    # NOTE: weight giữ float64 để round-trip chính xác giá trị gán từ Python
+    # (e.g. weight=0.9). Ma trận compute (N, N) vẫn là float32.
+    ('weight', np.float64, 0.5),
+    ('trace', np.float32, 0.0),
+    ('delay', np.int16, 1),
+    ('trace_fast', np.float32, 0.0),
+    ('trace_slow', np.float32, 0.0),
+    ('last_active_time', np.int64, 0),
+    ('eligibility', np.float32, 0.0),
+    ('commit_state', np.int8, 0),
+    ('consecutive_correct', np.int16, 0),
+    ('consecutive_wrong', np.int16, 0),
+    ('quarantine_time', np.int32, 0),
+    ('validation_score', np.float32, 0.0),
+    ('is_blacklisted', np.bool_, False),
+    ('fitness', np.float32, 0.5),
+    ('generation', np.int32, 0),
+    ('synapse_type', np.int8, 0),
+    ('source_agent_id', np.int32, -1),
+    ('confidence', np.float32, 0.5),
+    ('prediction_error_accum', np.float32, 0.0),
+)
+
+SYNAPSE_FIELDS = tuple(name for name, _, _ in SYNAPSE_SCHEMA)
+
+# NOTE: Version toàn cục (không reset theo store) để cache không nhầm lẫn
+# khi domain.synapses bị thay bằng một store mới.
+_VERSION_COUNTER = itertools.count(1)
+_VERSION_LOCK = threading.Lock()
+
+
+def _advance_version_counter(version: int):
+    """
+    Đảm bảo counter của process này chỉ cấp version > `version` từ giờ.
+
+    NOTE: Counter là theo process — worker fork (sharded pool) đếm tiếp từ
+    giá trị của parent. Store unpickle từ worker giữ version của worker
+    (heavy_tensors['connectome_version'] vẫn khớp), nên parent phải nhảy qua
+    version đó để episode sau không cấp lại cùng số cho topology khác.
+    """
+    global _VERSION_COUNTER
+    with _VERSION_LOCK:
+        nxt = next(_VERSION_COUNTER)
+        _VERSION_COUNTER = itertools.count(max(nxt, int(version) + 1))
+
+# synapse_type được encode thành int8
+SYNAPSE_TYPE_NATIVE = 0
+SYNAPSE_TYPE_SHADOW = 1
+SYNAPSE_TYPE_REVOKED = 2
+
+SYNAPSE_TYPE_NAMES = ('native', 'shadow', 'revoked')
+SYNAPSE_TYPE_CODES = {name: code for code, name in enumerate(SYNAPSE_TYPE_NAMES)}
+
+
+# Giá trị trung hòa ghi vào slot bị tombstone: không đóng góp vào integrate
+# (weight=0) và không học lại được (commit_state=2 ≡ COMMIT_STATE_REVOKED → lr=0).
+_TOMBSTONE_VALUES = (
+    ('weight', 0.0),
+    ('trace', 0.0),
+    ('trace_fast', 0.0),
+    ('trace_slow', 0.0),
+    ('eligibility', 0.0),
+    ('commit_state', 2),
+    ('consecutive_correct', 0),
+    ('consecutive_wrong', 0),
+    ('fitness', 0.0),
+)
+
+
+def encode_synapse_type(value) -> int:
+    """'native'/'shadow'/'revoked' -> int8 code (chấp nhận cả int)."""
+    if isinstance(value, str):
+        try:
+            return SYNAPSE_TYPE_CODES[value]
+        except KeyError:
+            raise ValueError(f"Unknown synapse_type: {value!r}")
+    return int(value)
+
+
+# ============================================================================
+# Lazy Per-Synapse View
+# ============================================================================
+
+class SynapseView:
+    """
+    Object-style view vào một slot của ConnectomeStore.
+
+    Đọc/ghi attribute đi thẳng vào cột tương ứng (không copy).
+
+    NOTE: View chỉ nên dùng ngắn hạn. Sau khi store bị compact/remove,
+    slot có thể trỏ tới synapse khác. Dùng `to_state()` để lấy bản copy
+    độc lập.
+    """
+    __slots__ = ('_store', '_slot')
+
+    def __init__(self, store: 'ConnectomeStore', slot: int):
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_slot', slot)
+
+    def __getattr__(self, name: str) -> Any:
+        col = self._store._cols.get(name)
+        if col is None:
+            raise AttributeError(f"'SynapseView' has no attribute '{name}'")
+        value = col[self._slot].item()
+        if name == 'synapse_type':
+            return SYNAPSE_TYPE_NAMES[value]
+        return value
+
+    def __setattr__(self, name: str, value: Any):
+        col = self._store._cols.get(name)
+        if col is None:
+            raise AttributeError(f"'SynapseView' has no attribute '{name}'")
+        if name == 'synapse_type':
+            value = encode_synapse_type(value)
+        col[self._slot] = value
+
+    def __eq__(self, other):
+        if isinstance(other, SynapseView):
+            return self._store is other._store and self._slot == other._slot
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._store), self._slot))
+
+    def __repr__(self):
+        return (f"SynapseView(id={self.synapse_id}, {self.pre_neuron_id}->"
+                f"{self.post_neuron_id}, w={self.weight:.4f})")
+
+    def to_state(self):
+        """Detached copy dưới dạng SynapseState."""
+        from src.core.snn_context_theus import SynapseState
+        return SynapseState(**{name: getattr(self, name) for name in SYNAPSE_FIELDS})
+
+    # NOTE: copy/deepcopy/pickle một view trả về SynapseState độc lập,
+    # tránh vô tình copy toàn bộ store.
+    def __copy__(self):
+        return self.to_state()
+
+    def __deepcopy__(self, memo):
+        return self.to_state()
+
+    def __reduce__(self):
+        state = self.to_state()
+        return (type(state), (), state.__dict__)
+
+
+# ============================================================================
+# Columnar Store
+# ============================================================================
+
+class ConnectomeStore:
+    """
+    Struct-of-Arrays container cho synapses.
+
+    Usage:
+        store = ConnectomeStore()
+        store.add_arrays(pre_ids, post_ids, weight=weights)
+        store['weight'] *= 0.99          # cột (S,) — view, ghi in-place
+        for syn in store: ...            # SynapseView (lazy)
+
+    NOTE: Các cột trả về từ `store[name]` là view trên buffer hiện tại.
+    Buffer có thể được re-alloc khi append vượt capacity, nên không giữ
+    reference qua các thao tác thay đổi cấu trúc.
+
+    NOTE: Cột là SLOT-ALIGNED (độ dài `num_slots`), có thể chứa tombstones
+    đã trung hòa. `len(store)`, iteration và `store[i]` chỉ thấy synapses
+    còn sống; code vectorized cần lọc theo `store.alive` khi đếm/chọn.
+    """
+
+    def __init__(self, capacity: int = 0):
+        capacity = max(int(capacity), 0)
+        self._cols: Dict[str, np.ndarray] = {
+            name: np.full(capacity, default, dtype=dtype)
+            for name, dtype, default in SYNAPSE_SCHEMA
+        }
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        # Free-list các slot tombstone (stack, pop từ cuối)
+        self._free: List[int] = []
+        self._next_id = 0
+        self._live_cache = None
+        # Đổi mỗi khi cấu trúc (tập synapses) thay đổi → cache (N, N) rebuild
+        self.version = next(_VERSION_COUNTER)
+
+    def __setstate__(self, state):
+        # NOTE: Giữ version gốc (tensors/caches keyed theo nó) nhưng counter
+        # của process này phải vượt qua nó (xem _advance_version_counter)
+        self.__dict__.update(state)
+        _advance_version_counter(self.version)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_synapses(cls, synapses: Iterable[Any]) -> 'ConnectomeStore':
+        """Tạo store từ list SynapseState / SynapseView / ConnectomeStore."""
+        if isinstance(synapses, ConnectomeStore):
+            return synapses
+        synapses = list(synapses)
+        store = cls(capacity=len(synapses))
+        store.extend(synapses)
+        return store
+
+    def to_synapses(self) -> List[Any]:
+        """Materialize toàn bộ store thành list SynapseState (O(S) Python)."""
+        return [SynapseView(self, i).to_state() for i in self._iter_slots()]
+
+    # ------------------------------------------------------------------
+    # Capacity
+    # ------------------------------------------------------------------
+
+    @property
+    def capacity(self) -> int:
+        return len(self._cols['synapse_id'])
+
+    def _ensure_capacity(self, needed: int):
+        cap = self.capacity
+        if needed <= cap:
+            return
+        new_cap = max(needed, cap * 2, 64)
+        for name, dtype, default in SYNAPSE_SCHEMA:
+            old = self._cols[name]
+            new = np.full(new_cap, default, dtype=dtype)
+            new[:self._size] = old[:self._size]
+            self._cols[name] = new
+        alive = np.zeros(new_cap, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+    def _allocate_slots(self, n: int, headroom: float = 0.0) -> np.ndarray:
+        """
+        Cấp `n` slot: ưu tiên slot tombstone trong free-list, phần còn lại
+        nối vào cuối. `headroom` > 0 dự trữ thêm ~headroom*num_slots slot
+        (dạng tombstone) khi phải nối, để cache aligned theo slot tăng
+        kích thước theo cấp số nhân thay vì mỗi lần một ít.
+        """
+        reuse = min(n, len(self._free))
+        reused = self._free[len(self._free) - reuse:]
+        del self._free[len(self._free) - reuse:]
+        fresh = n - reuse
+        start = self._size
+        extra = int(start * headroom) if (fresh and headroom > 0) else 0
+        if fresh:
+            self._ensure_capacity(start + fresh + extra)
+            self._size = start + fresh + extra
+        if extra:
+            reserved = np.arange(start + fresh, self._size, dtype=np.int64)
+            self._neutralize(reserved)
+            self._alive[reserved] = False
+            self._free.extend(reversed(reserved.tolist()))
+        slots = np.concatenate([
+            np.asarray(reused[::-1], dtype=np.int64),
+            np.arange(start, start + fresh, dtype=np.int64)
+        ])
+        self._alive[slots] = True
+        return slots
+
+    def _neutralize(self, slots: np.ndarray):
+        for name, value in _TOMBSTONE_VALUES:
+            self._cols[name][slots] = value
+
+    # ------------------------------------------------------------------
+    # Column Access
+    # ------------------------------------------------------------------
+
+    def column(self, name: str) -> np.ndarray:
+        """Cột slot-aligned (num_slots,) của field `name` (view, ghi in-place được)."""
+        return self._cols[name][:self._size]
+
+    @property
+    def num_slots(self) -> int:
+        """Số slot đang dùng (sống + tombstone) = độ dài các cột."""
+        return self._size
+
+    @property
+    def num_dead(self) -> int:
+        return len(self._free)
+
+    @property
+    def dead_fraction(self) -> float:
+        return len(self._free) / self._size if self._size else 0.0
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Mask (num_slots,) các slot còn sống."""
+        return self._alive[:self._size]
+
+    def live_slots(self) -> np.ndarray:
+        """Slot indices của synapses còn sống (cache theo version)."""
+        if not self._free:
+            return np.arange(self._size, dtype=np.int64)
+        if self._live_cache is None or self._live_cache[0] != self.version:
+            self._live_cache = (self.version, np.flatnonzero(self.alive))
+        return self._live_cache[1]
+
+    @property
+    def pre_ids(self) -> np.ndarray:
+        return self._cols['pre_neuron_id'][:self._size]
+
+    @property
+    def post_ids(self) -> np.ndarray:
+        return self._cols['post_neuron_id'][:self._size]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._cols['weight'][:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(col.nbytes for col in self._cols.values()))
+
+    def next_synapse_id(self) -> int:
+        return self._next_id
+
+    # ------------------------------------------------------------------
+    # Sequence Protocol (backward compatibility với List[SynapseState])
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def _iter_slots(self):
+        if not self._free:
+            return range(self._size)
+        return self.live_slots().tolist()
+
+    def __iter__(self) -> Iterator[SynapseView]:
+        for i in self._iter_slots():
+            yield SynapseView(self, i)
+
+    def __getitem__(self, key):
+        # NOTE: Index số/slice là chỉ số trong các synapses CÒN SỐNG
+        # (trùng với slot khi store không có tombstone).
+        if isinstance(key, str):
+            return self.column(key)
+        live = len(self)
+        if isinstance(key, slice):
+            idx = range(*key.indices(live))
+            if self._free:
+                slots = self.live_slots()
+                return [SynapseView(self, int(slots[i])) for i in idx]
+            return [SynapseView(self, i) for i in idx]
+        idx = int(key)
+        if idx < 0:
+            idx += live
+        if not 0 <= idx < live:
+            raise IndexError("synapse index out of range")
+        if self._free:
+            idx = int(self.live_slots()[idx])
+        return SynapseView(self, idx)
+
+    def __setitem__(self, key: str, values):
+        if not isinstance(key, str):
+            raise TypeError("ConnectomeStore only supports column assignment: store['weight'] = ...")
+        if key == 'synapse_type' and isinstance(values, str):
+            values = encode_synapse_type(values)
+        self._cols[key][:self._size] = values
+
+    def __repr__(self):
+        return (f"ConnectomeStore(size={len(self)}, dead={self.num_dead}, "
+                f"capacity={self.capacity}, version={self.version})")
+
+    # ------------------------------------------------------------------
+    # Structural Mutation
+    # ------------------------------------------------------------------
+
+    def append(self, synapse: Any):
+        """Append một synapse (SynapseState, SynapseView hoặc duck-typed object)."""
+        slot = int(self._allocate_slots(1)[0])
+        for name, _, default in SYNAPSE_SCHEMA:
+            value = getattr(synapse, name, default)
+            if name == 'synapse_type':
+                value = encode_synapse_type(value)
+            self._cols[name][slot] = value
+        self._next_id = max(self._next_id, int(self._cols['synapse_id'][slot]) + 1)
+        self.version = next(_VERSION_COUNTER)
+
+    def extend(self, synapses: Iterable[Any]):
+        if isinstance(synapses, ConnectomeStore):
+            live = synapses.live_slots()
+            self.add_arrays(
+                synapses.pre_ids[live], synapses.post_ids[live],
+                **{name: synapses.column(name)[live] for name in SYNAPSE_FIELDS
+                   if name not in ('pre_neuron_id', 'post_neuron_id')}
+            )
+            return
+        synapses = list(synapses)
+        if not synapses:
+            return
+        self._ensure_capacity(self._size + len(synapses))
+        for syn in synapses:
+            self.append(syn)
+
+    def add_arrays(self, pre_ids, post_ids, headroom: float = 0.0, **columns) -> np.ndarray:
+        """
+        Bulk append (vectorized). Trả về slot indices của synapses mới.
+
+        Cột không được cung cấp dùng default của schema; `synapse_id`
+        tự cấp phát tăng dần nếu thiếu. Slot tombstone được tái sử dụng
+        trước (xem `_allocate_slots` cho `headroom`).
+        """
+        pre_ids = np.asarray(pre_ids, dtype=np.int32).ravel()
+        post_ids = np.asarray(post_ids, dtype=np.int32).ravel()
+        n = len(pre_ids)
+        if len(post_ids) != n:
+            raise ValueError("pre_ids and post_ids must have the same length")
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+
+        unknown = set(columns) - set(SYNAPSE_FIELDS)
+        if unknown:
+            raise KeyError(f"Unknown synapse columns: {sorted(unknown)}")
+
+        slots = self._allocate_slots(n, headroom)
+        # Fast path: slots liên tục (không tái sử dụng tombstone) → ghi bằng slice
+        if n == 1 or bool(np.all(np.diff(slots) == 1)):
+            target = slice(int(slots[0]), int(slots[0]) + n)
+        else:
+            target = slots
+
+        self._cols['pre_neuron_id'][target] = pre_ids
+        self._cols['post_neuron_id'][target] = post_ids
+        if 'synapse_id' not in columns:
+            columns['synapse_id'] = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        if 'synapse_type' in columns and isinstance(columns['synapse_type'], str):
+            columns['synapse_type'] = encode_synapse_type(columns['synapse_type'])
+
+        for name, _, default in SYNAPSE_SCHEMA:
+            if name in ('pre_neuron_id', 'post_neuron_id'):
+                continue
+            self._cols[name][target] = columns.get(name, default)
+
+        self._next_id = max(self._next_id, int(self._cols['synapse_id'][target].max()) + 1)
+        self.version = next(_VERSION_COUNTER)
+        return slots
+
+    def tombstone(self, slots) -> np.ndarray:
+        """
+        Xóa O(k): đánh dấu slot chết, trung hòa giá trị và đưa vào free-list.
+        Slot đã chết bị bỏ qua. Trả về các slot thực sự bị xóa.
+
+        NOTE: pre/post của slot chết được giữ nguyên để cache dense có thể
+        xóa đúng ô (pre, post) tương ứng.
+        """
+        slots = np.unique(np.asarray(slots, dtype=np.int64).ravel())
+        if len(slots) == 0:
+            return slots
+        if slots[0] < 0 or slots[-1] >= self._size:
+            raise IndexError("synapse slot out of range")
+        slots = slots[self._alive[slots]]
+        if len(slots) == 0:
+            return slots
+        self._alive[slots] = False
+        self._neutralize(slots)
+        self._free.extend(slots[::-1].tolist())
+        self.version = next(_VERSION_COUNTER)
+        return slots
+
+    def compact(self) -> np.ndarray:
+        """
+        Dọn toàn bộ tombstones (stable order). Trả về slot cũ của từng slot
+        mới (old_slots[new_slot]) để cache aligned remap bằng một lần take.
+        """
+        live = self.live_slots()
+        if self._free:
+            self._compact_to(live)
+        return live
+
+    def _compact_to(self, keep_slots: np.ndarray):
+        kept = len(keep_slots)
+        for name in SYNAPSE_FIELDS:
+            col = self._cols[name]
+            col[:kept] = col[keep_slots]
+        self._alive[:kept] = True
+        self._size = kept
+        self._free = []
+        self.version = next(_VERSION_COUNTER)
+
+    def keep(self, mask: np.ndarray) -> int:
+        """
+        Giữ lại các synapses có mask=True (compaction in-place, stable order).
+        Trả về số synapses bị xóa.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (self._size,):
+            raise ValueError(f"mask shape {mask.shape} != ({self._size},)")
+        keep_slots = np.flatnonzero(mask & self.alive)
+        removed = len(self) - len(keep_slots)
+        if removed == 0 and not self._free:
+            return 0
+        self._compact_to(keep_slots)
+        return removed
+
+    def remove(self, mask: np.ndarray) -> int:
+        """Xóa các synapses có mask=True. Trả về số synapses bị xóa."""
+        return self.keep(~np.asarray(mask, dtype=bool))
+
+    def clear(self):
+        self._size = 0
+        self._free = []
+        self.version = next(_VERSION_COUNTER)
+
+
+# ============================================================================
+# Weights Keyed by (pre, post)
+# ============================================================================
+
+def synapse_keys(pre_ids, post_ids) -> np.ndarray:
+    """Key int64 (pre << 32 | post) — không phụ thuộc N, so sánh được giữa agents."""
+    pre = np.asarray(pre_ids, dtype=np.int64)
+    post = np.asarray(post_ids, dtype=np.int64)
+    return (pre << 32) | post
+
+
+class AncestorWeights:
+    """
+    Weights tổ tiên (Revolution Protocol) keyed theo (pre, post).
+
+    Lưu dạng cột: `keys_` (A,) int64 đã sort + `weights` (A,) float32, nên
+    tổng hợp từ elites là một masked mean (bincount) và tra cứu cho cả
+    connectome là một `searchsorted`, không có dict/loop Python.
+
+    NOTE: Immutable sau khi tạo — `version` dùng làm cache key cho các
+    mảng aligned theo slot (xem process_assimilate_ancestor).
+
+    NOTE: Giữ giao diện mapping tối thiểu (len, bool, keys, values) cho
+    code log/metrics cũ.
+    """
+    __slots__ = ('keys_', 'weights', 'version')
+
+    def __init__(self, keys=None, weights=None):
+        self.keys_ = np.asarray(keys if keys is not None else [], dtype=np.int64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float32)
+        self.version = next(_VERSION_COUNTER)
+
+    @classmethod
+    def from_arrays(cls, pre_ids, post_ids, weights) -> 'AncestorWeights':
+        """Mean theo (pre, post) của các samples (duplicates = nhiều elites)."""
+        keys = synapse_keys(pre_ids, post_ids)
+        if len(keys) == 0:
+            return cls()
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=np.asarray(weights, dtype=np.float64))
+        counts = np.bincount(inverse)
+        return cls(uniq, sums / counts)
+
+    @classmethod
+    def from_stores(cls, stores: Iterable['ConnectomeStore']) -> 'AncestorWeights':
+        """Masked mean qua các connectome: mỗi (pre, post) lấy trung bình trên các store có nó."""
+        pre, post, weights = [], [], []
+        for store in stores:
+            live = store.live_slots()
+            pre.append(store.pre_ids[live])
+            post.append(store.post_ids[live])
+            weights.append(store.weights[live])
+        if not pre:
+            return cls()
+        return cls.from_arrays(np.concatenate(pre), np.concatenate(post), np.concatenate(weights))
+
+    @classmethod
+    def from_mapping(cls, mapping, store: 'ConnectomeStore') -> 'AncestorWeights':
+        """Dict cũ {synapse_id: weight} → keyed theo (pre, post) của `store`."""
+        if isinstance(mapping, AncestorWeights):
+            return mapping
+        if not mapping:
+            return cls()
+        live = store.live_slots()
+        wanted = np.fromiter(mapping.keys(), dtype=np.int64, count=len(mapping))
+        slots = live[np.isin(store.column('synapse_id')[live], wanted)]
+        values = [mapping[i] for i in store.column('synapse_id')[slots].tolist()]
+        return cls.from_arrays(store.pre_ids[slots], store.post_ids[slots], values)
+
+    def lookup(self, pre_ids, post_ids):
+        """(found_mask, target_weights) cho từng (pre, post) — O(k log A)."""
+        keys = synapse_keys(pre_ids, post_ids)
+        if len(self.keys_) == 0:
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.float32)
+        pos = np.minimum(np.searchsorted(self.keys_, keys), len(self.keys_) - 1)
+        return self.keys_[pos] == keys, self.weights[pos]
+
+    def restrict_to(self, other: 'AncestorWeights') -> 'AncestorWeights':
+        """Chỉ giữ các (pre, post) có trong `other`."""
+        mask = np.isin(self.keys_, other.keys_, assume_unique=True)
+        return AncestorWeights(self.keys_[mask], self.weights[mask])
+
+    def __len__(self) -> int:
+        return len(self.keys_)
+
+    def __bool__(self) -> bool:
+        return len(self.keys_) > 0
+
+    # NOTE: Cấp version mới khi unpickle (counter là theo process)
+    def __getstate__(self):
+        return {'keys_': self.keys_, 'weights': self.weights}
+
+    def __setstate__(self, state):
+        self.keys_ = state['keys_']
+        self.weights = state['weights']
+        self.version = next(_VERSION_COUNTER)
+
+    def keys(self) -> List[tuple]:
+        return list(zip((self.keys_ >> 32).tolist(), (self.keys_ & 0xFFFFFFFF).tolist()))
+
+    def values(self) -> np.ndarray:
+        return self.weights
+
+    def __repr__(self):
+        return f"AncestorWeights(size={len(self)}, version={self.version})"
+
+
+# ============================================================================
+# CSR Index (Sparse Backend)
+# ============================================================================
+
+def build_pre_csr(pre_ids: np.ndarray, num_neurons: int, alive: np.ndarray = None,
+                  slack: float = 0.25, min_slack: int = 2):
+    """
+    CSR index theo pre-neuron trên các slot của store, có chừa chỗ trống
+    (padded) ở mỗi hàng để thêm synapse mới O(1) mà không rebuild.
+
+    Returns:
+        indptr: (N+1,) — hàng `i` chiếm slots[indptr[i]:indptr[i+1]] (capacity)
+        fill: (N,) số vị trí đã dùng của mỗi hàng (lỗ = -1 nằm trong fill)
+        slots: (P,) slot indices của store, -1 là lỗ/chỗ trống
+        pos: (S,) vị trí của từng slot trong `slots` (-1 nếu không được index)
+
+    NOTE: Không permute dữ liệu — các cột vẫn giữ thứ tự slot của store,
+    CSR chỉ là index để lấy "hàng" (fan-out) của một tập pre neurons.
+    """
+    pre_ids = np.asarray(pre_ids, dtype=np.int64)
+    indexed = pre_ids < num_neurons
+    if alive is not None:
+        indexed &= alive
+    live_slots = np.flatnonzero(indexed)
+    rows = pre_ids[live_slots]
+    order = np.argsort(rows, kind='stable')
+    sorted_slots = live_slots[order]
+    sorted_rows = rows[order]
+
+    counts = np.bincount(rows, minlength=num_neurons)[:num_neurons].astype(np.int64)
+    caps = counts + (counts * slack).astype(np.int64) + min_slack
+    indptr = np.zeros(num_neurons + 1, dtype=np.int64)
+    np.cumsum(caps, out=indptr[1:])
+
+    # Rank trong hàng: 0..count-1 (rows đã sort)
+    rank = np.arange(len(sorted_rows), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = indptr[sorted_rows] + rank
+
+    slots = np.full(int(indptr[-1]), -1, dtype=np.int64)
+    slots[positions] = sorted_slots
+    pos = np.full(len(pre_ids), -1, dtype=np.int64)
+    pos[sorted_slots] = positions
+    return indptr, counts, slots, pos
+
+
+def csr_insert(indptr: np.ndarray, fill: np.ndarray, csr_slots: np.ndarray,
+               csr_pos: np.ndarray, rows: np.ndarray, new_slots: np.ndarray) -> bool:
+    """
+    Chèn `new_slots` vào hàng `rows` tương ứng (in-place, vectorized).
+    Trả về False nếu có hàng hết chỗ trống → caller phải rebuild CSR.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    new_slots = np.asarray(new_slots, dtype=np.int64)
+    if len(rows) == 0:
+        return True
+    order = np.argsort(rows, kind='stable')
+    rows, new_slots = rows[order], new_slots[order]
+    uniq, first, counts = np.unique(rows, return_index=True, return_counts=True)
+    if np.any(fill[uniq] + counts > indptr[uniq + 1] - indptr[uniq]):
+        return False
+    rank = np.arange(len(rows), dtype=np.int64) - np.repeat(first, counts)
+    positions = indptr[rows] + fill[rows] + rank
+    csr_slots[positions] = new_slots
+    csr_pos[new_slots] = positions
+    fill[uniq] += counts
+    return True
+
+
+def csr_erase(csr_slots: np.ndarray, csr_pos: np.ndarray, slots: np.ndarray):
+    """Đục lỗ (-1) cho các slot đã xóa (in-place, O(k))."""
+    slots = np.asarray(slots, dtype=np.int64)
+    positions = csr_pos[slots]
+    indexed = positions >= 0
+    csr_slots[positions[indexed]] = -1
+    csr_pos[slots[indexed]] = -1
+
+
+def csr_gather_rows(indptr: np.ndarray, fill: np.ndarray, csr_slots: np.ndarray, rows: np.ndarray):
+    """
+    Lấy toàn bộ slots thuộc các hàng `rows` (vectorized, không loop Python).
+
+    Returns:
+        slots: (E,) slot indices (đã bỏ lỗ)
+        row_pos: (E,) vị trí trong `rows` mà mỗi slot thuộc về
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    lengths = fill[rows]
+    total = int(lengths.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    row_pos = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)
+    # Offset trong từng hàng: 0..len-1
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    slots = csr_slots[starts[row_pos] + offsets]
+    present = slots >= 0
+    if not present.all():
+        return slots[present], row_pos[present]
+    return slots, row_pos
@@ -36,6 +36,23 @@ class GlobalContext(BaseGlobalContext):
     use_dynamic_curiosity: bool = False
     use_adaptive_fatigue: bool = False
 
+    # --- Parallelism ---
+    # > 0: agents chạy trên N worker processes (ShardedAgentPool) thay vì threads
+    process_workers: int = 0
+    # True: Phase Thinking chọn action cho mọi agent trong một forward (BatchedPolicyInference)
+    batched_action_selection: bool = False
+
+    # --- Contract Audit ---
+    # Các stage của agent step chạy trusted (không guard/shadow); cứ N bước kiểm tra
+    # writes của mỗi stage theo contract outputs của stage đó (0 = không audit)
+    contract_audit_every: int = 100
+
+    # --- Latency Profiling ---
+    # True: histogram latency theo process (và sub-stage SNN Cycle), xuất vào metrics.jsonl mỗi episode
+    latency_profiling: bool = False
+    # Tên process chạy dưới cProfile (vd 'process_snn_cycle'), None = tắt
+    latency_profile_capture: Optional[str] = None
+
     # --- Environment Config ---
     switch_locations: Dict[str, Tuple[int, int]] = field(default_factory=dict)
     
@@ -112,6 +129,7 @@ class DomainContext(BaseDomainContext):
     heavy_gated_network: Any = None # GatedIntegrationNetwork
     heavy_gated_optimizer: Any = None # Optimizer for Gated Net
     heavy_last_q_values: Optional[torch.Tensor] = None # Last Q snapshot (Tensor)
+    heavy_replay_buffer: Any = None # ReplayBuffer (None = học online từng transition)
     
     # --- Dynamic Parameters ---
     current_exploration_rate: float = 1.0
@@ -132,6 +150,8 @@ class DomainContext(BaseDomainContext):
     # Metric tracking
     metrics: Dict[str, Any] = field(default_factory=dict)
     last_cycle_time: float = 0.0
+    # [HEAVY ZONE] theus.profiling.ProcessProfiler (None = latency profiling tắt)
+    heavy_latency_profiler: Any = None
     
     # --- SNN Recorder (Phase 15 - POP Refactor) ---
     # [HEAVY ZONE] Buffer is large and shouldn't be deep copied per step
@@ -11,6 +11,15 @@ import torch
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional
 from theus.context import BaseGlobalContext, BaseDomainContext, BaseSystemContext
+from src.core.connectome import (
+    SYNAPSE_SCHEMA,
+    AncestorWeights,
+    ConnectomeStore,
+    build_pre_csr,
+    csr_erase,
+    csr_insert,
+    encode_synapse_type
+)
 
 
 # ============================================================================
@@ -41,6 +50,25 @@ class SNNGlobalContext(BaseGlobalContext):
     vector_dim: int = 16
     ticks_per_step: int = 1  # Standard: 1 tick per RL step
     
+    # === Connectome Backend ===
+    # 'dense': ma trận (N, N) — nhanh cho N nhỏ
+    # 'sparse': CSR theo pre-neuron, aligned với connectome arrays (S,)
+    # 'auto': sparse khi num_neurons >= sparse_backend_min_neurons
+    weight_backend: str = "auto"
+    sparse_backend_min_neurons: int = 1024
+    # True: coordinator chạy SNN cycle của mọi agent như một batch
+    # (xem src/processes/snn_population_theus.py)
+    use_population_kernel: bool = False
+    # True: temporal loop của process_snn_cycle chạy qua FusedTickKernel
+    # (xem src/processes/snn_tick_kernel_theus.py) thay vì gọi từng _*_impl mỗi tick
+    use_fused_tick_kernel: bool = True
+    # True: sleep cycle chạy toàn bộ giấc ngủ qua DreamTickKernel một lần
+    # (xem src/processes/snn_sleep_engine_theus.py) thay vì RLAgent.dream_step mỗi step
+    # NOTE: Opt-in — khác dream_step ở chỗ noise đi vào potentials và current_time tăng
+    use_fused_sleep_engine: bool = False
+    # True (cùng use_fused_sleep_engine): giấc ngủ của các agents chạy song song trên thread pool
+    parallel_sleep: bool = False
+    
     # === Neuron Parameters ===
     tau_decay: float = 0.9  # Leaky decay (90% retention per step)
     refractory_period: int = 5  # ms
@@ -96,6 +124,9 @@ class SNNGlobalContext(BaseGlobalContext):
     social_elite_ratio: float = 0.2
     social_learner_ratio: float = 0.5
     social_synapses_per_transfer: int = 10
+    # True: synapses chuyển giao vào quarantine pool (shadow_synapses) thay vì
+    # connectome; process_quarantine_validation quyết định promote
+    social_transfer_quarantine: bool = False
     
     # === Social Quarantine (Phase 8) ===
     use_social_quarantine: bool = True
@@ -122,6 +153,7 @@ class SNNGlobalContext(BaseGlobalContext):
     cosine_similarity_threshold: float = 0.3  # Ngưỡng Cosine tối thiểu để mọc rễ
     max_connectivity_ratio: float = 0.3  # Trần sọ não = 30% đồ thị
     silent_death_threshold: float = 0.001  # Ngưỡng Weight để Silent GC thu hồi object
+    connectome_compaction_ratio: float = 0.25  # Compact store khi tombstones vượt 25% slots
     
     # === Revolution Protocol (Phase 12) ===
     use_revolution_protocol: bool = False  # Multi-agent only
@@ -232,7 +264,9 @@ class SNNDomainContext(BaseDomainContext):
     # === Network State (ECS Arrays) ===
     # [HEAVY ZONE] - Skip shadow copy (large object lists)
     heavy_neurons: List[NeuronState] = field(default_factory=list)
-    heavy_synapses: List[SynapseState] = field(default_factory=list)
+    # NOTE: Connectome lưu dạng Struct-of-Arrays (xem src/core/connectome.py).
+    # Iterate/index trả về SynapseView lazy, không tạo SynapseState objects.
+    heavy_synapses: ConnectomeStore = field(default_factory=ConnectomeStore)
     
     # Property aliases for backward compatibility
     @property
@@ -244,11 +278,14 @@ class SNNDomainContext(BaseDomainContext):
         self.heavy_neurons = value
     
     @property
-    def synapses(self) -> List[SynapseState]:
+    def synapses(self) -> ConnectomeStore:
         return self.heavy_synapses
     
     @synapses.setter
     def synapses(self, value):
+        # Chấp nhận list SynapseState/SynapseView (code cũ) → convert sang store
+        if not isinstance(value, ConnectomeStore):
+            value = ConnectomeStore.from_synapses(value)
         self.heavy_synapses = value
     
     # === Temporal State ===
@@ -264,6 +301,9 @@ class SNNDomainContext(BaseDomainContext):
     # ===== Emotion Vectors (SNN-RL Bridge) =====
     heavy_snn_emotion_vector: Optional[torch.Tensor] = None  # Current emotion from SNN
     heavy_previous_snn_emotion_vector: Optional[torch.Tensor] = None  # Previous emotion (t-1)
+    # NOTE: Double buffers của emotion readout (emotion / previous_emotion /
+    # state / previous_state). Readout chỉ trả delta, không ghi lên RL domain.
+    heavy_readout_buffers: Dict[str, Optional[torch.Tensor]] = field(default_factory=dict)
     
     # ===== Metrics & Monitoring =====
     metrics: Dict[str, float] = field(default_factory=dict)
@@ -275,7 +315,22 @@ class SNNDomainContext(BaseDomainContext):
     
     # === Social Learning ===
     viral_synapses_received: int = 0
-    shadow_synapses: List[SynapseState] = field(default_factory=list)
+    # NOTE: Quarantine pool cũng là Struct-of-Arrays (pre, post, weight,
+    # quarantine_time, validation_score, is_blacklisted, source_agent_id, ...)
+    # để validation mỗi step chạy bằng vài phép numpy thay vì vòng lặp objects.
+    # [HEAVY ZONE] - Skip shadow copy
+    heavy_shadow_synapses: ConnectomeStore = field(default_factory=ConnectomeStore)
+
+    @property
+    def shadow_synapses(self) -> ConnectomeStore:
+        return self.heavy_shadow_synapses
+
+    @shadow_synapses.setter
+    def shadow_synapses(self, value):
+        # Chấp nhận list SynapseState/SynapseView (code cũ) → convert sang store
+        if not isinstance(value, ConnectomeStore):
+            value = ConnectomeStore.from_synapses(value)
+        self.heavy_shadow_synapses = value
     
     # === Social Quarantine (Phase 8) ===
     blacklisted_sources: List[int] = field(default_factory=list)  # Agent IDs
@@ -285,7 +340,21 @@ class SNNDomainContext(BaseDomainContext):
     dampening_active: bool = False
     
     # === Revolution Protocol (Phase 12) ===
-    ancestor_weights: Dict[int, float] = field(default_factory=dict)
+    # NOTE: Keyed theo (pre, post) dạng cột (xem AncestorWeights) — dict cũ
+    # {synapse_id: weight} được convert theo connectome hiện tại khi gán.
+    # [HEAVY ZONE] - Skip shadow copy
+    heavy_ancestor_weights: AncestorWeights = field(default_factory=AncestorWeights)
+
+    @property
+    def ancestor_weights(self) -> AncestorWeights:
+        return self.heavy_ancestor_weights
+
+    @ancestor_weights.setter
+    def ancestor_weights(self, value):
+        if not isinstance(value, AncestorWeights):
+            value = AncestorWeights.from_mapping(value, self.synapses)
+        self.heavy_ancestor_weights = value
+
     population_performance: List[float] = field(default_factory=list)
     revolution_triggered: bool = False
     last_revolution_episode: int = -1000  # Cooldown tracker
@@ -303,6 +372,9 @@ class SNNDomainContext(BaseDomainContext):
     # - prototypes: (N, D) - For vector matching
     # [HEAVY ZONE] - Skip shadow copy
     heavy_tensors: Dict[str, np.ndarray] = field(default_factory=dict)
+    # FusedTickKernel (scratch buffers giữ qua các step) — derived, không phải state
+    # [HEAVY ZONE] - Skip shadow copy
+    heavy_tick_kernel: Any = None
 
     # === Phase 11: Robust Control (Safety) ===
     # Stores the current state of defense mechanisms
@@ -379,8 +451,10 @@ def create_snn_context_theus(
         domain_ctx.neurons.append(neuron)
     
     # Khởi tạo synapses (random connectivity)
+    # NOTE: Giữ nguyên thứ tự gọi RNG (random → uniform theo từng cặp) để
+    # cùng seed cho ra cùng connectome; chỉ gom vào arrays rồi bulk append.
     np.random.seed(global_ctx.seed)
-    synapse_id = 0
+    pre_ids, post_ids, init_weights = [], [], []
     
     for pre_id in range(num_neurons):
         for post_id in range(num_neurons):
@@ -388,14 +462,11 @@ def create_snn_context_theus(
                 continue
             
             if np.random.random() < connectivity:
-                synapse = SynapseState(
-                    synapse_id=synapse_id,
-                    pre_neuron_id=pre_id,
-                    post_neuron_id=post_id,
-                    weight=np.random.uniform(0.3, 0.7)
-                )
-                domain_ctx.synapses.append(synapse)
-                synapse_id += 1
+                pre_ids.append(pre_id)
+                post_ids.append(post_id)
+                init_weights.append(np.random.uniform(0.3, 0.7))
+    
+    domain_ctx.synapses.add_arrays(pre_ids, post_ids, weight=init_weights)
     
     # Tạo System Context
     sys_ctx = SNNSystemContext(
@@ -422,6 +493,318 @@ def create_snn_context_theus(
 # Vectorization Helpers (Compute-Sync Strategy)
 # ============================================================================
 
+# Synapse compute caches ↔ cột tương ứng trong ConnectomeStore
+# - Dense backend: ma trận (N, N)
+# - Sparse backend: mảng (S,) aligned với slot của store
+_SYNAPSE_MATRIX_COLUMNS = (
+    ('weights', 'weight', np.float32),
+    ('traces', 'trace', np.float32),
+    ('fitnesses', 'fitness', np.float32),
+    ('commit_states', 'commit_state', np.int8),
+    ('consecutive_correct', 'consecutive_correct', np.int16),
+    ('consecutive_wrong', 'consecutive_wrong', np.int16),
+)
+
+# CSR index theo pre-neuron (chỉ có ở sparse backend)
+_SYNAPSE_INDEX_KEYS = ('csr_indptr', 'csr_fill', 'csr_slots', 'csr_pos')
+
+# Dự trữ slot khi connectome lớn lên qua API incremental (xem add_synapses)
+_SLOT_HEADROOM = 0.125
+
+WEIGHT_BACKEND_DENSE = 'dense'
+WEIGHT_BACKEND_SPARSE = 'sparse'
+
+
+def resolve_weight_backend(global_ctx, num_neurons: int) -> str:
+    """'dense' | 'sparse' theo SNNGlobalContext.weight_backend ('auto' theo N)."""
+    backend = str(getattr(global_ctx, 'weight_backend', WEIGHT_BACKEND_DENSE)).lower()
+    if backend == 'auto':
+        try:
+            min_neurons = int(global_ctx.sparse_backend_min_neurons)
+        except (TypeError, AttributeError, ValueError):
+            min_neurons = 1024
+        backend = WEIGHT_BACKEND_SPARSE if num_neurons >= min_neurons else WEIGHT_BACKEND_DENSE
+    if backend not in (WEIGHT_BACKEND_DENSE, WEIGHT_BACKEND_SPARSE):
+        raise ValueError(f"Unknown weight_backend: {backend!r} (expected 'dense', 'sparse' or 'auto')")
+    return backend
+
+
+def is_sparse_backend(heavy_tensors) -> bool:
+    """True nếu synapse tensors đang ở dạng (S,) aligned (sparse backend)."""
+    return heavy_tensors is not None and heavy_tensors.get('weight_backend') == WEIGHT_BACKEND_SPARSE
+
+
+def _synapse_flat_index(store: ConnectomeStore, N: int):
+    """
+    Flat index (pre * N + post) cho các synapses hợp lệ (còn sống, trong range).
+    Trả về (valid_mask hoặc None nếu tất cả hợp lệ, flat_idx).
+    """
+    pre = store.pre_ids.astype(np.int64)
+    post = store.post_ids.astype(np.int64)
+    valid = (pre < N) & (post < N)
+    if store.num_dead:
+        valid &= store.alive
+    if valid.all():
+        return None, pre * N + post
+    return valid, pre[valid] * N + post[valid]
+
+
+def _scatter_synapse_matrix(store: ConnectomeStore, N: int, column: str, dtype) -> np.ndarray:
+    """Connectome column (S,) → dense (N, N) matrix. O(S) numpy."""
+    mat = np.zeros((N, N), dtype=dtype)
+    if len(store) == 0 or N == 0:
+        return mat
+    valid, flat = _synapse_flat_index(store, N)
+    values = store.column(column)
+    mat.ravel()[flat] = values if valid is None else values[valid]
+    return mat
+
+
+def _build_synapse_tensor(store: ConnectomeStore, N: int, column: str, dtype, backend: str) -> np.ndarray:
+    """Connectome column → compute tensor của backend tương ứng."""
+    if backend == WEIGHT_BACKEND_SPARSE:
+        return store.column(column).astype(dtype)
+    return _scatter_synapse_matrix(store, N, column, dtype)
+
+
+def gather_synapse_tensors(domain) -> None:
+    """
+    Synapse compute tensors → ConnectomeStore columns (vectorized gather).
+
+    NOTE: Thay cho vòng lặp Python qua toàn bộ synapse objects. Gọi sau
+    vectorized compute, hoặc trước khi thay đổi cấu trúc connectome
+    (Darwinism/Pruning) để không mất weights/commit states đã học.
+    """
+    t = domain.heavy_tensors
+    store = domain.synapses
+    N = len(domain.neurons)
+    if t is None or store.num_slots == 0 or N == 0:
+        return
+    # Cache thuộc về phiên bản connectome cũ → không gather (lệch slot)
+    if t.get('connectome_version') != store.version:
+        return
+
+    if is_sparse_backend(t):
+        # (S,) aligned → copy thẳng (tombstones đã trung hòa ở cả hai phía)
+        S = store.num_slots
+        for tensor_key, column, _ in _SYNAPSE_MATRIX_COLUMNS:
+            arr = t.get(tensor_key)
+            if arr is not None and arr.shape == (S,):
+                store.column(column)[:] = arr
+        return
+
+    valid, flat = _synapse_flat_index(store, N)
+    for tensor_key, column, _ in _SYNAPSE_MATRIX_COLUMNS:
+        mat = t.get(tensor_key)
+        if mat is None or mat.shape != (N, N):
+            continue
+        values = np.take(mat.ravel(), flat)
+        if valid is None:
+            store.column(column)[:] = values
+        else:
+            store.column(column)[valid] = values
+
+
+
+def _build_csr_index(t, store: ConnectomeStore, N: int):
+    indptr, fill, slots, pos = build_pre_csr(
+        store.pre_ids, N, alive=store.alive if store.num_dead else None
+    )
+    t['csr_indptr'] = indptr
+    t['csr_fill'] = fill
+    t['csr_slots'] = slots
+    t['csr_pos'] = pos
+
+
+# ============================================================================
+# Incremental Connectome Mutation
+# ============================================================================
+# NOTE: Thay đổi cấu trúc qua store trực tiếp (store.append/remove) tăng
+# version → ensure_heavy_tensors_initialized rebuild toàn bộ cache, O(S)
+# hoặc O(N²). Các hàm dưới đây sửa store VÀ vá cache tại chỗ O(k), rồi xác
+# nhận version mới — traces/commit states đang nằm trong tensors được giữ.
+
+def _synapse_tensors_in_sync(domain, version: int) -> bool:
+    t = domain.heavy_tensors
+    return (t is not None and 'weights' in t
+            and t.get('connectome_version') == version)
+
+
+def _patch_synapse_tensors(domain, slots: np.ndarray):
+    """Ghi lại các slot vừa đổi từ store vào compute tensors (O(k))."""
+    t = domain.heavy_tensors
+    store = domain.synapses
+    N = len(domain.neurons)
+    if len(slots) == 0:
+        return
+
+    if is_sparse_backend(t):
+        S = store.num_slots
+        for tensor_key, column, dtype in _SYNAPSE_MATRIX_COLUMNS:
+            arr = t.get(tensor_key)
+            if arr is None:
+                continue
+            if arr.shape[0] < S:
+                # Store nối thêm slot (kèm headroom) → nới tensor một lần
+                grown = store.column(column).astype(dtype)
+                grown[:arr.shape[0]] = arr
+                t[tensor_key] = grown
+                arr = t[tensor_key]
+            arr[slots] = store.column(column)[slots]
+
+        if 'csr_indptr' not in t:
+            return
+        pos = t['csr_pos']
+        if pos.shape[0] < S:
+            grown = np.full(S, -1, dtype=np.int64)
+            grown[:pos.shape[0]] = pos
+            t['csr_pos'] = grown
+        csr_erase(t['csr_slots'], t['csr_pos'], slots)
+        live = slots[store.alive[slots]]
+        rows = store.pre_ids[live]
+        live, rows = live[rows < N], rows[rows < N]
+        if not csr_insert(t['csr_indptr'], t['csr_fill'], t['csr_slots'], t['csr_pos'], rows, live):
+            # Hàng hết chỗ trống → rebuild (hiếm, nhờ slack của CSR)
+            _build_csr_index(t, store, N)
+        return
+
+    pre = store.pre_ids[slots].astype(np.int64)
+    post = store.post_ids[slots].astype(np.int64)
+    valid = (pre < N) & (post < N)
+    flat = pre[valid] * N + post[valid]
+    alive = store.alive[slots][valid]
+    for tensor_key, column, _ in _SYNAPSE_MATRIX_COLUMNS:
+        mat = t.get(tensor_key)
+        if mat is None or mat.shape != (N, N):
+            continue
+        # Slot chết → xóa ô (pre, post) về 0
+        mat.ravel()[flat] = np.where(alive, store.column(column)[slots][valid], 0)
+
+
+def add_synapses(domain, pre_ids, post_ids, **columns) -> np.ndarray:
+    """
+    Thêm synapses (vectorized) và vá compute tensors tại chỗ.
+    Trả về slot indices của synapses mới.
+    """
+    store = domain.synapses
+    in_sync = _synapse_tensors_in_sync(domain, store.version)
+    slots = store.add_arrays(pre_ids, post_ids, headroom=_SLOT_HEADROOM, **columns)
+    if in_sync:
+        _patch_synapse_tensors(domain, slots)
+        domain.heavy_tensors['connectome_version'] = store.version
+    return slots
+
+
+def add_synapse_records(domain, synapses) -> np.ndarray:
+    """add_synapses cho list SynapseState/SynapseView (giữ nguyên mọi field)."""
+    synapses = list(synapses)
+    if not synapses:
+        return np.empty(0, dtype=np.int64)
+    columns = {
+        name: [getattr(s, name, default) for s in synapses]
+        for name, _, default in SYNAPSE_SCHEMA
+        if name not in ('pre_neuron_id', 'post_neuron_id')
+    }
+    columns['synapse_type'] = [encode_synapse_type(v) for v in columns['synapse_type']]
+    return add_synapses(
+        domain,
+        [s.pre_neuron_id for s in synapses],
+        [s.post_neuron_id for s in synapses],
+        **columns
+    )
+
+
+def remove_synapses(domain, slots) -> int:
+    """
+    Xóa synapses theo slot (tombstone O(k)) và vá compute tensors tại chỗ.
+    Trả về số synapses bị xóa.
+    """
+    store = domain.synapses
+    in_sync = _synapse_tensors_in_sync(domain, store.version)
+    removed = store.tombstone(slots)
+    if in_sync and len(removed):
+        _patch_synapse_tensors(domain, removed)
+        domain.heavy_tensors['connectome_version'] = store.version
+    return len(removed)
+
+
+def compact_connectome(domain, max_dead_fraction: float = 0.25) -> bool:
+    """
+    Dọn tombstones khi vượt `max_dead_fraction` (amortized O(S)).
+    Cache sparse được remap bằng một lần take; dense không đổi.
+    """
+    store = domain.synapses
+    if store.num_dead == 0 or store.dead_fraction <= max_dead_fraction:
+        return False
+    in_sync = _synapse_tensors_in_sync(domain, store.version)
+    old_slots = store.compact()
+    if in_sync:
+        t = domain.heavy_tensors
+        if is_sparse_backend(t):
+            for tensor_key, _, _ in _SYNAPSE_MATRIX_COLUMNS:
+                if tensor_key in t:
+                    t[tensor_key] = t[tensor_key][old_slots]
+            _build_csr_index(t, store, len(domain.neurons))
+        t['connectome_version'] = store.version
+    return True
+
+
+# ============================================================================
+# Prototype Similarity Cache
+# ============================================================================
+# NOTE: Sim = ReLU(P·Pᵀ) chỉ đổi khi prototypes đổi (sync/clustering), không
+# đổi mỗi tick như weights (STDP) → cache theo version thay vì matmul mỗi tick.
+# ShmTensorStore ghi đè prototypes tại chỗ nên không thể so identity; writer
+# phải gọi set_prototypes / mark_prototypes_changed.
+
+def mark_prototypes_changed(heavy_tensors) -> None:
+    """Tăng prototypes_version (vô hiệu hóa similarity cache). Gọi sau khi sửa prototypes tại chỗ."""
+    heavy_tensors['prototypes_version'] = int(heavy_tensors.get('prototypes_version', 0)) + 1
+
+
+def set_prototypes(heavy_tensors, prototypes: np.ndarray) -> bool:
+    """Ghi prototypes (N, D); chỉ tăng version khi giá trị thực sự đổi. Trả về True nếu đổi."""
+    current = heavy_tensors.get('prototypes')
+    if current is not None and current.shape == prototypes.shape and np.array_equal(current, prototypes):
+        return False
+    heavy_tensors['prototypes'] = prototypes
+    mark_prototypes_changed(heavy_tensors)
+    return True
+
+
+def prototype_similarity(heavy_tensors, store: Optional[ConnectomeStore] = None) -> np.ndarray:
+    """
+    Cached ReLU(dot(Proto_pre, Proto_post)).
+
+    Returns:
+        Dense: (N, N), Sim[i, j] = ReLU(P_i · P_j).
+        Sparse: (S,) slot-aligned với weights (cần `store`).
+    """
+    t = heavy_tensors
+    sparse = is_sparse_backend(t)
+    key = (t.get('prototypes_version', 0), t.get('weight_backend'),
+           t.get('connectome_version') if sparse else None)
+    sim = t.get('similarity')
+    if sim is not None and t.get('similarity_key') == key:
+        return sim
+
+    protos = t['prototypes']
+    N = protos.shape[0]
+    if sparse:
+        pre = store.pre_ids.astype(np.int64)
+        post = store.post_ids.astype(np.int64)
+        # Tombstone/neuron ngoài phạm vi không bao giờ được gather (CSR bỏ qua) → sim 0
+        valid = (pre < N) & (post < N)
+        sim = np.zeros(len(pre), dtype=np.float32)
+        sim[valid] = np.einsum('ed,ed->e', protos[pre[valid]], protos[post[valid]])
+    else:
+        sim = np.matmul(protos, protos.T)
+    np.maximum(sim, 0, out=sim)
+    t['similarity'] = sim
+    t['similarity_key'] = key
+    return t['similarity']
+
+
 def ensure_heavy_tensors_initialized(ctx: SNNSystemContext):
     """
     Ensure shadow heavy_tensors exist and match object state.
@@ -440,6 +823,7 @@ def ensure_heavy_tensors_initialized(ctx: SNNSystemContext):
         
     neurons = domain.neurons
     N = len(neurons)
+    store = domain.synapses
     
     initialized_something = False
     
@@ -462,68 +846,51 @@ def ensure_heavy_tensors_initialized(ctx: SNNSystemContext):
         prototypes = np.zeros((N, D), dtype=np.float32)
         for i, n in enumerate(neurons):
             prototypes[i] = n.prototype_vector
-        domain.heavy_tensors['prototypes'] = prototypes
+        set_prototypes(domain.heavy_tensors, prototypes)
         
         # Potential Vectors (N, D) - Mutable State!
         pot_vecs = np.zeros((N, D), dtype=np.float32)
         for i, n in enumerate(neurons):
             pot_vecs[i] = n.potential_vector
         domain.heavy_tensors['potential_vectors'] = pot_vecs
-        
-        # Weights (N, N)
-        # We assume sparse connectivity mapped to dense matrix for fast multiply
-        # If N is large (>1000), sparse matrix is better. Here N=50-100.
-        weights = np.zeros((N, N), dtype=np.float32)
-        for s in domain.synapses:
-            if s.pre_neuron_id < N and s.post_neuron_id < N:
-                weights[s.pre_neuron_id, s.post_neuron_id] = s.weight
-        domain.heavy_tensors['weights'] = weights
-    
-    # --- DYNAMIC SYNAPSE SIZING (NEW) ---
-    # Nếu số lượng synapses thay đổi (do Pruning/Darwinism), ta phải re-initialize 
-    # các tensors liên quan đến synapses (S,).
-    S = len(domain.synapses)
-    if 'syn_pre_ids' in domain.heavy_tensors:
-        if len(domain.heavy_tensors['syn_pre_ids']) != S:
-            # Xóa các keys cũ để buộc khởi tạo lại bên dưới
-            synapse_keys = [
-                'syn_pre_ids', 'syn_post_ids', 'syn_commit_states',
-                'traces', 'fitnesses', '_fast_traces', '_slow_traces',
-                'commit_states', 'consecutive_correct', 'consecutive_wrong',
-                '_post_synapse_map', 'weights'
-            ]
-            for k in synapse_keys:
-                if k in domain.heavy_tensors:
-                    del domain.heavy_tensors[k]
+    
+    # --- WEIGHT BACKEND ---
+    # Dense (N, N) cho N nhỏ; sparse (S,) + CSR theo pre-neuron khi N lớn
+    # (N=4096 dense tốn hàng trăm MB/agent cho 6 ma trận synapse).
+    backend = resolve_weight_backend(ctx.global_ctx, N)
+    cached_backend = domain.heavy_tensors.get('weight_backend')
+    if cached_backend != backend:
+        if cached_backend is not None:
+            # Đổi backend giữa chừng: gather trước để không mất state
+            gather_synapse_tensors(domain)
+            for tensor_key, _, _ in _SYNAPSE_MATRIX_COLUMNS:
+                if tensor_key in domain.heavy_tensors:
+                    del domain.heavy_tensors[tensor_key]
+            initialized_something = True
+        domain.heavy_tensors['weight_backend'] = backend
+    
+    # --- DYNAMIC SYNAPSE SIZING ---
+    # Nếu cấu trúc connectome thay đổi (do Pruning/Darwinism/Social), các
+    # synapse tensors phải build lại từ store. Store là source of truth nên
+    # traces/commit states không bị mất.
+    cached_version = domain.heavy_tensors.get('connectome_version')
+    if cached_version != store.version:
+        if cached_version is not None:
+            for tensor_key in [k for k, _, _ in _SYNAPSE_MATRIX_COLUMNS] + list(_SYNAPSE_INDEX_KEYS):
+                if tensor_key in domain.heavy_tensors:
+                    del domain.heavy_tensors[tensor_key]
             initialized_something = True
+        domain.heavy_tensors['connectome_version'] = store.version
 
-    # NEW: Add STDP traces tensor
-    if 'traces' not in domain.heavy_tensors:
-        domain.heavy_tensors['traces'] = np.zeros((N, N), dtype=np.float32)
-        # Sync from synapses
-        for syn in domain.synapses:
-            if syn.pre_neuron_id < N and syn.post_neuron_id < N:
-                domain.heavy_tensors['traces'][syn.pre_neuron_id, syn.post_neuron_id] = syn.trace
-    
-    # NEW: Add fitness tensor (for Neural Darwinism)
-    if 'fitnesses' not in domain.heavy_tensors:
-        domain.heavy_tensors['fitnesses'] = np.zeros((N, N), dtype=np.float32)
-        for syn in domain.synapses:
-            if syn.pre_neuron_id < N and syn.post_neuron_id < N:
-                domain.heavy_tensors['fitnesses'][syn.pre_neuron_id, syn.post_neuron_id] = syn.fitness
-
-    # NEW (Phase 7): Commitment Tensors
-    if 'commit_states' not in domain.heavy_tensors:
-        domain.heavy_tensors['commit_states'] = np.zeros((N, N), dtype=np.int8)
-        domain.heavy_tensors['consecutive_correct'] = np.zeros((N, N), dtype=np.int16)
-        domain.heavy_tensors['consecutive_wrong'] = np.zeros((N, N), dtype=np.int16)
-        
-        for syn in domain.synapses:
-            if syn.pre_neuron_id < N and syn.post_neuron_id < N:
-                domain.heavy_tensors['commit_states'][syn.pre_neuron_id, syn.post_neuron_id] = syn.commit_state
-                domain.heavy_tensors['consecutive_correct'][syn.pre_neuron_id, syn.post_neuron_id] = syn.consecutive_correct
-                domain.heavy_tensors['consecutive_correct'][syn.pre_neuron_id, syn.post_neuron_id] = syn.consecutive_correct
-                domain.heavy_tensors['consecutive_wrong'][syn.pre_neuron_id, syn.post_neuron_id] = syn.consecutive_wrong
+    # Weights + STDP traces + fitness (Neural Darwinism) + Commitment (Phase 7)
+    for tensor_key, column, dtype in _SYNAPSE_MATRIX_COLUMNS:
+        if tensor_key not in domain.heavy_tensors:
+            domain.heavy_tensors[tensor_key] = _build_synapse_tensor(store, N, column, dtype, backend)
+
+    # CSR index theo pre-neuron (sparse backend): fan-out của neuron i là
+    # csr_slots[csr_indptr[i]:csr_indptr[i] + csr_fill[i]] (bỏ lỗ -1)
+    if backend == WEIGHT_BACKEND_SPARSE and 'csr_indptr' not in domain.heavy_tensors:
+        _build_csr_index(domain.heavy_tensors, store, N)
 
     # Phase 3: Vectorized Spike Buffer
     # Shape: (Buffer_Size, Num_Neurons)
@@ -537,13 +904,12 @@ def ensure_heavy_tensors_initialized(ctx: SNNSystemContext):
     if 'firing_traces' not in domain.heavy_tensors:
          domain.heavy_tensors['firing_traces'] = np.zeros(N, dtype=np.float32)
 
-    # NEW (Heavy Vectorization): Synapse Index Arrays (S,)
-    if 'syn_pre_ids' not in domain.heavy_tensors:
-        syn_pre = np.array([s.pre_neuron_id for s in domain.synapses], dtype=np.int32)
-        syn_post = np.array([s.post_neuron_id for s in domain.synapses], dtype=np.int32)
-        domain.heavy_tensors['syn_pre_ids'] = syn_pre
-        domain.heavy_tensors['syn_post_ids'] = syn_post
-        domain.heavy_tensors['syn_commit_states'] = np.array([s.commit_state for s in domain.synapses], dtype=np.int8)
+    # Fire counts (N,): kernels đếm trên tensor, sync_from ghi trả NeuronState.fire_count
+    if 'fire_counts' not in domain.heavy_tensors or domain.heavy_tensors['fire_counts'].shape[0] != N:
+         domain.heavy_tensors['fire_counts'] = np.array([n.fire_count for n in neurons], dtype=np.int64)
+
+    # NOTE: Synapse-aligned arrays (pre/post ids, fast/slow traces, commit
+    # state) giờ là các cột của domain.synapses — không còn copy vào heavy_tensors.
 
     # NEW (Phase 10.5): Derived Neuron Commitment
     if 'solidity_ratios' not in domain.heavy_tensors:
@@ -567,18 +933,17 @@ def sync_to_heavy_tensors(ctx: SNNSystemContext):
     domain.heavy_tensors['potentials'] = np.array([n.potential for n in neurons], dtype=np.float32)
     domain.heavy_tensors['last_fire_times'] = np.array([n.last_fire_time for n in neurons], dtype=np.int32)
     domain.heavy_tensors['thresholds'] = np.array([n.threshold for n in neurons], dtype=np.float32)
+    domain.heavy_tensors['fire_counts'] = np.array([n.fire_count for n in neurons], dtype=np.int64)
     
-    # 2. Weights (Expensive! Only sync if missing to avoid O(S) loop)
+    # 2. Weights (Only build if missing — O(S) numpy from connectome store)
     # We assume weights are primarily updated via Tensors (STDP) or valid if present.
     if 'weights' not in domain.heavy_tensors:
-        weights = np.zeros((N, N), dtype=np.float32)
-        for s in domain.synapses:
-             if s.pre_neuron_id < N and s.post_neuron_id < N:
-                  weights[s.pre_neuron_id, s.post_neuron_id] = s.weight
-        domain.heavy_tensors['weights'] = weights
+        backend = domain.heavy_tensors.get('weight_backend') or resolve_weight_backend(ctx.global_ctx, N)
+        domain.heavy_tensors['weights'] = _build_synapse_tensor(domain.synapses, N, 'weight', np.float32, backend)
     
     # 3. Prototypes & Potential Vectors
-    domain.heavy_tensors['prototypes'] = np.array([n.prototype_vector for n in neurons], dtype=np.float32)
+    # NOTE: set_prototypes chỉ tăng version khi prototypes đổi → similarity cache sống qua nhiều step
+    set_prototypes(domain.heavy_tensors, np.array([n.prototype_vector for n in neurons], dtype=np.float32))
     domain.heavy_tensors['potential_vectors'] = np.array([n.potential_vector for n in neurons], dtype=np.float32)
     domain.heavy_tensors['solidity_ratios'] = np.array([n.solidity_ratio for n in neurons], dtype=np.float32)
 
@@ -611,14 +976,15 @@ def sync_from_heavy_tensors(ctx: SNNSystemContext):
     pots = domain.heavy_tensors['potentials']
     lfts = domain.heavy_tensors.get('last_fire_times', [])
     pvecs = domain.heavy_tensors.get('potential_vectors', [])
-    pvecs = domain.heavy_tensors.get('potential_vectors', [])
     thresholds = domain.heavy_tensors.get('thresholds', [])
     solidity_ratios = domain.heavy_tensors.get('solidity_ratios', [])
+    fire_counts = domain.heavy_tensors.get('fire_counts', [])
     
     check_lft = len(lfts) > 0
     check_pvec = len(pvecs) > 0
     check_thresh = len(thresholds) > 0
     check_solidity = len(solidity_ratios) > 0
+    check_fire_count = len(fire_counts) > 0
     
     # 1. Sync State Variables
     for i, neuron in enumerate(domain.neurons):
@@ -641,37 +1007,15 @@ def sync_from_heavy_tensors(ctx: SNNSystemContext):
         # Update Solidity Ratio (Phase 10.5)
         if check_solidity:
              neuron.solidity_ratio = float(solidity_ratios[i])
+
+        # Update Fire Count (non-tensor metric trên objects)
+        if check_fire_count:
+            neuron.fire_count = int(fire_counts[i])
         
-    # NOTE: We do NOT sync weights back yet because Vectorized STDP is not implemented.
-    # If we vectorized STDP, we would sync weights back to domain.synapses.
-    
-    # NEW: Sync Traces & Fitness & Commitment Back (Partial Sync if they exist)
+    # 2. Sync Weights & Traces & Fitness & Commitment back to the connectome
+    # NOTE: Vectorized gather O(S) numpy — không còn vòng lặp qua synapse objects.
     if 'commit_states' in domain.heavy_tensors:
-         traces = domain.heavy_tensors.get('traces')
-         fitnesses = domain.heavy_tensors.get('fitnesses')
-         
-         # Commitment Tensors
-         commit_states = domain.heavy_tensors.get('commit_states')
-         consecutive_correct = domain.heavy_tensors.get('consecutive_correct')
-         consecutive_wrong = domain.heavy_tensors.get('consecutive_wrong')
-         
-         N = len(domain.neurons)
-         
-         for synapse in domain.synapses:
-             if synapse.pre_neuron_id < N and synapse.post_neuron_id < N:
-                 u, v = synapse.pre_neuron_id, synapse.post_neuron_id
-                 
-                 if traces is not None:
-                     synapse.trace = float(traces[u, v])
-                 if fitnesses is not None:
-                     synapse.fitness = float(fitnesses[u, v])
-                     
-                 if commit_states is not None:
-                     synapse.commit_state = int(commit_states[u, v])
-                 if consecutive_correct is not None:
-                     synapse.consecutive_correct = int(consecutive_correct[u, v])
-                 if consecutive_wrong is not None:
-                     synapse.consecutive_wrong = int(consecutive_wrong[u, v])
+        gather_synapse_tensors(domain)
 
 
 # ============================================================================
@@ -1,7 +1,5 @@
 # Models package
 from .gated_integration import GatedIntegrationNetwork
+from .replay_buffer import ReplayBuffer
 
-__all__ = ['GatedIntegrationNetwork']
-
-
-
+__all__ = ['GatedIntegrationNetwork', 'ReplayBuffer']
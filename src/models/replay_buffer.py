@@ -0,0 +1,103 @@
+"""
+Replay Buffer (Ring Buffer)
+===========================
+Bộ nhớ replay cấp phát trước cho Gated Integration Network: mỗi field của
+transition là một tensor liên tục (capacity, dim), push ghi đè vòng tròn,
+sample gather minibatch bằng index (không stack list Python).
+
+Transition: (obs, emotion, snn_state, action, reward,
+             next_obs, next_emotion, next_snn_state)
+
+Author: Do Huy Hoang
+Date: 2026-03-27
+"""
+import numpy as np
+import torch
+from typing import Dict, Optional
+
+
+class ReplayBuffer:
+    """
+    Ring buffer + lịch huấn luyện "train mỗi `train_every` transitions trên
+    minibatch `batch_size`" (sau khi có ít nhất `warmup` transitions).
+
+    NOTE: Index sample lấy từ np.random (seed theo experiment như các
+    process khác), không dùng torch RNG.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        obs_dim: int,
+        emotion_dim: int,
+        snn_state_dim: int,
+        batch_size: int = 32,
+        train_every: int = 4,
+        warmup: Optional[int] = None
+    ):
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise ValueError("ReplayBuffer capacity must be > 0")
+        self.batch_size = max(1, int(batch_size))
+        self.train_every = max(1, int(train_every))
+        self.warmup = max(self.batch_size, int(warmup) if warmup is not None else self.batch_size)
+
+        C = self.capacity
+        self.obs = torch.zeros((C, obs_dim), dtype=torch.float32)
+        self.emotion = torch.zeros((C, emotion_dim), dtype=torch.float32)
+        self.snn_state = torch.zeros((C, snn_state_dim), dtype=torch.float32)
+        self.action = torch.zeros(C, dtype=torch.int64)
+        self.reward = torch.zeros(C, dtype=torch.float32)
+        self.next_obs = torch.zeros((C, obs_dim), dtype=torch.float32)
+        self.next_emotion = torch.zeros((C, emotion_dim), dtype=torch.float32)
+        self.next_snn_state = torch.zeros((C, snn_state_dim), dtype=torch.float32)
+
+        self._pos = 0
+        self._size = 0
+        self.total_pushed = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(t.element_size() * t.nelement() for t in self._columns().values()))
+
+    def _columns(self) -> Dict[str, torch.Tensor]:
+        return {
+            'obs': self.obs, 'emotion': self.emotion, 'snn_state': self.snn_state,
+            'action': self.action, 'reward': self.reward,
+            'next_obs': self.next_obs, 'next_emotion': self.next_emotion,
+            'next_snn_state': self.next_snn_state,
+        }
+
+    def push(self, obs, emotion, snn_state, action: int, reward: float,
+             next_obs, next_emotion, next_snn_state):
+        """Ghi một transition vào slot kế tiếp (ghi đè slot cũ nhất khi đầy)."""
+        i = self._pos
+        for column, value in ((self.obs, obs), (self.emotion, emotion), (self.snn_state, snn_state),
+                              (self.next_obs, next_obs), (self.next_emotion, next_emotion),
+                              (self.next_snn_state, next_snn_state)):
+            column[i] = torch.as_tensor(value, dtype=torch.float32).reshape(-1)
+        self.action[i] = int(action)
+        self.reward[i] = float(reward)
+
+        self._pos = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total_pushed += 1
+
+    def should_train(self) -> bool:
+        """True khi đến lượt train (mỗi `train_every` push, sau warmup)."""
+        return self._size >= self.warmup and self.total_pushed % self.train_every == 0
+
+    def sample(self, batch_size: Optional[int] = None) -> Dict[str, torch.Tensor]:
+        """Minibatch ngẫu nhiên (có hoàn lại) dạng {field: tensor (B, ...)}."""
+        if self._size == 0:
+            raise ValueError("Cannot sample from an empty ReplayBuffer")
+        B = self.batch_size if batch_size is None else int(batch_size)
+        idx = torch.from_numpy(np.random.randint(0, self._size, size=B))
+        return {name: column.index_select(0, idx) for name, column in self._columns().items()}
+
+    def clear(self):
+        self._pos = 0
+        self._size = 0
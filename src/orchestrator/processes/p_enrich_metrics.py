@@ -53,6 +53,34 @@ def enrich_episode_metrics(ctx: OrchestratorSystemContext):
     else:
         metrics['avg_firing_rate'] = 0.0
 
+    # 2b. Checkpoint Writer (latency + queue depth của background writer)
+    writer = getattr(runner, 'checkpoint_writer', None)
+    if writer is not None:
+        metrics.update(writer.metrics())
+
+    # 2c. Process Latency (histogram theo agent → gộp population, reset mỗi episode)
+    profilers = {
+        agent.domain_ctx.agent_id: agent.domain_ctx.heavy_latency_profiler
+        for agent in runner.coordinator.agents
+        if getattr(agent.domain_ctx, 'heavy_latency_profiler', None) is not None
+    }
+    if profilers:
+        from theus.profiling import merge_histograms, top_functions
+        metrics['process_latency'] = {
+            name: hist.summary()
+            for name, hist in sorted(merge_histograms(profilers.values()).items())
+        }
+        capture = top_functions(profilers.values())
+        if capture:
+            metrics['process_profile'] = capture
+        metrics['process_latency_agents'] = {
+            str(agent_id): {
+                name: {'count': s['count'], 'total_ms': s['total_ms'], 'p99_us': s['p99_us']}
+                for name, s in profiler.snapshot(reset=True).items()
+            }
+            for agent_id, profiler in profilers.items()
+        }
+
     # 3. DEBUG: Memory Leak Diagnosis (Synapse Count & Spike Queue)
     total_synapses = 0
     total_spike_queue = 0
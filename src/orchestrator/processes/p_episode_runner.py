@@ -57,6 +57,11 @@ def run_single_episode(ctx: OrchestratorSystemContext):
         # Experiment Finished
         log(ctx, "info", f"Experiment {exp_name} completed all {total_episodes} episodes.")
         
+        # Đợi checkpoint background ghi xong trước khi chuyển experiment
+        writer = getattr(runner, 'checkpoint_writer', None)
+        if writer is not None:
+            writer.flush()
+        
         if bus: bus.emit("EXPERIMENT_DONE")
         
         # Update state for next experiment
@@ -4,8 +4,9 @@ from src.orchestrator.context import OrchestratorSystemContext
 from src.logger import log as system_log
 from src.utils.logger import ExperimentLogger 
 from src.coordination.multi_agent_coordinator import MultiAgentCoordinator
-from src.adapters.environment_adapter import EnvironmentAdapter
-from environment import GridWorld as ComplexMazeEnvV2
+from src.adapters.environment_adapter import EnvironmentAdapter, VectorEnvironmentAdapter
+from src.utils.checkpoint_writer import AsyncCheckpointWriter, cleanup_partial_checkpoints
+from environment import GridWorld as ComplexMazeEnvV2, VectorGridWorld
 
 import os
 import json
@@ -32,8 +33,16 @@ class FSMExperimentRunner:
         
         # 1. Setup Environment
         env_config = self.config.get('environment_config', {}) if 'environment_config' in self.config else self.config.get('environment', {})
-        self.env = ComplexMazeEnvV2(self.config) # GridWorld
-        self.adapter = EnvironmentAdapter(self.env)
+        # Vector mode: E maze độc lập (num_envs, hoặc một env cho mỗi layout trong
+        # environment_configs) chạy trong cùng coordinator, E×A agents mỗi tick
+        layouts = self.config.get('environment_configs') or []
+        num_envs = int(self.config.get('num_envs', len(layouts) or 1))
+        if num_envs > 1:
+            self.env = VectorGridWorld.from_settings(self.config, num_envs)
+            self.adapter = VectorEnvironmentAdapter(self.env)
+        else:
+            self.env = ComplexMazeEnvV2(self.config) # GridWorld
+            self.adapter = EnvironmentAdapter(self.env)
         
         # 2. Setup Contexts for Coordinator
         from src.core.context import GlobalContext
@@ -67,7 +76,8 @@ class FSMExperimentRunner:
                 setattr(snn_global_ctx, k, v)
         
         # 3. Setup Coordinator
-        self.coordinator = MultiAgentCoordinator(num_agents, global_ctx, snn_global_ctx)
+        total_agents = self.env.num_agents if num_envs > 1 else num_agents
+        self.coordinator = MultiAgentCoordinator(total_agents, global_ctx, snn_global_ctx)
         
         # 3. Setup Logger
         exp_name = os.path.basename(output_dir).replace("_checkpoints", "")
@@ -79,6 +89,15 @@ class FSMExperimentRunner:
             def end_episode(self): pass
         self.perf_monitor = PerfMonitor()
         
+        # 4b. Checkpoint Writer (background, atomic rename)
+        if os.path.isdir(output_dir):
+            cleanup_partial_checkpoints(output_dir)
+        self.checkpoint_writer = None
+        if self.config.get('async_checkpoint', True):
+            self.checkpoint_writer = AsyncCheckpointWriter(
+                max_pending=self.config.get('checkpoint_queue_depth', 2)
+            )
+        
         # 5. Revolution Config Injection
         if 'revolution_threshold' in config:
             snn_global_ctx.revolution_threshold = config['revolution_threshold']
@@ -1,7 +1,9 @@
 import os
+import time
 from theus.contracts import process
 from src.orchestrator.context import OrchestratorSystemContext
-from src.utils.snn_persistence import save_all_agents
+from src.utils.snn_persistence import snapshot_snn_agent
+from src.utils.checkpoint_writer import write_checkpoint_atomic
 from src.logger import log
 
 @process(
@@ -40,19 +42,28 @@ def save_periodic_checkpoint(ctx: OrchestratorSystemContext):
         
         # Get Contexts from all agents
         agents = runner.coordinator.agents
-        snn_contexts = [agent.snn_ctx for agent in agents]
-        rl_contexts = [agent.rl_ctx for agent in agents]
         
         # Output Dir
         checkpoint_dir = os.path.join(runner.output_dir, f"checkpoint_ep_{current_episode}")
         
-        # Save (V3: Pass rl_contexts to enable Neural Brain checkpoints)
-        save_all_agents(snn_contexts, checkpoint_dir, agents_rl_contexts=rl_contexts)
+        # Copy-on-snapshot: chỉ copy mảng ở đây, ghi đĩa ở background
+        # (V3: kèm rl_ctx để lưu Neural Brain weights)
+        start = time.perf_counter()
+        snapshots = [
+            snapshot_snn_agent(agent.snn_ctx, agent.rl_ctx, i)
+            for i, agent in enumerate(agents)
+        ]
+        snapshot_ms = (time.perf_counter() - start) * 1000
         
         # Save exploration rates to prevent Epsilon Lock
-        import json
         exp_rates = { str(i): agent.rl_ctx.domain_ctx.current_exploration_rate for i, agent in enumerate(agents) }
-        with open(os.path.join(checkpoint_dir, 'exploration_rates.json'), 'w') as f:
-            json.dump(exp_rates, f)
-            
-        log(ctx, "info", f"  [Checkpoint] Saved to {checkpoint_dir}")
+        extra_json = {'exploration_rates.json': exp_rates}
+        
+        writer = getattr(runner, 'checkpoint_writer', None)
+        if writer is not None:
+            writer.submit(checkpoint_dir, snapshots, extra_json, snapshot_ms=snapshot_ms)
+            log(ctx, "info", f"  [Checkpoint] Snapshot queued ({snapshot_ms:.1f} ms, "
+                             f"depth={writer.queue_depth}) -> {checkpoint_dir}")
+        else:
+            write_checkpoint_atomic(checkpoint_dir, snapshots, extra_json)
+            log(ctx, "info", f"  [Checkpoint] Saved to {checkpoint_dir}")
@@ -52,14 +52,18 @@ def prepare_sleep_cycle(ctx: OrchestratorSystemContext):
     }
 
 @process(
-    inputs=['domain_ctx', 'domain', 'domain.active_experiment_idx', 'domain.experiments', 'domain.sig_sleep_step'],
-    outputs=[],
+    inputs=['domain_ctx', 'domain', 'domain.active_experiment_idx', 'domain.experiments', 'domain.sig_sleep_step', 'domain.sig_sleep_duration'],
+    outputs=['domain.sig_sleep_step'],
     side_effects=['agents.dream'],
     errors=[]
 )
 def execute_dream_step(ctx: OrchestratorSystemContext):
     """
     Execute a single dream step for all agents.
+
+    With the fused sleep engine (snn_global_ctx.use_fused_sleep_engine), the
+    remaining steps of the sleep cycle run in one call and the step signal
+    jumps to the end so the dream loop exits after this iteration.
     """
     domain = ctx.domain
     active_idx = getattr(domain, 'active_experiment_idx', 0)
@@ -77,7 +81,14 @@ def execute_dream_step(ctx: OrchestratorSystemContext):
         return {}
 
     t = getattr(domain, 'sig_sleep_step', 0)
-    for agent in runner.coordinator.agents:
+    coordinator = runner.coordinator
+    if getattr(coordinator.snn_global_ctx, 'use_fused_sleep_engine', False):
+        duration = getattr(domain, 'sig_sleep_duration', 0)
+        # NOTE: advance_sleep_step cộng thêm 1 → sig_sleep_step > duration - 1, vòng dream kết thúc
+        coordinator.sleep(max(duration - t, 0))
+        return {'domain.sig_sleep_step': max(duration - 1, t)}
+
+    for agent in coordinator.agents:
         if hasattr(agent, 'dream_step'):
             agent.dream_step(t)
     
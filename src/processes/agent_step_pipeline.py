@@ -25,6 +25,16 @@ from src.processes.rl_snn_integration import execute_action_with_env, combine_re
 from src.processes.snn_recorder_process import process_record_snn_step
 from theus.contracts import process
 
+# SNN specific state: bare delta keys được ghi vào SNN Domain (còn lại → RL Domain)
+_SNN_DELTA_KEYS = ('current_time', 'metrics', 'heavy_tensors', 'spike_queue',
+                   'emotion_saturation_level', 'dampening_active')
+
+
+def _clean_delta_key(k: str) -> str:
+    # Handle prefixed keys from Theus Engine style
+    return k.replace('domain_ctx.', '').replace('snn_context.domain_ctx.', '')
+
+
 def _apply_delta(ctx: SystemContext, delta: dict):
     """
     Helper to manually merge process outputs into context.
@@ -39,76 +49,156 @@ def _apply_delta(ctx: SystemContext, delta: dict):
         snn_ctx = ctx.domain_ctx.snn_context
         
     for k, v in delta.items():
-        # Handle prefixed keys from Theus Engine style
-        clean_k = k.replace('domain_ctx.', '').replace('snn_context.domain_ctx.', '')
+        clean_k = _clean_delta_key(k)
         
         # Determine target: RL Domain or SNN Domain
-        # SNN specific state: current_time, metrics, heavy_tensors, spike_queue
-        snn_keys = ['current_time', 'metrics', 'heavy_tensors', 'spike_queue', 
-                    'emotion_saturation_level', 'dampening_active']
-        
-        if snn_ctx and clean_k in snn_keys:
+        if snn_ctx and clean_k in _SNN_DELTA_KEYS:
             # Update SNN Domain Context
             setattr(snn_ctx.domain_ctx, clean_k, v)
         else:
             # Update RL Domain Context
             setattr(ctx.domain_ctx, clean_k, v)
 
+
+def _snn_delta_path(key: str) -> str:
+    """
+    Context path mà _apply_delta ghi delta key vào (khi có snn_context) —
+    run_trusted dùng để audit delta theo đúng chỗ nó được áp dụng.
+    """
+    clean_k = _clean_delta_key(key)
+    if '.' in clean_k:
+        return key
+    if clean_k in _SNN_DELTA_KEYS:
+        return f'domain_ctx.snn_context.domain_ctx.{clean_k}'
+    return f'domain_ctx.{clean_k}'
+
+
+def _rl_delta_path(key: str) -> str:
+    """Như _snn_delta_path khi không có snn_context (mọi key → RL Domain)."""
+    clean_k = _clean_delta_key(key)
+    return key if '.' in clean_k else f'domain_ctx.{clean_k}'
+
+
+# Các process của Agent Step — RLAgent đăng ký engine.trust(...) cho từng stage
+# để bước được audit đối chiếu contract riêng của mỗi process.
+AGENT_STEP_STAGES = (
+    perception, monitor_safety_triggers, restore_snn_attention, modulate_snn_attention,
+    process_snn_cycle,
+    process_homeostasis, process_commitment, process_neural_darwinism, process_assimilate_ancestor,
+    compute_intrinsic_reward_snn, select_action_gated,
+    process_inject_viral_with_quarantine, process_quarantine_validation,
+    process_meta_homeostasis_fixed, process_periodic_resync, process_record_snn_step,
+)
+
+
+def _run_stages(ctx: SystemContext, stages, master_delta: dict = None, engine=None):
+    """
+    Chạy tuần tự các (process, kwargs), merge delta vào ctx.
+
+    NOTE: Có engine → mỗi process chạy qua engine.run_trusted (direct call;
+    bước được sample thì writes + delta keys — theo routing của _apply_delta —
+    được check với contract của chính process đó). Latency do profiler của engine ghi.
+    Không có engine: nếu domain_ctx có heavy_latency_profiler, mỗi process
+    được ghi call count + latency vào histogram theo tên process.
+    """
+    profiler = getattr(ctx.domain_ctx, 'heavy_latency_profiler', None)
+    delta_path = _snn_delta_path if getattr(ctx.domain_ctx, 'snn_context', None) else _rl_delta_path
+    for proc_func, kwargs in stages:
+        if engine is not None:
+            delta = engine.run_trusted(proc_func, ctx=ctx, delta_path=delta_path, **kwargs)
+        elif profiler is None:
+            delta = proc_func(ctx, **kwargs)
+        else:
+            delta = profiler.call(proc_func.__name__, proc_func, ctx, **kwargs)
+        if delta:
+            _apply_delta(ctx, delta)
+            if master_delta is not None:
+                master_delta.update(delta)
+
+
+def run_agent_pre_snn_stage(ctx: SystemContext, env_adapter=None, master_delta: dict = None, engine=None):
+    """
+    Steps 1-3 (Perception, Safety, Attention) — mọi thứ trước SNN Cycle.
+
+    NOTE: Tách riêng để coordinator có thể chạy SNN Cycle của cả population
+    trong một batch (PopulationSNNKernel) giữa pre và post stage.
+    """
+    _run_stages(ctx, [
+        # 1. Perception
+        (perception, {'env_adapter': env_adapter}),
+        # 2. SNN Safety Checks
+        (monitor_safety_triggers, {}),
+        # 3. Attention Modulation
+        (restore_snn_attention, {}),
+        (modulate_snn_attention, {}),
+    ], master_delta, engine)
+
+
+def run_agent_pre_action_stage(ctx: SystemContext, master_delta: dict = None, engine=None):
+    """Steps 5-7a (Homeostasis → Intrinsic Reward) — sau SNN Cycle, trước chọn action."""
+    _run_stages(ctx, [
+        # 5. Fast Homeostasis
+        (process_homeostasis, {}),
+        # 6. Advanced Features (Post-Cycle)
+        (process_commitment, {}),
+        (process_neural_darwinism, {}),
+        (process_assimilate_ancestor, {}),
+        # 7. RL Decision Making (reward nội sinh)
+        (compute_intrinsic_reward_snn, {}),
+    ], master_delta, engine)
+
+
+def run_agent_post_action_stage(ctx: SystemContext, master_delta: dict = None, engine=None):
+    """Steps 8-9 (Social / Meta → Recording) — sau khi đã chọn action."""
+    _run_stages(ctx, [
+        # 8. Social / Meta (Sandbox)
+        (process_inject_viral_with_quarantine, {}),
+        (process_quarantine_validation, {}),
+        (process_meta_homeostasis_fixed, {}),
+        (process_periodic_resync, {}),
+        # 9. Recording
+        (process_record_snn_step, {}),
+    ], master_delta, engine)
+
+
+def run_agent_post_snn_stage(ctx: SystemContext, master_delta: dict = None, engine=None):
+    """
+    Steps 5-9 (Homeostasis → Recording) — mọi thứ sau SNN Cycle.
+
+    NOTE: Tách quanh select_action_gated để coordinator có thể chọn action
+    cho cả population trong một forward (BatchedPolicyInference).
+    """
+    run_agent_pre_action_stage(ctx, master_delta, engine)
+    # 7. RL Decision Making (action)
+    _run_stages(ctx, [(select_action_gated, {})], master_delta, engine)
+    run_agent_post_action_stage(ctx, master_delta, engine)
+
+
 # Pipeline Function
 @process(
     inputs=['domain_ctx', 'domain_ctx.snn_context', 'domain_ctx.env_adapter'],
     outputs=['domain_ctx', 'domain_ctx.snn_context'],
 )
-def run_agent_step_pipeline(ctx: SystemContext, env_adapter=None):
+def run_agent_step_pipeline(ctx: SystemContext, env_adapter=None, engine=None):
     """
     Executes the full Agent Step Pipeline (SNN + RL).
     Order matches `workflows/agent_main.yaml`.
     
     COMPOSITE PROCESS: This is now a single transaction to minimize Theus overhead.
+    engine: nếu có, từng stage chạy qua engine.run_trusted (sampled contract audit
+    theo contract của stage, không phải contract rộng của composite này).
     Returns: Combined delta of all sub-processes for the Engine to apply.
     """
     master_delta = {}
 
-    def _execute_and_merge(proc_func, *args, **kwargs):
-        delta = proc_func(ctx, *args, **kwargs)
-        if delta:
-            _apply_delta(ctx, delta)
-            master_delta.update(delta)
-        return delta
-
-    # 1. Perception
-    _execute_and_merge(perception, env_adapter=env_adapter)
-    
-    # 2. SNN Safety Checks
-    _execute_and_merge(monitor_safety_triggers)
-    
-    # 3. Attention Modulation
-    _execute_and_merge(restore_snn_attention)
-    _execute_and_merge(modulate_snn_attention)
+    # 1-3. Perception, Safety, Attention
+    run_agent_pre_snn_stage(ctx, env_adapter=env_adapter, master_delta=master_delta, engine=engine)
     
     # 4. SNN Cycle (Composite)
-    _execute_and_merge(process_snn_cycle)
-    
-    # 5. Fast Homeostasis
-    _execute_and_merge(process_homeostasis)
-    
-    # 6. Advanced Features (Post-Cycle)
-    _execute_and_merge(process_commitment)
-    _execute_and_merge(process_neural_darwinism)
-    _execute_and_merge(process_assimilate_ancestor)
-    
-    # 7. RL Decision Making
-    _execute_and_merge(compute_intrinsic_reward_snn)
-    _execute_and_merge(select_action_gated)
-    
-    # 8. Social / Meta (Sandbox)
-    _execute_and_merge(process_inject_viral_with_quarantine)
-    _execute_and_merge(process_quarantine_validation)
-    _execute_and_merge(process_meta_homeostasis_fixed)
-    _execute_and_merge(process_periodic_resync)
+    _run_stages(ctx, [(process_snn_cycle, {})], master_delta, engine)
     
-    # 9. Recording
-    _execute_and_merge(process_record_snn_step)
+    # 5-9. Homeostasis → Recording
+    run_agent_post_snn_stage(ctx, master_delta=master_delta, engine=engine)
 
     # CRITICAL: Return the full objects to ensure nested mutations are persisted.
     # Theus Engine will merge these back into the agent's official state record.
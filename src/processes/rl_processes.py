@@ -12,6 +12,9 @@ from theus.contracts import process
 from src.core.context import SystemContext
 from typing import Dict, Any, Union, Mapping, MutableSequence
 
+# Discount factor của Bellman target (Neural Brain)
+GAMMA = 0.95
+
 # ------------------------------------------------------------------------------
 # Helper Functions (Pure Logic)
 # ------------------------------------------------------------------------------
@@ -123,39 +126,16 @@ def observation_to_state_key(obs: Union[Mapping[str, Any], np.ndarray, torch.Ten
     # Fallback default
     return "0,0"
 
-# ------------------------------------------------------------------------------
-# POP Processes
-# ------------------------------------------------------------------------------
-
-@process(
-    inputs=['domain_ctx', 
-        'domain_ctx.current_observation',
-        'domain_ctx.heavy_snn_emotion_vector',
-        'domain_ctx.heavy_snn_state_vector',
-        'domain_ctx.current_exploration_rate',
-        'domain_ctx.heavy_gated_network'
-    ],
-    outputs=['domain_ctx', 'domain_ctx.last_action', 'domain_ctx.heavy_last_q_values'],
-    side_effects=[]
-)
-def select_action_gated(ctx: SystemContext):
+def prepare_action_inputs(domain, net):
     """
-    Select action using Neural Brain (Gated Integration Network).
-    V3: Tabular Q-Table fallback removed.
+    Chuẩn bị input cho Neural Brain + exploration rate đã điều chỉnh theo cảm xúc.
+    Dùng chung cho select_action_gated và BatchedPolicyInference.
+
+    Returns:
+        (obs_tensor, emo_tensor, snn_state_tensor, adjusted_exploration)
     """
-    obs = ctx.domain_ctx.current_observation
-    emotion = ctx.domain_ctx.heavy_snn_emotion_vector
-    snn_state = ctx.domain_ctx.heavy_snn_state_vector
-    
-    # 1. Neural Network Check
-    net = ctx.domain_ctx.heavy_gated_network
-    if net is None:
-        ctx.log("CRITICAL: GatedIntegrationNetwork not found. Falling back to random.", level="error")
-        action = np.random.randint(0, 8)
-        return {
-            'last_action': action,
-            'heavy_last_q_values': torch.tensor([0.0] * 8).detach()
-        }
+    emotion = domain.heavy_snn_emotion_vector
+    snn_state = domain.heavy_snn_state_vector
 
     # 2. Emotion Tensor Preparation (V3: No more manual Q-table fallback)
     if emotion is None:
@@ -174,7 +154,7 @@ def select_action_gated(ctx: SystemContext):
             emotion_magnitude = 0.0
 
     # 3. Dynamic Exploration
-    adjusted_exploration = ctx.domain_ctx.current_exploration_rate * (1.0 + 0.2 * emotion_magnitude)
+    adjusted_exploration = domain.current_exploration_rate * (1.0 + 0.2 * emotion_magnitude)
     adjusted_exploration = min(adjusted_exploration, 1.0)
     
     # SNN State Tensor Preparation
@@ -191,25 +171,85 @@ def select_action_gated(ctx: SystemContext):
             state_dim = net.snn_state_dim if hasattr(net, 'snn_state_dim') else 100
             snn_state_tensor = torch.zeros(state_dim, dtype=torch.float32)
 
-    # 4. Neural Q-Value Prediction
-    obs_tensor = observation_to_tensor(obs)
+    obs_tensor = observation_to_tensor(domain.current_observation)
+    return obs_tensor, emo_tensor, snn_state_tensor, adjusted_exploration
+
+
+def choose_action(q_values: torch.Tensor, adjusted_exploration: float) -> int:
+    """Epsilon-greedy trên Q-values (thứ tự gọi np.random giữ như cũ)."""
+    if np.random.rand() < adjusted_exploration:
+        return np.random.randint(0, 8)
+    return int(np.argmax(q_values.numpy()))
+
+
+def train_gated_batch(net, opt, batch: Dict[str, torch.Tensor], gamma: float = GAMMA) -> float:
+    """
+    Một bước Adam trên minibatch replay (Bellman target như update_q_learning,
+    batch hóa: một forward/backward cho B transitions). Trả về loss.
+    """
+    q_values = net(batch['obs'], batch['emotion'], batch['snn_state'])
+    if q_values.dim() == 1:
+        # NOTE: Network squeeze khi batch=1
+        q_values = q_values.unsqueeze(0)
+    current_q = q_values.gather(1, batch['action'].unsqueeze(1)).squeeze(1)
     
+    with torch.no_grad():
+        next_q = net(batch['next_obs'], batch['next_emotion'], batch['next_snn_state'])
+        if next_q.dim() == 1:
+            next_q = next_q.unsqueeze(0)
+        target_q = batch['reward'] + gamma * next_q.max(dim=1).values
+    
+    loss = torch.nn.functional.mse_loss(current_q, target_q)
+    opt.zero_grad()
+    loss.backward()
+    opt.step()
+    return float(loss.item())
+
+
+# ------------------------------------------------------------------------------
+# POP Processes
+# ------------------------------------------------------------------------------
+
+@process(
+    inputs=['domain_ctx', 
+        'domain_ctx.current_observation',
+        'domain_ctx.heavy_snn_emotion_vector',
+        'domain_ctx.heavy_snn_state_vector',
+        'domain_ctx.current_exploration_rate',
+        'domain_ctx.heavy_gated_network'
+    ],
+    outputs=['domain_ctx', 'domain_ctx.last_action', 'domain_ctx.heavy_last_q_values'],
+    side_effects=[]
+)
+def select_action_gated(ctx: SystemContext):
+    """
+    Select action using Neural Brain (Gated Integration Network).
+    V3: Tabular Q-Table fallback removed.
+    """
+    # 1. Neural Network Check
+    net = ctx.domain_ctx.heavy_gated_network
+    if net is None:
+        ctx.log("CRITICAL: GatedIntegrationNetwork not found. Falling back to random.", level="error")
+        action = np.random.randint(0, 8)
+        return {
+            'last_action': action,
+            'heavy_last_q_values': torch.tensor([0.0] * 8).detach()
+        }
+
+    obs_tensor, emo_tensor, snn_state_tensor, adjusted_exploration = prepare_action_inputs(ctx.domain_ctx, net)
+
+    # 4. Neural Q-Value Prediction
     net.eval()
     with torch.no_grad():
         q_values_tensor = net(obs_tensor, emo_tensor, snn_state_tensor)
     net.train()
-    
-    q_values_list = q_values_tensor.tolist()
 
     # 5. Action Selection
-    if np.random.rand() < adjusted_exploration:
-        action = np.random.randint(0, 8)
-    else:
-        action = int(np.argmax(q_values_list))
+    action = choose_action(q_values_tensor, adjusted_exploration)
     
     return {
         'last_action': action,
-        'heavy_last_q_values': torch.tensor(q_values_list, dtype=torch.float32).detach()
+        'heavy_last_q_values': q_values_tensor.detach().clone()
     }
 
 
@@ -225,6 +265,7 @@ def select_action_gated(ctx: SystemContext):
         'domain_ctx.heavy_snn_emotion_vector',
         'domain_ctx.heavy_previous_snn_state_vector',
         'domain_ctx.heavy_snn_state_vector',
+        'domain_ctx.heavy_replay_buffer',
         'domain_ctx.metrics'
     ],
     outputs=['domain_ctx', 
@@ -291,6 +332,28 @@ def update_q_learning(ctx: SystemContext):
     state_tensor = observation_to_tensor(obs_prev)
     next_state_tensor = observation_to_tensor(obs_next)
     
+    # 2b. Replay Mode: lưu transition, train minibatch theo lịch
+    replay = ctx.domain_ctx.heavy_replay_buffer
+    if replay is not None:
+        replay.push(state_tensor, prev_emo, prev_snn_state, action, reward,
+                    next_state_tensor, curr_emo, curr_snn_state)
+        
+        # TD-error của transition hiện tại vẫn cần cho Dopamine (SNN)
+        with torch.no_grad():
+            q_values = net(state_tensor, prev_emo, prev_snn_state)
+            next_q_values = net(next_state_tensor, curr_emo, curr_snn_state)
+            td_error = float(reward + GAMMA * torch.max(next_q_values) - q_values[action])
+        
+        metrics = dict(ctx.domain_ctx.metrics)
+        metrics['avg_q_predicted'] = float(torch.mean(q_values).item())
+        if replay.should_train():
+            metrics['neural_loss'] = train_gated_batch(net, opt, replay.sample())
+        
+        return {
+            'td_error': td_error,
+            'metrics': metrics
+        }
+    
     # Forward Pass
     q_values = net(state_tensor, prev_emo, prev_snn_state)
     current_q_val = q_values[action]
@@ -299,8 +362,7 @@ def update_q_learning(ctx: SystemContext):
     with torch.no_grad():
         next_q_values = net(next_state_tensor, curr_emo, curr_snn_state)
         max_next_q = torch.max(next_q_values)
-        gamma = 0.95
-        target_q_val = torch.tensor(reward, dtype=torch.float32) + gamma * max_next_q
+        target_q_val = torch.tensor(reward, dtype=torch.float32) + GAMMA * max_next_q
     
     # Backpropagation
     loss = torch.nn.functional.mse_loss(current_q_val, target_q_val)
@@ -8,7 +8,8 @@ Date: 2025-12-25
 """
 import numpy as np
 from theus.contracts import process
-from src.core.snn_context_theus import SNNSystemContext
+from src.core.connectome import AncestorWeights
+from src.core.snn_context_theus import SNNSystemContext, gather_synapse_tensors
 from src.core.context import SystemContext
 from typing import List
 
@@ -287,6 +288,57 @@ def _lateral_inhibition_vectorized(ctx: SystemContext):
 # Phase 11: Neural Darwinism v2 — Monotonic Additive Plasticity
 # ============================================================================
 
+def _synaptogenesis_candidates(active_ids: np.ndarray, cluster_radius: int, prototypes,
+                               cosine_sim_threshold: float, store, N: int):
+    """
+    Các cặp (pre, post) lọt Dual-Gate và chưa có synapse, vectorized.
+
+    - Cổng 1 (ID Proximity): band |a - b| <= CLUSTER_RADIUS qua searchsorted
+      trên active ids đã sort — chỉ sinh O(A × band) cặp thay vì A².
+    - Cổng 2 (Cosine): một matmul Gram (A, A) trên prototypes của active neurons.
+    - Membership: sorted keys (pre * N + post) của các cạnh giữa active neurons.
+
+    Thứ tự trả về: (a, b) tăng dần — khớp vòng lặp lồng cũ trên domain.neurons.
+    """
+    ids = np.sort(np.asarray(active_ids, dtype=np.int64))
+    A = len(ids)
+    lo = np.searchsorted(ids, ids - cluster_radius, side='left')
+    hi = np.searchsorted(ids, ids + cluster_radius, side='right')
+    counts = hi - lo
+    a_idx = np.repeat(np.arange(A, dtype=np.int64), counts)
+    offsets = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    b_idx = np.repeat(lo, counts) + offsets
+    keep = a_idx != b_idx
+    a_idx, b_idx = a_idx[keep], b_idx[keep]
+
+    if prototypes is not None and len(a_idx) > 0:
+        protos = np.asarray(prototypes[ids], dtype=np.float64)
+        norms = np.linalg.norm(protos, axis=1)
+        gram = protos @ protos.T
+        cosine_sim = gram[a_idx, b_idx] / (norms[a_idx] * norms[b_idx] + 1e-8)
+        passed = cosine_sim >= cosine_sim_threshold
+        a_idx, b_idx = a_idx[passed], b_idx[passed]
+
+    pre, post = ids[a_idx], ids[b_idx]
+    if len(pre) == 0:
+        return pre, post
+
+    # Cạnh đã tồn tại — chỉ cần xét các cạnh có cả hai đầu là active neuron
+    is_active = np.zeros(N, dtype=bool)
+    is_active[ids[ids < N]] = True
+    e_pre, e_post = store.pre_ids.astype(np.int64), store.post_ids.astype(np.int64)
+    in_range = (e_pre < N) & (e_post < N) & store.alive
+    among_active = np.flatnonzero(in_range)
+    among_active = among_active[is_active[e_pre[among_active]] & is_active[e_post[among_active]]]
+    existing = np.unique(e_pre[among_active] * N + e_post[among_active])
+
+    keys = pre * N + post
+    hit = np.searchsorted(existing, keys)
+    hit[hit == len(existing)] = 0
+    fresh = existing[hit] != keys if len(existing) else np.ones(len(keys), dtype=bool)
+    return pre[fresh], post[fresh]
+
+
 @process(
     inputs=['domain_ctx.snn_context.domain_ctx.synapses',
             'domain_ctx.snn_context.domain_ctx.neurons',
@@ -312,7 +364,10 @@ def process_neural_darwinism(
     2. Targeted Synaptogenesis — Mọc rễ mới qua Dual-Gate (ID Proximity + Cosine)
     3. Dynamic Skull Limit — Dừng mọc khi chạm trần 30% đồ thị
     """
-    from src.core.snn_context_theus import SynapseState, ensure_heavy_tensors_initialized
+    from src.core.snn_context_theus import (
+        ensure_heavy_tensors_initialized, gather_synapse_tensors,
+        add_synapses, remove_synapses, compact_connectome
+    )
     # Resolve SNN Context
     snn_ctx = ctx
     if hasattr(ctx, 'domain_ctx') and hasattr(ctx.domain_ctx, 'snn_context') and ctx.domain_ctx.snn_context is not None:
@@ -338,12 +393,14 @@ def process_neural_darwinism(
         cluster_radius_ratio = float(getattr(global_ctx, 'cluster_radius_ratio', 0.1))
         cosine_sim_threshold = float(getattr(global_ctx, 'cosine_similarity_threshold', 0.3))
         max_connectivity_ratio = float(getattr(global_ctx, 'max_connectivity_ratio', 0.3))
+        compaction_ratio = float(getattr(global_ctx, 'connectome_compaction_ratio', 0.25))
     except (TypeError, AttributeError):
         silent_death_threshold = 0.001
         synaptogenesis_prob = 0.01
         cluster_radius_ratio = 0.1
         cosine_sim_threshold = 0.3
         max_connectivity_ratio = 0.3
+        compaction_ratio = 0.25
 
     N = len(domain.neurons)
     # NOTE: Dynamic Skull Limit — trần tỷ lệ thuận với số neuron, không hardcode.
@@ -356,23 +413,20 @@ def process_neural_darwinism(
     # vì đóng góp toán học của nó lên Input vector = 0.
     before_count = len(domain.synapses)
     
-    # NOTE: Đọc Weight từ heavy_tensors (authoritative source) thay vì object field
-    # để đảm bảo tính nhất quán sau khi STDP vectorized đã cập nhật ma trận.
+    # NOTE: Gather Weight/commit state từ heavy_tensors (authoritative source)
+    # vào connectome store trước khi đổi cấu trúc, để không mất những gì
+    # STDP/Commitment vectorized đã cập nhật kể từ lần sync cuối.
     ensure_heavy_tensors_initialized(snn_ctx)
-    weights_matrix = domain.heavy_tensors.get('weights')
-    
-    if weights_matrix is not None:
-        survivors = []
-        for s in domain.synapses:
-            if s.pre_neuron_id < N and s.post_neuron_id < N:
-                w = weights_matrix[s.pre_neuron_id, s.post_neuron_id]
-                if w > silent_death_threshold:
-                    survivors.append(s)
-                # NOTE: Synapse với w <= threshold bị loại bỏ tĩnh lặng.
-                # Không gây sốc vì 0.001 * spike ≈ 0.
-            else:
-                survivors.append(s)  # Giữ lại nếu index out-of-range (safety)
-        domain.synapses = survivors
+    gather_synapse_tensors(domain)
+    store = domain.synapses
+    
+    if 'weights' in domain.heavy_tensors and len(store) > 0:
+        pre_ids, post_ids = store.pre_ids, store.post_ids
+        in_range = (pre_ids < N) & (post_ids < N) & store.alive
+        # NOTE: Synapse với w <= threshold bị loại bỏ tĩnh lặng.
+        # Không gây sốc vì 0.001 * spike ≈ 0. Out-of-range được giữ lại (safety).
+        # Tombstone O(k) — tensors được vá tại chỗ, không rebuild.
+        remove_synapses(domain, np.flatnonzero(in_range & (store.weights <= silent_death_threshold)))
     
     gc_count = before_count - len(domain.synapses)
 
@@ -382,80 +436,36 @@ def process_neural_darwinism(
     
     if current_synapse_count < MAX_SYNAPSES:
         # Bước 2a: Tìm Active Neurons (bắn gai gần đây)
-        active_neurons = [
-            n for n in domain.neurons
-            if (domain.current_time - n.last_fire_time) < darwinism_interval
-        ]
-
-        if len(active_neurons) > 1:
-            # Bước 2b: Pre-compute dữ liệu cho Dual-Gate
-            existing_pairs = set(
-                (s.pre_neuron_id, s.post_neuron_id) for s in domain.synapses
+        neuron_ids = np.fromiter((n.neuron_id for n in domain.neurons), dtype=np.int64, count=N)
+        last_fire = np.fromiter((n.last_fire_time for n in domain.neurons), dtype=np.int64, count=N)
+        active_ids = neuron_ids[(domain.current_time - last_fire) < darwinism_interval]
+
+        if len(active_ids) > 1:
+            # Bước 2b: Dual-Gate vectorized → toàn bộ cặp eligible (thứ tự (a, b) tăng dần)
+            cand_pre, cand_post = _synaptogenesis_candidates(
+                active_ids, CLUSTER_RADIUS, domain.heavy_tensors.get('prototypes'),
+                cosine_sim_threshold, store, N
             )
-            prototypes = domain.heavy_tensors.get('prototypes')  # (N, D)
-            
-            # NOTE: Tính max_syn_id 1 lần duy nhất để gán ID cho synapse mới
-            max_syn_id = 0
-            if domain.synapses:
-                max_syn_id = max(s.synapse_id for s in domain.synapses)
-
-            for n_a in active_neurons:
-                if current_synapse_count + len(new_synapses) >= MAX_SYNAPSES:
-                    break  # Sọ não đầy
-                    
-                for n_b in active_neurons:
-                    if n_a.neuron_id == n_b.neuron_id:
-                        continue
-                    
-                    # === CỔNG 1: Vật lý (ID Proximity) — O(1) lọc sơ bộ ===
-                    if abs(n_a.neuron_id - n_b.neuron_id) > CLUSTER_RADIUS:
-                        continue
-                    
-                    if (n_a.neuron_id, n_b.neuron_id) in existing_pairs:
-                        continue
-                    
-                    if current_synapse_count + len(new_synapses) >= MAX_SYNAPSES:
-                        break
-
-                    # === CỔNG 2: Ngữ nghĩa (Cosine Similarity) ===
-                    # NOTE: Chỉ tính trên ~10% cặp đã lọt Cổng 1, tiết kiệm CPU.
-                    if prototypes is not None:
-                        proto_a = prototypes[n_a.neuron_id]
-                        proto_b = prototypes[n_b.neuron_id]
-                        dot_product = np.dot(proto_a, proto_b)
-                        norm_product = (np.linalg.norm(proto_a) * np.linalg.norm(proto_b)) + 1e-8
-                        cosine_sim = dot_product / norm_product
-                        if cosine_sim < cosine_sim_threshold:
-                            continue
-                    
-                    # === Cả hai Cổng đều mở → Xác suất mọc ===
-                    if np.random.random() < synaptogenesis_prob:
-                        max_syn_id += 1
-                        syn = SynapseState(
-                            synapse_id=max_syn_id,
-                            pre_neuron_id=n_a.neuron_id,
-                            post_neuron_id=n_b.neuron_id,
-                            weight=np.random.uniform(0.3, 0.5)
-                        )
-                        new_synapses.append(syn)
-                        existing_pairs.add((n_a.neuron_id, n_b.neuron_id))
+
+            # === Cả hai Cổng đều mở → Xác suất mọc (một lần Bernoulli cho mọi cặp) ===
+            # NOTE: Skull limit giữ nguyên ngữ nghĩa tuần tự: lấy các cặp thành
+            # công ĐẦU TIÊN theo thứ tự duyệt cho tới khi chạm trần.
+            if len(cand_pre) > 0:
+                grown = np.flatnonzero(np.random.random(len(cand_pre)) < synaptogenesis_prob)
+                grown = grown[:MAX_SYNAPSES - current_synapse_count]
+                new_synapses = list(zip(
+                    cand_pre[grown].tolist(), cand_post[grown].tolist(),
+                    np.random.uniform(0.3, 0.5, size=len(grown)).tolist()
+                ))
 
     if new_synapses:
-        domain.synapses.extend(new_synapses)
-
-    # === PART 3: TENSOR RESYNC SIGNAL ===
-    # NOTE: Nếu có synapse bị GC hoặc mọc mới, buộc Tensor Engine re-init
-    # để ma trận (N,N) và các index arrays (S,) được cập nhật kích thước mới.
-    if gc_count > 0 or len(new_synapses) > 0:
-        for key in ['syn_pre_ids', 'syn_post_ids', 'syn_commit_states',
-                    '_post_synapse_map', '_fast_traces', '_slow_traces',
-                    'traces', 'fitnesses', 'commit_states',
-                    'consecutive_correct', 'consecutive_wrong']:
-            if key in domain.heavy_tensors:
-                del domain.heavy_tensors[key]
-        # NOTE: Buộc re-build weights matrix từ danh sách synapses mới
-        if 'weights' in domain.heavy_tensors:
-            del domain.heavy_tensors['weights']
+        new_pre, new_post, new_w = zip(*new_synapses)
+        add_synapses(domain, new_pre, new_post, weight=new_w)
+
+    # === PART 3: TOMBSTONE COMPACTION ===
+    # NOTE: GC/mọc mới đã vá tensors tại chỗ (slot chết được tái sử dụng).
+    # Chỉ compact (remap O(S)) khi tombstones vượt ngưỡng.
+    compact_connectome(domain, compaction_ratio)
 
     # === METRICS ===
     new_metrics = dict(domain.metrics)
@@ -467,7 +477,7 @@ def process_neural_darwinism(
     new_metrics['accum_darwinism_reward'] = 0.0  # Reset for next interval
 
     return {
-        'synapses': list(domain.synapses),
+        'synapses': domain.synapses,
         'neurons': domain.neurons,
         'metrics': new_metrics,
         'heavy_tensors': domain.heavy_tensors
@@ -551,10 +561,12 @@ def process_revolution_protocol(
     # Compute ancestor performance
     if not domain.ancestor_weights:
         # Initialize ancestor
-        ancestor_weights = {
-            s.synapse_id: s.weight
-            for s in domain.synapses[:100]  # Sample
-        }
+        gather_synapse_tensors(domain)
+        sample = domain.synapses.live_slots()[:100]  # Sample
+        store = domain.synapses
+        ancestor_weights = AncestorWeights.from_arrays(
+            store.pre_ids[sample], store.post_ids[sample], store.weights[sample]
+        )
         return {'ancestor_weights': ancestor_weights}
     
     # 3. Trigger revolution
@@ -591,18 +603,14 @@ def process_revolution_protocol(
             elite_count = max(1, int(len(all_perfs) * top_elite))
             elite_indices = [idx for idx, _ in all_perfs[:elite_count]]
             
-            # 5. Compute new ancestor
-            new_ancestor = {}
-            for syn_id in domain.ancestor_weights.keys():
-                elite_weights = []
-                for idx in elite_indices:
-                    elite_ctx = population_contexts[idx]
-                    for syn in elite_ctx.domain_ctx.synapses:
-                        if syn.synapse_id == syn_id:
-                            elite_weights.append(syn.weight)
-                
-                if elite_weights:
-                    new_ancestor[syn_id] = np.mean(elite_weights)
+            # 5. Compute new ancestor: masked mean theo (pre, post) qua elites,
+            # giới hạn trong các synapses ancestor đang theo dõi
+            elite_stores = []
+            for idx in elite_indices:
+                elite_domain = population_contexts[idx].domain_ctx
+                gather_synapse_tensors(elite_domain)
+                elite_stores.append(elite_domain.synapses)
+            new_ancestor = AncestorWeights.from_stores(elite_stores).restrict_to(domain.ancestor_weights)
             
             # Update metrics
             new_metrics = dict(domain.metrics)
@@ -643,16 +651,46 @@ def _revolution_impl(
 # Phase 12.5: Ancestor Assimilation (Theus V2)
 # ============================================================================
 
+def _ancestor_targets(domain, ancestor, sparse: bool):
+    """
+    (index, targets) aligned với weight tensor cho các synapses có trong ancestor:
+    index = slots (S,)-aligned (sparse) | [pre; post] (2, k) (dense).
+
+    NOTE: Cache theo (ancestor.version, connectome version) — ancestor chỉ đổi
+    khi có revolution, nên mỗi step chỉ còn gather/blend/scatter.
+    """
+    t = domain.heavy_tensors
+    store = domain.synapses
+    key = (ancestor.version, store.version, sparse)
+    if t.get('ancestor_key') != key:
+        live = store.live_slots()
+        pre, post = store.pre_ids[live], store.post_ids[live]
+        found, targets = ancestor.lookup(pre, post)
+        if sparse:
+            index = live[found]
+        else:
+            N = len(domain.neurons)
+            found &= (pre < N) & (post < N)
+            index = np.stack([pre[found], post[found]]).astype(np.int64)
+        t['ancestor_index'] = index
+        t['ancestor_targets'] = targets[found]
+        t['ancestor_key'] = key
+    return t['ancestor_index'], t['ancestor_targets']
+
+
 @process(
     inputs=['domain_ctx', 
         'domain_ctx.snn_context',
         'domain_ctx.snn_context.domain_ctx.synapses',
+        'domain_ctx.snn_context.domain_ctx.heavy_tensors',
         'domain_ctx.snn_context.domain_ctx.ancestor_weights',
         'domain_ctx.snn_context.domain_ctx.metrics',
         'domain_ctx.snn_context.global_ctx.assimilation_rate', # New param
         'domain_ctx.snn_context.global_ctx.diversity_noise'    # New param
     ],
-    outputs=['domain_ctx.snn_context.domain_ctx.synapses', 'domain_ctx.snn_context.domain_ctx.metrics'],
+    outputs=['domain_ctx.snn_context.domain_ctx.synapses',
+             'domain_ctx.snn_context.domain_ctx.heavy_tensors',
+             'domain_ctx.snn_context.domain_ctx.metrics'],
     side_effects=[]
 )
 def process_assimilate_ancestor(ctx: SystemContext):
@@ -661,13 +699,13 @@ def process_assimilate_ancestor(ctx: SystemContext):
     
     Logic:
     1. Check if ancestor_weights available.
-    2. Iterate synapses.
-    3. If FLUID (not SOLID), soft-update towards ancestor.
+    2. Look up ancestor targets aligned with the weight tensor (cached).
+    3. If FLUID (not SOLID), soft-update towards ancestor (one masked blend).
     4. Add noise to maintain diversity.
     
     Eq: w = (1-alpha)*w + alpha*ancestor_w + N(0, noise)
     """
-    from src.core.snn_context_theus import COMMIT_STATE_SOLID
+    from src.core.snn_context_theus import COMMIT_STATE_SOLID, is_sparse_backend
     
     # Resolve SNN Context (Handle nested RL Context vs Standalone SNN Context)
     snn_ctx = ctx
@@ -689,30 +727,34 @@ def process_assimilate_ancestor(ctx: SystemContext):
         alpha = 0.05
         noise_std = 0.02
     
-    new_synapses = []
-    assimilated_count = 0
-    for synapse in domain.synapses:
-        # PROTECT SOLID KNOWLEDGE
-        if synapse.commit_state == COMMIT_STATE_SOLID:
-            new_synapses.append(synapse)
-            continue
-            
-        if synapse.synapse_id in ancestor:
-            target_w = ancestor[synapse.synapse_id]
-            
-            # Soft Update
-            new_w = (1.0 - alpha) * synapse.weight + alpha * target_w
-            
-            # Diversity Noise
-            noise = np.random.randn() * noise_std
-            new_w += noise
-            
-            # Update object (vially acceptable in current POP if returned)
-            synapse.weight = float(np.clip(new_w, 0.0, 1.0))
-            assimilated_count += 1
-        new_synapses.append(synapse)
+    store = domain.synapses
+    t = domain.heavy_tensors
+    if t is not None and 'weights' in t and t.get('connectome_version') == store.version:
+        # NOTE: Blend thẳng trên compute tensor (weights mới nhất, STDP ghi ở đây)
+        weights, commit_states = t['weights'], t['commit_states']
+        index, targets = _ancestor_targets(domain, ancestor, is_sparse_backend(t))
+    else:
+        # Chưa có tensors → blend trên cột của store (tensors build lại từ store)
+        weights, commit_states = store.weights, store.column('commit_state')
+        live = store.live_slots()
+        found, targets = ancestor.lookup(store.pre_ids[live], store.post_ids[live])
+        index, targets = live[found], targets[found]
+    
+    idx = tuple(index) if index.ndim == 2 else index
+    # PROTECT SOLID KNOWLEDGE
+    fluid = commit_states[idx] != COMMIT_STATE_SOLID
+    if not fluid.all():
+        idx = tuple(i[fluid] for i in idx) if isinstance(idx, tuple) else idx[fluid]
+        targets = targets[fluid]
+    
+    assimilated_count = len(targets)
+    if assimilated_count:
+        # Soft Update + Diversity Noise
+        new_w = (1.0 - alpha) * weights[idx] + alpha * targets
+        new_w += np.random.randn(assimilated_count) * noise_std
+        weights[idx] = np.clip(new_w, 0.0, 1.0)
             
     new_metrics = dict(domain.metrics)
     new_metrics['assimilated_synapses'] = assimilated_count
     
-    return {'synapses': new_synapses, 'metrics': new_metrics}
+    return {'metrics': new_metrics}
@@ -14,7 +14,10 @@ from src.core.snn_context_theus import (
     COMMIT_STATE_SOLID,
     COMMIT_STATE_REVOKED,
     ensure_heavy_tensors_initialized,
-    sync_from_heavy_tensors
+    sync_from_heavy_tensors,
+    gather_synapse_tensors,
+    is_sparse_backend,
+    remove_synapses
 )
 from src.core.context import SystemContext
 
@@ -100,12 +103,24 @@ def _commitment_impl(ctx: SystemContext):
     commit_states[newly_revoked_mask] = COMMIT_STATE_REVOKED
     
     is_solid = (commit_states == COMMIT_STATE_SOLID)
-    incoming_solid_count = np.sum(is_solid, axis=0)
     
-    if 'weights' in t:
-        incoming_total_count = np.sum(t['weights'] > 0, axis=0)
+    counted_states = commit_states
+    if is_sparse_backend(t):
+        # Sparse backend: tensors (S,) aligned → đếm incoming theo post neuron
+        N = len(domain.neurons)
+        post_ids = domain.synapses.post_ids
+        if domain.synapses.num_dead:
+            # Tombstones (REVOKED, weight=0) không tính vào metrics
+            counted_states = commit_states[domain.synapses.alive]
+        incoming_solid_count = np.bincount(post_ids, weights=is_solid, minlength=N)
+        incoming_total_count = np.bincount(post_ids, weights=(t['weights'] > 0), minlength=N)
     else:
-        incoming_total_count = np.ones(commit_states.shape[0])
+        incoming_solid_count = np.sum(is_solid, axis=0)
+        
+        if 'weights' in t:
+            incoming_total_count = np.sum(t['weights'] > 0, axis=0)
+        else:
+            incoming_total_count = np.ones(commit_states.shape[0])
     
     incoming_total_count[incoming_total_count == 0] = 1.0 
     ratios = (incoming_solid_count / incoming_total_count).astype(np.float32)
@@ -116,9 +131,9 @@ def _commitment_impl(ctx: SystemContext):
         'solid_neurons_count': int(np.sum(ratios > 0.5)),
         'solidified_count': domain.metrics.get('solidified_count', 0) + int(np.sum(newly_solid_mask)),
         'revoked_count': domain.metrics.get('revoked_count', 0) + int(np.sum(newly_revoked_mask)),
-        'fluid_synapses': int(np.sum(commit_states == COMMIT_STATE_FLUID)),
-        'solid_synapses': int(np.sum(commit_states == COMMIT_STATE_SOLID)),
-        'revoked_synapses': int(np.sum(commit_states == COMMIT_STATE_REVOKED))
+        'fluid_synapses': int(np.sum(counted_states == COMMIT_STATE_FLUID)),
+        'solid_synapses': int(np.sum(counted_states == COMMIT_STATE_SOLID)),
+        'revoked_synapses': int(np.sum(counted_states == COMMIT_STATE_REVOKED))
     })
     return {}
 
@@ -146,10 +161,12 @@ def process_pruning(ctx: SNNSystemContext):
     before = len(domain.synapses)
     
     # Filter out REVOKED synapses
-    domain.synapses = [
-        s for s in domain.synapses
-        if s.commit_state != COMMIT_STATE_REVOKED
-    ]
+    # NOTE: Gather commit states từ tensors trước, rồi tombstone các slot
+    # REVOKED — compute tensors được vá tại chỗ, không rebuild.
+    gather_synapse_tensors(domain)
+    store = domain.synapses
+    revoked = (store.column('commit_state') == COMMIT_STATE_REVOKED) & store.alive
+    remove_synapses(domain, np.flatnonzero(revoked))
     
     # FIX: Safe len via Core Patch
     pruned = before - len(domain.synapses)
@@ -10,6 +10,8 @@ Date: 2025-12-27
 from theus.contracts import process
 from src.core.context import SystemContext
 from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_from_heavy_tensors
+import time
+from functools import partial
 import numpy as np
 import torch
 
@@ -23,6 +25,7 @@ from src.processes.snn_learning_3factor_theus import _stdp_3factor_impl
 from src.processes.snn_advanced_features_theus import _hysteria_impl, _lateral_inhibition_vectorized
 from src.processes.snn_homeostasis_theus import _homeostasis_impl, _meta_homeostasis_impl
 from src.processes.snn_commitment_theus import _commitment_impl
+from src.processes.snn_tick_kernel_theus import get_tick_kernel
 
 @process(
     inputs=['domain_ctx', 'domain', 
@@ -49,54 +52,94 @@ from src.processes.snn_commitment_theus import _commitment_impl
 def process_snn_cycle(ctx: SystemContext):
     """
     Execute entire SNN Cycle in one optimized transaction.
+
+    NOTE: Với heavy_latency_profiler, từng sub-stage được ghi vào histogram
+    `process_snn_cycle.<stage>` (stage trong temporal loop: một mẫu mỗi tick).
     """
     snn_ctx = ctx.domain_ctx.snn_context
     ticks_per_step = getattr(snn_ctx.global_ctx, 'ticks_per_step', 10)
+    profiler = getattr(ctx.domain_ctx, 'heavy_latency_profiler', None)
+    t = time.perf_counter_ns()
     
     # 1. PRE-SYNC: Objects -> Tensors
     ensure_heavy_tensors_initialized(snn_ctx)
     from src.core.snn_context_theus import sync_to_heavy_tensors
     sync_to_heavy_tensors(snn_ctx)
+    t = _lap(profiler, 'sync', t)
     
     # 2. HYSTERIA (Pre-processing)
     _hysteria_impl(ctx) 
+    t = _lap(profiler, 'hysteria', t)
     
     # 3. TEMPORAL LOOP (The High-Frequency Core)
-    for _ in range(ticks_per_step):
-        # Input Encoding
-        _encode_state_to_spikes_impl(ctx)
+    # Fused kernel: bind tensors/hyperparameters một lần mỗi step, tick in-place
+    kernel = get_tick_kernel(snn_ctx)
+    if kernel is not None:
+        lap = partial(_lap, profiler) if profiler is not None else None
+        t = kernel.run(ctx, ticks_per_step, lap, t)
+    else:
+        # Fallback (legacy spike queue / use_fused_tick_kernel=False): từng _*_impl mỗi tick
+        for _ in range(ticks_per_step):
+            # Input Encoding
+            _encode_state_to_spikes_impl(ctx)
+            t = _lap(profiler, 'encode', t)
         
-        # Neural Integration
-        _integrate_impl(ctx, sync=False)
+            # Neural Integration
+            _integrate_impl(ctx, sync=False)
+            t = _lap(profiler, 'integrate', t)
         
-        # Lateral Inhibition
-        if snn_ctx.global_ctx.use_lateral_inhibition:
-            _lateral_inhibition_vectorized(ctx)
+            # Lateral Inhibition
+            if snn_ctx.global_ctx.use_lateral_inhibition:
+                _lateral_inhibition_vectorized(ctx)
+                t = _lap(profiler, 'inhibition', t)
         
-        # Firing Logic
-        _fire_impl(ctx, sync=False)
+            # Firing Logic
+            _fire_impl(ctx, sync=False)
+            t = _lap(profiler, 'fire', t)
         
-        # Immediate Learning (STDP) — Vectorized (S,) no sync back
-        _stdp_3factor_impl(ctx)
+            # Immediate Learning (STDP) — Vectorized (S,) no sync back
+            _stdp_3factor_impl(ctx)
+            t = _lap(profiler, 'stdp', t)
         
-        # Advance SNN Time
-        # TRAP: _tick_impl returns values but doesn't update in-place for immutable types.
-        # We must increment manually or use the return value.
-        snn_ctx.domain_ctx.current_time = int(snn_ctx.domain_ctx.current_time) + 1
-        _tick_impl(ctx) # For cleanup queue side-effects
+            # Advance SNN Time
+            # TRAP: _tick_impl returns values but doesn't update in-place for immutable types.
+            # We must increment manually or use the return value.
+            snn_ctx.domain_ctx.current_time = int(snn_ctx.domain_ctx.current_time) + 1
+            _tick_impl(ctx) # For cleanup queue side-effects
+            t = _lap(profiler, 'tick', t)
 
     # 4. MAINTENANCE (Post-loop, Once per Step) — Vectorized
     # Homeostasis (Threshold Adaptation)
     _homeostasis_impl(ctx)
     _meta_homeostasis_impl(ctx)
+    t = _lap(profiler, 'homeostasis', t)
     
     # Commitment (Synaptic Stability)
     _commitment_impl(ctx)
+    t = _lap(profiler, 'commitment', t)
     
     # 5. POST-SYNC: Tensors -> Objects (ONE HEAVY SYNC FOR ALL)
     sync_from_heavy_tensors(snn_ctx)
+    t = _lap(profiler, 'sync', t)
 
     # Readout
     _encode_emotion_vector_impl(ctx)
+    _lap(profiler, 'readout', t)
     
     return {}
+
+
+def _lap(profiler, stage: str, start_ns: int) -> int:
+    """Ghi thời gian từ start_ns vào `process_snn_cycle.<stage>` (nếu profiling bật), trả về mốc mới."""
+    now = time.perf_counter_ns()
+    if profiler is not None:
+        profiler.record(_STAGE_NAMES[stage], now - start_ns)
+    return now
+
+
+# NOTE: Tên histogram dựng sẵn, tránh format string mỗi tick
+_STAGE_NAMES = {
+    stage: f"process_snn_cycle.{stage}"
+    for stage in ('sync', 'hysteria', 'encode', 'integrate', 'inhibition', 'fire',
+                  'stdp', 'tick', 'homeostasis', 'commitment', 'readout')
+}
@@ -11,10 +11,17 @@ from theus.contracts import process
 from src.core.context import SystemContext
 from src.core.snn_context_theus import (
     ensure_heavy_tensors_initialized,
-    sync_from_heavy_tensors
+    sync_from_heavy_tensors,
+    is_sparse_backend,
+    prototype_similarity
 )
+from src.core.connectome import csr_gather_rows
 from src.logger import log
 
+# Sparse backend: số ô tối đa của khối (K, N) effective rows (4M float32 = 16MB);
+# tick có quá nhiều spike (K ≈ N) quay về scatter bincount để không cấp phát N².
+_EFF_ROWS_MAX_CELLS = 1 << 22
+
 
 @process(
     inputs=['domain_ctx', 'domain_ctx.snn_context'],
@@ -56,7 +63,7 @@ def _integrate_impl(ctx: SystemContext, sync: bool = True):
     # Unpack tensors
     pots = t['potentials']      # (N,)
     p_vecs = t['potential_vectors'] # (N, D)
-    weights = t['weights']      # (N, N)
+    weights = t['weights']      # (N, N) dense | (S,) sparse
     protos = t['prototypes']    # (N, D)
     
     try:
@@ -99,28 +106,45 @@ def _integrate_impl(ctx: SystemContext, sync: bool = True):
     N = len(pots)
     spike_indices = spike_indices[spike_indices < N]
         
+    sparse = is_sparse_backend(t)
+    
     if len(spike_indices) > 0:
         # Gather Firing Prototypes: (K, D)
         firing_protos = protos[spike_indices]
         
-        # Compute Similarity Matrix: (K, N)
-        # Sim[k, j] = dot(Proto_k, Proto_j)
-        # Assumes protos are normalized!
-        sim_matrix = np.matmul(firing_protos, protos.T)
-        
-        # ReLU (Similarity > 0)
-        sim_matrix = np.maximum(0, sim_matrix)
-        
-        # Gather Weights: (K, N) - Row k corresponds to weights FROM spike_k TO all j
-        # Connectivity matrix W[i, j] is weight i->j
-        firing_weights = weights[spike_indices, :]
+        # Cached ReLU(P·Pᵀ): (N, N) dense | (S,) sparse — chỉ tính lại khi prototypes/connectome đổi
+        sim = prototype_similarity(t, snn_ctx.domain_ctx.synapses)
         
-        # Effective Weights: (K, N)
-        eff_weights = firing_weights * sim_matrix
+        eff_weights = None
+        if sparse:
+            # SPARSE BACKEND: chỉ duyệt fan-out thực của các neuron fire (E ≈ K × fan_out)
+            # thay vì (K, N) dense. weights là (S,) aligned với connectome store.
+            slots, row_pos = csr_gather_rows(t['csr_indptr'], t['csr_fill'], t['csr_slots'], spike_indices)
+            posts = snn_ctx.domain_ctx.synapses.post_ids[slots]
+            
+            # Eff per edge = W[slot] * Sim[slot]
+            eff_edges = weights[slots] * sim[slots]  # (E,)
+            
+            if len(spike_indices) * N <= _EFF_ROWS_MAX_CELLS:
+                # Stage fan-out vào (K, N) effective rows → cùng gather-and-sum như dense
+                # (rẻ hơn scatter (E, D) qua bincount minlength N*D mỗi tick)
+                # NOTE: add.at trên flat index nhanh hơn nhiều so với index tuple 2D
+                eff_weights = np.zeros((len(spike_indices), N), dtype=np.float32)
+                np.add.at(eff_weights.reshape(-1), row_pos * N + posts, eff_edges)
+            else:
+                # 4. Integrate Scalar Potential: (N,) — scatter-add theo post neuron
+                delta_pots = np.bincount(posts, weights=eff_edges, minlength=N).astype(np.float32)
+        else:
+            # Gather Weights: (K, N) - Row k corresponds to weights FROM spike_k TO all j
+            # Connectivity matrix W[i, j] is weight i->j
+            # Effective Weights: (K, N) = W[spikes] * Sim[spikes] (row gather, no matmul)
+            eff_weights = weights[spike_indices, :]
+            eff_weights *= sim[spike_indices, :]
         
-        # 4. Integrate Scalar Potential: (N,)
-        # Sum contributions from all K spikes for each neuron j
-        delta_pots = np.sum(eff_weights, axis=0) # Sum over K (rows) -> (N,)
+        if eff_weights is not None:
+            # 4. Integrate Scalar Potential: (N,)
+            # Sum contributions from all K spikes for each neuron j
+            delta_pots = np.sum(eff_weights, axis=0) # Sum over K (rows) -> (N,)
         
         # GLOBAL INHIBITION (Prevent Seizures)
         # Normalize synaptic input by the level of network activity
@@ -142,7 +166,15 @@ def _integrate_impl(ctx: SystemContext, sync: bool = True):
         # 5. Integrate Vector Potential: (N, D)
         # delta_V[j] += sum_k (eff_weights[k, j] * firing_protos[k])
         # This is: eff_weights.T (N, K) @ firing_protos (K, D) -> (N, D)
-        delta_vecs = np.matmul(eff_weights.T, firing_protos)
+        if eff_weights is not None:
+            delta_vecs = np.matmul(eff_weights.T, firing_protos)
+        else:
+            # Scatter-add (E, D) vào (N, D) bằng một bincount trên flat index post*D + d
+            D = firing_protos.shape[1]
+            edge_vecs = eff_edges[:, None] * firing_protos[row_pos]
+            flat_idx = (posts[:, None].astype(np.int64) * D + np.arange(D)).ravel()
+            delta_vecs = np.bincount(flat_idx, weights=edge_vecs.ravel(), minlength=N * D)
+            delta_vecs = delta_vecs.reshape(N, D).astype(np.float32)
         p_vecs += delta_vecs
         
     # 6. Sync Back to Objects (Audit Compatibility)
@@ -212,9 +244,10 @@ def _fire_impl(ctx: SystemContext, sync: bool = True):
         last_fire[fired_indices] = cur_time
         pots[fired_indices] = -0.1
         p_vecs[fired_indices] = 0.0 # Clear vector
+        t['fire_counts'][fired_indices] += 1
         
         # Update Objects and Queue (Hybrid part)
-        # We need to update fire_count manually on objects as we don't tensorize it
+        # fire_count: objects cập nhật cùng fire_counts tensor (process_fire đứng riêng không sync_from)
         # Also need to add to spike_queue
         
         neurons = snn_ctx.domain_ctx.neurons
@@ -11,7 +11,8 @@ from theus.contracts import process
 from src.core.snn_context_theus import (
     COMMIT_STATE_SOLID,
     COMMIT_STATE_REVOKED,
-    ensure_heavy_tensors_initialized
+    ensure_heavy_tensors_initialized,
+    is_sparse_backend
 )
 from src.core.context import SystemContext
 
@@ -66,63 +67,45 @@ def _stdp_3factor_impl(ctx: SystemContext):
     ensure_heavy_tensors_initialized(snn_ctx)
     t = domain.heavy_tensors
     last_fire_times = t['last_fire_times']
+    
+    # NOTE: Traces đa thang thời gian là cột của connectome store (S,),
+    # ghi in-place — không còn bản copy '_fast_traces' trong heavy_tensors.
+    store = domain.synapses
+    fast = store.column('trace_fast')
+    slow = store.column('trace_slow')
+
+    # Step 1: Vectorized trace decay cho toàn bộ synapses — O(S) numpy thay vì O(S) Python
+    fast *= tau_fast
+    slow *= tau_slow
 
     if no_learning:
-        # NOTE: Vectorized trace decay — thay Python loop 74k objects bằng numpy.
-        # Chỉ chạy khi có numpy trace arrays (xây dựng ở bước FULL PATH đầu tiên).
-        # Nếu chưa có ('_fast_traces' chưa build), bỏ qua lần này — sẽ được tạo khi có spike.
-        if '_fast_traces' in t:
-            t['_fast_traces'] *= tau_fast
-            t['_slow_traces'] *= tau_slow
         return
 
     # FULL PATH: có spikes hoặc dopamine đáng kể
     hebbian_window = 20.0
-    
-    # NOTE: XÂY DỰNG INDEX MAP lần đầu (lazy init, O(S) một lần).
-    # _post_synapse_map[post_id] = list of synapse objects với post_neuron_id == post_id
-    # Cho phép O(K×fan_in) thay vì O(S) toàn bộ khi K (số neurons fire) << N.
-    if '_post_synapse_map' not in t:
-        post_map = {}
-        for syn in domain.synapses:
-            pid = syn.post_neuron_id
-            if pid not in post_map:
-                post_map[pid] = []
-            post_map[pid].append(syn)
-        t['_post_synapse_map'] = post_map
-        
-        # Đồng thời build numpy trace arrays cùng kích thước synapse list
-        S = len(domain.synapses)
-        t['_fast_traces'] = np.array([s.trace_fast for s in domain.synapses], dtype=np.float32)
-        t['_slow_traces'] = np.array([s.trace_slow for s in domain.synapses], dtype=np.float32)
-    
-    # Step 1: Vectorized trace decay cho toàn bộ synapses — O(S) numpy thay vì O(S) Python
-    t['_fast_traces'] *= tau_fast
-    t['_slow_traces'] *= tau_slow
-    
-    # Step 2: Hebbian update — CHỈ duyệt synapses của neurons bị fire
-    # O(K × avg_fan_in) thay vì O(S) — K << N trong sparse firing regime
-    cur_time = float(domain.current_time)
-    post_map = t['_post_synapse_map']
-    
-    for post_id in current_spikes:
-        for syn in post_map.get(post_id, []):
-            pre_last_fire = float(last_fire_times[syn.pre_neuron_id])
-            dt = cur_time - pre_last_fire
-            if 0 < dt <= hebbian_window:
-                syn.trace_fast += 1.0
-                syn.trace_slow += 1.0
-                syn.last_active_time = domain.current_time
+    pre_ids = store.pre_ids
+    post_ids = store.post_ids
+    
+    # Step 2: Hebbian update — CHỈ xét synapses có post neuron vừa fire
+    # NOTE: Mask (S,) thay cho _post_synapse_map (dict of object lists).
+    if current_spikes:
+        spiked = np.zeros(len(last_fire_times), dtype=bool)
+        spiked[np.fromiter(current_spikes, dtype=np.int64)] = True
+        candidates = np.flatnonzero(spiked[post_ids])
+        if len(candidates) > 0:
+            dt = float(domain.current_time) - last_fire_times[pre_ids[candidates]].astype(np.float32)
+            hit = candidates[(dt > 0) & (dt <= hebbian_window)]
+            fast[hit] += 1.0
+            slow[hit] += 1.0
+            store.column('last_active_time')[hit] = domain.current_time
 
     # Step 3: Weight update — FULLY VECTORIZED qua numpy
     # ∆w = η × eligibility × dopamine; eligibility = trace_fast + trace_slow
-    fast = t['_fast_traces']
-    slow = t['_slow_traces']
     eligibility = fast + slow  # (S,) vectorized
     
     # 3.1. Compute Learning Rates per synapse (vectorized)
     S = len(eligibility)
-    syn_commit = t['syn_commit_states']
+    syn_commit = store.column('commit_state')
     
     # Base LR for all
     lrs = np.full(S, float(global_ctx.dopamine_learning_rate), dtype=np.float32)
@@ -138,14 +121,22 @@ def _stdp_3factor_impl(ctx: SystemContext):
     # 3.2. Delta weight (S,)
     delta_w = lrs * eligibility * dopamine
     
-    # 3.3. Update Weight Matrix (N,N) using Advanced Indexing — O(S) in C/Numpy
-    pre_ids = t['syn_pre_ids']
-    post_ids = t['syn_post_ids']
+    # 3.3. Update Weights
     weights = t['weights']
     
-    weights[pre_ids, post_ids] += delta_w
-    
-    # 3.4. Global Weight Decay & Clipping (Vectorized N,N)
+    if is_sparse_backend(t):
+        # Sparse backend: weights (S,) aligned với connectome → cộng trực tiếp
+        weights += delta_w
+    elif store.num_dead:
+        # NOTE: Tombstone giữ (pre, post) cũ — có thể trùng ô với synapse
+        # mới mọc lại; fancy-index += với index trùng chỉ giữ lần ghi cuối.
+        live = store.alive
+        weights[pre_ids[live], post_ids[live]] += delta_w[live]
+    else:
+        # Dense (N,N) using Advanced Indexing — O(S) in C/Numpy
+        weights[pre_ids, post_ids] += delta_w
+    
+    # 3.4. Global Weight Decay & Clipping (Vectorized; sparse chỉ chạm S phần tử)
     weights *= w_decay
     np.clip(weights, 0.0, 1.0, out=weights)
     
@@ -45,10 +45,15 @@ def _clustering_impl_vectorized(ctx):
     domain = snn_ctx.domain_ctx
     
     # Ensure Infrastructure
-    from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_from_heavy_tensors
+    from src.core.snn_context_theus import (
+        ensure_heavy_tensors_initialized, sync_from_heavy_tensors, is_sparse_backend, mark_prototypes_changed
+    )
     ensure_heavy_tensors_initialized(snn_ctx)
     
     t = domain.heavy_tensors
+    if is_sparse_backend(t):
+        # NOTE: Kernel legacy chỉ hỗ trợ dense (N, N); sparse backend bỏ qua.
+        return {'heavy_tensors': t}
     weights = t['weights']          # (N, N)
     protos = t['prototypes']        # (N, D)
     
@@ -99,6 +104,9 @@ def _clustering_impl_vectorized(ctx):
         norms = np.maximum(norms, 1e-8)
         protos[post_indices] /= norms
     
+    # Prototypes sửa tại chỗ → vô hiệu hóa similarity cache của integrate
+    mark_prototypes_changed(t)
+    
     # Sync Back
     sync_from_heavy_tensors(snn_ctx)
     
@@ -139,10 +147,13 @@ def _stdp_impl_vectorized(ctx):
     domain = snn_ctx.domain_ctx
     
     # 0. Ensure Infrastructure
-    from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_from_heavy_tensors
+    from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_from_heavy_tensors, is_sparse_backend
     ensure_heavy_tensors_initialized(snn_ctx)
     
     t = domain.heavy_tensors
+    if is_sparse_backend(t):
+        # NOTE: Legacy 2-factor STDP chỉ hỗ trợ dense (N, N); sparse dùng 3-factor.
+        return {'heavy_tensors': t}
     weights = t['weights']          # (N, N)
     traces = t['traces']            # (N, N)
     last_fire = t['last_fire_times'] # (N,)
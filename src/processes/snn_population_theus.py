@@ -0,0 +1,557 @@
+"""
+SNN Population Kernel
+=====================
+Chạy temporal loop của `process_snn_cycle` cho TOÀN BỘ agents cùng lúc:
+mỗi tick là một bộ phép toán vectorized trên mảng agent-leading thay vì
+A lần gọi `_integrate_impl` / `_fire_impl` / `_stdp_3factor_impl` nhỏ lẻ.
+
+Layout (population flat):
+- Neuron arrays: (A·N,) / (A·N, D), agent `a` chiếm [noff[a], noff[a+1])
+- Synapse arrays: (ΣS,) nối các slot của từng connectome, agent `a` chiếm
+  [soff[a], soff[a+1]). Đồ thị population là block-diagonal: pre/post được
+  cộng offset neuron của agent, CSR được nối từ CSR của từng agent.
+- Config per-agent (tau_decay, learning rates, thresholds...) broadcast
+  thành mảng per-neuron / per-synapse.
+
+NOTE: Pre-sync (objects → tensors), Hysteria và phần sau loop không thuộc
+hot path (Commitment, Meta-Homeostasis, readout) vẫn chạy per-agent như
+`process_snn_cycle`. Agents được batch theo (ticks_per_step, vector_dim);
+agent lẻ hoặc dùng legacy spike queue fallback về `process_snn_cycle`.
+
+Author: Do Huy Hoang
+Date: 2026-03-22
+"""
+import numpy as np
+from typing import Dict, List, Sequence
+
+from src.core.context import SystemContext
+from src.core.connectome import build_pre_csr, csr_gather_rows
+from src.core.snn_context_theus import (
+    COMMIT_STATE_SOLID,
+    COMMIT_STATE_REVOKED,
+    ensure_heavy_tensors_initialized,
+    sync_to_heavy_tensors,
+    sync_from_heavy_tensors,
+    is_sparse_backend
+)
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.processes.snn_rl_bridge import _encode_emotion_vector_impl, _sensor_vector
+from src.processes.snn_advanced_features_theus import _hysteria_impl
+from src.processes.snn_homeostasis_theus import _meta_homeostasis_impl
+from src.processes.snn_commitment_theus import _commitment_impl
+
+REFRACTORY = 5           # Khớp _fire_impl
+HEBBIAN_WINDOW = 20.0    # Khớp _stdp_3factor_impl
+FIRE_EMA_ALPHA = 0.05    # Khớp _fire_impl
+# Giới hạn số phần tử của block (A, Nmax, Kmax); vượt quá → scatter theo edge
+PAD_LIMIT = 1 << 24
+
+
+def _sf(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError, AttributeError):
+        return default
+
+
+class PopulationSNNKernel:
+    """
+    Batched SNN temporal loop cho cả population.
+
+    Usage:
+        kernel = PopulationSNNKernel()
+        kernel.run_cycle([agent.rl_ctx for agent in agents])
+
+    NOTE: Kernel chỉ giữ cache CSR cho agents dense backend (theo
+    store.version). Mọi state khác vẫn nằm trong heavy_tensors của từng
+    agent — kernel stack vào đầu step và ghi trả ở cuối step, nên có thể
+    bật/tắt giữa các step mà không cần migrate.
+    """
+
+    def __init__(self):
+        self._dense_csr: Dict[int, tuple] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def run_cycle(self, contexts: Sequence[SystemContext]):
+        """Tương đương gọi process_snn_cycle(ctx) cho từng agent."""
+        # Batch theo (ticks_per_step, vector_dim): agents cùng key chạy chung một loop
+        groups: Dict[tuple, List[SystemContext]] = {}
+        fallback = []
+        for ctx in contexts:
+            if self._batchable(ctx):
+                snn_ctx = ctx.domain_ctx.snn_context
+                key = (int(getattr(snn_ctx.global_ctx, 'ticks_per_step', 10)),
+                       snn_ctx.domain_ctx.heavy_tensors['prototypes'].shape[1])
+                groups.setdefault(key, []).append(ctx)
+            else:
+                fallback.append(ctx)
+
+        for (ticks, _), batch in groups.items():
+            if len(batch) < 2:
+                fallback.extend(batch)
+                continue
+            for ctx in batch:
+                self._pre_sync(ctx)
+            state = self._stack(batch)
+            for _ in range(ticks):
+                self._tick(state)
+            self._homeostasis(state)
+            self._unstack(state)
+            for ctx in batch:
+                self._post_sync(ctx)
+
+        for ctx in fallback:
+            process_snn_cycle(ctx)
+
+    # ------------------------------------------------------------------
+    # Per-agent stages (giữ nguyên thứ tự của process_snn_cycle)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _batchable(ctx) -> bool:
+        snn_ctx = getattr(ctx.domain_ctx, 'snn_context', None)
+        if snn_ctx is None or not snn_ctx.domain_ctx.neurons:
+            return False
+        ensure_heavy_tensors_initialized(snn_ctx)
+        return bool(snn_ctx.domain_ctx.heavy_tensors.get('use_vectorized_queue', False))
+
+    @staticmethod
+    def _pre_sync(ctx):
+        snn_ctx = ctx.domain_ctx.snn_context
+        ensure_heavy_tensors_initialized(snn_ctx)
+        sync_to_heavy_tensors(snn_ctx)
+        _hysteria_impl(ctx)
+
+    @staticmethod
+    def _post_sync(ctx):
+        snn_ctx = ctx.domain_ctx.snn_context
+        _meta_homeostasis_impl(ctx)
+        _commitment_impl(ctx)
+        sync_from_heavy_tensors(snn_ctx)
+        _encode_emotion_vector_impl(ctx)
+
+    # ------------------------------------------------------------------
+    # Stack / Unstack
+    # ------------------------------------------------------------------
+
+    def _dense_index(self, store, N: int, pre: np.ndarray, post: np.ndarray, ok: np.ndarray):
+        """Owners + CSR cho agent dense backend, cache theo store.version."""
+        cached = self._dense_csr.get(id(store))
+        if cached is None or cached[0] != store.version or cached[1] != N:
+            owners = self._dense_cell_owners(pre, post, N, ok)
+            indptr, fill, slots, _ = build_pre_csr(pre, N, alive=owners, slack=0.0, min_slack=0)
+            cached = (store.version, N, owners, indptr, fill, slots)
+            self._dense_csr[id(store)] = cached
+        return cached[2:]
+
+    @staticmethod
+    def _dense_cell_owners(pre: np.ndarray, post: np.ndarray, N: int, ok: np.ndarray) -> np.ndarray:
+        """
+        Dense backend: mỗi ô W[pre, post] chỉ có một giá trị — khi (pre, post)
+        trùng nhau, slot ghi sau cùng (scatter order) là chủ của ô đó.
+        """
+        idx = np.flatnonzero(ok)
+        cells = pre[idx] * N + post[idx]
+        _, last = np.unique(cells[::-1], return_index=True)
+        owners = np.zeros(len(ok), dtype=bool)
+        owners[idx[len(idx) - 1 - last]] = True
+        return owners
+
+    def _stack(self, contexts: List[SystemContext]) -> dict:
+        A = len(contexts)
+        snns = [c.domain_ctx.snn_context for c in contexts]
+        domains = [s.domain_ctx for s in snns]
+        tensors = [d.heavy_tensors for d in domains]
+        Ns = np.array([len(t['potentials']) for t in tensors], dtype=np.int64)
+        Ss = np.array([d.synapses.num_slots for d in domains], dtype=np.int64)
+        noff = np.concatenate([[0], np.cumsum(Ns)])
+        soff = np.concatenate([[0], np.cumsum(Ss)])
+        agent_of_neuron = np.repeat(np.arange(A), Ns)
+        agent_of_edge = np.repeat(np.arange(A), Ss)
+
+        def cat(key):
+            return np.concatenate([t[key] for t in tensors])
+
+        def per_agent(getter, default):
+            return np.array([_sf(getter(s.global_ctx), default) for s in snns], dtype=np.float64)
+
+        st = {
+            'contexts': contexts, 'domains': domains, 'tensors': tensors,
+            'A': A, 'Ns': Ns, 'noff': noff, 'soff': soff,
+            'agent_of_neuron': agent_of_neuron, 'agent_of_edge': agent_of_edge,
+            'pots': cat('potentials'),
+            'pvecs': cat('potential_vectors'),
+            'protos': cat('prototypes'),
+            'thresholds': cat('thresholds'),
+            'last_fire': cat('last_fire_times').astype(np.int64),
+            'firing_traces': cat('firing_traces'),
+            'solidity': cat('solidity_ratios'),
+            # Spike buffers (B, ΣN) — B cố định 10 trong ensure_heavy_tensors_initialized
+            'spike_buffer': np.concatenate([t['spike_buffer'] for t in tensors], axis=1),
+            'fire_counts': np.zeros(int(noff[-1]), dtype=np.int64),
+            'times': np.array([int(d.current_time) for d in domains], dtype=np.int64),
+        }
+
+        # Prototypes dạng block (A, D, Nmax) cho batched similarity
+        Nmax = int(Ns.max())
+        n_local = np.arange(int(noff[-1])) - noff[agent_of_neuron]
+        protos_pad = np.zeros((A, Nmax, st['protos'].shape[1]), dtype=st['protos'].dtype)
+        protos_pad[agent_of_neuron, n_local] = st['protos']
+        st['Nmax'] = Nmax
+        st['n_local'] = n_local
+        st['protos_pad_T'] = protos_pad.transpose(0, 2, 1)
+
+        # Config per-agent → broadcast
+        st['tau_decay'] = per_agent(lambda g: g.tau_decay, 0.9)
+        st['amp'] = per_agent(lambda g: g.input_amplification_factor, 1.0)
+        st['target_fr'] = per_agent(lambda g: g.target_fire_rate, 0.02)
+        st['tau_fast'] = per_agent(lambda g: g.tau_trace_fast, 0.9)
+        st['tau_slow'] = per_agent(lambda g: g.tau_trace_slow, 0.99)
+        st['w_decay'] = per_agent(lambda g: g.weight_decay, 1.0)
+        st['lr'] = per_agent(lambda g: g.dopamine_learning_rate, 0.01)
+        st['solid_factor'] = per_agent(lambda g: g.solid_learning_rate_factor, 0.1)
+        st['lateral'] = [bool(getattr(s.global_ctx, 'use_lateral_inhibition', False)) for s in snns]
+        st['ema'] = np.array([d.metrics.get('avg_firing_rate', 0.0) for d in domains], dtype=np.float64)
+        st['total_spikes'] = np.array([d.metrics.get('episode_total_spikes', 0) for d in domains], dtype=np.int64)
+        st['fired_last'] = np.zeros(A, dtype=np.int64)
+        dop = []
+        for c in contexts:
+            try:
+                dop.append(np.tanh(float(c.domain_ctx.td_error)))
+            except Exception:
+                dop.append(0.0)
+        st['dopamine'] = np.array(dop, dtype=np.float64)
+
+        # Input encoding: phần không đổi trong step (receptors × sensor)
+        D = st['pvecs'].shape[1]
+        base_inj = np.zeros(int(noff[-1]), dtype=np.float64)
+        vec_inj = np.zeros((int(noff[-1]), D), dtype=np.float32)
+        for a, c in enumerate(contexts):
+            sensor = np.asarray(_sensor_vector(c.domain_ctx.current_observation), dtype=np.float64)
+            R = max(16, int(Ns[a] * 0.2))
+            rows = np.arange(min(R, Ns[a]))
+            base_inj[noff[a] + rows] = sensor[rows % len(sensor)]
+            vec_inj[noff[a] + rows] = sensor
+        st['base_inj'] = base_inj
+        st['vec_inj'] = vec_inj
+
+        # Synapses: CSR population nối từ CSR từng agent (block-diagonal)
+        indptrs, fills, slots_l = [], [], []
+        pos_base = 0
+        weights, pre_g, post_g, valid = [], [], [], []
+        for a, (d, t) in enumerate(zip(domains, tensors)):
+            N = int(Ns[a])
+            store = d.synapses
+            pre = store.pre_ids.astype(np.int64)
+            post = store.post_ids.astype(np.int64)
+            ok = (pre < N) & (post < N)
+            if store.num_dead:
+                ok &= store.alive
+            if is_sparse_backend(t):
+                w = t['weights'].astype(np.float32)
+                indptr, fill, slots = t['csr_indptr'], t['csr_fill'], t['csr_slots']
+            else:
+                ok, indptr, fill, slots = self._dense_index(store, N, pre, post, ok)
+                w = np.zeros(len(pre), dtype=np.float32)
+                w[ok] = t['weights'][pre[ok], post[ok]]
+
+            indptrs.append(indptr[:-1] + pos_base)
+            fills.append(fill)
+            slots_l.append(np.where(slots >= 0, slots + soff[a], -1))
+            pos_base += int(indptr[-1])
+            weights.append(w)
+            pre_g.append(np.where(ok, pre, 0) + noff[a])
+            post_g.append(np.where(ok, post, 0) + noff[a])
+            valid.append(ok)
+
+        st['csr_indptr'] = np.concatenate(indptrs + [[pos_base]]).astype(np.int64)
+        st['csr_fill'] = np.concatenate(fills).astype(np.int64)
+        st['csr_slots'] = np.concatenate(slots_l).astype(np.int64)
+        st['weights'] = np.concatenate(weights)
+        st['pre'] = np.concatenate(pre_g)
+        st['post'] = np.concatenate(post_g)
+        st['edge_valid'] = np.concatenate(valid)
+        st['fast'] = np.concatenate([d.synapses.column('trace_fast') for d in domains])
+        st['slow'] = np.concatenate([d.synapses.column('trace_slow') for d in domains])
+        st['last_active'] = np.concatenate([d.synapses.column('last_active_time') for d in domains])
+
+        # Hằng số trong step → broadcast một lần (per-neuron / per-synapse)
+        st['tau_n'] = st['tau_decay'][agent_of_neuron].astype(np.float32)
+        st['tau_fast_e'] = st['tau_fast'][agent_of_edge].astype(np.float32)
+        st['tau_slow_e'] = st['tau_slow'][agent_of_edge].astype(np.float32)
+        st['w_decay_e'] = st['w_decay'][agent_of_edge].astype(np.float32)
+        st['dopamine_e'] = st['dopamine'][agent_of_edge].astype(np.float32)
+        st['dopamine_active'] = np.abs(st['dopamine']) >= 1e-4
+
+        # Learning rate per synapse (commit state không đổi trong step)
+        commit = np.concatenate([d.synapses.column('commit_state') for d in domains])
+        lrs = st['lr'][agent_of_edge].astype(np.float32)
+        solid = commit == COMMIT_STATE_SOLID
+        lrs[solid] *= st['solid_factor'][agent_of_edge[solid]].astype(np.float32)
+        lrs[commit == COMMIT_STATE_REVOKED] = 0.0
+        st['lrs'] = lrs
+        return st
+
+    def _unstack(self, st: dict):
+        noff, soff = st['noff'], st['soff']
+        for a, (ctx, d, t) in enumerate(zip(st['contexts'], st['domains'], st['tensors'])):
+            n0, n1 = int(noff[a]), int(noff[a + 1])
+            s0, s1 = int(soff[a]), int(soff[a + 1])
+            t['potentials'][:] = st['pots'][n0:n1]
+            t['potential_vectors'][:] = st['pvecs'][n0:n1]
+            t['thresholds'][:] = st['thresholds'][n0:n1]
+            t['last_fire_times'][:] = st['last_fire'][n0:n1]
+            t['firing_traces'][:] = st['firing_traces'][n0:n1]
+            t['spike_buffer'][:] = st['spike_buffer'][:, n0:n1]
+
+            store = d.synapses
+            if is_sparse_backend(t):
+                t['weights'][:] = st['weights'][s0:s1]
+            else:
+                ok = st['edge_valid'][s0:s1]
+                pre = st['pre'][s0:s1][ok] - n0
+                post = st['post'][s0:s1][ok] - n0
+                t['weights'][pre, post] = st['weights'][s0:s1][ok]
+            store.column('trace_fast')[:] = st['fast'][s0:s1]
+            store.column('trace_slow')[:] = st['slow'][s0:s1]
+            store.column('last_active_time')[:] = st['last_active'][s0:s1]
+
+            t['fire_counts'] += st['fire_counts'][n0:n1]
+
+            d.current_time = int(st['times'][a])
+            # Tick cleanup (_tick_impl): bỏ spike_queue entries quá cũ
+            now = d.current_time
+            for key in [k for k in d.spike_queue.keys() if k < now - 10]:
+                del d.spike_queue[key]
+
+    # ------------------------------------------------------------------
+    # Batched Tick: encode → integrate → lateral inhibition → fire → STDP
+    # ------------------------------------------------------------------
+
+    def _tick(self, st: dict):
+        A, Ns, noff = st['A'], st['Ns'], st['noff']
+        aon = st['agent_of_neuron']
+        pots, pvecs, protos = st['pots'], st['pvecs'], st['protos']
+        times = st['times']
+        times_n = times[aon]
+        Ntot = len(pots)
+        D = pvecs.shape[1]
+
+        # 1. Input encoding (sensitivity theo EMA firing rate của từng agent)
+        sensitivity = np.clip(st['target_fr'] / (st['ema'] + 1e-6), 0.1, 10.0)
+        dynamic_amp = st['amp'] * sensitivity
+        pots += (st['base_inj'] * dynamic_amp[aon]).astype(np.float32)
+        pvecs += st['vec_inj']
+
+        # 2. Integrate
+        tau_n = st['tau_n']
+        pots *= tau_n
+        pvecs *= tau_n[:, None]
+
+        buffer = st['spike_buffer']
+        B = buffer.shape[0]
+        cols = np.arange(Ntot)
+        t_idx = times_n % B
+        spikes = np.flatnonzero(buffer[t_idx, cols] > 0)
+        buffer[t_idx, cols] = 0
+
+        if len(spikes) > 0:
+            a_k = aon[spikes]
+            K = np.bincount(a_k, minlength=A)
+            slots, row_pos = csr_gather_rows(st['csr_indptr'], st['csr_fill'], st['csr_slots'], spikes)
+            posts = st['post'][slots]
+            firing_protos = protos[spikes]
+
+            Nmax, Kmax = st['Nmax'], int(K.max())
+            padded = A * Nmax * Kmax <= PAD_LIMIT
+            if padded:
+                # Block layout (A, Kmax, Nmax): similarity như nhánh dense của
+                # _integrate_impl, nhưng một batched matmul cho cả population
+                k_local = np.arange(len(spikes)) - np.concatenate([[0], np.cumsum(K)])[a_k]
+                fp_pad = np.zeros((A, Kmax, D), dtype=protos.dtype)
+                fp_pad[a_k, k_local] = firing_protos
+                sim_pad = np.matmul(fp_pad, st['protos_pad_T'])
+                a_e, k_e, n_e = a_k[row_pos], k_local[row_pos], st['n_local'][posts]
+                sim = sim_pad[a_e, k_e, n_e]
+            else:
+                sim = np.einsum('ed,ed->e', firing_protos[row_pos], protos[posts])
+            np.maximum(sim, 0, out=sim)
+            eff = st['weights'][slots] * sim
+            delta_pots = np.bincount(posts, weights=eff, minlength=Ntot).astype(np.float32)
+
+            # Global inhibition per agent (khớp _integrate_impl)
+            expected = np.maximum(10, (Ns * 0.02).astype(np.int64))
+            norm = np.where(K > expected, 1.0 + (K - expected) / (expected * 2.0), 1.0)
+            delta_pots /= norm[aon].astype(np.float32)
+            pots += delta_pots
+
+            if padded:
+                # delta_V = M @ firing_protos, M[a, post, k] = Σ eff (block-diagonal)
+                cell = (a_e * Nmax + n_e) * Kmax + k_e
+                M = np.bincount(cell, weights=eff, minlength=A * Nmax * Kmax)
+                M = M.reshape(A, Nmax, Kmax).astype(np.float32)
+                delta_vecs = np.matmul(M, fp_pad)[aon, st['n_local']]
+            else:
+                delta_vecs = np.empty((Ntot, D), dtype=np.float32)
+                for d in range(D):
+                    delta_vecs[:, d] = np.bincount(posts, weights=eff * firing_protos[row_pos, d], minlength=Ntot)
+            pvecs += delta_vecs
+
+        # 3. Lateral inhibition — chỉ có tác dụng khi spike_queue có spikes
+        # (legacy queue); với vectorized queue là no-op như _lateral_inhibition_vectorized.
+        queue_spikes = self._queue_spikes(st)
+        for a, spk in queue_spikes.items():
+            if st['lateral'][a]:
+                self._lateral_inhibition(st, a, spk)
+
+        # 4. Fire
+        can_fire = (pots >= st['thresholds']) & ((times_n - st['last_fire']) >= REFRACTORY)
+        fired = np.flatnonzero(can_fire)
+        K_fired = np.bincount(aon[fired], minlength=A)
+        if len(fired) > 0:
+            st['last_fire'][fired] = times_n[fired]
+            pots[fired] = -0.1
+            pvecs[fired] = 0.0
+            st['fire_counts'][fired] += 1
+            buffer[(times_n[fired] + 1) % B, fired] = 1
+        fire_rate = K_fired / np.maximum(Ns, 1)
+        st['fired_last'] = K_fired
+        st['total_spikes'] += K_fired
+        st['ema'] = (1.0 - FIRE_EMA_ALPHA) * st['ema'] + FIRE_EMA_ALPHA * fire_rate
+
+        # 5. STDP 3-factor
+        self._stdp(st, queue_spikes)
+
+        # 6. Advance time
+        st['times'] = times + 1
+
+    @staticmethod
+    def _queue_spikes(st: dict) -> Dict[int, np.ndarray]:
+        out = {}
+        for a, d in enumerate(st['domains']):
+            spk = d.spike_queue.get(int(st['times'][a]), [])
+            if spk:
+                out[a] = np.asarray(spk, dtype=np.int64)
+        return out
+
+    @staticmethod
+    def _lateral_inhibition(st: dict, a: int, spikes: np.ndarray):
+        """Khớp _lateral_inhibition_vectorized trên slice của agent `a`."""
+        g = st['domains'][a]
+        global_ctx = st['contexts'][a].domain_ctx.snn_context.global_ctx
+        try:
+            wta_k = int(global_ctx.wta_k)
+            inhib_str = float(global_ctx.inhibition_strength)
+        except (TypeError, ValueError, AttributeError):
+            wta_k, inhib_str = 5, 0.5
+        N = int(st['Ns'][a])
+        if len(spikes) <= wta_k:
+            g.metrics['wta_winners'] = len(spikes)
+            g.metrics['wta_losers'] = 0
+            return
+        pots = st['pots'][int(st['noff'][a]):int(st['noff'][a + 1])]
+        spikes = spikes[spikes < N]
+        losers = spikes[np.argsort(pots[spikes])[::-1][wta_k:]]
+        pots[losers] = np.maximum(pots[losers] - inhib_str, 0.0)
+        g.metrics['wta_winners'] = len(spikes) - len(losers)
+        g.metrics['wta_losers'] = len(losers)
+
+    @staticmethod
+    def _stdp(st: dict, queue_spikes: Dict[int, np.ndarray]):
+        aoe = st['agent_of_edge']
+        fast, slow = st['fast'], st['slow']
+        fast *= st['tau_fast_e']
+        slow *= st['tau_slow_e']
+
+        # no_learning per agent: không spikes (queue) VÀ dopamine ~ 0
+        learning = st['dopamine_active'].copy()
+        learning[list(queue_spikes)] = True
+        if not learning.any():
+            return
+
+        if queue_spikes:
+            spiked = np.zeros(len(st['pots']), dtype=bool)
+            for a, spk in queue_spikes.items():
+                spk = spk[spk < st['Ns'][a]]
+                spiked[spk + st['noff'][a]] = True
+            candidates = np.flatnonzero(spiked[st['post']] & st['edge_valid'] & learning[aoe])
+            if len(candidates) > 0:
+                now = st['times'][aoe[candidates]].astype(np.float32)
+                dt = now - st['last_fire'][st['pre'][candidates]].astype(np.float32)
+                hit = candidates[(dt > 0) & (dt <= HEBBIAN_WINDOW)]
+                fast[hit] += 1.0
+                slow[hit] += 1.0
+                st['last_active'][hit] = st['times'][aoe[hit]]
+
+        weights = st['weights']
+        if learning.all():
+            weights += st['lrs'] * (fast + slow) * st['dopamine_e']
+            weights *= st['w_decay_e']
+            np.clip(weights, 0.0, 1.0, out=weights)
+        else:
+            learn_e = learning[aoe]
+            w = weights[learn_e] + st['lrs'][learn_e] * (fast[learn_e] + slow[learn_e]) * st['dopamine_e'][learn_e]
+            w *= st['w_decay_e'][learn_e]
+            weights[learn_e] = np.clip(w, 0.0, 1.0)
+
+    # ------------------------------------------------------------------
+    # Batched Homeostasis (khớp _homeostasis_impl)
+    # ------------------------------------------------------------------
+
+    def _homeostasis(self, st: dict):
+        A, Ns = st['A'], st['Ns']
+        aon = st['agent_of_neuron']
+        snns = [c.domain_ctx.snn_context for c in st['contexts']]
+
+        def per_agent(attr, default):
+            return np.array([_sf(getattr(s.global_ctx, attr, default), default) for s in snns])
+
+        target = per_agent('target_fire_rate', 0.02)
+        rate_global = per_agent('homeostasis_rate', 0.0)
+        rate_local = per_agent('local_homeostasis_rate', 0.0)
+        decay = per_agent('trace_decay', 0.9)
+        t_min = per_agent('threshold_min', 0.0)
+        t_max = per_agent('threshold_max', 10.0)
+
+        traces = st['firing_traces']
+        thresholds = st['thresholds']
+        solidity = np.clip(st['solidity'], 0.0, 1.0)
+
+        spikes = (st['last_fire'] == (st['times'][aon] - 1)).astype(np.float32)
+        traces[:] = decay[aon] * traces + (1.0 - decay[aon]) * spikes
+
+        global_rate = np.bincount(aon, weights=traces, minlength=A) / np.maximum(Ns, 1)
+        error_local = traces - target[aon]
+        w_local = solidity + (1.0 - solidity) * 0.2
+        w_global = 1.0 - w_local
+        delta = (w_global * ((global_rate - target) * rate_global)[aon]
+                 + w_local * error_local * rate_local[aon])
+        noise_scale = 0.0001 * (1.0 - solidity)
+
+        # NOTE: Noise/rescue được rút theo thứ tự từng agent (như chạy tuần tự)
+        # để cùng seed cho cùng kết quả với process_snn_cycle.
+        for a, d in enumerate(st['domains']):
+            n0, n1 = int(st['noff'][a]), int(st['noff'][a + 1])
+            delta[n0:n1] += np.random.normal(0, noise_scale[n0:n1], size=n1 - n0)
+            thresholds[n0:n1] += delta[n0:n1]
+            np.clip(thresholds[n0:n1], t_min[a], t_max[a], out=thresholds[n0:n1])
+            if global_rate[a] < 1e-6:
+                # Emergency rescue (mạng im lặng)
+                thresholds[n0:n1] = t_min[a] + np.random.uniform(0.0, 0.1, size=n1 - n0)
+                st['pots'][n0:n1] += np.random.uniform(0, t_min[a], size=n1 - n0)
+                d.metrics['emergency_rescue_triggered'] = True
+            d.metrics['fired_count'] = int(st['fired_last'][a])
+            d.metrics['episode_total_spikes'] = int(st['total_spikes'][a])
+            d.metrics['fire_rate'] = float(global_rate[a])
+            d.metrics['avg_firing_rate'] = float(global_rate[a])
+            d.metrics['avg_threshold'] = float(np.mean(thresholds[n0:n1]))
+            d.metrics['std_threshold'] = float(np.std(thresholds[n0:n1]))
+
+
+def process_population_snn_cycle(contexts: Sequence[SystemContext], kernel: PopulationSNNKernel = None):
+    """Chạy SNN cycle cho cả population (batched). Xem PopulationSNNKernel."""
+    (kernel or PopulationSNNKernel()).run_cycle(contexts)
+    return {}
@@ -34,20 +34,24 @@ def encode_emotion_vector(ctx: SystemContext):
     return _encode_emotion_vector_impl(ctx)
 
 def _encode_emotion_vector_impl(ctx: SystemContext):
-    """Internal implementation."""
+    """
+    Internal implementation.
+
+    Active set = fire_counts tensor > 0 (tính một lần); attention sigmoid-gated
+    là masked matmul trên ma trận prototypes. Emotion/SNN-state hiện tại và
+    trước đó là double buffers trong snn domain (heavy_readout_buffers):
+    buffer "previous" cũ được ghi đè in-place làm "current" mới rồi hoán đổi
+    reference (không clone mỗi step). Kết quả chỉ trả về dạng delta.
+    """
     snn_ctx = ctx.domain_ctx.snn_context
     
     if snn_ctx is None:
         # No SNN - skip
         return
     
-    neurons = snn_ctx.domain_ctx.neurons
-    
-    # Aggregate firing neurons' vectors
-    active_vectors = []
-    for neuron in neurons:
-        if neuron.fire_count > 0:  # Has fired
-            active_vectors.append(neuron.prototype_vector)
+    from src.core.snn_context_theus import ensure_heavy_tensors_initialized
+    ensure_heavy_tensors_initialized(snn_ctx)
+    t = snn_ctx.domain_ctx.heavy_tensors
     
     # Phase 9: Attention-based Aggregation using Sigmoid Gating
     # Query: Current Observation (Context)
@@ -64,77 +68,47 @@ def _encode_emotion_vector_impl(ctx: SystemContext):
          # Fallback: Use previous emotion state as context if obs not available
         query_vector = snn_ctx.domain_ctx.heavy_snn_emotion_vector.numpy()
         
-    # 2. Collect Keys/Values from Active Neurons
-    active_vectors = []
-    keys = []
-    
-    for neuron in neurons:
-        if neuron.fire_count > 0:
-            active_vectors.append(neuron.prototype_vector)
-            keys.append(neuron.prototype_vector)
+    # 2. Active Neurons (Keys/Values = prototypes của neurons đã fire)
+    protos = t['prototypes']
+    active = t['fire_counts'] > 0
+    n_active = int(np.count_nonzero(active))
             
-    if not active_vectors:
+    if n_active == 0:
         # No activity → neutral
-        emotion_vector = np.zeros(16)
+        emotion_vector = np.zeros(protos.shape[1], dtype=np.float32)
+    elif query_vector is not None:
+        # 3. Gating (Sigmoid) trên toàn bộ prototypes, mask về active set
+        # Allows multi-modal attention (e.g., Fear AND Curiosity)
+        # 4. Weighted Sum: V_out = Sum(Gate_i * V_i) = gates · P
+        scores = protos @ np.asarray(query_vector, dtype=np.float32)
+        gates = 1 / (1 + np.exp(-scores))
+        gates *= active
+        emotion_vector = gates @ protos
     else:
-        # 3. Compute Attention if Query is available
-        if query_vector is not None:
-             # Stack for vectorized operations
-            K = np.array(keys) # [N, 16]
-            Q = query_vector   # [16]
-            
-            # Score = Q . KT
-            # Shape: [N]
-            scores = np.dot(K, Q)
-            
-            # 4. Gating (Sigmoid)
-            # Allows multi-modal attention (e.g., Fear AND Curiosity)
-            # range (0, 1)
-            gates = 1 / (1 + np.exp(-scores))
-            
-            # 5. Weighted Sum
-            # V_out = Sum(Gate_i * V_i)
-            # Shape: [N, 1] * [N, 16] -> [N, 16] -> Sum -> [16]
-            weighted_vectors = K * gates[:, np.newaxis]
-            emotion_vector = np.sum(weighted_vectors, axis=0)
-            
-            # Debug/Audit log (optional - keep minimal for performance)
-            # print(f"Bridge Attention: {len(active_vectors)} active. Max Gate: {np.max(gates):.2f}")
-            
-        else:
-            # Fallback to Mean if no Context
-            emotion_vector = np.mean(active_vectors, axis=0)
+        # Fallback to Mean if no Context
+        emotion_vector = (active @ protos) / n_active
     
     # Normalize
     norm = np.linalg.norm(emotion_vector)
     if norm > 0:
         emotion_vector = emotion_vector / norm
     
-    # Shift current to previous (for RL learning)
-    prev_emo = None
-    if getattr(ctx.domain_ctx, 'heavy_snn_emotion_vector', None) is not None:
-        prev_emo = ctx.domain_ctx.heavy_snn_emotion_vector.detach().clone()
-        
-    prev_state = None
-    if getattr(ctx.domain_ctx, 'heavy_snn_state_vector', None) is not None:
-        prev_state = ctx.domain_ctx.heavy_snn_state_vector.detach().clone()
-        
     # Extract SNN State from heavy_tensors
-    from src.core.snn_context_theus import ensure_heavy_tensors_initialized
-    ensure_heavy_tensors_initialized(snn_ctx)
-    t = snn_ctx.domain_ctx.heavy_tensors
     if 'firing_traces' in t:
-        snn_state = t['firing_traces'].copy()
+        snn_state = t['firing_traces']
     else:
         snn_state = np.zeros(snn_ctx.global_ctx.num_neurons, dtype=np.float32)
-        
-    current_state = torch.tensor(snn_state, dtype=torch.float32).detach()
     
-    # Convert current emotion to tensor
-    current_emo = torch.tensor(
-        emotion_vector,
-        dtype=torch.float32
-    ).detach()
+    # Shift current to previous (for RL learning): double buffers swap by reference
+    buffers = snn_ctx.domain_ctx.heavy_readout_buffers
+    prev_emo, current_emo = _swap_readout_buffers(
+        buffers.get('emotion'), buffers.get('previous_emotion'), emotion_vector
+    )
+    prev_state, current_state = _swap_readout_buffers(
+        buffers.get('state'), buffers.get('previous_state'), snn_state
+    )
+    buffers.update(emotion=current_emo, previous_emotion=prev_emo,
+                   state=current_state, previous_state=prev_state)
 
     return {
         'heavy_snn_emotion_vector': current_emo,
@@ -144,6 +118,25 @@ def _encode_emotion_vector_impl(ctx: SystemContext):
     }
 
 
+def _swap_readout_buffers(current, previous, values: np.ndarray):
+    """
+    Double buffer cho readout: current cũ → previous; buffer previous cũ
+    (nếu dùng lại được) nhận `values` in-place và trở thành current mới.
+
+    Returns:
+        (previous, current) tensors
+    """
+    shape = (len(values),)
+    reusable = (
+        isinstance(previous, torch.Tensor) and previous is not current
+        and previous.shape == shape and previous.dtype == torch.float32
+        and not previous.requires_grad
+    )
+    buffer = previous if reusable else torch.empty(shape, dtype=torch.float32)
+    buffer.copy_(torch.from_numpy(np.ascontiguousarray(values, dtype=np.float32)))
+    return current, buffer
+
+
 # ============================================================================
 # RL → SNN: State Encoding (Observation → Spikes)
 # ============================================================================
@@ -159,6 +152,26 @@ def encode_state_to_spikes(ctx: SystemContext):
     """
     return _encode_state_to_spikes_impl(ctx)
 
+def _sensor_vector(obs):
+    """
+    Observation → sensor vector: Vector (sensor system), dict có 'sensor_vector',
+    hoặc dict legacy (encode agent_pos thành pattern 16 chiều đã chuẩn hóa).
+    """
+    if isinstance(obs, np.ndarray):
+        return obs
+    if isinstance(obs, dict) and 'sensor_vector' in obs:
+        # NEW SENSOR SYSTEM: Extract vector from dict
+        return obs['sensor_vector']
+    # Fallback: Nếu vẫn là dict (legacy), tạo vector đơn giản
+    x, y = obs['agent_pos'] if isinstance(obs, dict) and 'agent_pos' in obs else (0, 0)
+    pattern = np.zeros(16)
+    pattern[x % 8] = 1.0
+    pattern[8 + (y % 8)] = 1.0
+    pattern[14] = 1.0 # Action Pulse (Emergency Sync)
+    norm = np.linalg.norm(pattern)
+    return pattern / norm if norm > 0 else pattern
+
+
 def _encode_state_to_spikes_impl(ctx: SystemContext):
     """Internal implementation."""
     obs = ctx.domain_ctx.current_observation
@@ -176,29 +189,7 @@ def _encode_state_to_spikes_impl(ctx: SystemContext):
     #     print(f"DEBUG OBS RAW: {obs}")
     
     # Observation xử lý linh hoạt: Dict (legacy) hoặc Vector (sensor system)
-    if isinstance(obs, np.ndarray):
-        sensor_vector = obs
-    elif isinstance(obs, dict) and 'sensor_vector' in obs:
-        # NEW SENSOR SYSTEM: Extract vector from dict
-        sensor_vector = obs['sensor_vector']
-    else:
-        # Fallback: Nếu vẫn là dict (legacy), tạo vector đơn giản
-        if 'agent_pos' in obs:
-            x, y = obs['agent_pos']
-        else:
-            x, y = 0, 0
-        
-        # Simple encoding (legacy)
-        pattern = np.zeros(16)
-        pattern[x % 8] = 1.0
-        pattern[8 + (y % 8)] = 1.0
-        pattern[14] = 1.0 # Action Pulse (Emergency Sync)
-        
-        norm = np.linalg.norm(pattern)
-        if norm > 0:
-            pattern = pattern / norm
-        
-        sensor_vector = pattern
+    sensor_vector = _sensor_vector(obs)
     
     # v3 POP FIX: Use heavy_tensors directly instead of looping over objects
     from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_from_heavy_tensors
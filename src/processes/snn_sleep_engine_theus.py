@@ -0,0 +1,201 @@
+"""
+SNN Sleep Engine
+================
+Sleep cycle (REM) của cả population chạy như fused tensor kernel:
+dream stimulus (noise + PGO) → hysteria → integrate → lateral inhibition →
+fire → dream reward → 3-factor STDP → decode → tick, lặp `steps` lần.
+
+Thay cho `RLAgent.dream_step` tuần tự từng agent (8 process riêng lẻ mỗi
+step, inject loop qua neuron objects, integrate/fire mỗi process tự
+`sync_from_heavy_tensors`):
+
+- `DreamTickKernel` tái sử dụng các stage của `FusedTickKernel` (bind một
+  lần, scratch buffers, in-place) và chỉ thay phần input bằng stimulus
+  vectorized trên tensor potentials
+- objects (neurons, metrics, intrinsic_reward) được sync MỘT lần khi thức dậy
+- `run_sleep_cycle` có thể chạy các agents song song trên một executor
+  (numpy nhả GIL trong các phép toán lớn)
+
+NOTE: Khác với dream_step cũ: stimulus cộng vào tensor potentials (trước đây
+cộng vào neuron objects rồi bị integrate ghi đè khi sync) và mỗi dream step
+tiến current_time một tick (trước đây thời gian đứng yên trong suốt giấc ngủ,
+spike buffer không bao giờ được đọc).
+
+Author: Do Huy Hoang
+Date: 2026-03-31
+"""
+import numpy as np
+
+from src.core.snn_context_theus import ensure_heavy_tensors_initialized, sync_from_heavy_tensors
+from src.processes.snn_tick_kernel_theus import FusedTickKernel, _sf
+
+PGO_PROBABILITY = 0.01   # Khớp _inject_impl: 1% neuron nhận burst mỗi step
+PGO_AMPLITUDE = 0.5
+ACTIVE_INPUT = 0.1       # Input > 0.1 tính là neuron active (dream_active_count)
+
+# Dream coherence (khớp apply_dream_reward)
+COHERENT_RANGE = (0.05, 0.3)
+COHERENT_REWARD = 0.1
+SILENCE_REWARD = -0.2
+NIGHTMARE_REWARD = -0.5
+
+
+def dream_reward(firing_rate: float):
+    """Firing rate → (reward, state) theo Goldilocks zone của apply_dream_reward."""
+    if COHERENT_RANGE[0] <= firing_rate <= COHERENT_RANGE[1]:
+        return COHERENT_REWARD, "COHERENT"
+    if firing_rate < COHERENT_RANGE[0]:
+        return SILENCE_REWARD, "SILENCE"
+    return NIGHTMARE_REWARD, "NIGHTMARE"
+
+
+class DreamTickKernel(FusedTickKernel):
+    """
+    Fused REM loop cho một agent: một tick mỗi dream step.
+
+    Usage:
+        kernel = DreamTickKernel(seed)
+        kernel.run(rl_ctx, sleep_steps)
+
+    NOTE: Stimulus dùng Generator riêng của kernel (không phải np.random
+    global) để các agents ngủ song song vẫn deterministic theo seed.
+    """
+
+    def __init__(self, seed=None):
+        super().__init__()
+        self.rng = np.random.default_rng(seed)
+
+    def _bind(self, ctx):
+        super()._bind(ctx)
+        g = self.snn_ctx.global_ctx
+        domain = self.domain
+        self.noise_level = _sf(getattr(g, 'dream_noise_level', 0.1), 0.1)
+        self.stimulus = self._scratch('stimulus', (self.N,), np.float32)
+        self.pgo = self._scratch('pgo', (self.N,), bool)
+
+        # Hysteria Dampener (khớp _hysteria_impl)
+        self.sat_threshold = _sf(getattr(g, 'saturation_threshold', 0.9), 0.9)
+        self.recovery_rate = _sf(getattr(g, 'recovery_rate', 0.01), 0.01)
+        self.damp_factor = _sf(getattr(g, 'dampening_factor', 0.5), 0.5)
+        self.threshold_range = (float(g.threshold_min), float(g.threshold_max))
+        self.saturation = _sf(domain.emotion_saturation_level, 0.0)
+        self.dampening = bool(domain.dampening_active)
+        self.prev_fire_rate = domain.metrics.get('fire_rate', 0.0)
+
+        self.active_count = 0
+        self.reward = None
+        self.coherence = None
+        self.coherence_counts = {"COHERENT": 0, "SILENCE": 0, "NIGHTMARE": 0}
+        self.dream_state = None
+
+    def _tick(self):
+        queue = self.queue.get(self.now)
+        self._inject_dream()
+        self._hysteria()
+        self._integrate()
+        if self.lateral:
+            self._inhibit(queue)
+        fired = self._fire_dream()
+        self._reward()
+        self._stdp(queue)
+        self._decode(fired)
+        self._advance()
+
+    # ------------------------------------------------------------------
+    # Dream Stages
+    # ------------------------------------------------------------------
+
+    def _inject_dream(self):
+        """Random input current U(0, noise) + PGO bursts, vectorized trên potentials."""
+        stimulus, N, rng = self.stimulus, self.N, self.rng
+        stimulus[:] = rng.uniform(0.0, self.noise_level, N)
+        np.less(rng.random(N), PGO_PROBABILITY, out=self.pgo)
+        stimulus[self.pgo] += PGO_AMPLITUDE
+        self.pots += stimulus
+        self.active_count = int(np.count_nonzero(stimulus > ACTIVE_INPUT))
+
+    def _hysteria(self):
+        """Hysteria Dampener theo fire rate của step trước (state giữ cục bộ tới _flush)."""
+        if self.prev_fire_rate > self.sat_threshold:
+            self.dampening = True
+            self.saturation += 0.1
+        else:
+            self.saturation -= self.recovery_rate
+        self.saturation = min(max(self.saturation, 0.0), 1.0)
+
+        if self.dampening:
+            thresholds = self.thresholds
+            thresholds *= (1 + self.damp_factor)
+            np.clip(thresholds, *self.threshold_range, out=thresholds)
+            if self.saturation < 0.1:
+                self.dampening = False
+
+    def _fire_dream(self) -> np.ndarray:
+        before = self.step_fired
+        self._fire()
+        self.prev_fire_rate = self.fire_rate
+        if self.step_fired == before:
+            return None
+        return np.flatnonzero(self.last_fire == self.now)
+
+    def _reward(self):
+        self.reward, self.coherence = dream_reward(self.fire_rate)
+        self.coherence_counts[self.coherence] += 1
+
+    def _decode(self, fired):
+        """Mean prototype của neurons vừa fire → (x, y) argmax (khớp _decode_impl)."""
+        if fired is None:
+            return
+        dream_vector = self.protos[fired].mean(axis=0)
+        self.dream_state = (int(np.argmax(dream_vector[0:8])), int(np.argmax(dream_vector[8:16])))
+
+    def _flush(self):
+        domain = self.domain
+        if self.reward is not None:
+            metrics = domain.metrics
+            metrics['dream_active_count'] = self.active_count
+            metrics['dream_coherence_state'] = self.coherence
+            metrics['dream_firing_rate'] = self.fire_rate
+            metrics['dream_reward'] = self.reward
+            for state, count in self.coherence_counts.items():
+                metrics[f'dream_{state.lower()}_steps'] = count
+            metrics['saturation_level'] = self.saturation
+            metrics['dampening_active'] = 1 if self.dampening else 0
+            if self.dream_state is not None:
+                metrics['dream_state_x'], metrics['dream_state_y'] = self.dream_state
+            domain.emotion_saturation_level = self.saturation
+            domain.dampening_active = self.dampening
+            self.ctx.domain_ctx.intrinsic_reward = self.reward
+        super()._flush()
+
+
+def sleep_agent(ctx, steps: int, seed=None):
+    """Toàn bộ giấc ngủ (`steps` dream steps) của một agent, sync objects một lần khi thức dậy."""
+    snn_ctx = ctx.domain_ctx.snn_context
+    if snn_ctx is None or steps <= 0 or not snn_ctx.domain_ctx.neurons:
+        return
+    ensure_heavy_tensors_initialized(snn_ctx)
+    DreamTickKernel(seed).run(ctx, steps)
+    sync_from_heavy_tensors(snn_ctx)
+
+
+def run_sleep_cycle(contexts, steps: int, executor=None):
+    """
+    Sleep cycle cho cả population.
+
+    Args:
+        contexts: RL system contexts (domain_ctx.snn_context) của các agents
+        steps: Số dream steps
+        executor: concurrent.futures executor để chạy các agents song song (optional)
+
+    Seeds của các agents rút tuần tự từ np.random (global) → kết quả như nhau
+    dù chạy serial hay song song.
+    """
+    contexts = list(contexts)
+    seeds = np.random.randint(0, 2**31 - 1, size=len(contexts)).tolist()
+    if executor is None:
+        for ctx, seed in zip(contexts, seeds):
+            sleep_agent(ctx, steps, seed)
+        return
+    for future in [executor.submit(sleep_agent, ctx, steps, seed) for ctx, seed in zip(contexts, seeds)]:
+        future.result()
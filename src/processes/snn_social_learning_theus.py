@@ -7,10 +7,25 @@ Replaces legacy SocialLearningManager.
 Author: Do Huy Hoang
 Date: 2025-12-30
 """
-import copy
+import numpy as np
 from typing import List
 from theus.contracts import process
-from src.core.snn_context_theus import SNNSystemContext, SynapseState, SNNGlobalContext, SNNDomainContext
+from src.core.connectome import SYNAPSE_TYPE_SHADOW
+from src.core.snn_context_theus import (
+    SNNSystemContext,
+    SNNGlobalContext,
+    SNNDomainContext,
+    add_synapses,
+    gather_synapse_tensors
+)
+
+# Packed transfer record: một dòng cho mỗi synapse được chia sẻ giữa agents
+TRANSFER_RECORD_DTYPE = np.dtype([
+    ('pre', np.int32),
+    ('post', np.int32),
+    ('weight', np.float64),
+    ('source_agent_id', np.int32),
+])
 
 @process(
     inputs=['global_ctx', 'domain_ctx', 
@@ -18,6 +33,7 @@ from src.core.snn_context_theus import SNNSystemContext, SynapseState, SNNGlobal
         'domain_ctx.population_performance' 
     ],
     outputs=['domain_ctx', 
+        'domain_ctx.shadow_synapses',
         'domain_ctx.metrics'
     ],
     side_effects=['synapse.injection']
@@ -29,6 +45,10 @@ def process_social_learning_protocol(
 ):
     """
     Execute Social Learning: Transfer knowledge from Elite to Learners.
+
+    NOTE: Với social_transfer_quarantine, synapses vào quarantine pool
+    (shadow_synapses) của learner thay vì connectome;
+    process_quarantine_validation quyết định promote.
     
     Args:
         global_snn_ctx: Context containing Global Settings.
@@ -54,6 +74,7 @@ def process_social_learning_with_rankings(
     elite_ratio = getattr(global_config, 'social_elite_ratio', 0.2)
     learner_ratio = getattr(global_config, 'social_learner_ratio', 0.5)
     synapses_k = getattr(global_config, 'social_synapses_per_transfer', 10)
+    quarantine = getattr(global_config, 'social_transfer_quarantine', False)
     
     num_agents = len(population_contexts)
     if num_agents < 2:
@@ -67,55 +88,85 @@ def process_social_learning_with_rankings(
     elite_indices = [r[0] for r in rankings[:num_elite]]
     learner_indices = [r[0] for r in rankings[-num_learners:]]
     
-    # 2. Extract Elite Synapses
-    extracted_synapses = []
-    
-    for idx in elite_indices:
-        ctx = population_contexts[idx]
-        syns = _extract_top_synapses(ctx.domain_ctx, synapses_k)
-        extracted_synapses.extend(syns)
+    # 2. Extract Elite Synapses (packed records, một lô cho cả round)
+    extracted = np.concatenate([
+        _extract_top_synapses(population_contexts[idx].domain_ctx, synapses_k)
+        for idx in elite_indices
+    ])
         
     # 3. Inject into Learners
-    if not extracted_synapses:
+    if len(extracted) == 0:
         return
         
     for idx in learner_indices:
         ctx = population_contexts[idx]
-        count = _inject_synapses(ctx.domain_ctx, extracted_synapses)
+        count = _inject_synapses(ctx.domain_ctx, extracted, quarantine=quarantine)
         
         # Log
         ctx.domain_ctx.metrics['social_learning_injected'] = count
 
-def _extract_top_synapses(domain: SNNDomainContext, k: int) -> List[SynapseState]:
-    if not domain.synapses:
-        return []
-        
-    # Sort by abs weight
-    sorted_syns = sorted(domain.synapses, key=lambda s: abs(s.weight), reverse=True)
-    return sorted_syns[:k]
+def _top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Index của k giá trị lớn nhất, sắp giảm dần — O(n) bằng partition.
+    Giá trị bằng nhau giữ thứ tự index (khớp sorted(..., reverse=True) ổn định).
+    """
+    n = len(values)
+    if k >= n:
+        return np.argsort(-values, kind='stable')
+    kth = np.partition(values, n - k)[n - k]
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero(values == kth)[:k - len(above)]
+    top = np.concatenate([above, ties])
+    return top[np.argsort(-values[top], kind='stable')]
 
-def _inject_synapses(domain: SNNDomainContext, synapses: List[SynapseState]) -> int:
-    count = 0
-    start_id = max((s.synapse_id for s in domain.synapses), default=0) + 1
-    
-    for syn in synapses:
-        new_syn = copy.deepcopy(syn)
-        # Re-ID to avoid collisions
-        new_syn.synapse_id = start_id + count
-        
-        # Reset meta
-        new_syn.pre_neuron_id = syn.pre_neuron_id # Keep topology?
-        # Ideally we map topology, but if agents have identical layout (grid inputs), it works.
-        # If neurons are allocated dynamically, ID mismatch ensures chaos?
-        # Theus SNN assumes fixed Input Neurons (0-15).
-        # Internal neurons might differ.
-        # For now, we assume simple cloning (naive social learning).
-        
-        # Reset validation
-        if hasattr(new_syn, 'quarantine_time'): new_syn.quarantine_time = 0
-        if hasattr(new_syn, 'validation_score'): new_syn.validation_score = 0.0
-        
-        domain.synapses.append(new_syn)
-        count += 1
-        
-    return count
+
+def _extract_top_synapses(domain: SNNDomainContext, k: int) -> np.ndarray:
+    """Top-k synapses sống theo |weight| → packed transfer records (TRANSFER_RECORD_DTYPE)."""
+    store = domain.synapses
+    if not store or k <= 0:
+        return np.empty(0, dtype=TRANSFER_RECORD_DTYPE)
+
+    # NOTE: STDP ghi vào compute tensors (heavy_tensors['weights']) → gather về
+    # store trước để chọn theo weight hiện tại, không phải giá trị lúc init
+    gather_synapse_tensors(domain)
+    live = store.live_slots()
+    top = live[_top_k_indices(np.abs(store.weights[live]), k)]
+
+    records = np.empty(len(top), dtype=TRANSFER_RECORD_DTYPE)
+    records['pre'] = store.pre_ids[top]
+    records['post'] = store.post_ids[top]
+    records['weight'] = store.weights[top]
+    records['source_agent_id'] = domain.agent_id
+    return records
+
+
+def _inject_synapses(domain: SNNDomainContext, records: np.ndarray, quarantine: bool = False) -> int:
+    """
+    Bulk append transfer records vào connectome của learner (tensors được vá tại chỗ),
+    hoặc vào quarantine pool (shadow_synapses) khi quarantine=True.
+    """
+    n = len(records)
+    if n == 0:
+        return 0
+    # NOTE: Store theo dõi max synapse_id → O(1) thay vì duyệt toàn bộ.
+    # ID không trùng connectome lẫn pool (promote giữ nguyên synapse_id).
+    pool = domain.shadow_synapses
+    start_id = max(domain.synapses.next_synapse_id(), pool.next_synapse_id(), 1)
+    synapse_ids = np.arange(start_id, start_id + n, dtype=np.int64)
+    # Traces/commit/quarantine/validation lấy default của schema (bản sao mới)
+    if quarantine:
+        pool.add_arrays(
+            records['pre'], records['post'],
+            synapse_id=synapse_ids,
+            weight=records['weight'],
+            source_agent_id=records['source_agent_id'],
+            synapse_type=SYNAPSE_TYPE_SHADOW
+        )
+    else:
+        add_synapses(
+            domain, records['pre'], records['post'],
+            synapse_id=synapse_ids,
+            weight=records['weight'],
+            source_agent_id=records['source_agent_id']
+        )
+    return n
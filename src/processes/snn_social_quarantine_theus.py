@@ -6,8 +6,21 @@ Social Quarantine: Safe viral synapse transfer với validation.
 Author: Do Huy Hoang
 Date: 2025-12-25
 """
+import numpy as np
 from theus.contracts import process
+from src.core.connectome import SYNAPSE_FIELDS, SYNAPSE_TYPE_NATIVE
 from src.core.context import SystemContext
+from src.core.snn_context_theus import add_synapses
+
+
+def _last_fire_times(domain) -> np.ndarray:
+    """last_fire_times (N,) từ heavy tensors; fallback về neuron objects."""
+    tensors = domain.heavy_tensors or {}
+    lft = tensors.get('last_fire_times')
+    if lft is not None and len(lft) == len(domain.neurons):
+        return lft
+    return np.array([n.last_fire_time for n in domain.neurons], dtype=np.int64)
+
 
 
 @process(
@@ -72,88 +85,73 @@ def process_quarantine_validation(
     except:
         raw_error = 0.0 
     
-    # Init counters
-    blacklisted = 0
-    promoted = 0
-    rejected = 0
-    
-    for synapse in domain.shadow_synapses:
-        synapse.quarantine_time += 1
-        
-        # Check if active
-        pre_neuron = domain.neurons[synapse.pre_neuron_id]
-        if pre_neuron.last_fire_time == domain.current_time:
-            # Synapse was active.
-            # Would adding this weight have helped?
-            # Output = Prediction.
-            # New_Prediction = Prediction + Weight.
-            # New_Error = Target - (Prediction + Weight) = (Target - Prediction) - Weight = raw_error - Weight
-            
-            new_error = abs(raw_error - synapse.weight)
-            
-            # IMPROVEMENT CONDITION
-            if new_error < native_error:
-                # Shadow improved reality!
-                synapse.validation_score += 0.2  # Bonus
-                domain.metrics['shadow_hit'] = domain.metrics.get('shadow_hit', 0) + 1
-            else:
-                # Shadow made it worse!
-                synapse.validation_score -= 0.1
-                domain.metrics['shadow_miss'] = domain.metrics.get('shadow_miss', 0) + 1
-        
-        else:
-            # Synapse silent. Small decay or neutral?
-            # Decay score slightly to encourage active participation?
-            pass
+    # Safe cast config
+    try:
+        q_duration = int(global_ctx.quarantine_duration)
+    except:
+        q_duration = 50
+    try:
+        val_threshold = float(global_ctx.validation_threshold)
+    except:
+        val_threshold = 0.1
+
+    pool = domain.shadow_synapses
+    live = pool.live_slots()
+    promoted = rejected = blacklisted = 0
+
+    if len(live):
+        q_time = pool.column('quarantine_time')
+        scores = pool.column('validation_score')
+        flags = pool.column('is_blacklisted')
+        q_time[live] += 1
+
+        # Active = pre-neuron fired at current tick
+        last_fire = _last_fire_times(domain)
+        pre = pool.pre_ids[live]
+        in_range = pre < len(last_fire)
+        active = np.zeros(len(live), dtype=bool)
+        active[in_range] = last_fire[pre[in_range]] == domain.current_time
+
+        if active.any():
+            # New_Error = Target - (Prediction + Weight) = raw_error - Weight
+            # → shadow hữu ích nếu |raw_error - w| < |native error|
+            new_error = np.abs(raw_error - pool.weights[live[active]])
+            hit = new_error < native_error
+            scores[live[active]] += np.where(hit, 0.2, -0.1).astype(scores.dtype)
+            hits = int(hit.sum())
+            misses = len(hit) - hits
+            if hits:
+                domain.metrics['shadow_hit'] = domain.metrics.get('shadow_hit', 0) + hits
+            if misses:
+                domain.metrics['shadow_miss'] = domain.metrics.get('shadow_miss', 0) + misses
 
         # CRITICAL: Blacklist logic remains (Safety Net)
-        if reward < -0.5: # Major failure
-            synapse.is_blacklisted = True
-            if synapse.source_agent_id not in domain.blacklisted_sources:
-                domain.blacklisted_sources.append(synapse.source_agent_id)
-                blacklisted += 1
-    
-    # Check for promotion/rejection
-    to_promote = []
-    to_reject = []
-    
-    for synapse in domain.shadow_synapses:
-        # Safe cast config
-        try:
-            q_duration = int(global_ctx.quarantine_duration)
-        except:
-            q_duration = 50
-
-        if synapse.quarantine_time >= q_duration:
-            try:
-                val_threshold = float(global_ctx.validation_threshold)
-            except:
-                val_threshold = 0.1
-
-            if synapse.is_blacklisted:
-                # Blacklisted → Reject
-                to_reject.append(synapse)
-                rejected += 1
-            elif synapse.validation_score >= val_threshold:
-                # Validated → Promote
-                to_promote.append(synapse)
-                promoted += 1
-            else:
-                # Failed validation → Reject
-                to_reject.append(synapse)
-                rejected += 1
-    
-    # Promote validated synapses
-    for synapse in to_promote:
-        synapse.synapse_type = "native"
-        domain.synapses.append(synapse)
-    
-    # Remove from quarantine
-    domain.shadow_synapses = [
-        s for s in domain.shadow_synapses
-        if s not in to_promote and s not in to_reject
-    ]
-    
+        if reward < -0.5:  # Major failure
+            flags[live] = True
+            sources, first = np.unique(pool.column('source_agent_id')[live], return_index=True)
+            for source in sources[np.argsort(first)].tolist():
+                if source not in domain.blacklisted_sources:
+                    domain.blacklisted_sources.append(source)
+                    blacklisted += 1
+
+        # Promotion/rejection masks (blacklisted → reject, validated → promote)
+        due = live[q_time[live] >= q_duration]
+        passed = ~flags[due] & (scores[due] >= np.float32(val_threshold))
+        to_promote, to_reject = due[passed], due[~passed]
+        promoted, rejected = len(to_promote), len(to_reject)
+
+        if promoted:
+            # NOTE: Promote theo lô — tensors được vá tại chỗ, không rebuild
+            add_synapses(
+                domain, pool.pre_ids[to_promote], pool.post_ids[to_promote],
+                **{name: pool.column(name)[to_promote] for name in SYNAPSE_FIELDS
+                   if name not in ('pre_neuron_id', 'post_neuron_id', 'synapse_type')},
+                synapse_type=SYNAPSE_TYPE_NATIVE
+            )
+        # Remove from quarantine (tombstone O(k), slot được tái sử dụng)
+        if len(due):
+            pool.tombstone(due)
+
     # Update metrics
     domain.metrics['quarantine_promoted'] = \
         domain.metrics.get('quarantine_promoted', 0) + promoted
@@ -188,14 +186,12 @@ def process_inject_viral_with_quarantine(ctx: SystemContext):
     domain = snn_ctx.domain_ctx
     
     # Filter out blacklisted sources
-    before = len(domain.shadow_synapses)
-    
-    domain.shadow_synapses = [
-        s for s in domain.shadow_synapses
-        if s.source_agent_id not in domain.blacklisted_sources
-    ]
-    
-    blocked = before - len(domain.shadow_synapses)
+    pool = domain.shadow_synapses
+    blocked = 0
+    if pool and domain.blacklisted_sources:
+        sources = pool.column('source_agent_id')
+        blocked_mask = pool.alive & np.isin(sources, domain.blacklisted_sources)
+        blocked = len(pool.tombstone(np.flatnonzero(blocked_mask)))
     
     # Update metrics
     domain.metrics['blacklist_blocked'] = \
@@ -8,6 +8,7 @@ Date: 2025-12-25
 """
 from theus.contracts import process
 from src.core.snn_context_theus import SNNSystemContext
+from src.core.connectome import SYNAPSE_TYPE_REVOKED, SYNAPSE_TYPE_SHADOW
 
 
 @process(
@@ -150,17 +151,13 @@ def process_sandbox_evaluation(ctx: SNNSystemContext):
             
             takeover_count += 1
     
-    # Remove promoted shadows from shadow list
-    domain.shadow_synapses = [
-        s for s in domain.shadow_synapses
-        if s.synapse_type == "shadow"
-    ]
+    # Remove promoted shadows from shadow pool
+    promoted = domain.shadow_synapses.column('synapse_type') != SYNAPSE_TYPE_SHADOW
+    domain.shadow_synapses.remove(promoted)
     
     # Remove revoked synapses
-    domain.synapses = [
-        s for s in domain.synapses
-        if s.synapse_type != "revoked"
-    ]
+    revoked = domain.synapses.column('synapse_type') == SYNAPSE_TYPE_REVOKED
+    domain.synapses.remove(revoked)
     
     # Update metrics
     domain.metrics['viral_takeover_count'] = \
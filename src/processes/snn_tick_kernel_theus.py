@@ -0,0 +1,410 @@
+"""
+SNN Fused Tick Kernel
+=====================
+Temporal loop của `process_snn_cycle` cho MỘT agent, chạy như một kernel:
+encode → integrate → lateral inhibition → fire → STDP → tick.
+
+Thay vì mỗi tick gọi 6 hàm `_*_impl` (mỗi hàm resolve lại SNN context bằng
+chuỗi hasattr, ensure_heavy_tensors_initialized, lấy lại tensors từ dict và
+cấp phát temporaries mới), kernel:
+
+- bind tensor references + hyperparameters MỘT lần mỗi step (`_bind`)
+- giữ scratch buffers (masks, delta, effective rows) qua các step, chỉ cấp
+  phát lại khi N/S/D đổi
+- chạy các tick bằng phép toán in-place (`out=`), gom metrics và ghi trả
+  một lần cuối step (`_flush`); fire counts đếm thẳng trên heavy_tensors
+
+Kết quả khớp từng bit với vòng lặp `_*_impl` (xem tests/test_fused_tick_kernel.py).
+Legacy spike queue (`use_vectorized_queue=False`) không dùng kernel.
+
+Author: Do Huy Hoang
+Date: 2026-03-27
+"""
+import numpy as np
+
+from src.core.connectome import csr_gather_rows
+from src.core.snn_context_theus import (
+    COMMIT_STATE_SOLID,
+    COMMIT_STATE_REVOKED,
+    is_sparse_backend,
+    prototype_similarity
+)
+from src.logger import log
+from src.processes.snn_advanced_features_theus import _lateral_inhibition_vectorized
+from src.processes.snn_core_theus import _EFF_ROWS_MAX_CELLS
+from src.processes.snn_rl_bridge import _sensor_vector
+
+REFRACTORY = 5           # Khớp _fire_impl
+HEBBIAN_WINDOW = 20.0    # Khớp _stdp_3factor_impl
+FIRE_EMA_ALPHA = 0.05    # Khớp _fire_impl
+QUEUE_WINDOW = 10        # Khớp _tick_impl (spike_queue cleanup)
+
+
+def _sf(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError, AttributeError):
+        return default
+
+
+def get_tick_kernel(snn_ctx):
+    """
+    Kernel của agent (tạo lần đầu, lưu ở domain_ctx.heavy_tick_kernel), hoặc
+    None nếu tắt `use_fused_tick_kernel` / agent dùng legacy spike queue.
+    """
+    domain = snn_ctx.domain_ctx
+    if not getattr(snn_ctx.global_ctx, 'use_fused_tick_kernel', True) or not domain.neurons:
+        return None
+    if not domain.heavy_tensors.get('use_vectorized_queue', False):
+        return None
+    kernel = getattr(domain, 'heavy_tick_kernel', None)
+    if kernel is None:
+        kernel = domain.heavy_tick_kernel = FusedTickKernel()
+    return kernel
+
+
+class FusedTickKernel:
+    """
+    Fused SNN tick loop cho một agent.
+
+    Usage:
+        kernel = get_tick_kernel(snn_ctx)
+        kernel.run(ctx, ticks_per_step)
+
+    NOTE: Kernel chỉ giữ scratch buffers (derived state). Mọi state thật vẫn
+    nằm trong heavy_tensors / connectome store / metrics — bind lại mỗi step,
+    nên bật/tắt kernel giữa các step không cần migrate. Pickle/deepcopy trả
+    về kernel rỗng.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self._buffers = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def run(self, ctx, ticks: int, lap=None, start_ns: int = 0) -> int:
+        """
+        Chạy `ticks` tick cho agent của `ctx` (tương đương temporal loop của
+        process_snn_cycle). `lap(stage, start_ns) -> now_ns` (profiling) được
+        gọi sau mỗi stage; trả về mốc thời gian cuối cùng.
+        """
+        self._bind(ctx)
+        try:
+            if lap is None:
+                for _ in range(ticks):
+                    self._tick()
+                return start_ns
+            t = start_ns
+            for _ in range(ticks):
+                queue = self._encode()
+                t = lap('encode', t)
+                self._integrate()
+                t = lap('integrate', t)
+                if self.lateral:
+                    self._inhibit(queue)
+                    t = lap('inhibition', t)
+                self._fire()
+                t = lap('fire', t)
+                self._stdp(queue)
+                t = lap('stdp', t)
+                self._advance()
+                t = lap('tick', t)
+            return t
+        finally:
+            self._flush()
+
+    # ------------------------------------------------------------------
+    # Bind / Flush (một lần mỗi step)
+    # ------------------------------------------------------------------
+
+    def _bind(self, ctx):
+        self.ctx = ctx
+        snn_ctx = ctx.domain_ctx.snn_context
+        g = snn_ctx.global_ctx
+        domain = snn_ctx.domain_ctx
+        t = domain.heavy_tensors
+        store = domain.synapses
+        self.snn_ctx, self.domain, self.store = snn_ctx, domain, store
+
+        self.pots = t['potentials']
+        self.pvecs = t['potential_vectors']
+        self.thresholds = t['thresholds']
+        self.last_fire = t['last_fire_times']
+        self.spike_buffer = t['spike_buffer']
+        self.weights = t['weights']
+        self.protos = t['prototypes']
+        self.sparse = is_sparse_backend(t)
+        if self.sparse:
+            self.csr = (t['csr_indptr'], t['csr_fill'], t['csr_slots'])
+        # NOTE: Prototypes không đổi trong temporal loop → similarity bind một lần
+        self.sim = prototype_similarity(t, store)
+        self.post_ids = store.post_ids
+        self.pre_ids = store.pre_ids
+        self.fast = store.column('trace_fast')
+        self.slow = store.column('trace_slow')
+
+        N, D = self.pvecs.shape
+        S = store.num_slots
+        self.N, self.S = N, S
+        self.now = int(domain.current_time)
+
+        # Hyperparameters (khớp các _*_impl)
+        self.tau_decay = _sf(g.tau_decay, 0.9)
+        self.base_amp = float(g.input_amplification_factor)
+        self.target_fr = float(g.target_fire_rate)
+        self.lateral = bool(g.use_lateral_inhibition)
+        self.tau_fast = float(g.tau_trace_fast)
+        self.tau_slow = float(g.tau_trace_slow)
+        self.w_decay = float(g.weight_decay)
+        try:
+            td_error = float(ctx.domain_ctx.td_error)
+        except Exception:
+            td_error = 0.0
+        self.dopamine = float(np.tanh(td_error))
+        self.lrs = None  # Tính lười: chỉ cần khi có learning
+
+        # Input encoding: sensor không đổi trong step
+        sensor = np.asarray(_sensor_vector(ctx.domain_ctx.current_observation))
+        R = min(max(16, int(N * 0.2)), N)
+        self.sensor = sensor
+        self.R = R
+        self.base_inj = sensor[np.arange(R) % len(sensor)]
+        # NOTE: dtype của (val * amp) như nhánh scalar: float giữ dtype, int → float64
+        inj_dtype = self.base_inj.dtype if self.base_inj.dtype.kind == 'f' else np.float64
+        self.inj = self._scratch('inj', (R,), inj_dtype)
+
+        # Scratch buffers (giữ qua các step)
+        self.age = self._scratch('age', (N,), self.last_fire.dtype)
+        self.can_fire = self._scratch('can_fire', (N,), bool)
+        self.above = self._scratch('above', (N,), bool)
+        self.delta_pots = self._scratch('delta_pots', (N,), np.float32)
+        self.delta_vecs = self._scratch('delta_vecs', (N, D), np.float32)
+        self.eligibility = self._scratch('eligibility', (S,), np.float32)
+        self.fire_counts = t['fire_counts']
+
+        # Metrics gom cục bộ, ghi trả ở _flush
+        metrics = domain.metrics
+        self.ema = metrics.get('avg_firing_rate', 0.0)
+        self.total_spikes = metrics.get('episode_total_spikes', 0)
+        self.fire_rate = None
+        self.fired_count = 0
+        self.step_fired = 0
+        self.queue = domain.spike_queue
+
+    def _flush(self):
+        domain = self.domain
+        if self.fire_rate is not None:
+            metrics = domain.metrics
+            metrics['fire_rate'] = self.fire_rate
+            metrics['fired_count'] = self.fired_count
+            metrics['episode_total_spikes'] = self.total_spikes
+            metrics['avg_firing_rate'] = self.ema
+
+        # Tick cleanup (_tick_impl) một lần cho cả step: bỏ spike_queue entries quá cũ
+        now = int(domain.current_time)
+        for key in [k for k in self.queue.keys() if k < now - QUEUE_WINDOW]:
+            del self.queue[key]
+
+        if self.step_fired:
+            log(self.snn_ctx, "debug", f"DEBUG SNN FIRE: Time={now}, Fired={self.step_fired} (step)")
+        # Không giữ references tới state của agent giữa các step
+        self.ctx = self.snn_ctx = self.domain = self.store = None
+
+    def _scratch(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buf
+
+    def _rows(self, name: str, K: int) -> np.ndarray:
+        """Block (K, N) float32 từ buffer có capacity tăng dần theo K."""
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape[1] != self.N or buf.shape[0] < K:
+            cap = min(max(K, 2 * (buf.shape[0] if buf is not None else 0), 16), max(K, self.N))
+            buf = self._buffers[name] = np.empty((cap, self.N), dtype=np.float32)
+        return buf[:K]
+
+    # ------------------------------------------------------------------
+    # Tick Stages
+    # ------------------------------------------------------------------
+
+    def _tick(self):
+        queue = self._encode()
+        self._integrate()
+        if self.lateral:
+            self._inhibit(queue)
+        self._fire()
+        self._stdp(queue)
+        self._advance()
+
+    def _encode(self):
+        """Khớp _encode_state_to_spikes_impl. Trả về spike_queue entries của tick này."""
+        sensitivity = min(max(self.target_fr / (self.ema + 1e-6), 0.1), 10.0)
+        np.multiply(self.base_inj, self.base_amp * sensitivity, out=self.inj)
+        R = self.R
+        self.pots[:R] += self.inj
+        self.pvecs[:R] += self.sensor
+        return self.queue.get(self.now)
+
+    def _integrate(self):
+        """Khớp _integrate_impl (decay + synaptic integration qua similarity cache)."""
+        pots, pvecs, N = self.pots, self.pvecs, self.N
+        pots *= self.tau_decay
+        pvecs *= self.tau_decay
+
+        buffer = self.spike_buffer
+        t_idx = self.now % buffer.shape[0]
+        spike_indices = np.flatnonzero(buffer[t_idx])
+        buffer[t_idx] = 0
+        K = len(spike_indices)
+        if K == 0:
+            return
+
+        firing_protos = self.protos[spike_indices]
+        rows = None
+        if self.sparse:
+            slots, row_pos = csr_gather_rows(*self.csr, spike_indices)
+            posts = self.post_ids[slots]
+            eff_edges = self.weights[slots]
+            eff_edges *= self.sim[slots]
+            if K * N <= _EFF_ROWS_MAX_CELLS:
+                rows = self._rows('rows', K)
+                rows.fill(0)
+                np.add.at(rows.reshape(-1), row_pos * N + posts, eff_edges)
+            else:
+                delta_pots = np.bincount(posts, weights=eff_edges, minlength=N).astype(np.float32)
+        else:
+            rows = self._rows('rows', K)
+            np.take(self.weights, spike_indices, axis=0, out=rows)
+            sim_rows = self._rows('sim_rows', K)
+            np.take(self.sim, spike_indices, axis=0, out=sim_rows)
+            rows *= sim_rows
+
+        if rows is not None:
+            delta_pots = np.sum(rows, axis=0, out=self.delta_pots)
+
+        # Global inhibition (khớp _integrate_impl)
+        expected_spikes = max(10, int(N * 0.02))
+        if K > expected_spikes:
+            delta_pots /= 1.0 + ((K - expected_spikes) / (expected_spikes * 2.0))
+        pots += delta_pots
+
+        if rows is not None:
+            delta_vecs = np.matmul(rows.T, firing_protos, out=self.delta_vecs)
+        else:
+            D = firing_protos.shape[1]
+            edge_vecs = eff_edges[:, None] * firing_protos[row_pos]
+            flat_idx = (posts[:, None].astype(np.int64) * D + np.arange(D)).ravel()
+            delta_vecs = np.bincount(flat_idx, weights=edge_vecs.ravel(), minlength=N * D)
+            delta_vecs = delta_vecs.reshape(N, D).astype(np.float32)
+        pvecs += delta_vecs
+
+    def _inhibit(self, queue):
+        """Lateral inhibition chỉ có tác dụng khi spike_queue có spikes (legacy/imagination)."""
+        if queue:
+            _lateral_inhibition_vectorized(self.ctx)
+
+    def _fire(self):
+        """Khớp _fire_impl (spike buffer + fire_counts tensor; metrics gom tới _flush)."""
+        now = self.now
+        np.subtract(now, self.last_fire, out=self.age)
+        np.greater_equal(self.age, REFRACTORY, out=self.can_fire)
+        np.greater_equal(self.pots, self.thresholds, out=self.above)
+        self.can_fire &= self.above
+        fired = np.flatnonzero(self.can_fire)
+        n_fired = len(fired)
+
+        if n_fired > 0:
+            self.last_fire[fired] = now
+            self.pots[fired] = -0.1
+            self.pvecs[fired] = 0.0
+            self.fire_counts[fired] += 1
+            buffer = self.spike_buffer
+            buffer[(now + 1) % buffer.shape[0], fired] = 1
+            self.step_fired += n_fired
+
+        fire_rate = n_fired / self.N
+        self.fire_rate = fire_rate
+        self.fired_count = n_fired
+        self.total_spikes += n_fired
+        self.ema = (1.0 - FIRE_EMA_ALPHA) * self.ema + FIRE_EMA_ALPHA * fire_rate
+
+    def _stdp(self, queue):
+        """Khớp _stdp_3factor_impl (commit state không đổi trong step → lrs tính một lần)."""
+        fast, slow = self.fast, self.slow
+        fast *= self.tau_fast
+        slow *= self.tau_slow
+
+        dopamine = self.dopamine
+        if not queue and abs(dopamine) < 1e-4:
+            return
+
+        pre_ids, post_ids = self.pre_ids, self.post_ids
+        if queue:
+            current_spikes = set(queue)
+            spiked = np.zeros(self.N, dtype=bool)
+            spiked[np.fromiter(current_spikes, dtype=np.int64)] = True
+            candidates = np.flatnonzero(spiked[post_ids])
+            if len(candidates) > 0:
+                dt = float(self.now) - self.last_fire[pre_ids[candidates]].astype(np.float32)
+                hit = candidates[(dt > 0) & (dt <= HEBBIAN_WINDOW)]
+                fast[hit] += 1.0
+                slow[hit] += 1.0
+                self.store.column('last_active_time')[hit] = self.now
+
+        if self.lrs is None:
+            self.lrs = self._learning_rates()
+        delta_w = np.add(fast, slow, out=self.eligibility)
+        delta_w *= self.lrs
+        delta_w *= dopamine
+
+        weights = self.weights
+        if self.sparse:
+            weights += delta_w
+        else:
+            # Dense: scatter qua flat index (pre * N + post) cache theo store.version;
+            # index trùng vẫn giữ lần ghi cuối như weights[pre, post] += delta_w
+            flat, live = self._dense_flat_index()
+            if weights.flags.c_contiguous:
+                weights.reshape(-1)[flat] += delta_w if live is None else delta_w[live]
+            else:
+                # reshape(-1) sẽ là bản copy → scatter 2D
+                live_pre = pre_ids if live is None else pre_ids[live]
+                live_post = post_ids if live is None else post_ids[live]
+                weights[live_pre, live_post] += delta_w if live is None else delta_w[live]
+        weights *= self.w_decay
+        np.clip(weights, 0.0, 1.0, out=weights)
+
+    def _dense_flat_index(self):
+        """(flat index của synapses sống, live mask hoặc None) — cache theo (store.version, N)."""
+        store = self.store
+        key = (store.version, self.N)
+        cached = self._buffers.get('dense_flat')
+        if cached is None or cached[0] != key:
+            live = store.alive.copy() if store.num_dead else None
+            pre = self.pre_ids.astype(np.int64)
+            post = self.post_ids.astype(np.int64)
+            if live is not None:
+                pre, post = pre[live], post[live]
+            cached = self._buffers['dense_flat'] = (key, pre * self.N + post, live)
+        return cached[1], cached[2]
+
+    def _learning_rates(self) -> np.ndarray:
+        g = self.snn_ctx.global_ctx
+        commit = self.store.column('commit_state')
+        lrs = np.full(self.S, float(g.dopamine_learning_rate), dtype=np.float32)
+        lrs[commit == COMMIT_STATE_SOLID] *= float(g.solid_learning_rate_factor)
+        lrs[commit == COMMIT_STATE_REVOKED] = 0.0
+        return lrs
+
+    def _advance(self):
+        self.now += 1
+        self.domain.current_time = self.now
@@ -317,66 +317,69 @@ class BrainBiopsyTheus:
     @staticmethod
     def load_agent_checkpoint(filename: str, snn_ctx: SNNSystemContext) -> SNNSystemContext:
         """
-        Load agent SNN state from JSON checkpoint.
+        Load agent SNN state từ checkpoint (thư mục binary hoặc JSON cũ).
         
         Args:
-            filename: Path to JSON file
+            filename: Path to checkpoint directory / legacy JSON file
             snn_ctx: Existing context to hydrate (avoids re-creating objects)
             
         Returns:
             Updated snn_ctx
         """
-        import json
-        import numpy as np
+        from src.utils.snn_persistence import open_snn_checkpoint, restore_snn_checkpoint
+        
+        # 1-2. Neurons + Connectome (cột memmap → bulk copy vào store)
+        restore_snn_checkpoint(snn_ctx, open_snn_checkpoint(filename))
         
-        with open(filename, 'r') as f:
-            data = json.load(f)
-            
-        domain = snn_ctx.domain_ctx
-        
-        # 1. Load Neurons
-        if 'neurons' in data:
-            for i, n_data in enumerate(data['neurons']):
-                if i < len(domain.neurons):
-                    neuron = domain.neurons[i]
-                    neuron.potential = n_data.get('potential', 0.0)
-                    neuron.threshold = n_data.get('threshold', 0.0)
-                    neuron.last_fire_time = n_data.get('last_fire_time', -1)
-                    neuron.fire_count = n_data.get('fire_count', 0)
-                    
-                    if 'prototype_vector' in n_data:
-                        neuron.prototype_vector = np.array(n_data['prototype_vector'], dtype=np.float32)
-                    
-        # 2. Load Synapses (Critical)
-        if 'synapses' in data:
-            syn_dict = {s['synapse_id']: s for s in data['synapses']}
-            
-            for syn in domain.synapses:
-                s_data = syn_dict.get(syn.synapse_id)
-                if s_data:
-                    syn.weight = s_data.get('weight', syn.weight)
-                    syn.trace = s_data.get('trace', 0.0)
-                    # Phase 7: Commitment
-                    syn.commit_state = s_data.get('commit_state', 0)
-                    syn.consecutive_correct = s_data.get('consecutive_correct', 0)
-                    syn.consecutive_wrong = s_data.get('consecutive_wrong', 0)
-                    
         # 3. Sync to Heavy Tensors (Compute-Sync)
         from src.core.snn_context_theus import sync_to_heavy_tensors
         sync_to_heavy_tensors(snn_ctx)
         
         return snn_ctx
 
+    @staticmethod
+    def inspect_checkpoint(filename: str) -> Dict[str, Any]:
+        """
+        Thống kê connectome trực tiếp từ checkpoint (memmap, zero-copy),
+        không cần dựng SNN context.
+        """
+        from src.utils.snn_persistence import open_snn_checkpoint
+        
+        ckpt = open_snn_checkpoint(filename)
+        syn = ckpt.synapses
+        stats = {
+            'metadata': ckpt.metadata,
+            'format_version': ckpt.manifest.get('format_version'),
+            'num_synapses': ckpt.num_synapses,
+        }
+        if ckpt.num_synapses:
+            weights = syn['weight']
+            stats['weights'] = {
+                'mean': float(weights.mean()),
+                'std': float(weights.std()),
+                'min': float(weights.min()),
+                'max': float(weights.max()),
+            }
+            if 'commit_state' in syn:
+                counts = np.bincount(np.asarray(syn['commit_state'], dtype=np.int64), minlength=3)
+                stats['commit_states'] = {
+                    'fluid': int(counts[0]), 'solid': int(counts[1]), 'revoked': int(counts[2])
+                }
+        if 'fire_count' in ckpt.neurons:
+            stats['total_fires'] = int(ckpt.neurons['fire_count'].sum())
+        return stats
+
 def load_all_agents(checkpoint_dir: str, snn_contexts: list) -> list:
     """
     Load checkpoints for all agents in a directory.
-    Expects files: agent_0_snn.json, agent_1_snn.json, etc.
+    Expects agent_0_snn/, agent_1_snn/, ... (or legacy agent_{i}_snn.json).
     """
     import os
+    from src.utils.snn_persistence import agent_checkpoint_path
     
     loaded = []
     for i, ctx in enumerate(snn_contexts):
-        filename = os.path.join(checkpoint_dir, f"agent_{i}_snn.json")
+        filename = agent_checkpoint_path(checkpoint_dir, i)
         if os.path.exists(filename):
             BrainBiopsyTheus.load_agent_checkpoint(filename, ctx)
             loaded.append(ctx)
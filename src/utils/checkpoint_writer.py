@@ -0,0 +1,194 @@
+"""
+Async Checkpoint Writer
+=======================
+Ghi checkpoint ở background thread để episode loop không bị chặn.
+
+- Caller chụp snapshot (copy mảng, xem `snapshot_snn_agent`) rồi `submit`.
+- Writer ghi vào thư mục tạm `checkpoint_ep_N.partial-{pid}` rồi
+  `os.replace` sang tên thật → crash giữa chừng không bao giờ để lại
+  `checkpoint_ep_N` ghi dở (thư mục .partial bị dọn ở lần chạy sau).
+- Queue có giới hạn: khi writer chậm hơn tần suất checkpoint, `submit`
+  chặn (backpressure) thay vì giữ snapshot không giới hạn trong RAM.
+
+NOTE: Dùng thread (không phải process): phần ghi là np.save / file I/O
+trên mảng lớn, nhả GIL nên không tranh chấp đáng kể với episode loop,
+và snapshot không phải pickle qua process boundary.
+
+Author: Do Huy Hoang
+Date: 2026-03-26
+"""
+import atexit
+import glob
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from src.utils.snn_persistence import AgentSnapshot, write_agent_snapshot
+
+
+PARTIAL_SUFFIX = '.partial-'
+
+
+def cleanup_partial_checkpoints(output_dir: str) -> int:
+    """Xóa các thư mục checkpoint ghi dở (`*.partial-*`). Trả về số thư mục đã xóa."""
+    removed = 0
+    for path in glob.glob(os.path.join(output_dir, f'*{PARTIAL_SUFFIX}*')):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def write_checkpoint_atomic(checkpoint_dir: str, snapshots: List[AgentSnapshot],
+                            extra_json: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Ghi toàn bộ agents vào thư mục tạm rồi rename atomically thành `checkpoint_dir`.
+    `extra_json`: {filename: object} ghi kèm (e.g. exploration_rates.json).
+    """
+    checkpoint_dir = checkpoint_dir.rstrip('/\\')
+    tmp_dir = f"{checkpoint_dir}{PARTIAL_SUFFIX}{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    for snapshot in snapshots:
+        write_agent_snapshot(snapshot, tmp_dir)
+    for filename, obj in (extra_json or {}).items():
+        with open(os.path.join(tmp_dir, filename), 'w') as f:
+            json.dump(obj, f)
+
+    # NOTE: os.replace không ghi đè được thư mục không rỗng → đẩy bản cũ
+    # sang một tên tạm trước (hiếm: chỉ khi chạy lại cùng output_dir)
+    stale_dir = None
+    if os.path.exists(checkpoint_dir):
+        stale_dir = f"{checkpoint_dir}{PARTIAL_SUFFIX}old-{os.getpid()}"
+        os.replace(checkpoint_dir, stale_dir)
+    os.replace(tmp_dir, checkpoint_dir)
+    if stale_dir:
+        shutil.rmtree(stale_dir, ignore_errors=True)
+    return checkpoint_dir
+
+
+class AsyncCheckpointWriter:
+    """
+    Background writer với queue giới hạn `max_pending` checkpoints.
+
+    Usage:
+        writer = AsyncCheckpointWriter(max_pending=2)
+        snapshots = [snapshot_snn_agent(a.snn_ctx, a.rl_ctx, i) for i, a in enumerate(agents)]
+        writer.submit(checkpoint_dir, snapshots, {'exploration_rates.json': rates})
+        ...
+        writer.flush()   # đợi ghi xong (cuối experiment)
+        writer.metrics() # latency / queue depth
+    """
+
+    def __init__(self, max_pending: int = 2):
+        self.max_pending = max(1, int(max_pending))
+        self._queue: queue.Queue = queue.Queue()
+        # NOTE: Giới hạn tính cả checkpoint đang ghi (không chỉ đang chờ)
+        # → tối đa `max_pending` bộ snapshot nằm trong RAM cùng lúc
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._stats = {
+            'checkpoints_written': 0,
+            'checkpoint_errors': 0,
+            'checkpoint_last_write_ms': 0.0,
+            'checkpoint_max_write_ms': 0.0,
+            'checkpoint_last_snapshot_ms': 0.0,
+            'checkpoint_last_submit_wait_ms': 0.0,
+            'checkpoint_last_bytes': 0,
+        }
+        self.last_error: Optional[str] = None
+        self.last_checkpoint_dir: Optional[str] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+        # NOTE: Thread daemon bị kill khi interpreter thoát → flush ở atexit
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Producer Side (episode loop)
+    # ------------------------------------------------------------------
+
+    def submit(self, checkpoint_dir: str, snapshots: List[AgentSnapshot],
+               extra_json: Optional[Dict[str, Any]] = None, snapshot_ms: float = 0.0):
+        """
+        Đưa checkpoint vào queue. Chặn nếu đã có `max_pending` checkpoint
+        đang chờ hoặc đang ghi.
+        """
+        if self._closed:
+            raise RuntimeError("AsyncCheckpointWriter is closed")
+        start = time.perf_counter()
+        self._slots.acquire()
+        self._queue.put((checkpoint_dir, list(snapshots), dict(extra_json or {})))
+        with self._lock:
+            self._stats['checkpoint_last_snapshot_ms'] = float(snapshot_ms)
+            self._stats['checkpoint_last_submit_wait_ms'] = (time.perf_counter() - start) * 1000
+
+    @property
+    def queue_depth(self) -> int:
+        """Số checkpoint đang chờ hoặc đang ghi."""
+        return self._queue.unfinished_tasks
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['checkpoint_queue_depth'] = self.queue_depth
+        return stats
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Đợi mọi checkpoint trong queue ghi xong. False nếu hết timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush rồi dừng writer thread (idempotent)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    # ------------------------------------------------------------------
+    # Writer Thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                checkpoint_dir, snapshots, extra_json = job
+                start = time.perf_counter()
+                write_checkpoint_atomic(checkpoint_dir, snapshots, extra_json)
+                elapsed = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self._stats['checkpoints_written'] += 1
+                    self._stats['checkpoint_last_write_ms'] = elapsed
+                    self._stats['checkpoint_max_write_ms'] = max(self._stats['checkpoint_max_write_ms'], elapsed)
+                    self._stats['checkpoint_last_bytes'] = sum(s.nbytes for s in snapshots)
+                    self.last_checkpoint_dir = checkpoint_dir
+            except Exception:
+                # NOTE: Lỗi ghi không được làm sập episode loop; thư mục
+                # .partial còn sót sẽ bị cleanup_partial_checkpoints dọn
+                with self._lock:
+                    self._stats['checkpoint_errors'] += 1
+                    self.last_error = traceback.format_exc()
+                print(f"[Checkpoint] Background write failed:\n{self.last_error}")
+            finally:
+                if job is not None:
+                    self._slots.release()
+                self._queue.task_done()
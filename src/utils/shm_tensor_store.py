@@ -7,8 +7,12 @@ bình thường, nhưng backing bằng SharedMemory (zero-copy).
 Author: Do Huy Hoang
 Date: 2026-03-05
 """
+import os
 import numpy as np
-from typing import Any, Optional
+from typing import Any, Dict, Optional
+
+# NOTE: POSIX SharedMemory segments hiện diện dưới dạng file trong /dev/shm
+SHM_DIR = "/dev/shm"
 
 
 class ShmTensorStore(dict):
@@ -82,3 +86,88 @@ class ShmTensorStore(dict):
             f"ShmTensorStore(prefix='{self._prefix}', "
             f"keys={total}, shm_backed={shm_count})"
         )
+
+
+# ============================================================================
+# Cross-Process Helpers (Sharded Agent Pool)
+# ============================================================================
+
+def _shm_name(value) -> Optional[str]:
+    shm = getattr(value, 'shm', None)
+    return getattr(shm, 'name', None) if shm is not None else None
+
+
+def export_tensor_manifest(tensors: Dict[str, Any]) -> Dict[str, tuple]:
+    """
+    Mô tả heavy_tensors để gửi qua process boundary mà không copy data SHM.
+
+    Returns:
+        {key: ('shm', name, shape, dtype_str)} cho SHM-backed arrays,
+        {key: ('value', value)} cho mọi thứ khác (flags, plain arrays).
+    """
+    manifest = {}
+    for key, value in tensors.items():
+        name = _shm_name(value)
+        if name is not None:
+            manifest[key] = ('shm', name, value.shape, value.dtype.str)
+        else:
+            manifest[key] = ('value', value)
+    return manifest
+
+
+def adopt_tensor_manifest(tensors: Dict[str, Any], manifest: Dict[str, tuple]):
+    """
+    Áp manifest (từ export_tensor_manifest ở process khác) vào `tensors`.
+
+    - Segment trùng tên với value hiện tại → bỏ qua (cùng mmap, đã đồng bộ)
+    - Segment khác (process kia đã re-alloc) → attach by name, copy vào store
+    - Keys không có trong manifest bị xoá (process kia đã invalidate)
+    """
+    from multiprocessing import shared_memory
+
+    for key in [k for k in tensors.keys() if k not in manifest]:
+        del tensors[key]
+
+    for key, entry in manifest.items():
+        if entry[0] == 'value':
+            tensors[key] = entry[1]
+            continue
+        _, name, shape, dtype = entry
+        if key in tensors and _shm_name(tensors[key]) == name:
+            continue
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            tensors[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf).copy()
+        finally:
+            shm.close()
+
+
+def unlink_process_segments(allocator, pid: int) -> int:
+    """
+    Unlink mọi segment mà process `pid` đã cấp qua (bản fork của) `allocator`.
+
+    NOTE: Dùng khi worker process chết bất thường — atexit/cleanup của nó
+    không chạy nên segments sẽ rò rỉ trong /dev/shm. Tên segment theo format
+    của HeavyZoneAllocator: theus:{session}:{pid}:{key}.
+
+    Returns:
+        Số segments đã unlink.
+    """
+    from multiprocessing import shared_memory
+
+    session = getattr(allocator, '_session_id', None)
+    if session is None or not os.path.isdir(SHM_DIR):
+        return 0
+    prefix = f"theus:{session}:{pid}:"
+    removed = 0
+    for name in os.listdir(SHM_DIR):
+        if not name.startswith(prefix):
+            continue
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+            shm.close()
+            shm.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
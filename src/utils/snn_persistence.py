@@ -3,17 +3,336 @@ SNN Save/Load Utilities
 ========================
 Utilities để lưu và load trained SNN agents.
 
+Checkpoint format (binary, versioned) — một thư mục cho mỗi agent:
+
+    agent_{id}_snn/
+        manifest.json            # format_version, metadata, memory nhỏ, schema cột
+        neuron.<field>.npy       # cột neuron (N,) / prototype_vector (N, D)
+        synapse.<field>.npy      # cột connectome (S,) — chỉ synapses còn sống
+        q_table.pkl              # Q-table (keys có thể là tuple → không JSON được)
+    agent_{id}_net.pt            # Gated Integration Network weights (cạnh thư mục)
+
+Cột được ghi bằng bulk `np.save` và đọc lại bằng `np.load(mmap_mode='r')`
+(zero-copy cho biopsy/inspect). Format JSON cũ (`agent_{id}_snn.json`) vẫn
+đọc được và có thể chuyển đổi bằng `convert_json_checkpoint`.
+
 Author: Do Huy Hoang
 Date: 2025-12-25
 """
 import json
 import os
+import pickle
 import numpy as np
 import torch
-from typing import Any, List, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from src.core.connectome import SYNAPSE_SCHEMA
 from src.core.snn_context_theus import SNNSystemContext
 
 
+CHECKPOINT_FORMAT = 'snn-checkpoint'
+CHECKPOINT_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+Q_TABLE_FILE = 'q_table.pkl'
+
+# (field, dtype) của cột neuron. prototype_vector là (N, D).
+NEURON_SCHEMA = (
+    ('neuron_id', np.int32),
+    ('prototype_vector', np.float32),
+    ('potential', np.float32),
+    ('threshold', np.float32),
+    ('fire_count', np.int64),
+    ('last_fire_time', np.int64),
+    ('solidity_ratio', np.float32),
+)
+
+_SYNAPSE_DTYPES = {name: dtype for name, dtype, _ in SYNAPSE_SCHEMA}
+
+
+# ============================================================================
+# Paths
+# ============================================================================
+
+def agent_checkpoint_path(checkpoint_dir: str, agent_id: int) -> str:
+    """
+    Path checkpoint của agent trong `checkpoint_dir`: thư mục binary nếu có,
+    fallback file JSON cũ; nếu chưa có gì trả về path binary.
+    """
+    binary_path = os.path.join(checkpoint_dir, f'agent_{agent_id}_snn')
+    legacy_path = binary_path + '.json'
+    if not os.path.isdir(binary_path) and os.path.isfile(legacy_path):
+        return legacy_path
+    return binary_path
+
+
+def _net_weights_path(checkpoint_path: str) -> str:
+    """agent_0_snn/ hoặc agent_0_snn.json -> agent_0_net.pt"""
+    base = checkpoint_path.rstrip('/\\')
+    if base.endswith('.json'):
+        base = base[:-len('.json')]
+    if base.endswith('_snn'):
+        base = base[:-len('_snn')]
+    return base + '_net.pt'
+
+
+# ============================================================================
+# Checkpoint Reader
+# ============================================================================
+
+class SNNCheckpoint:
+    """
+    Checkpoint đã mở (read-only).
+
+    - `manifest`: dict (metadata, memory, schema cột)
+    - `neurons` / `synapses`: {field: np.ndarray} — memmap với format binary
+    - `q_table()`: load lazy (pickle), không tốn gì nếu chỉ xem connectome
+
+    NOTE: Mảng memmap giữ file mở; copy (np.array) nếu cần giữ lâu hoặc sửa.
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any],
+                 neurons: Dict[str, np.ndarray], synapses: Dict[str, np.ndarray],
+                 q_table: Optional[Dict] = None):
+        self.path = path
+        self.manifest = manifest
+        self.neurons = neurons
+        self.synapses = synapses
+        self._q_table = q_table
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.manifest.get('metadata', {})
+
+    @property
+    def memory(self) -> Dict[str, Any]:
+        return self.manifest.get('memory', {})
+
+    @property
+    def num_synapses(self) -> int:
+        return len(self.synapses['pre_neuron_id']) if 'pre_neuron_id' in self.synapses else 0
+
+    def q_table(self) -> Dict:
+        if self._q_table is None:
+            q_path = os.path.join(self.path, Q_TABLE_FILE)
+            if os.path.isdir(self.path) and os.path.exists(q_path):
+                with open(q_path, 'rb') as f:
+                    self._q_table = pickle.load(f)
+            else:
+                self._q_table = {}
+        return self._q_table
+
+    def synapse_record(self, i: int) -> Dict[str, Any]:
+        """Synapse thứ i dạng dict (cho in ấn / inspect)."""
+        return {name: col[i].item() for name, col in self.synapses.items()}
+
+
+def open_snn_checkpoint(path: str, mmap: bool = True) -> SNNCheckpoint:
+    """
+    Mở checkpoint binary (thư mục) hoặc JSON cũ.
+
+    Binary: cột được np.load với mmap_mode='r' (zero-copy) nếu `mmap`.
+    JSON: parse toàn bộ rồi chuyển sang cột (chậm, chỉ để tương thích).
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, MANIFEST_FILE), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != CHECKPOINT_FORMAT:
+            raise ValueError(f"Not an SNN checkpoint: {path}")
+        if manifest.get('format_version', 0) > CHECKPOINT_FORMAT_VERSION:
+            raise ValueError(
+                f"Checkpoint format v{manifest['format_version']} is newer than "
+                f"supported v{CHECKPOINT_FORMAT_VERSION}: {path}"
+            )
+        mmap_mode = 'r' if mmap else None
+        columns = {}
+        for kind in ('neuron', 'synapse'):
+            columns[kind] = {
+                name: np.load(os.path.join(path, f'{kind}.{name}.npy'), mmap_mode=mmap_mode)
+                for name in manifest[f'{kind}_columns']
+            }
+        return SNNCheckpoint(path, manifest, columns['neuron'], columns['synapse'])
+
+    with open(path, 'r') as f:
+        state = json.load(f)
+    return _checkpoint_from_json_state(path, state)
+
+
+def _checkpoint_from_json_state(path: str, state: Dict[str, Any]) -> SNNCheckpoint:
+    """Chuyển state JSON cũ (list of dicts) sang dạng cột."""
+    neuron_dtypes = dict(NEURON_SCHEMA)
+    neurons = {}
+    records = state.get('neurons', [])
+    for name, dtype in NEURON_SCHEMA:
+        if records and name in records[0]:
+            neurons[name] = np.array([n[name] for n in records], dtype=neuron_dtypes[name])
+
+    synapses = {}
+    records = state.get('synapses', [])
+    for name, dtype, _ in SYNAPSE_SCHEMA:
+        if records and name in records[0]:
+            synapses[name] = np.array([s[name] for s in records], dtype=dtype)
+
+    memory = dict(state.get('memory', {}))
+    q_table = memory.pop('q_table', {}) or {}
+    manifest = _build_manifest(state.get('agent_id', -1), state.get('metadata', {}),
+                               memory, neurons, synapses)
+    return SNNCheckpoint(path, manifest, neurons, synapses, q_table=q_table)
+
+
+# ============================================================================
+# Writer
+# ============================================================================
+
+def _build_manifest(agent_id, metadata, memory, neurons, synapses) -> Dict[str, Any]:
+    def _schema(columns):
+        return {name: {'dtype': str(col.dtype), 'shape': list(col.shape)} for name, col in columns.items()}
+    return {
+        'format': CHECKPOINT_FORMAT,
+        'format_version': CHECKPOINT_FORMAT_VERSION,
+        'agent_id': agent_id,
+        'metadata': metadata,
+        'memory': memory,
+        'neuron_columns': _schema(neurons),
+        'synapse_columns': _schema(synapses),
+    }
+
+
+def _write_checkpoint_dir(path: str, manifest: Dict[str, Any],
+                          neurons: Dict[str, np.ndarray], synapses: Dict[str, np.ndarray],
+                          q_table_blob: Optional[bytes] = None):
+    """Ghi cột bằng np.save (bulk), manifest ghi cuối cùng."""
+    os.makedirs(path, exist_ok=True)
+    for kind, columns in (('neuron', neurons), ('synapse', synapses)):
+        for name, col in columns.items():
+            np.save(os.path.join(path, f'{kind}.{name}.npy'), col, allow_pickle=False)
+    with open(os.path.join(path, Q_TABLE_FILE), 'wb') as f:
+        f.write(q_table_blob if q_table_blob is not None else pickle.dumps({}))
+    # NOTE: Manifest là file cuối → thư mục thiếu manifest = checkpoint dở dang
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+# Cột neuron lấy thẳng từ heavy_tensors (đã sync mỗi cycle) thay vì duyệt objects
+_NEURON_TENSOR_KEYS = {
+    'prototype_vector': 'prototypes',
+    'potential': 'potentials',
+    'threshold': 'thresholds',
+    'last_fire_time': 'last_fire_times',
+    'solidity_ratio': 'solidity_ratios',
+}
+
+
+def _snapshot_neurons(snn_ctx: SNNSystemContext) -> Dict[str, np.ndarray]:
+    neurons = snn_ctx.domain_ctx.neurons
+    tensors = snn_ctx.domain_ctx.heavy_tensors or {}
+    N = len(neurons)
+    columns = {}
+    for name, dtype in NEURON_SCHEMA:
+        tensor = tensors.get(_NEURON_TENSOR_KEYS.get(name))
+        if tensor is not None and len(tensor) == N:
+            columns[name] = np.array(tensor, dtype=dtype)
+        elif name == 'prototype_vector':
+            D = snn_ctx.global_ctx.vector_dim
+            columns[name] = (np.array([n.prototype_vector for n in neurons], dtype=dtype)
+                             if neurons else np.zeros((0, D), dtype=dtype))
+        else:
+            columns[name] = np.fromiter((getattr(n, name) for n in neurons), dtype=dtype, count=N)
+    return columns
+
+
+def _snapshot_synapses(snn_ctx: SNNSystemContext, copy: bool = True) -> Dict[str, np.ndarray]:
+    """Cột connectome của synapses còn sống (bỏ tombstones)."""
+    store = snn_ctx.domain_ctx.synapses
+    if store.num_dead:
+        live = store.live_slots()
+        return {name: store.column(name)[live] for name, _, _ in SYNAPSE_SCHEMA}
+    # NOTE: copy=False (ghi đồng bộ) → ghi thẳng view của cột, không copy
+    return {name: store.column(name).copy() if copy else store.column(name)
+            for name, _, _ in SYNAPSE_SCHEMA}
+
+
+@dataclass
+class AgentSnapshot:
+    """
+    Bản chụp in-memory của một agent, độc lập với state đang chạy:
+    cột numpy đã copy, Q-table đã pickle, state_dict đã clone.
+    Ghi ra đĩa bằng `write_agent_snapshot` (có thể ở thread khác).
+    """
+    agent_id: int
+    manifest: Dict[str, Any]
+    neurons: Dict[str, np.ndarray]
+    synapses: Dict[str, np.ndarray]
+    q_table_blob: bytes
+    net_state: Optional[Dict[str, Any]] = None
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(c.nbytes for c in self.neurons.values())
+                   + sum(c.nbytes for c in self.synapses.values())
+                   + len(self.q_table_blob))
+
+
+def snapshot_snn_agent(
+    snn_ctx: SNNSystemContext,
+    rl_ctx: Any,
+    agent_id: int,
+    copy: bool = True
+) -> AgentSnapshot:
+    """
+    Chụp state của agent (copy-on-snapshot). Chi phí chủ yếu là copy
+    mảng O(N + S); không duyệt synapse objects.
+
+    Args:
+        copy: False → cột synapse có thể là view của store (chỉ dùng khi
+              ghi ngay, trước khi agent chạy tiếp)
+    """
+    metadata = {
+        'num_neurons': len(snn_ctx.domain_ctx.neurons),
+        'num_synapses': len(snn_ctx.domain_ctx.synapses),
+        'vector_dim': snn_ctx.global_ctx.vector_dim,
+        'current_time': int(snn_ctx.domain_ctx.current_time), # FIX: Phải lưu thời gian hiện tại
+    }
+    memory = {'beliefs': {}, 'short_term': []}
+    q_table = {}
+    net_state = None
+
+    # Save RL Memory
+    if rl_ctx:
+        domain = rl_ctx.domain_ctx
+        q_table = domain.heavy_q_table
+        memory['beliefs'] = dict(domain.believed_switch_states)
+        memory['epsilon'] = float(getattr(domain, 'current_exploration_rate', 1.0))
+        # Save short term (simplified)
+        memory['short_term'] = [str(x) for x in domain.short_term_memory][-10:] # Last 10
+
+        # NEW V3: Gated Integration Network Weights
+        net = domain.heavy_gated_network
+        if net is not None:
+            net_state = {k: v.detach().clone() if copy else v for k, v in net.state_dict().items()}
+
+    neurons = _snapshot_neurons(snn_ctx)
+    synapses = _snapshot_synapses(snn_ctx, copy=copy)
+    return AgentSnapshot(
+        agent_id=agent_id,
+        manifest=_build_manifest(agent_id, metadata, memory, neurons, synapses),
+        neurons=neurons,
+        synapses=synapses,
+        q_table_blob=pickle.dumps(q_table, protocol=pickle.HIGHEST_PROTOCOL),
+        net_state=net_state
+    )
+
+
+def write_agent_snapshot(snapshot: AgentSnapshot, output_dir: str) -> str:
+    """Ghi snapshot thành `agent_{id}_snn/` (+ `agent_{id}_net.pt`). Trả về path."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f'agent_{snapshot.agent_id}_snn')
+    _write_checkpoint_dir(path, snapshot.manifest, snapshot.neurons, snapshot.synapses,
+                          snapshot.q_table_blob)
+    if snapshot.net_state is not None:
+        torch.save(snapshot.net_state, _net_weights_path(path))
+    return path
+
+
 def save_snn_agent(
     snn_ctx: SNNSystemContext,
     rl_ctx: Any, # SystemContext (optional)
@@ -21,84 +340,95 @@ def save_snn_agent(
     output_dir: str
 ) -> str:
     """
-    Lưu SNN agent vào file JSON.
+    Lưu SNN agent thành checkpoint binary `agent_{id}_snn/` (+ `agent_{id}_net.pt`).
     
     Args:
         snn_ctx: SNN system context
+        rl_ctx: Optional RL system context (memory + Neural Brain weights)
         agent_id: Agent ID
         output_dir: Output directory
         
     Returns:
-        filepath: Path to saved file
+        path: Path to saved checkpoint directory
     """
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Extract state
-    state = {
-        'agent_id': agent_id,
-        'metadata': {
-            'num_neurons': len(snn_ctx.domain_ctx.neurons),
-            'num_synapses': len(snn_ctx.domain_ctx.synapses),
-            'vector_dim': snn_ctx.global_ctx.vector_dim,
-            'current_time': int(snn_ctx.domain_ctx.current_time), # FIX: Phải lưu thời gian hiện tại
-        },
-        'neurons': [],
-        'synapses': [],
-        'memory': {
-            'q_table': {},
-            'beliefs': {},
-            'short_term': []
-        }
-    }
-    
-    # Save RL Memory
-    if rl_ctx:
-        domain = rl_ctx.domain_ctx
-        state['memory']['q_table'] = domain.heavy_q_table
-        state['memory']['beliefs'] = domain.believed_switch_states
-        state['memory']['epsilon'] = float(getattr(domain, 'current_exploration_rate', 1.0))
-        # Save short term (simplified)
-        state['memory']['short_term'] = [str(x) for x in domain.short_term_memory][-10:] # Last 10
+    snapshot = snapshot_snn_agent(snn_ctx, rl_ctx, agent_id, copy=False)
+    return write_agent_snapshot(snapshot, output_dir)
 
-    
-    # Save neurons
-    for neuron in snn_ctx.domain_ctx.neurons:
-        neuron_data = {
-            'neuron_id': neuron.neuron_id,
-            'prototype_vector': neuron.prototype_vector.tolist(),
-            'threshold': float(neuron.threshold),
-            'fire_count': int(neuron.fire_count),
-            'last_fire_time': int(neuron.last_fire_time), # FIX: Phải lưu vết firing cuối
-        }
-        state['neurons'].append(neuron_data)
-    
-    # Save synapses
-    for synapse in snn_ctx.domain_ctx.synapses:
-        synapse_data = {
-            'synapse_id': synapse.synapse_id,
-            'pre_neuron_id': synapse.pre_neuron_id,
-            'post_neuron_id': synapse.post_neuron_id,
-            'weight': float(synapse.weight),
-            'commit_state': int(synapse.commit_state),
-            'consecutive_correct': int(synapse.consecutive_correct),
-            'consecutive_wrong': int(synapse.consecutive_wrong),
-            'fitness': float(synapse.fitness),
-        }
-        state['synapses'].append(synapse_data)
-    
-    # Save to file
-    filepath = os.path.join(output_dir, f'agent_{agent_id}_snn.json')
-    with open(filepath, 'w') as f:
-        json.dump(state, f, indent=2)
-    
-    # NEW V3: Save Gated Integration Network Weights (.pt)
-    if rl_ctx and rl_ctx.domain_ctx.heavy_gated_network is not None:
-        net = rl_ctx.domain_ctx.heavy_gated_network
-        weights_path = os.path.join(output_dir, f'agent_{agent_id}_net.pt')
-        torch.save(net.state_dict(), weights_path)
-        # print(f"Saved Neural Brain weights to {weights_path}")
-    
-    return filepath
+
+def convert_json_checkpoint(json_path: str, remove_json: bool = False) -> str:
+    """
+    Chuyển checkpoint JSON cũ (`agent_{id}_snn.json`) sang format binary
+    cạnh nó (`agent_{id}_snn/`). File `_net.pt` giữ nguyên (cùng tên).
+
+    Returns:
+        path: Path to binary checkpoint directory
+    """
+    ckpt = open_snn_checkpoint(json_path)
+    path = json_path[:-len('.json')] if json_path.endswith('.json') else json_path + '_bin'
+    _write_checkpoint_dir(path, ckpt.manifest, ckpt.neurons, ckpt.synapses,
+                          pickle.dumps(ckpt.q_table(), protocol=pickle.HIGHEST_PROTOCOL))
+    if remove_json:
+        os.remove(json_path)
+    return path
+
+
+def convert_checkpoint_dir(checkpoint_dir: str, remove_json: bool = False) -> List[str]:
+    """Chuyển mọi `agent_*_snn.json` trong `checkpoint_dir` sang format binary."""
+    converted = []
+    for name in sorted(os.listdir(checkpoint_dir)):
+        if name.startswith('agent_') and name.endswith('_snn.json'):
+            converted.append(convert_json_checkpoint(os.path.join(checkpoint_dir, name), remove_json))
+    return converted
+
+
+# ============================================================================
+# Loader
+# ============================================================================
+
+def restore_snn_checkpoint(snn_ctx: SNNSystemContext, ckpt: SNNCheckpoint):
+    """
+    Đổ checkpoint vào snn_ctx.
+
+    - Neurons: restore theo index (số neuron của context giữ nguyên).
+    - Connectome: store được dựng lại từ cột checkpoint (bulk add_arrays),
+      nên topology sau Darwinism/Social cũng được khôi phục.
+    - Compute tensors (nếu đã init) được sync lại từ objects/store.
+    """
+    domain = snn_ctx.domain_ctx
+    if len(domain.neurons) != ckpt.metadata.get('num_neurons', len(domain.neurons)):
+        print(f"Warning: Neuron count mismatch: {len(domain.neurons)} vs {ckpt.metadata['num_neurons']}")
+        # Don't fail immediately, try to restore as many as possible
+
+    # Restore SNN level state
+    if 'current_time' in ckpt.metadata:
+        domain.current_time = ckpt.metadata['current_time']
+
+    # Restore neurons
+    n = min(len(domain.neurons), len(ckpt.neurons.get('neuron_id', ())))
+    columns = {name: np.asarray(col[:n]) for name, col in ckpt.neurons.items() if name != 'neuron_id'}
+    protos = columns.pop('prototype_vector', None)
+    values = {name: col.tolist() for name, col in columns.items()}
+    for i in range(n):
+        neuron = domain.neurons[i]
+        for name, col in values.items():
+            setattr(neuron, name, col[i])
+        if protos is not None:
+            neuron.prototype_vector = protos[i].astype(np.float32)
+
+    # Restore synapses
+    if 'pre_neuron_id' in ckpt.synapses:
+        store = domain.synapses
+        store.clear()
+        store.add_arrays(
+            ckpt.synapses['pre_neuron_id'], ckpt.synapses['post_neuron_id'],
+            **{name: col for name, col in ckpt.synapses.items()
+               if name not in ('pre_neuron_id', 'post_neuron_id') and name in _SYNAPSE_DTYPES}
+        )
+
+    if domain.heavy_tensors and 'potentials' in domain.heavy_tensors:
+        from src.core.snn_context_theus import sync_to_heavy_tensors, ensure_heavy_tensors_initialized
+        sync_to_heavy_tensors(snn_ctx)
+        ensure_heavy_tensors_initialized(snn_ctx)
 
 
 def load_snn_agent(
@@ -107,12 +437,12 @@ def load_snn_agent(
     rl_ctx: Optional[Any] = None
 ) -> bool:
     """
-    Load SNN agent từ file JSON.
+    Load SNN agent từ checkpoint binary (thư mục) hoặc file JSON cũ.
     V3: Hỗ trợ load trọng số Neural Brain từ file .pt tương ứng.
     
     Args:
         snn_ctx: SNN system context (sẽ được update)
-        filepath: Path to saved JSON file
+        filepath: Path to checkpoint directory / legacy JSON file
         rl_ctx: Optional RL system context to load network weights
         
     Returns:
@@ -121,59 +451,27 @@ def load_snn_agent(
     if not os.path.exists(filepath):
         return False
     
-    # Load state
     try:
-        with open(filepath, 'r') as f:
-            state = json.load(f)
+        ckpt = open_snn_checkpoint(filepath)
     except Exception as e:
-        print(f"Error loading JSON: {e}")
+        print(f"Error loading checkpoint: {e}")
         return False
-    
-    # Verify metadata (Loose check for V3)
-    if len(snn_ctx.domain_ctx.neurons) != state['metadata']['num_neurons']:
-        print(f"Warning: Neuron count mismatch: {len(snn_ctx.domain_ctx.neurons)} vs {state['metadata']['num_neurons']}")
-        # Don't fail immediately, try to restore as many as possible
-    
-    # Restore SNN level state
-    if 'current_time' in state['metadata']:
-        snn_ctx.domain_ctx.current_time = state['metadata']['current_time']
 
-    # Restore neurons
-    for i, neuron_data in enumerate(state['neurons']):
-        if i < len(snn_ctx.domain_ctx.neurons):
-            neuron = snn_ctx.domain_ctx.neurons[i]
-            neuron.prototype_vector = np.array(neuron_data['prototype_vector'], dtype=np.float32)
-            neuron.threshold = neuron_data['threshold']
-            neuron.fire_count = neuron_data['fire_count']
-            if 'last_fire_time' in neuron_data:
-                neuron.last_fire_time = neuron_data['last_fire_time']
-    
-    # Restore synapses
-    for i, synapse_data in enumerate(state['synapses']):
-        if i < len(snn_ctx.domain_ctx.synapses):
-            synapse = snn_ctx.domain_ctx.synapses[i]
-            synapse.weight = synapse_data['weight']
-            synapse.commit_state = synapse_data['commit_state']
-            synapse.consecutive_correct = synapse_data['consecutive_correct']
-            synapse.consecutive_wrong = synapse_data['consecutive_wrong']
-            synapse.fitness = synapse_data['fitness']
+    restore_snn_checkpoint(snn_ctx, ckpt)
             
     # Restore RL Context factors
     if rl_ctx:
         domain = rl_ctx.domain_ctx
-        if 'memory' in state and 'epsilon' in state['memory']:
-            domain.current_exploration_rate = float(state['memory']['epsilon'])
-            # print(f"Restored Epsilon to {domain.current_exploration_rate:.4f}")
+        if 'epsilon' in ckpt.memory:
+            domain.current_exploration_rate = float(ckpt.memory['epsilon'])
 
     # NEW V3: Load Neural Brain Weights (.pt)
     if rl_ctx and rl_ctx.domain_ctx.heavy_gated_network is not None:
-        # Construct path from JSON path: agent_0_snn.json -> agent_0_net.pt
-        weights_path = filepath.replace('_snn.json', '_net.pt')
+        weights_path = _net_weights_path(filepath)
         if os.path.exists(weights_path):
             try:
                 state_dict = torch.load(weights_path, map_location='cpu')
                 rl_ctx.domain_ctx.heavy_gated_network.load_state_dict(state_dict)
-                # print(f"Successfully loaded Neural Brain weights from {weights_path}")
             except Exception as e:
                 print(f"Warning: Failed to load Neural weights: {e}")
     
@@ -231,7 +529,7 @@ def load_all_agents(
     count = 0
     
     for agent_id, snn_ctx in enumerate(agents_snn_contexts):
-        filepath = os.path.join(input_dir, f'agent_{agent_id}_snn.json')
+        filepath = agent_checkpoint_path(input_dir, agent_id)
         
         rl_ctx = None
         if agents_rl_contexts and agent_id < len(agents_rl_contexts):
@@ -0,0 +1,118 @@
+"""
+Benchmark: SNN Checkpoint Write/Load
+====================================
+So sánh format JSON cũ (list of dicts, indent=2) với checkpoint binary
+(cột .npy, bulk write, load bằng memmap) cho một agent ~100k synapses.
+
+Author: Do Huy Hoang
+Date: 2026-03-25
+"""
+import sys
+import json
+import os
+import tempfile
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.snn_context_theus import create_snn_context_theus
+from src.utils.snn_persistence import (
+    save_snn_agent,
+    snapshot_snn_agent,
+    load_snn_agent,
+    convert_json_checkpoint,
+    open_snn_checkpoint
+)
+
+
+def _build_context(num_neurons: int, connectivity: float):
+    snn_ctx = create_snn_context_theus(num_neurons=num_neurons, connectivity=0.0)
+    rng = np.random.RandomState(0)
+    mask = rng.rand(num_neurons, num_neurons) < connectivity
+    np.fill_diagonal(mask, False)
+    pre, post = np.nonzero(mask)
+    snn_ctx.domain_ctx.synapses.add_arrays(pre, post, weight=rng.rand(len(pre)))
+    return snn_ctx
+
+
+def _legacy_json_save(snn_ctx, path):
+    """Tái hiện writer JSON cũ (một dict cho mỗi synapse)."""
+    domain = snn_ctx.domain_ctx
+    state = {
+        'metadata': {'num_neurons': len(domain.neurons), 'num_synapses': len(domain.synapses),
+                     'vector_dim': snn_ctx.global_ctx.vector_dim, 'current_time': 0},
+        'neurons': [{'neuron_id': n.neuron_id, 'prototype_vector': n.prototype_vector.tolist(),
+                     'threshold': float(n.threshold), 'fire_count': int(n.fire_count),
+                     'last_fire_time': int(n.last_fire_time)} for n in domain.neurons],
+        'synapses': [{'synapse_id': s.synapse_id, 'pre_neuron_id': s.pre_neuron_id,
+                      'post_neuron_id': s.post_neuron_id, 'weight': float(s.weight),
+                      'commit_state': int(s.commit_state), 'consecutive_correct': int(s.consecutive_correct),
+                      'consecutive_wrong': int(s.consecutive_wrong), 'fitness': float(s.fitness)}
+                     for s in domain.synapses],
+        'memory': {}
+    }
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def _dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def benchmark_checkpoint():
+    print("=" * 60)
+    print("SNN CHECKPOINT BENCHMARK (per agent)")
+    print("=" * 60)
+
+    for num_neurons in (256, 1024):
+        snn_ctx = _build_context(num_neurons, 0.1)
+        S = len(snn_ctx.domain_ctx.synapses)
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'agent_0_snn.json')
+            start = time.perf_counter()
+            _legacy_json_save(snn_ctx, json_path)
+            json_write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load_snn_agent(snn_ctx, json_path)
+            json_load = time.perf_counter() - start
+            json_size = _dir_size(json_path)
+
+            os.rename(json_path, os.path.join(tmp, 'legacy.json'))
+            start = time.perf_counter()
+            path = save_snn_agent(snn_ctx, None, 0, tmp)
+            bin_write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            snapshot_snn_agent(snn_ctx, None, 0)
+            snapshot = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load_snn_agent(snn_ctx, path)
+            bin_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            ckpt = open_snn_checkpoint(path)
+            mean_w = float(ckpt.synapses['weight'].mean())
+            bin_inspect = time.perf_counter() - start
+            bin_size = _dir_size(path)
+
+            start = time.perf_counter()
+            convert_json_checkpoint(os.path.join(tmp, 'legacy.json'))
+            convert = time.perf_counter() - start
+
+        print(f"N={num_neurons:5d} S={S:7d}")
+        print(f"  JSON:   write={json_write * 1000:8.1f} ms  load={json_load * 1000:8.1f} ms  size={json_size / 1e6:6.2f} MB")
+        print(f"  Binary: write={bin_write * 1000:8.1f} ms  load={bin_load * 1000:8.1f} ms  size={bin_size / 1e6:6.2f} MB"
+              f"  (x{json_write / max(bin_write, 1e-9):.0f} write)")
+        print(f"  Snapshot (copy-on-snapshot, blocks episode loop): {snapshot * 1000:.1f} ms")
+        print(f"  Inspect (memmap mean weight={mean_w:.3f}): {bin_inspect * 1000:.1f} ms, convert: {convert * 1000:.1f} ms")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    benchmark_checkpoint()
@@ -0,0 +1,97 @@
+"""
+Benchmark: Connectome Mutation per Darwinism Interval
+=====================================================
+So sánh chi phí mỗi interval (GC ~0.5% synapses + mọc lại cùng số lượng):
+
+- rebuild:      store.remove(mask) + add_arrays → version đổi →
+                ensure_heavy_tensors_initialized build lại toàn bộ cache
+- incremental:  remove_synapses + add_synapses (tombstone + free-list,
+                vá tensors tại chỗ) + compact_connectome theo chu kỳ
+
+Author: Do Huy Hoang
+Date: 2026-03-20
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.snn_context_theus import (
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    gather_synapse_tensors,
+    add_synapses,
+    remove_synapses,
+    compact_connectome
+)
+
+CONNECTIVITY = 0.1
+CHURN = 0.005
+INTERVALS = 10
+
+
+def _build_context(num_neurons: int, backend: str):
+    # NOTE: Connectome random được bulk-add (vectorized) để setup N=4096 nhanh
+    snn_ctx = create_snn_context_theus(num_neurons=num_neurons, connectivity=0.0,
+                                       weight_backend=backend)
+    rng = np.random.RandomState(0)
+    mask = rng.rand(num_neurons, num_neurons) < CONNECTIVITY
+    np.fill_diagonal(mask, False)
+    pre, post = np.nonzero(mask)
+    snn_ctx.domain_ctx.synapses.add_arrays(pre, post, weight=rng.uniform(0.3, 0.7, len(pre)))
+    ensure_heavy_tensors_initialized(snn_ctx)
+    return snn_ctx
+
+
+def _interval(snn_ctx, rng, incremental: bool):
+    domain = snn_ctx.domain_ctx
+    store = domain.synapses
+    N = len(domain.neurons)
+    k = max(1, int(len(store) * CHURN))
+
+    gather_synapse_tensors(domain)
+    live = store.live_slots()
+    victims = live[rng.randint(0, len(live), k)]
+    new_pre, new_post = rng.randint(0, N, k), rng.randint(0, N, k)
+    new_w = rng.uniform(0.3, 0.5, k)
+
+    if incremental:
+        remove_synapses(domain, victims)
+        add_synapses(domain, new_pre, new_post, weight=new_w)
+        compact_connectome(domain, 0.25)
+    else:
+        mask = np.zeros(store.num_slots, dtype=bool)
+        mask[victims] = True
+        store.remove(mask)
+        store.add_arrays(new_pre, new_post, weight=new_w)
+    ensure_heavy_tensors_initialized(snn_ctx)
+
+
+def benchmark_connectome_mutation():
+    print("=" * 60)
+    print("CONNECTOME MUTATION BENCHMARK (per Darwinism interval)")
+    print("=" * 60)
+
+    for num_neurons, backend in ((1024, 'dense'), (1024, 'sparse'), (4096, 'sparse')):
+        snn_ctx = _build_context(num_neurons, backend)
+        S = len(snn_ctx.domain_ctx.synapses)
+        results = {}
+        for mode in ('rebuild', 'incremental'):
+            rng = np.random.RandomState(42)
+            _interval(snn_ctx, rng, mode == 'incremental')  # warm-up
+            start = time.perf_counter()
+            for _ in range(INTERVALS):
+                _interval(snn_ctx, rng, mode == 'incremental')
+            results[mode] = (time.perf_counter() - start) / INTERVALS * 1000
+
+        speedup = results['rebuild'] / max(results['incremental'], 1e-9)
+        print(f"N={num_neurons:5d} [{backend:6s}] S={S:8d}  "
+              f"rebuild={results['rebuild']:8.2f} ms  "
+              f"incremental={results['incremental']:8.2f} ms  (x{speedup:.1f})")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    benchmark_connectome_mutation()
@@ -0,0 +1,113 @@
+"""
+Benchmark: Vectorized Emotion Readout
+=====================================
+µs mỗi lần _encode_emotion_vector_impl (một lần mỗi RL step, mỗi agent):
+
+- legacy:     2 vòng lặp qua neuron objects (fire_count > 0), stack list
+              prototypes, clone tensors emotion/state trước đó
+- vectorized: mask fire_counts tensor, masked matmul trên prototypes,
+              double buffers (snn domain) hoán đổi reference
+
+~30% neurons đã fire.
+
+Author: Do Huy Hoang
+Date: 2026-04-01
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+import torch
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus, sync_to_heavy_tensors
+from src.processes.snn_rl_bridge import _encode_emotion_vector_impl
+
+CALLS = 200
+
+
+def _legacy_encode_emotion_vector(ctx):
+    """_encode_emotion_vector_impl trước khi vectorize."""
+    snn_ctx = ctx.domain_ctx.snn_context
+    neurons = snn_ctx.domain_ctx.neurons
+    active_vectors = []
+    for neuron in neurons:
+        if neuron.fire_count > 0:
+            active_vectors.append(neuron.prototype_vector)
+    query_vector = None
+    obs = ctx.domain_ctx.current_observation
+    if isinstance(obs, np.ndarray) and obs.shape == (16,):
+        query_vector = obs
+    active_vectors = []
+    keys = []
+    for neuron in neurons:
+        if neuron.fire_count > 0:
+            active_vectors.append(neuron.prototype_vector)
+            keys.append(neuron.prototype_vector)
+    if not active_vectors:
+        emotion_vector = np.zeros(16)
+    elif query_vector is not None:
+        K = np.array(keys)
+        gates = 1 / (1 + np.exp(-np.dot(K, query_vector)))
+        emotion_vector = np.sum(K * gates[:, np.newaxis], axis=0)
+    else:
+        emotion_vector = np.mean(active_vectors, axis=0)
+    norm = np.linalg.norm(emotion_vector)
+    if norm > 0:
+        emotion_vector = emotion_vector / norm
+    prev_emo = None
+    if ctx.domain_ctx.heavy_snn_emotion_vector is not None:
+        prev_emo = ctx.domain_ctx.heavy_snn_emotion_vector.detach().clone()
+    prev_state = None
+    if ctx.domain_ctx.heavy_snn_state_vector is not None:
+        prev_state = ctx.domain_ctx.heavy_snn_state_vector.detach().clone()
+    t = snn_ctx.domain_ctx.heavy_tensors
+    current_state = torch.tensor(t['firing_traces'].copy(), dtype=torch.float32).detach()
+    current_emo = torch.tensor(emotion_vector, dtype=torch.float32).detach()
+    # Benchmark giữ state giữa các lần gọi như khi engine áp dụng delta
+    ctx.domain_ctx.heavy_snn_emotion_vector = current_emo
+    ctx.domain_ctx.heavy_snn_state_vector = current_state
+    return {
+        'heavy_snn_emotion_vector': current_emo,
+        'heavy_previous_snn_emotion_vector': prev_emo,
+        'heavy_snn_state_vector': current_state,
+        'heavy_previous_snn_state_vector': prev_state
+    }
+
+
+def _build(num_neurons: int):
+    snn_ctx = create_snn_context_theus(num_neurons=num_neurons, connectivity=64 / num_neurons, seed=1)
+    rng = np.random.RandomState(0)
+    for neuron in snn_ctx.domain_ctx.neurons:
+        neuron.fire_count = int(rng.rand() < 0.3)
+    sync_to_heavy_tensors(snn_ctx)
+    domain = DomainContext(agent_id=0)
+    domain.snn_context = snn_ctx
+    domain.current_observation = rng.rand(16).astype(np.float32)
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def _us_per_call(num_neurons: int, readout) -> float:
+    ctx = _build(num_neurons)
+    readout(ctx)  # warmup
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        readout(ctx)
+    return (time.perf_counter() - start) / CALLS * 1e6
+
+
+def benchmark_emotion_readout():
+    print("=" * 60)
+    print("EMOTION READOUT BENCHMARK (µs per call)")
+    print("=" * 60)
+    print(f"{'N':>6} | {'legacy':>10} | {'vectorized':>10} | {'speedup':>7}")
+    print("-" * 44)
+    for num_neurons in (256, 1024, 4096):
+        legacy = _us_per_call(num_neurons, _legacy_encode_emotion_vector)
+        vectorized = _us_per_call(num_neurons, _encode_emotion_vector_impl)
+        print(f"{num_neurons:>6} | {legacy:>10.1f} | {vectorized:>10.1f} | {legacy / vectorized:>6.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_emotion_readout()
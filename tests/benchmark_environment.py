@@ -0,0 +1,78 @@
+"""
+Benchmark: GridWorld Environment Step
+=====================================
+Chi phí environment cho một step của A agents (như run_episode):
+sensor vectors đầu step + perform_action / get_observation tuần tự + debug probe.
+
+- legacy:    tra cứu tuple-set + scan từng dynamic wall list (git HEAD~ environment.py)
+- occupancy: occupancy layers NumPy + gather batched (environment.py hiện tại)
+
+Chạy legacy: truyền đường dẫn file environment.py cũ làm argv[1].
+
+Author: Do Huy Hoang
+Date: 2026-03-24
+"""
+import sys
+import time
+import random
+import importlib.util
+sys.path.append('.')
+
+import numpy as np
+
+import environment
+
+GRID = 100
+STEPS = 50
+ACTIONS = ['up', 'down', 'left', 'right', 'up-left', 'up-right', 'down-left', 'down-right']
+
+
+def _config(num_agents: int):
+    rng = random.Random(0)
+    cells = [(r, c) for r in range(GRID) for c in range(GRID)]
+    rng.shuffle(cells)
+    walls = [list(c) for c in cells[:1500]]
+    gates = [{'id': f'g{g}', 'pos': [list(c) for c in cells[1500 + 40 * g:1540 + 40 * g]]} for g in range(10)]
+    switches = [{'id': f's{g}', 'pos': list(cells[2000 + g])} for g in range(10)]
+    rules = [{'id': f'g{g}', 'type': 'toggle', 'inputs': [f's{g}']} for g in range(10)]
+    return {
+        'grid_size': GRID, 'num_agents': num_agents, 'max_steps_per_episode': 10_000,
+        'start_positions': [list(c) for c in cells[3000:3000 + num_agents]],
+        'walls': walls, 'logical_switches': switches, 'dynamic_walls': gates, 'dynamic_wall_rules': rules,
+    }
+
+
+def _run(module, num_agents: int) -> float:
+    env = module.GridWorld({'environment_config': _config(num_agents), 'log_level': 'error'})
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        env.new_step()
+        for i in range(num_agents):
+            env.get_sensor_vector(i)  # Perception (Phase 1)
+        for i in range(num_agents):
+            env.perform_action(i, rng.choice(ACTIONS))
+            env.get_observation(i)  # next_obs (Phase 2)
+            if i == 0:
+                env.get_sensor_vector(0)  # Debug probe
+        env.current_step += 1
+    return (time.perf_counter() - start) / STEPS * 1000
+
+
+def main():
+    modules = [('occupancy', environment)]
+    if len(sys.argv) > 1:
+        spec = importlib.util.spec_from_file_location('environment_legacy', sys.argv[1])
+        legacy = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(legacy)
+        modules.insert(0, ('legacy', legacy))
+
+    print(f"Grid {GRID}x{GRID}, 1500 walls, 10 gates x 40 cells, {STEPS} steps")
+    print(f"{'agents':>8} | " + " | ".join(f"{name:>14}" for name, _ in modules))
+    for num_agents in (8, 32, 64):
+        times = [_run(module, num_agents) for _, module in modules]
+        print(f"{num_agents:>8} | " + " | ".join(f"{t:>11.3f} ms" for t in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: Fused SNN Tick Kernel
+================================
+ms mỗi RL step (process_snn_cycle) theo ticks_per_step:
+
+- per-stage: mỗi tick gọi _encode/_integrate/_lateral/_fire/_stdp/_tick_impl
+- fused:     FusedTickKernel (bind một lần mỗi step, scratch buffers, in-place)
+
+Cột "per tick" = (ms @ 10 ticks - ms @ 1 tick) / 9: chi phí biên của một tick.
+
+Author: Do Huy Hoang
+Date: 2026-03-27
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus
+from src.processes.snn_composite_theus import process_snn_cycle
+
+STEPS = 30
+
+
+def _build(num_neurons: int, ticks: int, fused: bool):
+    snn_ctx = create_snn_context_theus(
+        num_neurons=num_neurons, connectivity=64 / num_neurons, seed=0, ticks_per_step=ticks
+    )
+    snn_ctx.global_ctx.use_fused_tick_kernel = fused
+    domain = DomainContext(agent_id=0)
+    domain.snn_context = snn_ctx
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def _ms_per_step(num_neurons: int, ticks: int, fused: bool) -> float:
+    ctx = _build(num_neurons, ticks, fused)
+    rng = np.random.RandomState(0)
+    elapsed = 0.0
+    for step in range(STEPS + 2):
+        ctx.domain_ctx.current_observation = rng.rand(16).astype(np.float32)
+        ctx.domain_ctx.td_error = float(rng.randn())
+        start = time.perf_counter()
+        process_snn_cycle(ctx)
+        if step >= 2:  # warmup (init tensors, similarity cache)
+            elapsed += time.perf_counter() - start
+    return elapsed / STEPS * 1e3
+
+
+def benchmark_fused_tick_kernel():
+    print("=" * 60)
+    print("FUSED TICK KERNEL BENCHMARK (ms per RL step)")
+    print("=" * 60)
+    print(f"{'N':>6} | {'mode':>9} | {'1 tick':>8} | {'10 ticks':>8} | {'per tick':>8}")
+    print("-" * 52)
+    for num_neurons in (256, 1024):
+        for mode in ('per-stage', 'fused'):
+            one = _ms_per_step(num_neurons, 1, mode == 'fused')
+            ten = _ms_per_step(num_neurons, 10, mode == 'fused')
+            print(f"{num_neurons:>6} | {mode:>9} | {one:>8.2f} | {ten:>8.2f} | {(ten - one) / 9:>8.3f}")
+
+
+if __name__ == '__main__':
+    benchmark_fused_tick_kernel()
@@ -0,0 +1,100 @@
+"""
+Benchmark: Cached Prototype Similarity in Integrate
+===================================================
+Tick throughput của _integrate_impl (decay + synaptic integration):
+
+- per-tick:  similarity ReLU(P_firing · Pᵀ) tính lại mỗi tick (công thức cũ)
+- cached:    ReLU(P·Pᵀ) cache theo prototypes/connectome version → mỗi tick
+             chỉ còn gather hàng (dense) / gather slot (sparse) vào khối
+             effective rows (K, N) rồi cộng dồn
+
+Backend 'auto': N=256 dense, N>=1024 sparse. ~2% neuron fire mỗi tick.
+
+Author: Do Huy Hoang
+Date: 2026-03-26
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.connectome import csr_gather_rows
+from src.core.snn_context_theus import (
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    is_sparse_backend,
+)
+from src.processes.snn_core_theus import _integrate_impl
+
+TICKS = 200
+FIRE_RATE = 0.02
+
+
+def _legacy_integrate(snn_ctx):
+    """_integrate_impl trước khi có cache (similarity tính lại mỗi tick)."""
+    ensure_heavy_tensors_initialized(snn_ctx)
+    t = snn_ctx.domain_ctx.heavy_tensors
+    pots, p_vecs = t['potentials'], t['potential_vectors']
+    weights, protos = t['weights'], t['prototypes']
+    tau_decay = float(snn_ctx.global_ctx.tau_decay)
+    pots *= tau_decay
+    p_vecs *= tau_decay
+    spike_buffer = t['spike_buffer']
+    t_idx = int(snn_ctx.domain_ctx.current_time) % spike_buffer.shape[0]
+    spike_indices = np.where(spike_buffer[t_idx] > 0)[0]
+    spike_buffer[t_idx] = 0
+    N = len(pots)
+    spike_indices = spike_indices[spike_indices < N]
+    firing_protos = protos[spike_indices]
+    if is_sparse_backend(t):
+        slots, row_pos = csr_gather_rows(t['csr_indptr'], t['csr_fill'], t['csr_slots'], spike_indices)
+        posts = snn_ctx.domain_ctx.synapses.post_ids[slots]
+        sim_edges = np.einsum('ed,ed->e', firing_protos[row_pos], protos[posts])
+        np.maximum(sim_edges, 0, out=sim_edges)
+        eff_edges = weights[slots] * sim_edges
+        pots += np.bincount(posts, weights=eff_edges, minlength=N).astype(np.float32)
+        D = firing_protos.shape[1]
+        edge_vecs = eff_edges[:, None] * firing_protos[row_pos]
+        flat_idx = (posts[:, None].astype(np.int64) * D + np.arange(D)).ravel()
+        p_vecs += np.bincount(flat_idx, weights=edge_vecs.ravel(), minlength=N * D).reshape(N, D)
+    else:
+        sim_matrix = np.maximum(0, np.matmul(firing_protos, protos.T))
+        eff_weights = weights[spike_indices, :] * sim_matrix
+        pots += np.sum(eff_weights, axis=0)
+        p_vecs += np.matmul(eff_weights.T, firing_protos)
+
+
+def _ticks_per_second(num_neurons, integrate):
+    snn_ctx = create_snn_context_theus(num_neurons=num_neurons, connectivity=64 / num_neurons, seed=0)
+    ensure_heavy_tensors_initialized(snn_ctx)
+    t = snn_ctx.domain_ctx.heavy_tensors
+    rng = np.random.RandomState(0)
+    k = max(1, int(num_neurons * FIRE_RATE))
+    spikes = [rng.choice(num_neurons, k, replace=False) for _ in range(TICKS)]
+    buffer_size = t['spike_buffer'].shape[0]
+
+    elapsed = 0.0
+    for tick in range(TICKS):
+        snn_ctx.domain_ctx.current_time = tick
+        t['spike_buffer'][tick % buffer_size, spikes[tick]] = 1
+        start = time.perf_counter()
+        integrate(snn_ctx)
+        elapsed += time.perf_counter() - start
+    return TICKS / elapsed, t.get('weight_backend')
+
+
+def benchmark_integrate_cache():
+    print("=" * 60)
+    print("INTEGRATE SIMILARITY CACHE BENCHMARK (ticks/s)")
+    print("=" * 60)
+    print(f"{'N':>6} | {'backend':>7} | {'per-tick':>10} | {'cached':>10} | {'speedup':>7}")
+    print("-" * 52)
+    for num_neurons in (256, 1024, 4096):
+        legacy, backend = _ticks_per_second(num_neurons, _legacy_integrate)
+        cached, _ = _ticks_per_second(num_neurons, lambda ctx: _integrate_impl(ctx, sync=False))
+        print(f"{num_neurons:>6} | {backend:>7} | {legacy:>10,.0f} | {cached:>10,.0f} | {cached / legacy:>6.2f}x")
+
+
+if __name__ == '__main__':
+    benchmark_integrate_cache()
@@ -0,0 +1,79 @@
+"""
+Benchmark: Population-Batched SNN Kernel
+========================================
+So sánh một RL step (SNN cycle) cho A agents:
+
+- sequential:  process_snn_cycle(ctx) cho từng agent (A temporal loops nhỏ)
+- population:  PopulationSNNKernel.run_cycle — mỗi tick là một bộ phép toán
+               vectorized trên mảng (A·N,) cho cả population
+
+Author: Do Huy Hoang
+Date: 2026-03-22
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.processes.snn_population_theus import PopulationSNNKernel
+
+STEPS = 10
+TICKS_PER_STEP = 10
+
+
+def _build_population(num_agents: int, num_neurons: int, backend: str):
+    contexts = []
+    for i in range(num_agents):
+        snn_ctx = create_snn_context_theus(
+            num_neurons=num_neurons, connectivity=0.1, seed=i,
+            weight_backend=backend, ticks_per_step=TICKS_PER_STEP
+        )
+        domain = DomainContext(agent_id=i)
+        domain.snn_context = snn_ctx
+        contexts.append(SystemContext(global_ctx=GlobalContext(), domain_ctx=domain))
+    return contexts
+
+
+def _run(contexts, kernel, rng):
+    for ctx in contexts:
+        ctx.domain_ctx.current_observation = rng.rand(16)
+        ctx.domain_ctx.td_error = float(rng.randn())
+    if kernel is None:
+        for ctx in contexts:
+            process_snn_cycle(ctx)
+    else:
+        kernel.run_cycle(contexts)
+
+
+def benchmark_population_kernel():
+    print("=" * 60)
+    print("POPULATION SNN KERNEL BENCHMARK (ms per RL step)")
+    print("=" * 60)
+
+    for num_agents, num_neurons, backend in ((8, 256, 'dense'), (32, 256, 'dense'),
+                                             (8, 1024, 'sparse'), (32, 1024, 'sparse')):
+        results = {}
+        for mode in ('sequential', 'population'):
+            contexts = _build_population(num_agents, num_neurons, backend)
+            kernel = PopulationSNNKernel() if mode == 'population' else None
+            rng = np.random.RandomState(0)
+            _run(contexts, kernel, rng)  # warm-up (build tensors)
+            start = time.perf_counter()
+            for _ in range(STEPS):
+                _run(contexts, kernel, rng)
+            results[mode] = (time.perf_counter() - start) / STEPS * 1000
+
+        speedup = results['sequential'] / max(results['population'], 1e-9)
+        print(f"A={num_agents:3d} N={num_neurons:5d} [{backend:6s}]  "
+              f"sequential={results['sequential']:8.2f} ms  "
+              f"population={results['population']:8.2f} ms  (x{speedup:.1f})")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    benchmark_population_kernel()
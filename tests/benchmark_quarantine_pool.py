@@ -0,0 +1,121 @@
+"""
+Benchmark: Array-backed Quarantine Pool
+=======================================
+µs mỗi lần gọi process_quarantine_validation theo kích thước pool:
+
+- legacy: hai vòng lặp Python qua List[SynapseState], tra
+          neurons[pre].last_fire_time từng synapse, rebuild list bằng
+          `s not in to_promote and s not in to_reject` (so sánh dataclass)
+- pool:   ConnectomeStore columns — active mask từ last_fire_times,
+          score/blacklist/promote/reject bằng vài phép numpy, promote theo lô
+
+Author: Do Huy Hoang
+Date: 2026-03-29
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import DomainContext, GlobalContext, SystemContext
+from src.core.snn_context_theus import (
+    SynapseState,
+    add_synapse_records,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+)
+from src.processes.snn_social_quarantine_theus import process_quarantine_validation
+
+NUM_NEURONS = 256
+STEPS = 50
+
+
+def _legacy_validation(domain, reward, td_error, q_duration=50, val_threshold=0.1):
+    """process_quarantine_validation trước khi pool chuyển sang cột."""
+    native_error = abs(td_error)
+    to_promote, to_reject = [], []
+    for synapse in domain.legacy_shadow:
+        synapse.quarantine_time += 1
+        if domain.neurons[synapse.pre_neuron_id].last_fire_time == domain.current_time:
+            if abs(td_error - synapse.weight) < native_error:
+                synapse.validation_score += 0.2
+            else:
+                synapse.validation_score -= 0.1
+        if reward < -0.5:
+            synapse.is_blacklisted = True
+            if synapse.source_agent_id not in domain.blacklisted_sources:
+                domain.blacklisted_sources.append(synapse.source_agent_id)
+    for synapse in domain.legacy_shadow:
+        if synapse.quarantine_time >= q_duration:
+            if synapse.is_blacklisted or synapse.validation_score < val_threshold:
+                to_reject.append(synapse)
+            else:
+                to_promote.append(synapse)
+    for synapse in to_promote:
+        synapse.synapse_type = "native"
+    add_synapse_records(domain, to_promote)
+    domain.legacy_shadow = [
+        s for s in domain.legacy_shadow
+        if s not in to_promote and s not in to_reject
+    ]
+
+
+def _shadows(pool_size):
+    rng = np.random.RandomState(0)
+    return [
+        SynapseState(
+            synapse_id=10_000 + i, pre_neuron_id=int(rng.randint(NUM_NEURONS)),
+            post_neuron_id=int(rng.randint(NUM_NEURONS)), weight=float(rng.uniform(-1, 1)),
+            quarantine_time=int(rng.randint(0, 50)), synapse_type="shadow", source_agent_id=i % 8
+        )
+        for i in range(pool_size)
+    ]
+
+
+def _us_per_step(pool_size, legacy):
+    snn_ctx = create_snn_context_theus(num_neurons=NUM_NEURONS, connectivity=0.1, seed=0)
+    ensure_heavy_tensors_initialized(snn_ctx)
+    domain = snn_ctx.domain_ctx
+    if legacy:
+        domain.legacy_shadow = _shadows(pool_size)
+    else:
+        domain.shadow_synapses = _shadows(pool_size)
+    ctx = SystemContext(global_ctx=GlobalContext(), domain_ctx=DomainContext(agent_id=0))
+    ctx.domain_ctx.snn_context = snn_ctx
+
+    rng = np.random.RandomState(1)
+    elapsed = 0.0
+    for step in range(STEPS):
+        domain.current_time = step
+        fired = rng.rand(NUM_NEURONS) < 0.05
+        lft = np.where(fired, step, step - 5).astype(np.int32)
+        domain.heavy_tensors['last_fire_times'][:] = lft
+        for neuron, t in zip(domain.neurons, lft.tolist()):
+            neuron.last_fire_time = t
+        td_error = float(rng.randn())
+        start = time.perf_counter()
+        if legacy:
+            _legacy_validation(domain, 0.5, td_error)
+        else:
+            ctx.domain_ctx.last_reward = 0.5
+            ctx.domain_ctx.td_error = td_error
+            process_quarantine_validation(ctx)
+        elapsed += time.perf_counter() - start
+    return elapsed / STEPS * 1e6
+
+
+def benchmark_quarantine_pool():
+    print("=" * 60)
+    print("QUARANTINE VALIDATION BENCHMARK (µs per step)")
+    print("=" * 60)
+    print(f"{'pool':>6} | {'legacy':>10} | {'pool':>10} | {'speedup':>7}")
+    print("-" * 44)
+    for pool_size in (100, 500, 2000):
+        legacy = _us_per_step(pool_size, True)
+        pool = _us_per_step(pool_size, False)
+        print(f"{pool_size:>6} | {legacy:>10,.1f} | {pool:>10,.1f} | {legacy / pool:>6.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_quarantine_pool()
@@ -0,0 +1,121 @@
+"""
+Benchmark: Vectorized Revolution Protocol
+=========================================
+- synthesis:    tổng hợp ancestor từ elites (10% quần thể)
+    legacy: dict {synapse_id: weight} mỗi elite từ objects + vòng lặp
+            lồng trên union ids
+    tensor: AncestorWeights.from_stores — masked mean theo (pre, post)
+- assimilation: process_assimilate_ancestor mỗi step của một agent
+    legacy: vòng lặp từng synapse object + ghi lại ma trận
+    tensor: một masked blend + noise trên weight tensor (index cache)
+
+N=512, fan-out ~64 (~32k synapses mỗi agent).
+
+Author: Do Huy Hoang
+Date: 2026-03-30
+"""
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.connectome import AncestorWeights
+from src.core.snn_context_theus import (
+    COMMIT_STATE_SOLID,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    gather_synapse_tensors,
+)
+from src.processes.snn_advanced_features_theus import process_assimilate_ancestor
+
+NUM_NEURONS = 512
+ELITE_RATIO = 0.1
+ASSIMILATION_STEPS = 20
+
+
+def _legacy_synthesis(contexts):
+    """RevolutionProtocolManager._execute_revolution trước khi vectorize."""
+    all_weights_dicts = []
+    all_synapse_ids = set()
+    for ctx in contexts:
+        weights_dict = {s.synapse_id: s.weight for s in ctx.domain_ctx.synapses}
+        all_weights_dicts.append(weights_dict)
+        all_synapse_ids.update(weights_dict.keys())
+    ancestor_weights = {}
+    for syn_id in all_synapse_ids:
+        values = [w_dict[syn_id] for w_dict in all_weights_dicts if syn_id in w_dict]
+        if values:
+            ancestor_weights[syn_id] = float(np.mean(values))
+    return ancestor_weights
+
+
+def _tensor_synthesis(contexts):
+    """Đường mới (RevolutionProtocolManager._execute_revolution)."""
+    for ctx in contexts:
+        gather_synapse_tensors(ctx.domain_ctx)
+    return AncestorWeights.from_stores([ctx.domain_ctx.synapses for ctx in contexts])
+
+
+def _legacy_assimilate(snn_ctx, ancestor, alpha=0.05, noise_std=0.02):
+    """process_assimilate_ancestor trước khi vectorize (dict keyed theo synapse_id)."""
+    domain = snn_ctx.domain_ctx
+    gather_synapse_tensors(domain)
+    for synapse in domain.synapses:
+        if synapse.commit_state == COMMIT_STATE_SOLID:
+            continue
+        if synapse.synapse_id in ancestor:
+            new_w = (1.0 - alpha) * synapse.weight + alpha * ancestor[synapse.synapse_id]
+            new_w += np.random.randn() * noise_std
+            synapse.weight = float(np.clip(new_w, 0.0, 1.0))
+    weights_matrix = domain.heavy_tensors['weights']
+    store = domain.synapses
+    weights_matrix[store.pre_ids, store.post_ids] = store.weights
+
+
+def _build(num_agents):
+    contexts = []
+    for seed in range(num_agents):
+        snn_ctx = create_snn_context_theus(
+            num_neurons=NUM_NEURONS, connectivity=64 / NUM_NEURONS, seed=seed
+        )
+        ensure_heavy_tensors_initialized(snn_ctx)
+        contexts.append(snn_ctx)
+    return contexts
+
+
+def _seconds(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark_revolution():
+    print("=" * 60)
+    print(f"REVOLUTION PROTOCOL BENCHMARK (N={NUM_NEURONS}, fan-out ~64)")
+    print("=" * 60)
+    print(f"{'agents':>6} | {'synthesis legacy':>16} | {'tensor':>10} | {'speedup':>7}")
+    print("-" * 52)
+    for num_agents in (16, 64):
+        contexts = _build(num_agents)
+        elites = contexts[:max(1, int(num_agents * ELITE_RATIO))]
+        legacy = _seconds(lambda: _legacy_synthesis(elites))
+        tensor = _seconds(lambda: _tensor_synthesis(elites), repeat=5)
+        print(f"{num_agents:>6} | {legacy * 1e3:>13.1f} ms | {tensor * 1e3:>7.2f} ms | {legacy / tensor:>6.0f}x")
+
+    print()
+    print(f"{'assimilation (1 agent)':>24} | {'ms/step':>8}")
+    print("-" * 37)
+    legacy_ctx, tensor_ctx = _build(2)
+    legacy_ancestor = _legacy_synthesis([legacy_ctx])
+    legacy = _seconds(lambda: _legacy_assimilate(legacy_ctx, legacy_ancestor), repeat=3)
+    tensor_ctx.domain_ctx.ancestor_weights = AncestorWeights.from_stores([tensor_ctx.domain_ctx.synapses])
+    tensor = _seconds(lambda: process_assimilate_ancestor(tensor_ctx), repeat=ASSIMILATION_STEPS)
+    print(f"{'legacy (objects)':>24} | {legacy * 1e3:>8.2f}")
+    print(f"{'tensor (masked blend)':>24} | {tensor * 1e3:>8.2f}")
+    print(f"{'speedup':>24} | {legacy / tensor:>7.0f}x")
+
+
+if __name__ == '__main__':
+    benchmark_revolution()
@@ -0,0 +1,114 @@
+"""
+Benchmark: Sharded Agent Execution (agents × cores)
+===================================================
+So sánh thời gian một RL step (Thinking + Learning) cho A agents:
+
+- threads:  ThreadPoolExecutor(max_workers=A) như MultiAgentCoordinator hiện tại
+            (GIL → các agent step gần như tuần tự)
+- shards:   ShardedAgentPool với W worker processes, tensors trong SHM
+
+Workload mỗi agent: process_snn_cycle (phần nặng nhất của agent step).
+
+Author: Do Huy Hoang
+Date: 2026-03-23
+"""
+import os
+import sys
+import time
+sys.path.append('.')
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus, ensure_heavy_tensors_initialized
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.utils.shm_tensor_store import ShmTensorStore
+from src.coordination.sharded_agent_pool import ShardedAgentPool, fork_available
+
+STEPS = 10
+NUM_NEURONS = 256
+
+
+class _WorkloadAgent:
+    def __init__(self, agent_id, allocator):
+        snn_ctx = create_snn_context_theus(num_neurons=NUM_NEURONS, connectivity=0.1,
+                                           seed=agent_id, ticks_per_step=10)
+        snn_ctx.domain_ctx.heavy_tensors = ShmTensorStore(allocator=allocator, prefix=f"bench_{agent_id}")
+        ensure_heavy_tensors_initialized(snn_ctx)
+        domain = DomainContext(agent_id=agent_id)
+        domain.snn_context = snn_ctx
+        self.agent_id = agent_id
+        self.ctx = SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+    def step(self, env_adapter):
+        self.ctx.domain_ctx.current_observation = env_adapter.get_observation(self.agent_id)
+        process_snn_cycle(self.ctx)
+        return 0
+
+    def observe_reward_and_learn(self, reward, next_obs):
+        self.ctx.domain_ctx.td_error = reward
+
+
+class _Feed:
+    def __init__(self, obs):
+        self.obs = obs
+
+    def get_observation(self, agent_id):
+        return self.obs[agent_id]
+
+
+def _time_threads(agents, rng):
+    executor = ThreadPoolExecutor(max_workers=len(agents))
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        feed = _Feed([rng.rand(16) for _ in agents])
+        [f.result() for f in [executor.submit(a.step, feed) for a in agents]]
+        [f.result() for f in [executor.submit(a.observe_reward_and_learn, 0.1, None) for a in agents]]
+    executor.shutdown()
+    return (time.perf_counter() - start) / STEPS * 1000
+
+
+def _time_shards(agents, workers, allocator, rng):
+    pool = ShardedAgentPool(agents, workers, allocator=allocator).start()
+    pool.step([rng.rand(16) for _ in agents])  # warm-up
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        pool.step([rng.rand(16) for _ in agents])
+        pool.learn([(0.1, None)] * len(agents))
+    elapsed = (time.perf_counter() - start) / STEPS * 1000
+    pool.close(sync=False)
+    return elapsed
+
+
+def benchmark_sharded_agents():
+    print("=" * 60)
+    print(f"SHARDED AGENTS BENCHMARK (ms per RL step, N={NUM_NEURONS}, cores={os.cpu_count()})")
+    print("=" * 60)
+    if not fork_available():
+        print("fork start method unavailable — skipping")
+        return
+
+    from theus.context import HeavyZoneAllocator
+    allocator = HeavyZoneAllocator()
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({w for w in (1, 2, 4, 8, cores) if w <= cores})
+
+    for num_agents in (4, 8, 16):
+        agents = [_WorkloadAgent(i, allocator) for i in range(num_agents)]
+        rng = np.random.RandomState(0)
+        baseline = _time_threads(agents, rng)
+        row = [f"A={num_agents:3d}  threads={baseline:8.2f}"]
+        for workers in worker_counts:
+            if workers > num_agents:
+                continue
+            elapsed = _time_shards(agents, workers, allocator, rng)
+            row.append(f"W={workers}:{elapsed:7.2f} (x{baseline / max(elapsed, 1e-9):.1f})")
+        print("  ".join(row))
+
+    allocator.cleanup()
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    benchmark_sharded_agents()
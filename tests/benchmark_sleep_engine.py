@@ -0,0 +1,94 @@
+"""
+Benchmark: Fused Sleep Engine
+=============================
+ms cho một sleep cycle (STEPS dream steps) của cả population:
+
+- legacy: RLAgent.dream_step mỗi step cho từng agent (8 process riêng lẻ,
+          inject loop qua neuron objects, sync objects trong mỗi process)
+- fused:  run_sleep_cycle (DreamTickKernel, sync objects một lần khi thức dậy)
+- fused ∥: run_sleep_cycle trên ThreadPoolExecutor
+
+Author: Do Huy Hoang
+Date: 2026-03-31
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus, ensure_heavy_tensors_initialized
+from src.processes.snn_sleep_engine_theus import run_sleep_cycle
+
+AGENTS = 8
+STEPS = 100
+
+
+def _legacy_dream_step(ctx):
+    """Chuỗi process của RLAgent.dream_step (gọi trực tiếp với rl_ctx)."""
+    from src.processes.snn_dream_processes import process_inject_dream_stimulus, apply_dream_reward
+    from src.processes.snn_core_theus import process_integrate, process_fire
+    from src.processes.snn_advanced_features_theus import (
+        process_lateral_inhibition, process_hysteria_dampener
+    )
+    from src.processes.snn_learning_3factor_theus import process_stdp_3factor
+    from src.processes.p_dream_decoder import process_decode_dream
+
+    process_inject_dream_stimulus(ctx)
+    process_hysteria_dampener(ctx)
+    process_integrate(ctx)
+    process_lateral_inhibition(ctx)
+    process_fire(ctx)
+    apply_dream_reward(ctx)
+    process_stdp_3factor(ctx)
+    process_decode_dream(ctx)
+
+
+def _population(num_neurons: int):
+    contexts = []
+    for i in range(AGENTS):
+        snn_ctx = create_snn_context_theus(
+            num_neurons=num_neurons, connectivity=64 / num_neurons, seed=i + 1
+        )
+        ensure_heavy_tensors_initialized(snn_ctx)
+        domain = DomainContext(agent_id=i)
+        domain.snn_context = snn_ctx
+        domain.td_error = 0.5
+        contexts.append(SystemContext(global_ctx=GlobalContext(), domain_ctx=domain))
+    return contexts
+
+
+def _ms_per_cycle(num_neurons: int, mode: str) -> float:
+    contexts = _population(num_neurons)
+    np.random.seed(0)
+    start = time.perf_counter()
+    if mode == 'legacy':
+        for _ in range(STEPS):
+            for ctx in contexts:
+                _legacy_dream_step(ctx)
+    elif mode == 'fused':
+        run_sleep_cycle(contexts, STEPS)
+    else:
+        with ThreadPoolExecutor(max_workers=AGENTS) as executor:
+            run_sleep_cycle(contexts, STEPS, executor=executor)
+    return (time.perf_counter() - start) * 1e3
+
+
+def benchmark_sleep_engine():
+    print("=" * 60)
+    print(f"SLEEP ENGINE BENCHMARK (ms per sleep cycle, {AGENTS} agents x {STEPS} steps)")
+    print("=" * 60)
+    print(f"{'N':>6} | {'legacy':>10} | {'fused':>10} | {'fused ∥':>10} | {'speedup':>7}")
+    print("-" * 56)
+    for num_neurons in (256, 1024):
+        legacy = _ms_per_cycle(num_neurons, 'legacy')
+        fused = _ms_per_cycle(num_neurons, 'fused')
+        parallel = _ms_per_cycle(num_neurons, 'parallel')
+        print(f"{num_neurons:>6} | {legacy:>10.1f} | {fused:>10.1f} | {parallel:>10.1f} | "
+              f"{legacy / min(fused, parallel):>6.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_sleep_engine()
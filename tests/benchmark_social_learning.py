@@ -0,0 +1,88 @@
+"""
+Benchmark: Tensor-native Social Transfer
+========================================
+Một round social learning (32 agents, N=1024, fan-out ~64, k=10 mỗi elite):
+
+- legacy: sorted() toàn bộ synapse objects theo |weight| mỗi elite,
+          deepcopy + re-ID từng bản sao khi inject
+- tensor: top-k O(S) (partition) trên live weight array → packed transfer
+          records (pre, post, weight, source_agent_id) → bulk add_synapses
+
+Author: Do Huy Hoang
+Date: 2026-03-28
+"""
+import copy
+import sys
+import time
+sys.path.append('.')
+
+from src.core.snn_context_theus import (
+    add_synapse_records,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+)
+from src.processes.snn_social_learning_theus import process_social_learning_with_rankings
+
+NUM_AGENTS = 32
+NUM_NEURONS = 1024
+SYNAPSES_K = 10
+ROUNDS = 5
+
+
+def _legacy_round(contexts, rankings, global_config):
+    """process_social_learning_with_rankings trước khi chuyển sang tensors."""
+    n = len(contexts)
+    elite_indices = [idx for idx, _ in rankings[:max(1, int(n * 0.2))]]
+    learner_indices = [idx for idx, _ in rankings[-max(1, int(n * 0.5)):]]
+    extracted = []
+    for idx in elite_indices:
+        domain = contexts[idx].domain_ctx
+        extracted.extend(sorted(domain.synapses, key=lambda s: abs(s.weight), reverse=True)[:SYNAPSES_K])
+    for idx in learner_indices:
+        domain = contexts[idx].domain_ctx
+        next_id = max(domain.synapses.next_synapse_id(), 1)
+        new_syns = []
+        for syn in extracted:
+            new_syn = copy.deepcopy(syn)
+            new_syn.synapse_id = next_id
+            next_id += 1
+            new_syn.quarantine_time = 0
+            new_syn.validation_score = 0.0
+            new_syns.append(new_syn)
+        add_synapse_records(domain, new_syns)
+
+
+def _build():
+    contexts = []
+    for agent_id in range(NUM_AGENTS):
+        ctx = create_snn_context_theus(
+            num_neurons=NUM_NEURONS, connectivity=64 / NUM_NEURONS, seed=agent_id
+        )
+        ctx.domain_ctx.agent_id = agent_id
+        ensure_heavy_tensors_initialized(ctx)
+        contexts.append(ctx)
+    rankings = [(i, float(NUM_AGENTS - i)) for i in range(NUM_AGENTS)]
+    return contexts, rankings
+
+
+def _ms_per_round(run_round) -> float:
+    contexts, rankings = _build()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        run_round(contexts, rankings, contexts[0].global_ctx)
+    return (time.perf_counter() - start) / ROUNDS * 1e3
+
+
+def benchmark_social_learning():
+    print("=" * 60)
+    print(f"SOCIAL TRANSFER BENCHMARK ({NUM_AGENTS} agents, N={NUM_NEURONS}, k={SYNAPSES_K})")
+    print("=" * 60)
+    legacy = _ms_per_round(_legacy_round)
+    tensor = _ms_per_round(process_social_learning_with_rankings)
+    print(f"  legacy (object sort):  {legacy:>9.2f} ms/round")
+    print(f"  tensor (top-k + bulk): {tensor:>9.2f} ms/round")
+    print(f"  speedup:               {legacy / tensor:>8.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_social_learning()
@@ -0,0 +1,210 @@
+"""
+Test Agent Step Contract Audit
+==============================
+RLAgent trust từng stage của agent step; bước được sample (contract_audit_every)
+kiểm tra writes của mỗi stage theo contract của chính stage đó — cả step()
+lẫn các đường split của coordinator (begin/finish, prepare/complete).
+Delta keys được audit theo routing của _apply_delta (RL hay SNN domain).
+"""
+import sys
+import warnings
+
+sys.path.append('.')
+
+import numpy as np
+import pytest
+import torch
+
+from theus.contracts import process
+from theus.engine import _audited_call
+from src.core.context import DomainContext, GlobalContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus
+from src.models.gated_integration import GatedIntegrationNetwork
+from src.processes.snn_advanced_features_theus import process_assimilate_ancestor
+import src.processes.agent_step_pipeline as pipeline
+
+
+class _AuditingEngine:
+    """
+    Stub engine cho _run_stages (không cần Rust core): run_trusted audit mọi
+    lần gọi bằng cùng _audited_call của TheusEngine và giữ violations theo process.
+    """
+
+    def __init__(self):
+        self.violations = {}
+
+    def run_trusted(self, func, *args, ctx=None, delta_path=None, **kwargs):
+        result, violations = _audited_call(func, ctx, args, kwargs, delta_path)
+        self.violations.setdefault(func.__name__, []).append(violations)
+        return result
+
+
+def _pipeline_ctx():
+    """RL context + SNN + gated network, đủ cho toàn bộ agent step pipeline."""
+    np.random.seed(0)
+    torch.manual_seed(0)
+    domain = DomainContext(agent_id=0)
+    domain.snn_context = create_snn_context_theus(num_neurons=30, connectivity=0.15, seed=3)
+    net = GatedIntegrationNetwork(obs_dim=16, emotion_dim=16, snn_state_dim=100, hidden_dim=32, action_dim=4)
+    domain.heavy_gated_network = net
+    domain.heavy_gated_optimizer = torch.optim.Adam(net.parameters(), lr=1e-3)
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def _agent(audit_every):
+    """RLAgent thật (coordinator 1 agent); violations → RuntimeWarning (không AuditSystem)."""
+    import torch
+    from src.coordination.multi_agent_coordinator import MultiAgentCoordinator
+    from src.core.snn_context_theus import SNNGlobalContext
+
+    np.random.seed(0)
+    torch.manual_seed(0)
+    global_ctx = GlobalContext(
+        initial_needs=[0.5, 0.5], initial_emotions=[0.0, 0.0], total_episodes=1,
+        max_steps=8, seed=42, switch_locations={}, contract_audit_every=audit_every
+    )
+    snn_global_ctx = SNNGlobalContext(num_neurons=30, vector_dim=16, connectivity=0.15, seed=42)
+    coordinator = MultiAgentCoordinator(num_agents=1, global_ctx=global_ctx, snn_global_ctx=snn_global_ctx)
+    agent = coordinator.agents[0]
+    agent.engine._audit = None
+    return coordinator, agent
+
+
+def _adapter():
+    from src.adapters.environment_adapter import EnvironmentAdapter
+    from environment import GridWorld
+
+    env = GridWorld({
+        "initial_needs": [0.5, 0.5], "initial_emotions": [0.0, 0.0], "switch_locations": {},
+        "environment_config": {
+            "grid_size": 6, "max_steps_per_episode": 8, "num_agents": 1, "start_positions": [[0, 0]]
+        }
+    })
+    return EnvironmentAdapter(env)
+
+
+@process(inputs=['domain_ctx'], outputs=['domain_ctx.last_action'])
+def _leaky_record_step(ctx):
+    ctx.domain_ctx.td_error = 0.0  # không khai báo trong outputs
+
+
+def test_sampled_step_audits_each_stage():
+    print("=" * 60)
+    print("Test: Sampled step audits every stage against its own contract")
+    print("=" * 60)
+    pytest.importorskip("theus_core")
+
+    coordinator, agent = _agent(audit_every=2)
+    adapter = _adapter()
+    agent.step(adapter)                     # call 1: sampled
+    agent.begin_step(adapter)               # call 2: not sampled
+    agent.finish_step()
+    agent.begin_step(adapter)               # call 3: sampled (split path)
+    agent.prepare_action()
+    agent.complete_step()
+    agent.observe_reward_and_learn(0.0, adapter.get_observation(0))
+
+    stats = agent.engine.trusted_stats
+    assert 'run_agent_step_pipeline' not in stats
+    for proc in pipeline.AGENT_STEP_STAGES:
+        s = stats[proc.__name__]
+        assert s['audited'] >= 1 and s['violations'] == 0, (proc.__name__, s)
+    # Stages chạy trên cả 3 đường: calls 1, 3 được sample
+    assert stats['perception'] == {'calls': 3, 'audited': 2, 'violations': 0}
+    assert stats['process_record_snn_step'] == {'calls': 3, 'audited': 2, 'violations': 0}
+    assert stats['update_q_learning']['audited'] == 1
+    coordinator.cleanup()
+    print(f"  Stages audited: {len(pipeline.AGENT_STEP_STAGES)}")
+    print("✅ Per-stage audit verified!")
+
+
+def test_undeclared_stage_write_is_reported():
+    print("=" * 60)
+    print("Test: Stage writing an undeclared field → violation on audited step")
+    print("=" * 60)
+    pytest.importorskip("theus_core")
+
+    coordinator, agent = _agent(audit_every=1)
+    agent.engine.trust(_leaky_record_step, every=1)
+    original = pipeline.process_record_snn_step
+    pipeline.process_record_snn_step = _leaky_record_step
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            agent.step(_adapter())
+    finally:
+        pipeline.process_record_snn_step = original
+
+    messages = [str(w.message) for w in caught if issubclass(w.category, RuntimeWarning)]
+    reported = [m for m in messages if '_leaky_record_step' in m and 'domain_ctx.td_error' in m]
+    assert reported, messages
+    stats = agent.engine.trusted_stats
+    assert stats['_leaky_record_step'] == {'calls': 1, 'audited': 1, 'violations': 1}
+    assert stats['perception']['violations'] == 0
+    coordinator.cleanup()
+    print(f"  Reported: {reported[0]}")
+    print("✅ Undeclared write reported!")
+
+
+def test_stub_engine_audits_each_stage():
+    print("=" * 60)
+    print("Test: _run_stages(engine=stub) audits every stage (no Rust core)")
+    print("=" * 60)
+
+    ctx = _pipeline_ctx()
+    adapter = _adapter()
+    engine = _AuditingEngine()
+    for _ in range(3):
+        pipeline.run_agent_step_pipeline(ctx, env_adapter=adapter, engine=engine)
+
+    for proc in pipeline.AGENT_STEP_STAGES:
+        # [] = writes quan sát được và đều có trong contract (None = không audit được)
+        assert engine.violations[proc.__name__] == [[]] * 3, (proc.__name__, engine.violations[proc.__name__])
+
+    original = pipeline.process_record_snn_step
+    pipeline.process_record_snn_step = _leaky_record_step
+    try:
+        pipeline.run_agent_post_action_stage(ctx, engine=engine)
+    finally:
+        pipeline.process_record_snn_step = original
+    assert engine.violations['_leaky_record_step'] == [['domain_ctx.td_error']]
+    print(f"  Stages audited: {len(pipeline.AGENT_STEP_STAGES)}")
+    print("✅ Stub per-stage audit verified!")
+
+
+@process(inputs=['domain_ctx'], outputs=['domain_ctx.metrics'])
+def _rl_metrics_stage(ctx):
+    return {'metrics': {'x': 1.0}}  # 'metrics' được _apply_delta ghi vào SNN domain
+
+
+def test_snn_routed_delta_key_audited_at_snn_path():
+    print("=" * 60)
+    print("Test: bare delta key 'metrics' audited where _apply_delta writes it")
+    print("=" * 60)
+
+    ctx = _pipeline_ctx()
+    snn_domain = ctx.domain_ctx.snn_context.domain_ctx
+    ids = snn_domain.synapses.column('synapse_id')[:3].tolist()
+    snn_domain.ancestor_weights = {ids[0]: 0.1, ids[1]: 0.2, ids[2]: 0.3}
+
+    engine = _AuditingEngine()
+    pipeline._run_stages(ctx, [(process_assimilate_ancestor, {})], engine=engine)
+    # Contract chỉ khai báo domain_ctx.snn_context.domain_ctx.metrics
+    assert engine.violations['process_assimilate_ancestor'] == [[]]
+    assert snn_domain.metrics['assimilated_synapses'] == 3
+
+    # Routing mặc định (bare key → domain_ctx.<key>) sẽ báo sai
+    _, violations = _audited_call(process_assimilate_ancestor, ctx, (), {})
+    assert violations == ['domain_ctx.metrics']
+
+    # Ngược lại: khai báo RL metrics nhưng delta thực ra ghi vào SNN domain
+    pipeline._run_stages(ctx, [(_rl_metrics_stage, {})], engine=engine)
+    assert engine.violations['_rl_metrics_stage'] == [['domain_ctx.snn_context.domain_ctx.metrics']]
+    print("✅ SNN-routed delta key verified!")
+
+
+if __name__ == '__main__':
+    test_sampled_step_audits_each_stage()
+    test_undeclared_stage_write_is_reported()
+    test_stub_engine_audits_each_stage()
+    test_snn_routed_delta_key_audited_at_snn_path()
@@ -0,0 +1,170 @@
+"""
+Test Ancestor Weights (Revolution Protocol)
+===========================================
+AncestorWeights keyed theo (pre, post): masked mean qua elites khớp công
+thức dict cũ, và process_assimilate_ancestor blend trực tiếp trên weight
+tensor (dense/sparse) giống vòng lặp từng synapse, giữ nguyên SOLID.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.connectome import AncestorWeights, ConnectomeStore
+from src.core.snn_context_theus import (
+    COMMIT_STATE_SOLID,
+    add_synapses,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    gather_synapse_tensors,
+)
+from src.processes.snn_advanced_features_theus import process_assimilate_ancestor
+
+
+def test_ancestor_masked_mean():
+    print("=" * 60)
+    print("Test: AncestorWeights masked mean over elites")
+    print("=" * 60)
+
+    rng = np.random.RandomState(0)
+    stores = []
+    for _ in range(3):
+        store = ConnectomeStore()
+        store.add_arrays(rng.randint(0, 6, 20), rng.randint(0, 6, 20), weight=rng.rand(20))
+        store.tombstone([0, 1])
+        stores.append(store)
+
+    # Reference: dict {(pre, post): [weights...]} trên synapses còn sống
+    samples = {}
+    for store in stores:
+        for syn in store:
+            samples.setdefault((syn.pre_neuron_id, syn.post_neuron_id), []).append(syn.weight)
+
+    ancestor = AncestorWeights.from_stores(stores)
+    assert len(ancestor) == len(samples)
+    assert sorted(ancestor.keys()) == sorted(samples)
+    for (pre, post), value in zip(ancestor.keys(), ancestor.values()):
+        assert np.isclose(value, np.mean(samples[(pre, post)]), atol=1e-6)
+
+    pre, post = ancestor.keys()[0]
+    found, targets = ancestor.lookup([9, pre], [9, post])
+    assert not found[0] and found[1]
+    assert targets[1] == ancestor.values()[0]
+
+    # Restrict giữ đúng tập keys được theo dõi
+    tracked = AncestorWeights.from_arrays([0, 1, 7], [1, 2, 7], [0.0, 0.0, 0.0])
+    restricted = ancestor.restrict_to(tracked)
+    assert set(restricted.keys()) == set(tracked.keys()) & set(samples)
+
+    print(f"  {len(ancestor)} (pre, post) keys from {len(stores)} elites")
+    print("✅ Masked mean verified!")
+
+
+def _reference_assimilate(snn_ctx, ancestor, alpha, noise_std, seed):
+    """Vòng lặp từng synapse (công thức cũ) trên weights đã gather."""
+    domain = snn_ctx.domain_ctx
+    gather_synapse_tensors(domain)
+    store = domain.synapses
+    lookup = dict(zip(ancestor.keys(), ancestor.values().tolist()))
+    weights = {}
+    np.random.seed(seed)
+    for slot in store.live_slots().tolist():
+        key = (int(store.pre_ids[slot]), int(store.post_ids[slot]))
+        if store.column('commit_state')[slot] == COMMIT_STATE_SOLID or key not in lookup:
+            continue
+        new_w = (1.0 - alpha) * store.weights[slot] + alpha * lookup[key]
+        new_w += np.random.randn() * noise_std
+        weights[slot] = float(np.clip(new_w, 0.0, 1.0))
+    return weights
+
+
+def test_assimilation_on_weight_tensor():
+    print("=" * 60)
+    print("Test: process_assimilate_ancestor on weight tensors")
+    print("=" * 60)
+
+    for backend in ('dense', 'sparse'):
+        contexts = []
+        for _ in range(2):
+            snn_ctx = create_snn_context_theus(
+                num_neurons=60, connectivity=0.2, seed=5, weight_backend=backend
+            )
+            snn_ctx.global_ctx.assimilation_rate = 0.3
+            snn_ctx.global_ctx.diversity_noise = 0.05
+            ensure_heavy_tensors_initialized(snn_ctx)
+            domain = snn_ctx.domain_ctx
+            store = domain.synapses
+            live = store.live_slots()
+            # Weights hiện tại chỉ có trong tensor + một vài synapse SOLID
+            t = domain.heavy_tensors
+            if backend == 'dense':
+                t['weights'][store.pre_ids[live[:30]], store.post_ids[live[:30]]] = 0.25
+                t['commit_states'][store.pre_ids[live[5:10]], store.post_ids[live[5:10]]] = COMMIT_STATE_SOLID
+            else:
+                t['weights'][live[:30]] = 0.25
+                t['commit_states'][live[5:10]] = COMMIT_STATE_SOLID
+            contexts.append(snn_ctx)
+
+        # Ancestor: một nửa connectome + một cặp (pre, post) chưa có, weight 0.9
+        store = contexts[0].domain_ctx.synapses
+        half = store.live_slots()[::2]
+        existing = set(zip(store.pre_ids.tolist(), store.post_ids.tolist()))
+        absent = next((i, j) for i in range(60) for j in range(60) if (i, j) not in existing)
+        ancestor = AncestorWeights.from_arrays(
+            np.append(store.pre_ids[half], absent[0]), np.append(store.post_ids[half], absent[1]),
+            np.full(len(half) + 1, 0.9)
+        )
+
+        expected = _reference_assimilate(contexts[1], ancestor, 0.3, 0.05, seed=11)
+        snn_ctx = contexts[0]
+        snn_ctx.domain_ctx.ancestor_weights = ancestor
+        np.random.seed(11)
+        result = process_assimilate_ancestor(snn_ctx)
+
+        domain = snn_ctx.domain_ctx
+        assert result['metrics']['assimilated_synapses'] == len(expected)
+        gather_synapse_tensors(domain)
+        for slot, weight in expected.items():
+            assert np.isclose(domain.synapses.weights[slot], weight, atol=1e-5), (backend, slot)
+        solid = domain.synapses.column('commit_state') == COMMIT_STATE_SOLID
+        assert np.all(domain.synapses.weights[solid] == 0.25)
+
+        # Connectome đổi → cache aligned tính lại, synapse mới khớp ancestor được blend
+        slot = add_synapses(domain, [absent[0]], [absent[1]], weight=[0.0])[0]
+        snn_ctx.global_ctx.diversity_noise = 0.0
+        process_assimilate_ancestor(snn_ctx)
+        gather_synapse_tensors(domain)
+        assert np.isclose(domain.synapses.weights[slot], 0.3 * 0.9, atol=1e-6)
+        print(f"  {backend}: assimilated={len(expected)}")
+
+    print("✅ Tensor assimilation verified!")
+
+
+def test_legacy_mapping_conversion():
+    print("=" * 60)
+    print("Test: legacy {synapse_id: weight} → (pre, post) keys")
+    print("=" * 60)
+
+    snn_ctx = create_snn_context_theus(num_neurons=30, connectivity=0.2, seed=1)
+    domain = snn_ctx.domain_ctx
+    store = domain.synapses
+    ids = store.column('synapse_id')[:3].tolist()
+    domain.ancestor_weights = {ids[0]: 0.1, ids[1]: 0.2, ids[2]: 0.3, 10**9: 1.0}
+
+    ancestor = domain.ancestor_weights
+    assert isinstance(ancestor, AncestorWeights)
+    found, targets = ancestor.lookup(store.pre_ids[:3], store.post_ids[:3])
+    assert found.all()
+    assert np.allclose(targets, [0.1, 0.2, 0.3])
+
+    domain.ancestor_weights = {}
+    assert not domain.ancestor_weights
+
+    print("✅ Legacy mapping verified!")
+
+
+if __name__ == '__main__':
+    test_ancestor_masked_mean()
+    test_assimilation_on_weight_tensor()
+    test_legacy_mapping_conversion()
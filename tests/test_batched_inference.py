@@ -0,0 +1,123 @@
+"""
+Test Batched Policy Inference
+=============================
+BatchedPolicyInference.select_actions == select_action_gated chạy tuần tự
+từng agent (Q-values + actions), cho networks riêng và network dùng chung.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+import torch
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.models.gated_integration import GatedIntegrationNetwork
+from src.coordination.batched_inference import BatchedPolicyInference
+from src.processes.rl_processes import select_action_gated
+
+# NOTE: observation_to_tensor luôn chuẩn hóa sensor_vector về 16 chiều
+OBS_DIM, EMO_DIM, STATE_DIM = 16, 16, 32
+
+
+def _make_net(seed):
+    torch.manual_seed(seed)
+    return GatedIntegrationNetwork(obs_dim=OBS_DIM, emotion_dim=EMO_DIM, snn_state_dim=STATE_DIM,
+                                   hidden_dim=32, action_dim=8)
+
+
+def _make_contexts(nets, seed=0):
+    rng = np.random.RandomState(seed)
+    contexts = []
+    for i, net in enumerate(nets):
+        domain = DomainContext(agent_id=i)
+        domain.heavy_gated_network = net
+        domain.heavy_gated_optimizer = torch.optim.Adam(net.parameters(), lr=1e-3)
+        domain.current_observation = {'sensor_vector': rng.rand(OBS_DIM).astype(np.float32)}
+        domain.heavy_snn_emotion_vector = torch.from_numpy(rng.rand(EMO_DIM).astype(np.float32))
+        domain.heavy_snn_state_vector = torch.from_numpy(rng.rand(STATE_DIM).astype(np.float32))
+        domain.current_exploration_rate = 0.1
+        contexts.append(SystemContext(global_ctx=GlobalContext(), domain_ctx=domain))
+    return contexts
+
+
+def _sequential(contexts, seed):
+    np.random.seed(seed)
+    deltas = [select_action_gated(ctx) for ctx in contexts]
+    return [d['last_action'] for d in deltas], [d['heavy_last_q_values'] for d in deltas]
+
+
+def _batched(inference, contexts, seed):
+    np.random.seed(seed)
+    actions = inference.select_actions(contexts)
+    return actions, [ctx.domain_ctx.heavy_last_q_values for ctx in contexts]
+
+
+def test_batched_matches_sequential():
+    print("=" * 60)
+    print("Test: Batched (vmap, weights riêng) == sequential select_action_gated")
+    print("=" * 60)
+
+    contexts = _make_contexts([_make_net(seed) for seed in range(5)])
+    inference = BatchedPolicyInference()
+    for step in range(10):
+        actions_seq, q_seq = _sequential(contexts, step)
+        actions_bat, q_bat = _batched(inference, contexts, step)
+        assert actions_seq == actions_bat
+        assert [ctx.domain_ctx.last_action for ctx in contexts] == actions_bat
+        for a, b in zip(q_seq, q_bat):
+            assert a.shape == b.shape == (8,)
+            assert torch.allclose(a, b, atol=1e-5)
+    print("✅ Batched actions & Q-values verified!")
+
+
+def test_shared_network():
+    print("=" * 60)
+    print("Test: Network dùng chung trộn với network riêng")
+    print("=" * 60)
+
+    shared = _make_net(0)
+    contexts = _make_contexts([shared, shared, shared, _make_net(1)])
+    inference = BatchedPolicyInference()
+
+    actions_seq, q_seq = _sequential(contexts, 7)
+    actions_bat, q_bat = _batched(inference, contexts, 7)
+    assert actions_seq == actions_bat
+    for a, b in zip(q_seq, q_bat):
+        assert torch.allclose(a, b, atol=1e-5)
+    print("✅ Shared network verified!")
+
+
+def test_stack_cache_follows_optimizer():
+    print("=" * 60)
+    print("Test: Stacked params cache cập nhật row sau optimizer step")
+    print("=" * 60)
+
+    contexts = _make_contexts([_make_net(seed) for seed in range(3)])
+    inference = BatchedPolicyInference()
+    inference.select_actions(contexts)
+    stacked = next(iter(inference._stacks.values()))
+    inference.select_actions(contexts)
+    assert next(iter(inference._stacks.values())) is stacked  # weights không đổi → dùng cache
+
+    # Một bước train của agent 1 → row 1 của cache phải được làm mới
+    domain = contexts[1].domain_ctx
+    q = domain.heavy_gated_network(torch.rand(OBS_DIM), torch.rand(EMO_DIM), torch.rand(STATE_DIM))
+    q.sum().backward()
+    domain.heavy_gated_optimizer.step()
+
+    actions_seq, q_seq = _sequential(contexts, 3)
+    actions_bat, q_bat = _batched(inference, contexts, 3)
+    assert next(iter(inference._stacks.values())) is stacked  # cập nhật in-place, không re-stack
+    for name, p in domain.heavy_gated_network.named_parameters():
+        assert torch.equal(stacked[1][name][1], p.detach())
+    assert actions_seq == actions_bat
+    for a, b in zip(q_seq, q_bat):
+        assert torch.allclose(a, b, atol=1e-5)
+    print("✅ Cache invalidation verified!")
+
+
+if __name__ == '__main__':
+    test_batched_matches_sequential()
+    test_shared_network()
+    test_stack_cache_follows_optimizer()
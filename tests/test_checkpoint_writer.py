@@ -0,0 +1,110 @@
+"""
+Test Async Checkpoint Writer
+============================
+Copy-on-snapshot, atomic rename (không để lại checkpoint ghi dở) và metrics.
+"""
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.snn_context_theus import create_snn_context_theus
+from src.utils.snn_persistence import snapshot_snn_agent, open_snn_checkpoint
+import src.utils.checkpoint_writer as checkpoint_writer
+from src.utils.checkpoint_writer import AsyncCheckpointWriter, cleanup_partial_checkpoints
+
+
+def _make_contexts(num_agents=2):
+    contexts = []
+    for seed in range(num_agents):
+        np.random.seed(seed)
+        contexts.append(create_snn_context_theus(num_neurons=30, connectivity=0.2, seed=seed))
+    return contexts
+
+
+def test_snapshot_isolation_and_atomic_rename():
+    print("=" * 60)
+    print("Test: Copy-on-snapshot + atomic checkpoint directory")
+    print("=" * 60)
+
+    contexts = _make_contexts()
+    expected = [ctx.domain_ctx.synapses.weights.copy() for ctx in contexts]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = AsyncCheckpointWriter(max_pending=2)
+        snapshots = [snapshot_snn_agent(ctx, None, i) for i, ctx in enumerate(contexts)]
+        checkpoint_dir = os.path.join(tmp, 'checkpoint_ep_50')
+        writer.submit(checkpoint_dir, snapshots, {'exploration_rates.json': {'0': 0.5}})
+
+        # Agent chạy tiếp ngay sau snapshot → không ảnh hưởng checkpoint
+        for ctx in contexts:
+            ctx.domain_ctx.synapses['weight'][:] = -1.0
+
+        assert writer.flush(timeout=30)
+        assert sorted(os.listdir(tmp)) == ['checkpoint_ep_50']
+        assert os.path.exists(os.path.join(checkpoint_dir, 'exploration_rates.json'))
+        for i, weights in enumerate(expected):
+            ckpt = open_snn_checkpoint(os.path.join(checkpoint_dir, f'agent_{i}_snn'))
+            assert np.array_equal(ckpt.synapses['weight'], weights)
+
+        metrics = writer.metrics()
+        assert metrics['checkpoints_written'] == 1 and metrics['checkpoint_queue_depth'] == 0
+        assert metrics['checkpoint_last_write_ms'] > 0
+        writer.close()
+        print(f"  Write latency: {metrics['checkpoint_last_write_ms']:.1f} ms")
+
+    print("✅ Snapshot isolation + atomic rename verified!")
+
+
+def test_crash_leaves_no_partial_checkpoint():
+    print("=" * 60)
+    print("Test: Failed write + bounded queue")
+    print("=" * 60)
+
+    contexts = _make_contexts(1)
+    snapshots = [snapshot_snn_agent(contexts[0], None, 0)]
+    original_write = checkpoint_writer.write_agent_snapshot
+    gate = threading.Event()
+
+    def _crashing_write(snapshot, output_dir):
+        gate.wait(10)
+        original_write(snapshot, output_dir)
+        raise IOError("disk full")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint_writer.write_agent_snapshot = _crashing_write
+        try:
+            writer = AsyncCheckpointWriter(max_pending=1)
+            writer.submit(os.path.join(tmp, 'checkpoint_ep_1'), snapshots)
+            # Writer đang bị chặn → queue đầy, submit tiếp theo phải đợi
+            blocked = threading.Thread(
+                target=writer.submit, args=(os.path.join(tmp, 'checkpoint_ep_2'), snapshots)
+            )
+            blocked.start()
+            blocked.join(0.3)
+            assert blocked.is_alive() and writer.queue_depth >= 1
+            gate.set()
+            blocked.join(10)
+            assert writer.flush(timeout=30)
+        finally:
+            checkpoint_writer.write_agent_snapshot = original_write
+
+        metrics = writer.metrics()
+        assert metrics['checkpoint_errors'] == 2 and metrics['checkpoints_written'] == 0
+        writer.close()
+
+        # Không có checkpoint_ep_N nào, chỉ còn thư mục .partial → được dọn
+        assert not any(name.startswith('checkpoint_ep_') and '.partial-' not in name for name in os.listdir(tmp))
+        assert cleanup_partial_checkpoints(tmp) == 2
+        assert os.listdir(tmp) == []
+
+    print("✅ Crash safety verified!")
+
+
+if __name__ == '__main__':
+    test_snapshot_isolation_and_atomic_rename()
+    test_crash_leaves_no_partial_checkpoint()
@@ -0,0 +1,203 @@
+"""
+Test Connectome Store (Struct-of-Arrays)
+========================================
+Test ConnectomeStore + SynapseView + scatter/gather với heavy_tensors.
+"""
+import sys
+import copy
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.connectome import ConnectomeStore, SynapseView
+from src.core.snn_context_theus import (
+    SynapseState,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    sync_from_heavy_tensors,
+    gather_synapse_tensors,
+    add_synapses,
+    remove_synapses,
+    compact_connectome,
+    COMMIT_STATE_SOLID
+)
+
+
+def test_store_sequence_protocol():
+    print("=" * 60)
+    print("Test: ConnectomeStore sequence protocol")
+    print("=" * 60)
+
+    store = ConnectomeStore()
+    store.append(SynapseState(synapse_id=5, pre_neuron_id=0, post_neuron_id=1, weight=0.9))
+    store.extend([
+        SynapseState(synapse_id=6, pre_neuron_id=1, post_neuron_id=2, synapse_type="shadow"),
+        SynapseState(synapse_id=7, pre_neuron_id=2, post_neuron_id=0, source_agent_id=3),
+    ])
+
+    assert len(store) == 3
+    assert store.next_synapse_id() == 8
+    assert store[0].weight == 0.9
+    assert store[1].synapse_type == "shadow"
+    assert store[-1].source_agent_id == 3
+    assert [s.synapse_id for s in store[:2]] == [5, 6]
+
+    # View ghi thẳng vào cột
+    store[2].weight = 0.25
+    assert store['weight'][2] == 0.25
+
+    # deepcopy view → SynapseState độc lập
+    detached = copy.deepcopy(store[0])
+    assert isinstance(detached, SynapseState)
+    detached.weight = 0.1
+    assert store[0].weight == 0.9
+
+    # Bulk append + compaction
+    slots = store.add_arrays([3, 4], [4, 3], weight=[0.4, 0.6])
+    assert list(slots) == [3, 4]
+    assert list(store['synapse_id'][3:]) == [8, 9]
+    removed = store.remove(store.weights < 0.3)
+    assert removed == 1 and len(store) == 4
+    assert 7 not in store['synapse_id']
+
+    print(f"  {store}")
+    print("✅ Sequence protocol verified!")
+
+
+def test_scatter_gather_roundtrip():
+    print("=" * 60)
+    print("Test: heavy_tensors scatter/gather")
+    print("=" * 60)
+
+    snn_ctx = create_snn_context_theus(num_neurons=30, connectivity=0.2, seed=11)
+    domain = snn_ctx.domain_ctx
+    store = domain.synapses
+    assert isinstance(store, ConnectomeStore)
+    assert isinstance(store[0], SynapseView)
+
+    ensure_heavy_tensors_initialized(snn_ctx)
+    t = domain.heavy_tensors
+    pre, post = store.pre_ids, store.post_ids
+    assert np.allclose(t['weights'][pre, post], store.weights, atol=1e-6)
+
+    # Giả lập compute vectorized cập nhật ma trận (N, N)
+    t['weights'][pre[0], post[0]] = 0.123
+    t['commit_states'][pre[1], post[1]] = COMMIT_STATE_SOLID
+    sync_from_heavy_tensors(snn_ctx)
+
+    assert abs(store[0].weight - 0.123) < 1e-6
+    assert store[1].commit_state == COMMIT_STATE_SOLID
+
+    # Thay đổi cấu trúc → ma trận được scatter lại từ store
+    store.remove(np.arange(len(store)) == 0)
+    ensure_heavy_tensors_initialized(snn_ctx)
+    assert t['weights'][pre[0], post[0]] == 0.0 or (pre[0], post[0]) in set(zip(store.pre_ids, store.post_ids))
+    assert t['commit_states'][store.pre_ids[0], store.post_ids[0]] == COMMIT_STATE_SOLID
+
+    print(f"  Synapses: {len(store)}, store bytes: {store.nbytes}")
+    print("✅ Scatter/gather verified!")
+
+
+def test_sparse_backend_matches_dense():
+    print("=" * 60)
+    print("Test: Sparse (CSR) backend == Dense backend")
+    print("=" * 60)
+
+    from src.core.context import GlobalContext, DomainContext, SystemContext
+    from src.processes.snn_composite_theus import process_snn_cycle
+
+    results = {}
+    for backend in ('dense', 'sparse'):
+        np.random.seed(3)
+        snn_ctx = create_snn_context_theus(
+            num_neurons=60, connectivity=0.15, seed=5,
+            weight_backend=backend, ticks_per_step=3
+        )
+        domain = DomainContext(agent_id=0)
+        domain.snn_context = snn_ctx
+        ctx = SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+        rng = np.random.RandomState(0)
+        for _ in range(20):
+            domain.current_observation = rng.rand(16)
+            domain.td_error = float(rng.randn())
+            process_snn_cycle(ctx)
+
+        t = snn_ctx.domain_ctx.heavy_tensors
+        assert t['weight_backend'] == backend
+        results[backend] = (t['potentials'].copy(), snn_ctx.domain_ctx.synapses.weights.copy())
+
+    S = len(results['sparse'][1])
+    print(f"  Synapses: {S}")
+    assert np.allclose(results['dense'][0], results['sparse'][0], atol=1e-5)
+    assert np.allclose(results['dense'][1], results['sparse'][1], atol=1e-6)
+    print("✅ Sparse backend verified!")
+
+
+def test_incremental_mutation_matches_rebuild():
+    print("=" * 60)
+    print("Test: Incremental add/remove == full rebuild")
+    print("=" * 60)
+
+    from src.core.connectome import csr_gather_rows
+
+    for backend in ('dense', 'sparse'):
+        snn_ctx = create_snn_context_theus(
+            num_neurons=50, connectivity=0.2, seed=7, weight_backend=backend
+        )
+        domain = snn_ctx.domain_ctx
+        store = domain.synapses
+        N = len(domain.neurons)
+        rng = np.random.RandomState(1)
+
+        ensure_heavy_tensors_initialized(snn_ctx)
+        t = domain.heavy_tensors
+        # Giả lập STDP đã cập nhật tensors (chưa gather về store)
+        t['weights'] *= 0.5
+
+        for _ in range(5):
+            live = store.live_slots()
+            removed = remove_synapses(domain, rng.choice(live, size=20, replace=False))
+            assert removed == 20
+            add_synapses(domain, rng.randint(0, N, 15), rng.randint(0, N, 15),
+                         weight=rng.uniform(0.3, 0.5, 15))
+            # Không rebuild: cache vẫn được xác nhận khớp với store
+            assert t['connectome_version'] == store.version
+
+        assert store.num_dead > 0 and len(store) == store.num_slots - store.num_dead
+        patched = {k: t[k].copy() for k in ('weights', 'commit_states')}
+        if backend == 'sparse':
+            rows = np.arange(N)
+            slots, row_pos = csr_gather_rows(t['csr_indptr'], t['csr_fill'], t['csr_slots'], rows)
+            patched_edges = sorted(zip(row_pos.tolist(), slots.tolist()))
+
+        # Rebuild từ store (gather trước để giữ weights đã học)
+        gather_synapse_tensors(domain)
+        fresh_t = {}
+        domain.heavy_tensors = fresh_t
+        ensure_heavy_tensors_initialized(snn_ctx)
+        for k, arr in patched.items():
+            assert np.allclose(fresh_t[k], arr, atol=1e-6), f"{backend}:{k} mismatch"
+        if backend == 'sparse':
+            slots, row_pos = csr_gather_rows(fresh_t['csr_indptr'], fresh_t['csr_fill'], fresh_t['csr_slots'], rows)
+            assert sorted(zip(row_pos.tolist(), slots.tolist())) == patched_edges
+
+        # Compaction: remap cache, nội dung theo synapse không đổi
+        live_w = store.weights[store.live_slots()].copy()
+        assert compact_connectome(domain, max_dead_fraction=0.0)
+        assert store.num_dead == 0 and fresh_t['connectome_version'] == store.version
+        assert np.allclose(store.weights, live_w)
+        if backend == 'sparse':
+            assert np.allclose(fresh_t['weights'], live_w, atol=1e-6)
+
+        print(f"  [{backend}] synapses={len(store)} slots={store.num_slots}")
+
+    print("✅ Incremental mutation verified!")
+
+
+if __name__ == '__main__':
+    test_store_sequence_protocol()
+    test_scatter_gather_roundtrip()
+    test_sparse_backend_matches_dense()
+    test_incremental_mutation_matches_rebuild()
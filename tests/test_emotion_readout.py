@@ -0,0 +1,142 @@
+"""
+Test Vectorized Emotion Readout
+===============================
+_encode_emotion_vector_impl (fire_counts tensor + masked matmul) khớp readout
+cũ duyệt neuron objects; emotion/SNN-state là double buffers (snn domain)
+hoán đổi reference; readout không ghi lên RL domain (snn_state_dim của RL
+network độc lập với num_neurons).
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+import torch
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus, sync_to_heavy_tensors
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.processes.snn_rl_bridge import _encode_emotion_vector_impl
+
+
+def _legacy_emotion_vector(ctx):
+    """Readout cũ: lọc neuron objects theo fire_count, attention trên list prototypes."""
+    snn_ctx = ctx.domain_ctx.snn_context
+    keys = [n.prototype_vector for n in snn_ctx.domain_ctx.neurons if n.fire_count > 0]
+    obs = ctx.domain_ctx.current_observation
+    query = obs if isinstance(obs, np.ndarray) and obs.shape == (16,) else None
+    if not keys:
+        emotion = np.zeros(16)
+    elif query is not None:
+        K = np.array(keys)
+        gates = 1 / (1 + np.exp(-np.dot(K, query)))
+        emotion = np.sum(K * gates[:, np.newaxis], axis=0)
+    else:
+        emotion = np.mean(keys, axis=0)
+    norm = np.linalg.norm(emotion)
+    return emotion / norm if norm > 0 else emotion
+
+
+def _make_ctx(active_ratio=0.3):
+    np.random.seed(3)
+    snn_ctx = create_snn_context_theus(num_neurons=120, connectivity=0.1, seed=3)
+    rng = np.random.RandomState(5)
+    for neuron in snn_ctx.domain_ctx.neurons:
+        neuron.fire_count = int(rng.randint(1, 4)) if rng.rand() < active_ratio else 0
+    sync_to_heavy_tensors(snn_ctx)
+    domain = DomainContext(agent_id=0)
+    domain.snn_context = snn_ctx
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def test_readout_matches_object_loop():
+    print("=" * 60)
+    print("Test: Vectorized readout == object loop (attention / mean / neutral)")
+    print("=" * 60)
+
+    rng = np.random.RandomState(0)
+    for label, active_ratio, obs in (
+        ('attention', 0.3, rng.randn(16).astype(np.float32)),
+        ('mean', 0.3, None),
+        ('neutral', 0.0, rng.randn(16).astype(np.float32)),
+    ):
+        ctx = _make_ctx(active_ratio)
+        ctx.domain_ctx.current_observation = obs
+        expected = _legacy_emotion_vector(ctx)
+        emotion = _encode_emotion_vector_impl(ctx)['heavy_snn_emotion_vector']
+        assert emotion.dtype == torch.float32
+        assert np.allclose(emotion.numpy(), expected, atol=1e-5), label
+        print(f"  {label}: |e|={float(torch.norm(emotion)):.3f}")
+
+    print("✅ Readout verified!")
+
+
+def test_readout_double_buffers():
+    print("=" * 60)
+    print("Test: Emotion/state double buffers swap by reference")
+    print("=" * 60)
+
+    ctx = _make_ctx()
+    snn_domain = ctx.domain_ctx.snn_context.domain_ctx
+    buffers = snn_domain.heavy_readout_buffers
+    traces = snn_domain.heavy_tensors['firing_traces']
+    rng = np.random.RandomState(1)
+
+    history = []
+    for step in range(4):
+        ctx.domain_ctx.current_observation = rng.randn(16).astype(np.float32)
+        traces[:] = rng.rand(len(traces))
+        delta = _encode_emotion_vector_impl(ctx)
+        assert delta['heavy_snn_emotion_vector'] is buffers['emotion']
+        assert delta['heavy_previous_snn_state_vector'] is buffers['previous_state']
+        history.append((delta['heavy_snn_emotion_vector'], delta['heavy_snn_emotion_vector'].clone(),
+                        delta['heavy_snn_state_vector'], traces.copy()))
+
+        if step == 0:
+            assert delta['heavy_previous_snn_emotion_vector'] is None
+            continue
+        prev_emo, prev_values, prev_state, prev_traces = history[step - 1]
+        assert delta['heavy_previous_snn_emotion_vector'] is prev_emo
+        assert torch.equal(prev_emo, prev_values)
+        assert delta['heavy_previous_snn_state_vector'] is prev_state
+        assert np.array_equal(prev_state.numpy(), prev_traces)
+        assert np.array_equal(delta['heavy_snn_state_vector'].numpy(), traces)
+        if step >= 2:
+            # Buffer của step-2 được dùng lại làm current
+            assert delta['heavy_snn_emotion_vector'] is history[step - 2][0]
+            assert delta['heavy_snn_state_vector'] is history[step - 2][2]
+
+    print("✅ Double buffers verified!")
+
+
+def test_snn_cycle_keeps_readout_off_rl_domain():
+    print("=" * 60)
+    print("Test: process_snn_cycle → fire_counts tensor, readout không ghi RL domain")
+    print("=" * 60)
+
+    ctx = _make_ctx(active_ratio=0.0)
+    rng = np.random.RandomState(2)
+    for _ in range(5):
+        ctx.domain_ctx.current_observation = rng.rand(16).astype(np.float32)
+        process_snn_cycle(ctx)
+
+    snn_domain = ctx.domain_ctx.snn_context.domain_ctx
+    counts = snn_domain.heavy_tensors['fire_counts']
+    assert [n.fire_count for n in snn_domain.neurons] == counts.tolist()
+    assert counts.sum() == snn_domain.metrics['episode_total_spikes'] > 0
+    buffers = snn_domain.heavy_readout_buffers
+    assert buffers['previous_emotion'] is not None
+    assert np.allclose(buffers['emotion'].numpy(), _legacy_emotion_vector(ctx), atol=1e-5)
+    # num_neurons (120) != snn_state_dim mặc định (100): RL side vẫn nhận zeros đúng kích thước
+    assert buffers['state'].shape == (120,)
+    for name in ('heavy_snn_emotion_vector', 'heavy_previous_snn_emotion_vector',
+                 'heavy_snn_state_vector', 'heavy_previous_snn_state_vector'):
+        assert getattr(ctx.domain_ctx, name) is None, name
+
+    print("✅ SNN cycle readout verified!")
+
+
+if __name__ == '__main__':
+    test_readout_matches_object_loop()
+    test_readout_double_buffers()
+    test_snn_cycle_keeps_readout_off_rl_domain()
@@ -0,0 +1,136 @@
+"""
+Test GridWorld Occupancy Layers
+===============================
+Sensor vector (batched gather trên lưới occupancy) và va chạm (array lookup)
+phải khớp với logic tra cứu từng ô: tường tĩnh > tường động, công tắc đè
+tường động, ngoài biên = tường tĩnh. Gate đổi trạng thái khi bật công tắc.
+"""
+import sys
+import random
+
+sys.path.append('.')
+
+import numpy as np
+
+from environment import GridWorld
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+ACTIONS = ['up', 'down', 'left', 'right', 'up-left', 'up-right', 'down-left', 'down-right', 'stay']
+
+
+def _make_env(num_agents=6, size=12):
+    rng = random.Random(7)
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    rng.shuffle(cells)
+    walls = [list(cell) for cell in cells[:20]]
+    gate_a = [list(cell) for cell in cells[20:26]]
+    gate_b = [list(cell) for cell in cells[24:30]]  # Chồng lấn gate_a
+    switches = [{'id': 'A', 'pos': list(cells[30])}, {'id': 'B', 'pos': list(cells[31])},
+                {'id': 'C', 'pos': gate_a[0]}]  # Công tắc nằm trên tường động
+    config = {
+        'grid_size': size, 'num_agents': num_agents, 'max_steps_per_episode': 200,
+        'start_positions': [list(cells[40 + i]) for i in range(num_agents)],
+        'goal_pos': list(cells[60]),
+        'walls': walls + [[-1, 3], [size + 4, 0]],  # Ngoài grid: bị bỏ qua
+        'logical_switches': switches,
+        'dynamic_walls': [{'id': 'gA', 'pos': gate_a}, {'id': 'gB', 'pos': gate_b}],
+        'dynamic_wall_rules': [{'id': 'gA', 'type': 'toggle', 'inputs': ['A']},
+                               {'id': 'gB', 'type': 'xor', 'inputs': ['A', 'B', 'C']}],
+    }
+    return GridWorld({'environment_config': config, 'log_level': 'error'})
+
+
+def _reference_tactile(env, pos):
+    """Tra cứu từng ô (logic trước khi có occupancy layers)."""
+    values = []
+    for dr, dc in DIRECTIONS:
+        cell = (pos[0] + dr, pos[1] + dc)
+        value = 0.0
+        if not (0 <= cell[0] < env.size and 0 <= cell[1] < env.size) or cell in env.static_walls:
+            value = 0.3
+        else:
+            if any(closed and cell in env.dynamic_walls.get(g, [])
+                   for g, closed in env.dynamic_wall_states.items()):
+                value = 0.6
+            if cell in env.switches:
+                value = 1.0
+        values.append(value)
+    return np.array(values, dtype=np.float32)
+
+
+def _reference_bump(env, pos, action):
+    # ACTIONS[:8] cùng thứ tự với DIRECTIONS; 'stay' không di chuyển
+    dr, dc = dict(zip(ACTIONS, DIRECTIONS)).get(action, (0, 0))
+    cell = (pos[0] + dr, pos[1] + dc)
+    if not (0 <= cell[0] < env.size and 0 <= cell[1] < env.size) or cell in env.static_walls:
+        return 'static'
+    if any(closed and cell in env.dynamic_walls.get(g, []) for g, closed in env.dynamic_wall_states.items()):
+        return 'dynamic'
+    return None
+
+
+def test_sensor_and_moves_match_cell_lookup():
+    print("=" * 60)
+    print("Test: occupancy layers == per-cell lookup")
+    print("=" * 60)
+
+    env = _make_env()
+    rng = random.Random(0)
+    toggles = 0
+    for step in range(150):
+        env.new_step()
+        batched = env.get_sensor_vectors()
+        for i in range(env.num_agents):
+            vector = env.get_sensor_vector(i)
+            assert np.array_equal(vector, batched[i])
+            pos = env.agent_positions[i]
+            assert np.array_equal(vector[2:10], _reference_tactile(env, pos))
+            assert vector[0] == np.float32(pos[0] / env.size)
+            assert vector[12] == (env.last_bump_types[i] == 'static')
+            assert vector[13] == (env.last_bump_types[i] == 'dynamic')
+            assert vector[15] == np.float32(min(1.0, env.current_step / env.max_steps))
+
+        for i in range(env.num_agents):
+            action = rng.choice(ACTIONS)
+            expected_bump = _reference_bump(env, env.agent_positions[i], action)
+            events_before = len(env.broadcast_events)
+            env.perform_action(i, action)
+            assert env.last_bump_types[i] == expected_bump
+            toggles += any(e['type'] == 'switch_toggle' for e in env.broadcast_events[events_before:])
+            # Observation ngay sau move thấy trạng thái gate mới
+            assert np.array_equal(env.get_observation(i)['sensor_vector'][2:10],
+                                  _reference_tactile(env, env.agent_positions[i]))
+        env.current_step += 1
+
+    print(f"  150 steps, {toggles} switch toggles, gates={env.dynamic_wall_states}")
+    print("✅ Occupancy layers verified!")
+
+
+def test_auditory_channels_and_reset():
+    print("=" * 60)
+    print("Test: broadcast channels + reset")
+    print("=" * 60)
+
+    env = _make_env(num_agents=2)
+    switch_pos = next(pos for pos, sid in env.switches.items() if sid == 'A')
+    env.agent_positions[0] = [switch_pos[0], switch_pos[1] - 1] if switch_pos[1] > 0 else [switch_pos[0], 1]
+    env._sensor_dirty[:] = True
+    action = 'right' if switch_pos[1] > 0 else 'left'
+    env.perform_action(0, action)
+    assert env.broadcast_events[0]['type'] == 'switch_toggle'
+
+    vectors = env.get_sensor_vectors()
+    assert np.all(vectors[:, 10] == 1.0) and np.all(vectors[:, 11] == 0.5)
+    env.new_step()
+    assert np.all(env.get_sensor_vectors()[:, 10:12] == 0.0)
+
+    obs = env.reset()
+    assert env.switch_states['A'] is False
+    for i, o in obs.items():
+        assert np.array_equal(o['sensor_vector'][2:10], _reference_tactile(env, env.agent_positions[i]))
+    print("✅ Broadcast channels verified!")
+
+
+if __name__ == '__main__':
+    test_sensor_and_moves_match_cell_lookup()
+    test_auditory_channels_and_reset()
@@ -0,0 +1,95 @@
+"""
+Test Fused Tick Kernel
+======================
+process_snn_cycle qua FusedTickKernel == vòng lặp _*_impl từng tick
+(use_fused_tick_kernel=False), khớp từng bit trên dense/sparse backend,
+có tombstones, dopamine và spike_queue entries (imagination seeds).
+"""
+import pickle
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.processes.snn_tick_kernel_theus import FusedTickKernel
+
+
+def _make_ctx(backend, fused):
+    np.random.seed(7)
+    snn_ctx = create_snn_context_theus(
+        num_neurons=90, connectivity=0.15, seed=4,
+        weight_backend=backend, ticks_per_step=5
+    )
+    snn_ctx.global_ctx.use_fused_tick_kernel = fused
+    store = snn_ctx.domain_ctx.synapses
+    store.tombstone(store.live_slots()[10:20])
+
+    domain = DomainContext(agent_id=0)
+    domain.snn_context = snn_ctx
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def _run(ctx, steps=12):
+    rng = np.random.RandomState(1)
+    snn_domain = ctx.domain_ctx.snn_context.domain_ctx
+    for step in range(steps):
+        ctx.domain_ctx.current_observation = rng.rand(16).astype(np.float32)
+        ctx.domain_ctx.td_error = float(rng.randn()) if step % 3 else 0.0
+        if step == 4:
+            # Spike ngoài buffer (imagination) → lateral inhibition + Hebbian path
+            now = int(snn_domain.current_time)
+            snn_domain.spike_queue[now + 2] = list(range(0, 40, 3))
+        np.random.seed(step)
+        process_snn_cycle(ctx)
+
+
+def test_fused_kernel_matches_per_stage_loop():
+    print("=" * 60)
+    print("Test: FusedTickKernel == per-stage _*_impl loop")
+    print("=" * 60)
+
+    for backend in ('dense', 'sparse'):
+        fused, reference = _make_ctx(backend, True), _make_ctx(backend, False)
+        _run(fused)
+        _run(reference)
+
+        f_dom = fused.domain_ctx.snn_context.domain_ctx
+        r_dom = reference.domain_ctx.snn_context.domain_ctx
+        assert isinstance(f_dom.heavy_tick_kernel, FusedTickKernel)
+        assert r_dom.heavy_tick_kernel is None
+        for key in ('potentials', 'potential_vectors', 'thresholds', 'last_fire_times',
+                    'weights', 'spike_buffer', 'firing_traces'):
+            assert np.array_equal(f_dom.heavy_tensors[key], r_dom.heavy_tensors[key]), (backend, key)
+        for column in ('trace_fast', 'trace_slow', 'last_active_time'):
+            assert np.array_equal(f_dom.synapses.column(column), r_dom.synapses.column(column)), (backend, column)
+        assert [n.fire_count for n in f_dom.neurons] == [n.fire_count for n in r_dom.neurons]
+        assert f_dom.current_time == r_dom.current_time
+        assert sorted(f_dom.spike_queue) == sorted(r_dom.spike_queue)
+        for key in ('fire_rate', 'fired_count', 'episode_total_spikes', 'avg_firing_rate'):
+            assert f_dom.metrics[key] == r_dom.metrics[key], (backend, key)
+        print(f"  {backend}: spikes={f_dom.metrics['episode_total_spikes']}, t={f_dom.current_time}")
+
+    print("✅ Fused kernel verified!")
+
+
+def test_kernel_pickles_empty():
+    print("=" * 60)
+    print("Test: FusedTickKernel pickle (scratch buffers không được serialize)")
+    print("=" * 60)
+
+    ctx = _make_ctx('dense', True)
+    _run(ctx, steps=1)
+    kernel = ctx.domain_ctx.snn_context.domain_ctx.heavy_tick_kernel
+    assert kernel._buffers
+    assert pickle.loads(pickle.dumps(kernel))._buffers == {}
+
+    print("✅ Kernel pickle verified!")
+
+
+if __name__ == '__main__':
+    test_fused_kernel_matches_per_stage_loop()
+    test_kernel_pickles_empty()
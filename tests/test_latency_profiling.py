@@ -0,0 +1,91 @@
+"""
+Test Latency Profiling
+======================
+process_snn_cycle ghi latency từng sub-stage, _run_stages ghi từng process,
+và cProfile capture chỉ áp dụng cho process được chọn.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from theus.profiling import ProcessProfiler, merge_histograms, top_functions
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus
+from src.processes.agent_step_pipeline import _run_stages
+from src.processes.snn_composite_theus import process_snn_cycle
+
+
+def _make_ctx(agent_id=0, ticks=3):
+    snn_ctx = create_snn_context_theus(num_neurons=40, connectivity=0.15, seed=3 + agent_id,
+                                       ticks_per_step=ticks)
+    domain = DomainContext(agent_id=agent_id)
+    domain.snn_context = snn_ctx
+    domain.current_observation = np.random.RandomState(agent_id).rand(16)
+    domain.heavy_latency_profiler = ProcessProfiler(capture='process_snn_cycle')
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def test_snn_cycle_substages():
+    print("=" * 60)
+    print("Test: process_snn_cycle sub-stage histograms")
+    print("=" * 60)
+
+    ctx = _make_ctx(ticks=3)
+    for _ in range(4):
+        _run_stages(ctx, [(process_snn_cycle, {})])
+
+    snap = ctx.domain_ctx.heavy_latency_profiler.snapshot()
+    assert snap['process_snn_cycle']['count'] == 4
+    for stage in ('encode', 'integrate', 'fire', 'stdp'):
+        assert snap[f'process_snn_cycle.{stage}']['count'] == 12  # 4 steps × 3 ticks
+    for stage in ('hysteria', 'homeostasis', 'commitment', 'readout'):
+        assert snap[f'process_snn_cycle.{stage}']['count'] == 4
+    assert snap['process_snn_cycle.sync']['count'] == 8  # pre + post sync
+    for name, s in sorted(snap.items()):
+        assert s['p50_us'] <= s['p99_us'] <= s['max_us']
+        print(f"  {name:<38} n={s['count']:>3} mean={s['mean_us']:>9.1f}us")
+
+    # Sub-stages không thể dài hơn cả cycle
+    total = snap['process_snn_cycle']['total_ms']
+    stages = sum(s['total_ms'] for n, s in snap.items() if n.startswith('process_snn_cycle.'))
+    assert stages <= total
+    print("✅ Sub-stage breakdown verified!")
+
+
+def test_capture_and_population_merge():
+    print("=" * 60)
+    print("Test: cProfile capture + population merge")
+    print("=" * 60)
+
+    calls = []
+
+    def noop_stage(ctx):
+        calls.append(ctx.domain_ctx.agent_id)
+        return {'td_error': 0.5}
+
+    contexts = [_make_ctx(agent_id=i, ticks=1) for i in range(2)]
+    for ctx in contexts:
+        _run_stages(ctx, [(noop_stage, {}), (process_snn_cycle, {})])
+        # Delta vẫn được merge như trước
+        assert ctx.domain_ctx.td_error == 0.5
+
+    profilers = [ctx.domain_ctx.heavy_latency_profiler for ctx in contexts]
+    merged = merge_histograms(profilers)
+    assert merged['noop_stage'].count == 2
+    assert merged['process_snn_cycle'].count == 2
+
+    rows = top_functions(profilers)
+    assert rows and any('process_snn_cycle' in r['function'] for r in rows)
+    assert not any('noop_stage' in r['function'] for r in rows)
+
+    profilers[0].snapshot(reset=True)
+    assert profilers[0].snapshot() == {}
+    print(f"  Top captured: {rows[0]['function']} ({rows[0]['cumtime_ms']} ms)")
+    print("✅ Capture verified!")
+
+
+if __name__ == '__main__':
+    test_snn_cycle_substages()
+    test_capture_and_population_merge()
@@ -0,0 +1,93 @@
+"""
+Test Neural Darwinism Synaptogenesis (Vectorized)
+=================================================
+Dual-Gate vectorized == vòng lặp lồng cũ, skull limit và seed reproducibility.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.snn_context_theus import create_snn_context_theus, ensure_heavy_tensors_initialized
+from src.processes.snn_advanced_features_theus import (
+    process_neural_darwinism,
+    _synaptogenesis_candidates
+)
+
+
+def _make_active_context(num_neurons=120, seed=3, **kwargs):
+    # Prototypes được sinh trước khi create_snn_context_theus seed RNG
+    np.random.seed(seed)
+    snn_ctx = create_snn_context_theus(num_neurons=num_neurons, connectivity=0.1, seed=seed, **kwargs)
+    ensure_heavy_tensors_initialized(snn_ctx)
+    domain = snn_ctx.domain_ctx
+    rng = np.random.RandomState(seed)
+    for n in domain.neurons:
+        n.last_fire_time = int(rng.choice([-1000, 50]))
+    domain.current_time = 100
+    return snn_ctx
+
+
+def test_candidates_match_reference_loop():
+    print("=" * 60)
+    print("Test: Dual-Gate candidates == reference loop")
+    print("=" * 60)
+
+    snn_ctx = _make_active_context()
+    domain = snn_ctx.domain_ctx
+    N = len(domain.neurons)
+    radius, threshold = 12, 0.3
+    protos = domain.heavy_tensors['prototypes']
+    existing = set(zip(domain.synapses.pre_ids.tolist(), domain.synapses.post_ids.tolist()))
+    active = [n.neuron_id for n in domain.neurons if domain.current_time - n.last_fire_time < 100]
+
+    reference = []
+    for a in active:
+        for b in active:
+            if a == b or abs(a - b) > radius or (a, b) in existing:
+                continue
+            cos = np.dot(protos[a], protos[b]) / (np.linalg.norm(protos[a]) * np.linalg.norm(protos[b]) + 1e-8)
+            if cos >= threshold:
+                reference.append((a, b))
+
+    pre, post = _synaptogenesis_candidates(np.array(active), radius, protos, threshold, domain.synapses, N)
+    print(f"  Active: {len(active)}, candidates: {len(reference)}")
+    assert list(zip(pre.tolist(), post.tolist())) == reference
+    print("✅ Candidates verified!")
+
+
+def test_skull_limit_and_seed():
+    print("=" * 60)
+    print("Test: Skull limit + seed reproducibility")
+    print("=" * 60)
+
+    runs = []
+    for _ in range(2):
+        snn_ctx = _make_active_context()
+        snn_ctx.global_ctx.synaptogenesis_prob = 0.5
+        np.random.seed(123)
+        process_neural_darwinism(snn_ctx)
+        store = snn_ctx.domain_ctx.synapses
+        live = store.live_slots()
+        runs.append(sorted(zip(store.pre_ids[live].tolist(), store.post_ids[live].tolist(),
+                               store.weights[live].round(6).tolist())))
+    assert runs[0] == runs[1]
+    print(f"  Reproducible synapses: {len(runs[0])}")
+
+    # Trần sọ não thấp → dừng mọc đúng tại MAX_SYNAPSES
+    snn_ctx = _make_active_context()
+    snn_ctx.global_ctx.synaptogenesis_prob = 1.0
+    N = len(snn_ctx.domain_ctx.neurons)
+    limit = len(snn_ctx.domain_ctx.synapses) + 7
+    snn_ctx.global_ctx.max_connectivity_ratio = (limit + 0.5) / (N * (N - 1))
+    result = process_neural_darwinism(snn_ctx)
+    assert result['metrics']['darwinism_total_synapses'] == limit
+    assert result['metrics']['darwinism_new_synapses'] == 7
+    print(f"  Skull limit {limit} respected")
+    print("✅ Skull limit + seed verified!")
+
+
+if __name__ == '__main__':
+    test_candidates_match_reference_loop()
+    test_skull_limit_and_seed()
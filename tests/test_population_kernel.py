@@ -0,0 +1,105 @@
+"""
+Test SNN Population Kernel
+==========================
+PopulationSNNKernel (batched) == process_snn_cycle chạy tuần tự từng agent,
+trên population trộn dense/sparse backend và connectome có tombstones.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.processes.snn_population_theus import PopulationSNNKernel
+
+
+def _make_population(backends):
+    contexts = []
+    for i, backend in enumerate(backends):
+        np.random.seed(10 + i)
+        snn_ctx = create_snn_context_theus(
+            num_neurons=60 + 10 * i, connectivity=0.15, seed=5 + i,
+            weight_backend=backend, ticks_per_step=3
+        )
+        # Tombstones + cặp (pre, post) trùng lặp
+        store = snn_ctx.domain_ctx.synapses
+        live = store.live_slots()[:10]
+        store.add_arrays(store.pre_ids[live], store.post_ids[live], weight=np.full(10, 0.9))
+        store.tombstone(store.live_slots()[20:30])
+
+        domain = DomainContext(agent_id=i)
+        domain.snn_context = snn_ctx
+        contexts.append(SystemContext(global_ctx=GlobalContext(), domain_ctx=domain))
+    return contexts
+
+
+def test_population_kernel_matches_sequential():
+    print("=" * 60)
+    print("Test: PopulationSNNKernel == sequential process_snn_cycle")
+    print("=" * 60)
+
+    backends = ['dense', 'sparse', 'dense']
+    sequential = _make_population(backends)
+    batched = _make_population(backends)
+    kernel = PopulationSNNKernel()
+
+    rng = np.random.RandomState(0)
+    for step in range(20):
+        obs = [rng.rand(16) for _ in backends]
+        td = [float(rng.randn()) for _ in backends]
+        for contexts in (sequential, batched):
+            for ctx, o, e in zip(contexts, obs, td):
+                ctx.domain_ctx.current_observation = o
+                ctx.domain_ctx.td_error = e
+
+        np.random.seed(step)
+        for ctx in sequential:
+            process_snn_cycle(ctx)
+        np.random.seed(step)
+        kernel.run_cycle(batched)
+
+    for a, (seq, bat) in enumerate(zip(sequential, batched)):
+        s_dom = seq.domain_ctx.snn_context.domain_ctx
+        b_dom = bat.domain_ctx.snn_context.domain_ctx
+        s_t, b_t = s_dom.heavy_tensors, b_dom.heavy_tensors
+        assert s_dom.current_time == b_dom.current_time
+        assert np.allclose(s_t['potentials'], b_t['potentials'], atol=1e-4)
+        assert np.allclose(s_t['thresholds'], b_t['thresholds'], atol=1e-5)
+        assert np.array_equal(s_t['last_fire_times'], b_t['last_fire_times'])
+        assert np.allclose(s_dom.synapses.weights, b_dom.synapses.weights, atol=1e-6)
+        assert np.allclose(s_dom.synapses.column('trace_fast'), b_dom.synapses.column('trace_fast'))
+        assert [n.fire_count for n in s_dom.neurons] == [n.fire_count for n in b_dom.neurons]
+        assert s_dom.metrics['episode_total_spikes'] == b_dom.metrics['episode_total_spikes']
+        print(f"  Agent {a} [{backends[a]}]: spikes={b_dom.metrics['episode_total_spikes']}")
+
+    print("✅ Population kernel verified!")
+
+
+def test_population_kernel_fallback():
+    print("=" * 60)
+    print("Test: PopulationSNNKernel fallback (agent lẻ)")
+    print("=" * 60)
+
+    sequential = _make_population(['sparse'])
+    batched = _make_population(['sparse'])
+    for contexts in (sequential, batched):
+        contexts[0].domain_ctx.current_observation = np.ones(16) * 0.5
+        contexts[0].domain_ctx.td_error = 0.5
+
+    np.random.seed(0)
+    process_snn_cycle(sequential[0])
+    np.random.seed(0)
+    PopulationSNNKernel().run_cycle(batched)
+
+    s_t = sequential[0].domain_ctx.snn_context.domain_ctx.heavy_tensors
+    b_t = batched[0].domain_ctx.snn_context.domain_ctx.heavy_tensors
+    assert np.array_equal(s_t['potentials'], b_t['potentials'])
+    print("✅ Fallback verified!")
+
+
+if __name__ == '__main__':
+    test_population_kernel_matches_sequential()
+    test_population_kernel_fallback()
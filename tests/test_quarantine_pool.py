@@ -0,0 +1,159 @@
+"""
+Test Quarantine Pool (Struct-of-Arrays)
+=======================================
+process_quarantine_validation trên pool dạng cột phải cho cùng kết quả
+với vòng lặp SynapseState cũ: validation scores, blacklist, promote vào
+connectome (tensors được vá) và reject.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.connectome import ConnectomeStore
+from src.core.context import DomainContext, GlobalContext, SystemContext
+from src.core.snn_context_theus import (
+    SynapseState,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+)
+from src.processes.snn_social_quarantine_theus import (
+    process_inject_viral_with_quarantine,
+    process_quarantine_validation,
+)
+
+NUM_NEURONS = 20
+
+
+def _shadow_synapses():
+    rng = np.random.RandomState(5)
+    return [
+        SynapseState(
+            synapse_id=500 + i, pre_neuron_id=int(rng.randint(NUM_NEURONS)),
+            post_neuron_id=int(rng.randint(NUM_NEURONS)), weight=float(rng.uniform(-1, 1)),
+            quarantine_time=int(rng.randint(0, 9)), synapse_type="shadow",
+            source_agent_id=i % 4
+        )
+        for i in range(24)
+    ]
+
+
+def _reference_step(shadows, blacklisted_sources, last_fire, now, reward, td_error, q_duration, threshold):
+    """Vòng lặp SynapseState cũ (trước khi pool chuyển sang cột)."""
+    hits = misses = 0
+    for syn in shadows:
+        syn.quarantine_time += 1
+        if last_fire[syn.pre_neuron_id] == now:
+            if abs(td_error - syn.weight) < abs(td_error):
+                syn.validation_score += 0.2
+                hits += 1
+            else:
+                syn.validation_score -= 0.1
+                misses += 1
+        if reward < -0.5:
+            syn.is_blacklisted = True
+            if syn.source_agent_id not in blacklisted_sources:
+                blacklisted_sources.append(syn.source_agent_id)
+    promote = [s for s in shadows if s.quarantine_time >= q_duration
+               and not s.is_blacklisted and s.validation_score >= threshold]
+    remaining = [s for s in shadows if s.quarantine_time < q_duration]
+    return remaining, promote, hits, misses
+
+
+def _make_ctx():
+    snn_ctx = create_snn_context_theus(num_neurons=NUM_NEURONS, connectivity=0.2, seed=2)
+    snn_ctx.global_ctx.quarantine_duration = 10
+    snn_ctx.global_ctx.validation_threshold = 0.15
+    ensure_heavy_tensors_initialized(snn_ctx)
+    snn_ctx.domain_ctx.shadow_synapses = _shadow_synapses()
+    domain = DomainContext(agent_id=0)
+    domain.snn_context = snn_ctx
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def test_quarantine_pool_matches_object_loop():
+    print("=" * 60)
+    print("Test: Quarantine pool validation == SynapseState loop")
+    print("=" * 60)
+
+    ctx = _make_ctx()
+    domain = ctx.domain_ctx.snn_context.domain_ctx
+    assert isinstance(domain.shadow_synapses, ConnectomeStore)
+
+    shadows = _shadow_synapses()
+    ref_blacklist, ref_promoted = [], []
+    ref_hits = ref_misses = 0
+    rng = np.random.RandomState(9)
+    native_before = len(domain.synapses)
+
+    for step in range(10):
+        domain.current_time = step
+        last_fire = np.where(rng.rand(NUM_NEURONS) < 0.5, step, step - 3).astype(np.int32)
+        domain.heavy_tensors['last_fire_times'][:] = last_fire
+        reward = -1.0 if step == 7 else 0.5
+        td_error = float(rng.uniform(-1, 1))
+        ctx.domain_ctx.last_reward = reward
+        ctx.domain_ctx.td_error = td_error
+
+        process_quarantine_validation(ctx)
+        shadows, promote, hits, misses = _reference_step(
+            shadows, ref_blacklist, last_fire, step, reward, td_error, 10, 0.15
+        )
+        ref_promoted += promote
+        ref_hits += hits
+        ref_misses += misses
+
+        pool = domain.shadow_synapses
+        live = pool.live_slots()
+        assert sorted(pool.column('synapse_id')[live].tolist()) == sorted(s.synapse_id for s in shadows)
+        by_id = {s.synapse_id: s for s in shadows}
+        for slot in live:
+            ref = by_id[int(pool.column('synapse_id')[slot])]
+            assert np.isclose(pool.column('validation_score')[slot], ref.validation_score, atol=1e-5)
+            assert pool.column('quarantine_time')[slot] == ref.quarantine_time
+
+    assert ref_promoted and ref_blacklist, "scenario should promote and blacklist"
+    assert domain.metrics['quarantine_rejected'] > 0
+    assert domain.blacklisted_sources == ref_blacklist
+    assert len(domain.synapses) == native_before + len(ref_promoted)
+    assert domain.metrics['quarantine_promoted'] == len(ref_promoted)
+    assert domain.metrics['shadow_hit'] == ref_hits
+    assert domain.metrics['shadow_miss'] == ref_misses
+    assert domain.metrics['in_quarantine'] == len(shadows)
+
+    # Promoted synapses → connectome (native) và compute tensors
+    store = domain.synapses
+    weights = domain.heavy_tensors['weights']
+    promoted_ids = {s.synapse_id for s in ref_promoted}
+    for syn in store:
+        if syn.synapse_id in promoted_ids:
+            assert syn.synapse_type == "native"
+            assert weights[syn.pre_neuron_id, syn.post_neuron_id] != 0
+    assert promoted_ids <= {syn.synapse_id for syn in store}
+    print(f"  promoted={len(ref_promoted)}, remaining={len(shadows)}, blacklist={ref_blacklist}")
+
+    print("✅ Quarantine pool verified!")
+
+
+def test_inject_filters_blacklisted_sources():
+    print("=" * 60)
+    print("Test: Blacklisted sources filtered from quarantine pool")
+    print("=" * 60)
+
+    ctx = _make_ctx()
+    domain = ctx.domain_ctx.snn_context.domain_ctx
+    domain.blacklisted_sources = [1, 3]
+    process_inject_viral_with_quarantine(ctx)
+
+    pool = domain.shadow_synapses
+    assert len(pool) == 12
+    assert set(s.source_agent_id for s in pool) == {0, 2}
+    assert domain.metrics['blacklist_blocked'] == 12
+
+    print("✅ Blacklist filter verified!")
+
+
+if __name__ == '__main__':
+    test_quarantine_pool_matches_object_loop()
+    test_inject_filters_blacklisted_sources()
@@ -0,0 +1,416 @@
+"""
+Test Sharded Agent Pool
+=======================
+ShardedAgentPool: agents chạy trên worker processes, heavy_tensors chia sẻ
+qua SharedMemory, state kéo về parent khi đóng pool, dọn SHM khi worker crash.
+sync_back / discard_shard_state của RLAgent và connectome versions qua fork.
+"""
+import os
+import sys
+import pickle
+import contextlib
+import multiprocessing as mp
+
+sys.path.append('.')
+
+import numpy as np
+import pytest
+
+from src.agents.rl_agent import RLAgent
+from src.core.connectome import ConnectomeStore
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import create_snn_context_theus, ensure_heavy_tensors_initialized
+from src.processes.snn_composite_theus import process_snn_cycle
+from src.utils.shm_tensor_store import (
+    ShmTensorStore,
+    SHM_DIR,
+    export_tensor_manifest,
+    adopt_tensor_manifest
+)
+from src.coordination.sharded_agent_pool import ShardedAgentPool, ShardWorkerError, fork_available
+
+
+class _SNNWorkloadAgent:
+    """Agent tối giản cùng interface với RLAgent (step / learn / export / import)."""
+
+    def __init__(self, agent_id, allocator, crash_at_step=None):
+        self.agent_id = agent_id
+        self.crash_at_step = crash_at_step
+        np.random.seed(agent_id)  # prototypes được sinh trước khi create seed RNG
+        snn_ctx = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=agent_id)
+        snn_ctx.domain_ctx.heavy_tensors = ShmTensorStore(allocator=allocator, prefix=f"agent_{agent_id}")
+        ensure_heavy_tensors_initialized(snn_ctx)
+        domain = DomainContext(agent_id=agent_id)
+        domain.snn_context = snn_ctx
+        self.ctx = SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+        self.snn_ctx = snn_ctx
+        self.steps = 0
+
+    def step(self, env_adapter):
+        if self.steps == self.crash_at_step:
+            # Cấp segment mới trong worker rồi chết bất thường
+            self.snn_ctx.domain_ctx.heavy_tensors['scratch'] = np.ones(64, dtype=np.float32)
+            os._exit(1)
+        self.ctx.domain_ctx.current_observation = np.asarray(env_adapter.get_observation(self.agent_id))
+        np.random.seed(1000 * self.agent_id + self.steps)
+        process_snn_cycle(self.ctx)
+        self.steps += 1
+        return int(np.argmax(self.snn_ctx.domain_ctx.heavy_tensors['potentials'][:4]))
+
+    def observe_reward_and_learn(self, reward, next_obs):
+        self.ctx.domain_ctx.td_error = float(reward)
+
+    def export_shard_state(self):
+        snn_domain = self.snn_ctx.domain_ctx
+        return pickle.dumps({
+            'snn_domain': {k: v for k, v in vars(snn_domain).items()
+                           if not k.startswith('_') and k != 'heavy_tensors'},
+            'heavy_tensors': export_tensor_manifest(snn_domain.heavy_tensors),
+            'steps': self.steps,
+            'td_error': self.ctx.domain_ctx.td_error,
+        })
+
+    def import_shard_state(self, blob):
+        state = pickle.loads(blob)
+        snn_domain = self.snn_ctx.domain_ctx
+        adopt_tensor_manifest(snn_domain.heavy_tensors, state['heavy_tensors'])
+        for k, v in state['snn_domain'].items():
+            setattr(snn_domain, k, v)
+        self.steps = state['steps']
+        self.ctx.domain_ctx.td_error = state['td_error']
+
+
+def _allocator():
+    from theus.context import HeavyZoneAllocator
+    return HeavyZoneAllocator()
+
+
+def _drive(agents, steps, pool=None):
+    rng = np.random.RandomState(0)
+    actions = []
+    for _ in range(steps):
+        obs = [rng.rand(16) for _ in agents]
+        if pool is not None:
+            acts = pool.step(obs)
+            pool.learn([(float(r), o) for r, o in zip(rng.randn(len(agents)), obs)])
+        else:
+            acts = [a.step(_Feed(obs)) for a in agents]
+            for a, r, o in zip(agents, rng.randn(len(agents)), obs):
+                a.observe_reward_and_learn(float(r), o)
+        actions.append(acts)
+    return actions
+
+
+class _Feed:
+    def __init__(self, obs):
+        self.obs = obs
+
+    def get_observation(self, agent_id):
+        return self.obs[agent_id]
+
+
+def test_sharded_matches_in_process():
+    print("=" * 60)
+    print("Test: Sharded pool == in-process execution")
+    print("=" * 60)
+    if not fork_available():
+        print("  ⚠️ fork unavailable, skipping")
+        return
+
+    allocator = _allocator()
+    reference = [_SNNWorkloadAgent(i, None) for i in range(4)]
+    sharded = [_SNNWorkloadAgent(i, allocator) for i in range(4)]
+
+    ref_actions = _drive(reference, 5)
+    pool = ShardedAgentPool(sharded, num_workers=2, allocator=allocator).start()
+    shard_actions = _drive(sharded, 5, pool)
+
+    # Zero-copy: parent thấy tensors do worker ghi trước khi sync
+    t0 = sharded[0].snn_ctx.domain_ctx.heavy_tensors
+    assert np.array_equal(t0['potentials'], reference[0].snn_ctx.domain_ctx.heavy_tensors['potentials'])
+    assert sharded[0].snn_ctx.domain_ctx.current_time == 0  # object state chưa sync
+
+    pool.close(sync=True)
+    assert shard_actions == ref_actions
+    for ref, agent in zip(reference, sharded):
+        r_dom, s_dom = ref.snn_ctx.domain_ctx, agent.snn_ctx.domain_ctx
+        assert s_dom.current_time == r_dom.current_time and agent.steps == 5
+        assert np.array_equal(s_dom.synapses.weights, r_dom.synapses.weights)
+        assert np.array_equal(s_dom.heavy_tensors['thresholds'], r_dom.heavy_tensors['thresholds'])
+    print(f"  Actions (last step): {shard_actions[-1]}")
+    allocator.cleanup()
+    print("✅ Sharded execution verified!")
+
+
+def test_worker_crash_teardown():
+    print("=" * 60)
+    print("Test: Worker crash → teardown + SHM cleanup")
+    print("=" * 60)
+    if not fork_available() or not os.path.isdir(SHM_DIR):
+        print("  ⚠️ fork or /dev/shm unavailable, skipping")
+        return
+
+    allocator = _allocator()
+    agents = [_SNNWorkloadAgent(i, allocator, crash_at_step=2 if i == 3 else None) for i in range(4)]
+    pool = ShardedAgentPool(agents, num_workers=2, allocator=allocator).start()
+    pids = [proc.pid for proc, _, _ in pool._workers]
+
+    try:
+        _drive(agents, 4, pool)
+        raise AssertionError("expected ShardWorkerError")
+    except ShardWorkerError as e:
+        print(f"  Caught: {str(e).splitlines()[0]}")
+
+    assert not pool.started
+    leaked = [n for n in os.listdir(SHM_DIR)
+              if any(n.startswith(f"theus:{allocator._session_id}:{pid}:") for pid in pids)]
+    assert leaked == [], leaked
+    # Parent giữ state đầu episode (object state không bị worker sửa)
+    assert all(a.steps == 0 and a.snn_ctx.domain_ctx.current_time == 0 for a in agents)
+    allocator.cleanup()
+    print("✅ Crash teardown verified!")
+
+
+def _coordinator(process_workers, num_agents=4):
+    """Coordinator thật (RLAgent + TheusEngine); exploration 0 → actions deterministic."""
+    import torch
+    from src.coordination.multi_agent_coordinator import MultiAgentCoordinator
+    from src.core.snn_context_theus import SNNGlobalContext
+
+    np.random.seed(0)
+    torch.manual_seed(0)
+    global_ctx = GlobalContext(
+        initial_needs=[0.5, 0.5], initial_emotions=[0.0, 0.0], total_episodes=1,
+        max_steps=8, seed=42, switch_locations={}, initial_exploration_rate=0.0,
+        process_workers=process_workers
+    )
+    snn_global_ctx = SNNGlobalContext(num_neurons=30, vector_dim=16, connectivity=0.15, seed=42)
+    return MultiAgentCoordinator(num_agents=num_agents, global_ctx=global_ctx, snn_global_ctx=snn_global_ctx)
+
+
+def _grid_world(num_agents=4):
+    from src.adapters.environment_adapter import EnvironmentAdapter
+    from environment import GridWorld
+
+    env = GridWorld({
+        "initial_needs": [0.5, 0.5], "initial_emotions": [0.0, 0.0], "switch_locations": {},
+        "environment_config": {
+            "grid_size": 6, "max_steps_per_episode": 8, "num_agents": num_agents,
+            "start_positions": [[0, i] for i in range(num_agents)]
+        }
+    })
+    return env, EnvironmentAdapter(env)
+
+
+def test_sharded_episode_metrics_match_threads():
+    print("=" * 60)
+    print("Test: Sharded episode metrics (total_reward) == thread pool")
+    print("=" * 60)
+    if not fork_available():
+        pytest.skip("fork unavailable")
+    pytest.importorskip("theus_core")
+
+    results = []
+    for workers in (0, 2):
+        coordinator = _coordinator(workers)
+        env, adapter = _grid_world()
+        metrics = coordinator.run_episode(env, adapter)
+        results.append((metrics, [a.episode_metrics['total_reward'] for a in coordinator.agents],
+                        coordinator.population_performance[-1]))
+        coordinator.cleanup()
+
+    (ref_metrics, ref_rewards, ref_avg), (shard_metrics, shard_rewards, shard_avg) = results
+    assert np.allclose(shard_rewards, ref_rewards), (shard_rewards, ref_rewards)
+    assert np.allclose(shard_metrics['agent_rewards'], ref_metrics['agent_rewards'])
+    assert np.isclose(shard_avg, ref_avg)
+    assert shard_metrics['agent_success'] == ref_metrics['agent_success']
+    print(f"  Agent rewards: {shard_rewards}")
+    print("✅ Sharded episode metrics verified!")
+
+
+def test_worker_crash_rebuilds_agent_tensors():
+    print("=" * 60)
+    print("Test: Worker crash (RLAgent) → SHM tensors build lại từ parent state")
+    print("=" * 60)
+    if not fork_available():
+        pytest.skip("fork unavailable")
+    pytest.importorskip("theus_core")
+
+    coordinator = _coordinator(process_workers=2)
+    env, adapter = _grid_world()
+    crashing = coordinator.agents[3]
+    original_step = crashing.step
+    calls = []
+
+    def crash_on_third_step(env_adapter):
+        if len(calls) == 2:
+            os._exit(1)
+        calls.append(1)
+        return original_step(env_adapter)
+
+    crashing.step = crash_on_third_step
+    coordinator.run_episode(env, adapter)  # Parallel Thinking lỗi → episode dừng sớm
+
+    for agent in coordinator.agents:
+        snn_domain = agent.snn_ctx.domain_ctx
+        t, store = snn_domain.heavy_tensors, snn_domain.synapses
+        # Parent giữ state đầu episode; tensors khớp lại objects/store
+        assert snn_domain.current_time == 0
+        assert t['connectome_version'] == store.version
+        assert np.array_equal(t['potentials'], np.array([n.potential for n in snn_domain.neurons], dtype=np.float32))
+        assert np.array_equal(t['last_fire_times'], np.array([n.last_fire_time for n in snn_domain.neurons]))
+        live = store.live_slots()
+        assert np.allclose(t['weights'][store.pre_ids[live], store.post_ids[live]], store.weights[live])
+        assert not t['spike_buffer'].any()
+    coordinator.cleanup()
+    print("✅ Crash recovery verified!")
+
+
+class _EditOnlyEngine:
+    """RLAgent.import_shard_state chỉ cần engine.edit() (không commit lên Core)."""
+
+    def edit(self):
+        return contextlib.nullcontext()
+
+
+class _RLShardAgent(_SNNWorkloadAgent):
+    """Workload agent dùng export/import/discard_shard_state thật của RLAgent."""
+
+    _SHARD_SKIP_FIELDS = RLAgent._SHARD_SKIP_FIELDS
+    _SHARD_WORKER_METRICS = RLAgent._SHARD_WORKER_METRICS
+    export_shard_state = RLAgent.export_shard_state
+    import_shard_state = RLAgent.import_shard_state
+    discard_shard_state = RLAgent.discard_shard_state
+
+    def __init__(self, agent_id, allocator, crash_at_step=None):
+        super().__init__(agent_id, allocator, crash_at_step)
+        self.domain_ctx = self.ctx.domain_ctx
+        self.engine = _EditOnlyEngine()
+        self.episode_metrics = {'total_reward': 0.0, 'intrinsic_reward_total': 0.0,
+                                'extrinsic_reward_total': 0.0, 'steps': 0,
+                                'success': False, 'steps_to_goal': None}
+
+    def step(self, env_adapter):
+        action = super().step(env_adapter)
+        self.episode_metrics['steps'] += 1
+        return action
+
+    def observe_reward_and_learn(self, reward, next_obs):
+        super().observe_reward_and_learn(reward, next_obs)
+        self.episode_metrics['total_reward'] += reward
+        self.episode_metrics['extrinsic_reward_total'] += reward
+
+
+def _count_imports(agent, imports):
+    original = agent.import_shard_state
+
+    def counted(blob):
+        imports.append(agent.agent_id)
+        original(blob)
+    agent.import_shard_state = counted
+
+
+def test_sync_back_merges_worker_state():
+    print("=" * 60)
+    print("Test: sync_back → metrics/state của worker về parent trước khi đóng pool")
+    print("=" * 60)
+    if not fork_available():
+        pytest.skip("fork unavailable")
+
+    allocator = _allocator()
+    reference = [_RLShardAgent(i, None) for i in range(4)]
+    agents = [_RLShardAgent(i, allocator) for i in range(4)]
+    _drive(reference, 4)
+    pool = ShardedAgentPool(agents, num_workers=2, allocator=allocator).start()
+    _drive(agents, 4, pool)
+
+    # Phase Acting ở parent ghi success/steps_to_goal trong lúc worker giữ reward
+    agents[1].episode_metrics.update(success=True, steps_to_goal=3)
+    imports = []
+    for agent in agents:
+        _count_imports(agent, imports)
+    pool.sync_back()  # coordinator gọi trước _collect_population_metrics
+
+    assert sorted(imports) == [0, 1, 2, 3]
+    for ref, agent in zip(reference, agents):
+        assert agent.episode_metrics['total_reward'] == ref.episode_metrics['total_reward'] != 0.0
+        assert agent.episode_metrics['steps'] == ref.episode_metrics['steps'] == 4
+        assert agent.snn_ctx.domain_ctx.current_time == ref.snn_ctx.domain_ctx.current_time
+        assert agent.domain_ctx.td_error == ref.domain_ctx.td_error
+    # Merge, không ghi đè các key do parent sở hữu
+    assert agents[1].episode_metrics['success'] is True and agents[1].episode_metrics['steps_to_goal'] == 3
+
+    pool.close(sync=True)
+    assert len(imports) == 4  # Không có step/learn sau sync_back → không import lại
+    allocator.cleanup()
+    print(f"  Rewards: {[round(a.episode_metrics['total_reward'], 3) for a in agents]}")
+    print("✅ sync_back merge verified!")
+
+
+def test_worker_crash_discards_shard_tensors():
+    print("=" * 60)
+    print("Test: Worker crash → discard_shard_state build lại tensors từ parent state")
+    print("=" * 60)
+    if not fork_available():
+        pytest.skip("fork unavailable")
+
+    allocator = _allocator()
+    agents = [_RLShardAgent(i, allocator, crash_at_step=2 if i == 3 else None) for i in range(4)]
+    pool = ShardedAgentPool(agents, num_workers=2, allocator=allocator).start()
+    with pytest.raises(ShardWorkerError):
+        _drive(agents, 4, pool)
+
+    for agent in agents:
+        snn_domain = agent.snn_ctx.domain_ctx
+        t, store = snn_domain.heavy_tensors, snn_domain.synapses
+        # Worker đã sửa SHM tensors in-place; parent objects vẫn ở đầu episode
+        assert snn_domain.current_time == 0 and agent.episode_metrics['steps'] == 0
+        assert t['connectome_version'] == store.version
+        assert np.array_equal(t['potentials'], np.array([n.potential for n in snn_domain.neurons], dtype=np.float32))
+        live = store.live_slots()
+        assert np.allclose(t['weights'][store.pre_ids[live], store.post_ids[live]], store.weights[live])
+        assert not t['spike_buffer'].any() and not t['firing_traces'].any()
+    allocator.cleanup()
+    print("✅ Crash discard verified!")
+
+
+def _grow_store_in_worker(conn, store):
+    for _ in range(5):
+        store.add_arrays([0], [1])
+    conn.send(pickle.dumps(store))
+    conn.close()
+
+
+def test_imported_store_versions_not_reissued():
+    print("=" * 60)
+    print("Test: Connectome version từ worker không bị cấp lại ở episode sau")
+    print("=" * 60)
+    if not fork_available():
+        pytest.skip("fork unavailable")
+
+    fork = mp.get_context('fork')
+    store = ConnectomeStore()
+    versions = []
+    for _ in range(2):  # Mỗi episode fork worker mới từ parent
+        parent_conn, child_conn = fork.Pipe()
+        proc = fork.Process(target=_grow_store_in_worker, args=(child_conn, store))
+        proc.start()
+        child_conn.close()
+        store = pickle.loads(parent_conn.recv())
+        proc.join()
+        versions.append(store.version)
+
+    assert versions[1] > versions[0], versions
+    assert ConnectomeStore().version > versions[1]
+    print(f"  Imported versions: {versions}")
+    print("✅ Version counter verified!")
+
+
+if __name__ == '__main__':
+    test_sharded_matches_in_process()
+    test_worker_crash_teardown()
+    test_sharded_episode_metrics_match_threads()
+    test_worker_crash_rebuilds_agent_tensors()
+    test_sync_back_merges_worker_state()
+    test_worker_crash_discards_shard_tensors()
+    test_imported_store_versions_not_reissued()
@@ -0,0 +1,119 @@
+"""
+Test Prototype Similarity Cache
+===============================
+_integrate_impl dùng cache ReLU(P·Pᵀ) (dense (N, N) | sparse (S,)) phải cho
+kết quả như công thức cũ (matmul mỗi tick), và cache chỉ tính lại khi
+prototypes hoặc connectome đổi.
+"""
+import sys
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.snn_context_theus import (
+    add_synapses,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    mark_prototypes_changed,
+    prototype_similarity,
+    sync_to_heavy_tensors,
+)
+from src.processes.snn_core_theus import _integrate_impl
+
+
+def _make_ctx(backend):
+    snn_ctx = create_snn_context_theus(num_neurons=80, connectivity=0.15, seed=3, weight_backend=backend)
+    ensure_heavy_tensors_initialized(snn_ctx)
+    return snn_ctx
+
+
+def _reference_integrate(snn_ctx, spikes):
+    """Công thức cũ: similarity tính lại từ prototypes mỗi tick."""
+    t = snn_ctx.domain_ctx.heavy_tensors
+    store = snn_ctx.domain_ctx.synapses
+    tau = float(snn_ctx.global_ctx.tau_decay)
+    pots = t['potentials'] * tau
+    p_vecs = t['potential_vectors'] * tau
+    protos = t['prototypes']
+    N = len(pots)
+    live = store.live_slots()
+    pre, post, w = store.pre_ids[live], store.post_ids[live], store.weights[live]
+    firing = np.isin(pre, spikes)
+    pre, post, w = pre[firing], post[firing], w[firing]
+    eff = w * np.maximum(np.einsum('ed,ed->e', protos[pre], protos[post]), 0)
+    pots += np.bincount(post, weights=eff, minlength=N)
+    np.add.at(p_vecs, post, eff[:, None] * protos[pre])
+    return pots, p_vecs
+
+
+def _fire(snn_ctx, spikes):
+    t = snn_ctx.domain_ctx.heavy_tensors
+    t_idx = int(snn_ctx.domain_ctx.current_time) % t['spike_buffer'].shape[0]
+    t['spike_buffer'][t_idx, spikes] = 1
+
+
+def test_cached_integrate_matches_reference():
+    print("=" * 60)
+    print("Test: Cached similarity integrate == per-tick matmul")
+    print("=" * 60)
+
+    for backend in ('dense', 'sparse'):
+        snn_ctx = _make_ctx(backend)
+        spikes = np.array([1, 7, 19, 42, 63])
+        expected_pots, expected_vecs = _reference_integrate(snn_ctx, spikes)
+        _fire(snn_ctx, spikes)
+        _integrate_impl(snn_ctx, sync=False)
+
+        t = snn_ctx.domain_ctx.heavy_tensors
+        assert np.allclose(t['potentials'], expected_pots, atol=1e-5)
+        assert np.allclose(t['potential_vectors'], expected_vecs, atol=1e-5)
+        print(f"  {backend}: similarity shape {t['similarity'].shape}")
+
+    print("✅ Cached integrate verified!")
+
+
+def test_similarity_cache_invalidation():
+    print("=" * 60)
+    print("Test: Similarity cache versioned invalidation")
+    print("=" * 60)
+
+    # Dense: sync không đổi prototypes → giữ cache
+    snn_ctx = _make_ctx('dense')
+    t = snn_ctx.domain_ctx.heavy_tensors
+    sim = prototype_similarity(t)
+    version = t['prototypes_version']
+    sync_to_heavy_tensors(snn_ctx)
+    assert t['prototypes_version'] == version
+    assert prototype_similarity(t) is sim
+
+    # Prototype đổi trên object → sync tăng version → tính lại
+    neuron = snn_ctx.domain_ctx.neurons[5]
+    neuron.prototype_vector = -np.asarray(neuron.prototype_vector)
+    sync_to_heavy_tensors(snn_ctx)
+    assert t['prototypes_version'] == version + 1
+    protos = t['prototypes']
+    assert np.allclose(prototype_similarity(t), np.maximum(protos @ protos.T, 0))
+
+    # Sửa tại chỗ + mark_prototypes_changed
+    protos[0] = protos[1]
+    mark_prototypes_changed(t)
+    assert np.allclose(prototype_similarity(t)[0], np.maximum(protos @ protos[1], 0))
+
+    # Sparse: connectome đổi → cache (S,) theo slots mới
+    snn_ctx = _make_ctx('sparse')
+    domain = snn_ctx.domain_ctx
+    t = domain.heavy_tensors
+    prototype_similarity(t, domain.synapses)
+    slots = add_synapses(domain, [2, 3], [4, 5], weight=[0.5, 0.5])
+    sim = prototype_similarity(t, domain.synapses)
+    assert len(sim) == domain.synapses.num_slots
+    protos = t['prototypes']
+    assert np.allclose(sim[slots], np.maximum([protos[2] @ protos[4], protos[3] @ protos[5]], 0))
+
+    print("✅ Cache invalidation verified!")
+
+
+if __name__ == '__main__':
+    test_cached_integrate_matches_reference()
+    test_similarity_cache_invalidation()
@@ -0,0 +1,152 @@
+"""
+Test Fused Sleep Engine
+=======================
+DreamTickKernel / run_sleep_cycle: stimulus tới tensor potentials, thời gian
+tiến mỗi dream step, objects sync một lần khi thức dậy, REVOKED synapses
+không học, dream metrics được ghi, song song == tuần tự. Engine là opt-in
+(use_fused_sleep_engine): mặc định execute_dream_step vẫn gọi dream_step.
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.context import GlobalContext, DomainContext, SystemContext
+from src.core.snn_context_theus import COMMIT_STATE_REVOKED, SNNGlobalContext, create_snn_context_theus
+from src.orchestrator.processes.p_sleep_cycle import execute_dream_step
+from src.orchestrator.runtime_registry import clear_runner, register_runner
+from src.processes.snn_sleep_engine_theus import run_sleep_cycle, sleep_agent
+
+
+def _make_ctx(seed=4, backend='sparse'):
+    np.random.seed(seed)
+    snn_ctx = create_snn_context_theus(
+        num_neurons=80, connectivity=0.15, seed=seed, weight_backend=backend
+    )
+    snn_ctx.global_ctx.dream_noise_level = 0.3
+    domain = DomainContext(agent_id=seed)
+    domain.snn_context = snn_ctx
+    domain.td_error = 1.0
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
+
+
+def test_sleep_advances_time_and_syncs_at_wake():
+    print("=" * 60)
+    print("Test: Dream stimulus → spikes, time advances, objects synced")
+    print("=" * 60)
+
+    ctx = _make_ctx()
+    snn_domain = ctx.domain_ctx.snn_context.domain_ctx
+    start = snn_domain.current_time
+    sleep_agent(ctx, 40, seed=0)
+
+    assert snn_domain.current_time == start + 40
+    assert snn_domain.metrics['episode_total_spikes'] > 0
+    assert sum(n.fire_count for n in snn_domain.neurons) == snn_domain.metrics['episode_total_spikes']
+
+    pots = snn_domain.heavy_tensors['potentials']
+    assert [n.potential for n in snn_domain.neurons] == [float(p) for p in pots]
+
+    metrics = snn_domain.metrics
+    assert metrics['dream_coherence_state'] in ('COHERENT', 'SILENCE', 'NIGHTMARE')
+    assert sum(metrics[f'dream_{s}_steps'] for s in ('coherent', 'silence', 'nightmare')) == 40
+    assert ctx.domain_ctx.intrinsic_reward == metrics['dream_reward']
+    print(f"  spikes={metrics['episode_total_spikes']}, last={metrics['dream_coherence_state']}")
+
+    print("✅ Sleep cycle verified!")
+
+
+def test_revoked_synapses_do_not_learn():
+    print("=" * 60)
+    print("Test: REVOKED synapses giữ nguyên weight trong giấc ngủ")
+    print("=" * 60)
+
+    ctx = _make_ctx()
+    snn_ctx = ctx.domain_ctx.snn_context
+    snn_ctx.global_ctx.weight_decay = 1.0
+    store = snn_ctx.domain_ctx.synapses
+    revoked = store.live_slots()[:30]
+    store.column('commit_state')[revoked] = COMMIT_STATE_REVOKED
+    # Eligibility có sẵn (không có spike_queue entries thì dream không tạo trace mới)
+    store.column('trace_fast')[:] = 1.0
+
+    sleep_agent(ctx, 1, seed=0)  # init tensors
+    weights = snn_ctx.domain_ctx.heavy_tensors['weights']
+    before = weights.copy()
+    sleep_agent(ctx, 30, seed=1)
+
+    assert np.array_equal(weights[revoked], before[revoked])
+    assert not np.array_equal(weights, before)
+
+    print("✅ Commit states respected!")
+
+
+def test_parallel_sleep_matches_serial():
+    print("=" * 60)
+    print("Test: run_sleep_cycle song song == tuần tự")
+    print("=" * 60)
+
+    for backend in ('dense', 'sparse'):
+        serial = [_make_ctx(seed, backend) for seed in range(1, 5)]
+        parallel = [_make_ctx(seed, backend) for seed in range(1, 5)]
+
+        np.random.seed(11)
+        run_sleep_cycle(serial, 25)
+        np.random.seed(11)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            run_sleep_cycle(parallel, 25, executor=executor)
+
+        for s_ctx, p_ctx in zip(serial, parallel):
+            s_dom = s_ctx.domain_ctx.snn_context.domain_ctx
+            p_dom = p_ctx.domain_ctx.snn_context.domain_ctx
+            for key in ('potentials', 'thresholds', 'last_fire_times', 'weights'):
+                assert np.array_equal(s_dom.heavy_tensors[key], p_dom.heavy_tensors[key]), (backend, key)
+            assert s_dom.metrics == p_dom.metrics
+        print(f"  {backend}: OK")
+
+    print("✅ Parallel sleep verified!")
+
+
+class _DreamCoordinator:
+    """Coordinator test double: ghi lại dream_step / sleep được gọi."""
+
+    def __init__(self, snn_global_ctx):
+        self.snn_global_ctx = snn_global_ctx
+        self.dreamed, self.slept = [], []
+        self.agents = [SimpleNamespace(dream_step=self.dreamed.append)]
+
+    def sleep(self, steps):
+        self.slept.append(steps)
+
+
+def test_fused_sleep_engine_is_opt_in():
+    print("=" * 60)
+    print("Test: execute_dream_step dùng dream_step trừ khi bật fused engine")
+    print("=" * 60)
+
+    assert SNNGlobalContext().use_fused_sleep_engine is False
+    domain = SimpleNamespace(active_experiment_idx=0, experiments=[{'name': '_sleep_test'}],
+                             sig_sleep_step=3, sig_sleep_duration=10)
+    coordinator = _DreamCoordinator(SNNGlobalContext())
+    register_runner('_sleep_test', SimpleNamespace(coordinator=coordinator))
+    try:
+        assert execute_dream_step(SimpleNamespace(domain=domain)) == {}
+        assert coordinator.dreamed == [3] and coordinator.slept == []
+
+        coordinator.snn_global_ctx.use_fused_sleep_engine = True
+        delta = execute_dream_step(SimpleNamespace(domain=domain))
+        assert coordinator.slept == [7] and coordinator.dreamed == [3]
+        assert delta == {'domain.sig_sleep_step': 9}
+    finally:
+        clear_runner('_sleep_test')
+    print("✅ Fused sleep engine opt-in verified!")
+
+
+if __name__ == '__main__':
+    test_sleep_advances_time_and_syncs_at_wake()
+    test_revoked_synapses_do_not_learn()
+    test_parallel_sleep_matches_serial()
+    test_fused_sleep_engine_is_opt_in()
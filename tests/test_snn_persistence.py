@@ -0,0 +1,153 @@
+"""
+Test SNN Persistence (Binary Checkpoint)
+========================================
+Round-trip checkpoint binary (memmap), load JSON cũ và converter JSON → binary.
+"""
+import sys
+import json
+import os
+import tempfile
+
+sys.path.append('.')
+
+import numpy as np
+
+from src.core.snn_context_theus import create_snn_context_theus, remove_synapses
+from src.utils.snn_persistence import (
+    save_snn_agent,
+    load_snn_agent,
+    load_all_agents,
+    open_snn_checkpoint,
+    convert_checkpoint_dir,
+    agent_checkpoint_path
+)
+
+
+def _make_trained_context(seed=4):
+    np.random.seed(seed)
+    snn_ctx = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=seed)
+    domain = snn_ctx.domain_ctx
+    rng = np.random.RandomState(seed)
+    store = domain.synapses
+    store['weight'][:] = rng.rand(store.num_slots)
+    store['commit_state'][:] = rng.randint(0, 2, store.num_slots)
+    store['fitness'][:] = rng.rand(store.num_slots)
+    for n in domain.neurons:
+        n.threshold = float(rng.uniform(0.5, 1.5))
+        n.fire_count = int(rng.randint(0, 50))
+        n.last_fire_time = int(rng.randint(0, 100))
+    domain.current_time = 321
+    return snn_ctx
+
+
+def _connectome(snn_ctx):
+    store = snn_ctx.domain_ctx.synapses
+    live = store.live_slots()
+    return sorted(zip(store['synapse_id'][live].tolist(), store.pre_ids[live].tolist(),
+                      store.post_ids[live].tolist(), store.weights[live].tolist(),
+                      store['commit_state'][live].tolist()))
+
+
+def _legacy_json_state(snn_ctx):
+    """State đúng như format JSON cũ của save_snn_agent."""
+    domain = snn_ctx.domain_ctx
+    return {
+        'agent_id': 0,
+        'metadata': {
+            'num_neurons': len(domain.neurons),
+            'num_synapses': len(domain.synapses),
+            'vector_dim': snn_ctx.global_ctx.vector_dim,
+            'current_time': int(domain.current_time),
+        },
+        'neurons': [{
+            'neuron_id': n.neuron_id,
+            'prototype_vector': n.prototype_vector.tolist(),
+            'threshold': float(n.threshold),
+            'fire_count': int(n.fire_count),
+            'last_fire_time': int(n.last_fire_time),
+        } for n in domain.neurons],
+        'synapses': [{
+            'synapse_id': s.synapse_id,
+            'pre_neuron_id': s.pre_neuron_id,
+            'post_neuron_id': s.post_neuron_id,
+            'weight': float(s.weight),
+            'commit_state': int(s.commit_state),
+            'consecutive_correct': int(s.consecutive_correct),
+            'consecutive_wrong': int(s.consecutive_wrong),
+            'fitness': float(s.fitness),
+        } for s in domain.synapses],
+        'memory': {'q_table': {'s0': {'0': 1.5}}, 'beliefs': {'sw': True}, 'short_term': []}
+    }
+
+
+def test_binary_roundtrip():
+    print("=" * 60)
+    print("Test: Binary checkpoint round-trip (memmap)")
+    print("=" * 60)
+
+    snn_ctx = _make_trained_context()
+    # Tombstones không được ghi vào checkpoint
+    remove_synapses(snn_ctx.domain_ctx, [0, 3, 5])
+    expected = _connectome(snn_ctx)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_snn_agent(snn_ctx, None, 0, tmp)
+        assert os.path.isdir(path) and agent_checkpoint_path(tmp, 0) == path
+
+        ckpt = open_snn_checkpoint(path)
+        assert isinstance(ckpt.synapses['weight'], np.memmap)
+        assert ckpt.num_synapses == len(expected)
+        assert ckpt.metadata['current_time'] == 321
+
+        np.random.seed(99)
+        target = create_snn_context_theus(num_neurons=40, connectivity=0.05, seed=99)
+        assert load_all_agents([target], tmp) == 1
+
+    assert _connectome(target) == expected
+    src_n, dst_n = snn_ctx.domain_ctx.neurons, target.domain_ctx.neurons
+    assert all(a.fire_count == b.fire_count and a.last_fire_time == b.last_fire_time for a, b in zip(src_n, dst_n))
+    assert np.allclose([n.threshold for n in src_n], [n.threshold for n in dst_n], atol=1e-6)
+    assert np.allclose(src_n[7].prototype_vector, dst_n[7].prototype_vector, atol=1e-6)
+    assert target.domain_ctx.current_time == 321
+    print(f"  Synapses restored: {len(expected)}")
+    print("✅ Binary round-trip verified!")
+
+
+def test_json_conversion():
+    print("=" * 60)
+    print("Test: Legacy JSON load + JSON → binary converter")
+    print("=" * 60)
+
+    snn_ctx = _make_trained_context(seed=8)
+    expected = _connectome(snn_ctx)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'agent_0_snn.json')
+        with open(json_path, 'w') as f:
+            json.dump(_legacy_json_state(snn_ctx), f)
+
+        # Chưa convert → loader fallback về JSON
+        assert agent_checkpoint_path(tmp, 0) == json_path
+        np.random.seed(1)
+        from_json = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=1)
+        assert load_snn_agent(from_json, json_path)
+
+        converted = convert_checkpoint_dir(tmp)
+        assert converted == [os.path.join(tmp, 'agent_0_snn')]
+        assert agent_checkpoint_path(tmp, 0) == converted[0]
+        ckpt = open_snn_checkpoint(converted[0])
+        assert ckpt.q_table() == {'s0': {'0': 1.5}} and ckpt.memory['beliefs'] == {'sw': True}
+
+        np.random.seed(1)
+        from_bin = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=1)
+        assert load_snn_agent(from_bin, converted[0])
+
+    assert _connectome(from_json) == expected
+    assert _connectome(from_bin) == expected
+    print(f"  Converted synapses: {len(expected)}")
+    print("✅ JSON conversion verified!")
+
+
+if __name__ == '__main__':
+    test_binary_roundtrip()
+    test_json_conversion()
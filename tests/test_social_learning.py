@@ -1,14 +1,42 @@
 """
 Test Social Learning (Process Based)
 =====================================
-Test social learning process (Pure POP).
+Test social learning process (Pure POP). Với social_transfer_quarantine,
+transfer vào quarantine pool và connectome chỉ nhận synapses được
+process_quarantine_validation promote.
 """
 import sys
 
 sys.path.append('.')
 
-from src.core.snn_context_theus import SNNGlobalContext, SNNSystemContext, SNNDomainContext, SynapseState
-from src.processes.snn_social_learning_theus import process_social_learning_protocol
+import numpy as np
+
+from src.core.snn_context_theus import (
+    SNNGlobalContext,
+    SNNSystemContext,
+    SNNDomainContext,
+    SynapseState,
+    create_snn_context_theus,
+    ensure_heavy_tensors_initialized,
+    remove_synapses
+)
+from src.core.context import DomainContext, GlobalContext, SystemContext
+from src.processes.snn_social_learning_theus import (
+    process_social_learning_protocol,
+    process_social_learning_with_rankings,
+    _extract_top_synapses,
+    _inject_synapses
+)
+from src.processes.snn_social_quarantine_theus import process_quarantine_validation
+
+
+def _rl_ctx(snn_ctx, reward=0.0):
+    """RL context bọc snn_ctx cho quarantine validation."""
+    domain = DomainContext(agent_id=snn_ctx.domain_ctx.agent_id)
+    domain.snn_context = snn_ctx
+    domain.last_reward = {'total': reward}
+    domain.td_error = 0.0
+    return SystemContext(global_ctx=GlobalContext(), domain_ctx=domain)
 
 def test_social_learning_process_logic():
     print("=" * 60)
@@ -69,6 +97,7 @@ def test_social_learning_process_logic():
     print(f"  Agent 1 Final Synapses: {final_count}")
     
     assert final_count == 3, f"Agent 1 should have 3 synapses, got {final_count}"
+    assert len(domain1.shadow_synapses) == 0
     
     # Check injected properties
     # Validating that new synapses are copies of Agent 0's high weight syns
@@ -86,5 +115,121 @@ def test_social_learning_process_logic():
     
     print("\n✅ Social Learning Process Logic verified!")
 
+def test_social_transfer_uses_live_tensor_weights():
+    print("=" * 60)
+    print("Test: Social transfer top-k over live tensor weights")
+    print("=" * 60)
+
+    for backend in ('dense', 'sparse'):
+        elite = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=1, weight_backend=backend)
+        learner = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=2, weight_backend=backend)
+        elite_domain, learner_domain = elite.domain_ctx, learner.domain_ctx
+        elite_domain.agent_id = 3
+        ensure_heavy_tensors_initialized(elite)
+        ensure_heavy_tensors_initialized(learner)
+
+        # STDP chỉ ghi vào tensors: store weights cũ, tensors mới
+        store = elite_domain.synapses
+        live = store.live_slots()
+        hot, dead, tie_a, tie_b = live[5], live[6], live[8], live[9]
+        weights = elite_domain.heavy_tensors['weights']
+        if backend == 'dense':
+            weights[store.pre_ids[hot], store.post_ids[hot]] = -5.0
+            weights[store.pre_ids[tie_a], store.post_ids[tie_a]] = 3.0
+            weights[store.pre_ids[tie_b], store.post_ids[tie_b]] = 3.0
+        else:
+            weights[[hot, tie_a, tie_b]] = [-5.0, 3.0, 3.0]
+        store.weights[dead] = 9.0
+        remove_synapses(elite_domain, [dead])
+
+        records = _extract_top_synapses(elite_domain, 3)
+        assert list(records['weight']) == [-5.0, 3.0, 3.0]
+        assert records['pre'][1] == store.pre_ids[tie_a] and records['post'][1] == store.post_ids[tie_a]
+        assert (records['source_agent_id'] == 3).all()
+
+        before = len(learner_domain.synapses)
+        next_id = learner_domain.synapses.next_synapse_id()
+        assert _inject_synapses(learner_domain, records) == 3
+        learner_store = learner_domain.synapses
+        assert len(learner_store) == before + 3
+        slots = learner_store.live_slots()[-3:]
+        assert list(learner_store.weights[slots]) == [-5.0, 3.0, 3.0]
+        assert list(learner_store.column('synapse_id')[slots]) == [next_id, next_id + 1, next_id + 2]
+        assert (learner_store.column('source_agent_id')[slots] == 3).all()
+        assert learner_domain.heavy_tensors['connectome_version'] == learner_store.version
+        print(f"  {backend}: top-3 weights {records['weight'].tolist()}")
+
+    print("✅ Tensor-native social transfer verified!")
+
+
+def test_quarantined_transfer_promoted_on_validation():
+    print("=" * 60)
+    print("Test: social_transfer_quarantine → pool, validation promotes")
+    print("=" * 60)
+
+    elite = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=1)
+    learner = create_snn_context_theus(num_neurons=40, connectivity=0.2, seed=2)
+    elite.domain_ctx.agent_id = 3
+    ensure_heavy_tensors_initialized(elite)
+    ensure_heavy_tensors_initialized(learner)
+    learner_domain = learner.domain_ctx
+    learner_store, pool = learner_domain.synapses, learner_domain.shadow_synapses
+    before = len(learner_store)
+    next_id = learner_store.next_synapse_id()
+
+    # Option đi qua process → _inject_synapses(quarantine=True)
+    config = learner.global_ctx
+    config.social_transfer_quarantine = True
+    config.social_elite_ratio = config.social_learner_ratio = 0.5
+    config.social_synapses_per_transfer = 3
+    records = _extract_top_synapses(elite.domain_ctx, 3)
+    process_social_learning_with_rankings([elite, learner], [(0, 1.0), (1, 0.0)], config)
+
+    # Transfer vào quarantine pool, không vào connectome
+    assert len(learner_store) == before and len(pool) == 3
+    assert learner_domain.metrics['social_learning_injected'] == 3
+    assert list(pool.weights) == list(records['weight'])
+    assert list(pool.column('synapse_id')) == [next_id, next_id + 1, next_id + 2]
+    assert (pool.column('source_agent_id') == 3).all()
+    assert all(s.synapse_type == "shadow" for s in pool)
+
+    # Hết hạn quarantine → validation promote vào connectome (tensors được vá)
+    config.quarantine_duration = 1
+    config.validation_threshold = 0.0
+    process_quarantine_validation(_rl_ctx(learner))
+    assert len(pool) == 0 and len(learner_store) == before + 3
+    slots = learner_store.live_slots()[-3:]
+    assert list(learner_store.weights[slots]) == list(records['weight'])
+    assert list(learner_store.column('synapse_id')[slots]) == [next_id, next_id + 1, next_id + 2]
+    assert learner_domain.heavy_tensors['connectome_version'] == learner_store.version
+    print("✅ Quarantined transfer promoted!")
+
+
+def test_blacklisted_transfer_never_reaches_connectome():
+    print("=" * 60)
+    print("Test: Social transfer from a failing source is rejected in quarantine")
+    print("=" * 60)
+
+    elite = create_snn_context_theus(num_neurons=30, connectivity=0.2, seed=1)
+    learner = create_snn_context_theus(num_neurons=30, connectivity=0.2, seed=2)
+    elite.domain_ctx.agent_id = 5
+    ensure_heavy_tensors_initialized(elite)
+    ensure_heavy_tensors_initialized(learner)
+    learner.global_ctx.quarantine_duration = 1
+    learner.global_ctx.validation_threshold = 0.0
+
+    before = len(learner.domain_ctx.synapses)
+    _inject_synapses(learner.domain_ctx, _extract_top_synapses(elite.domain_ctx, 4), quarantine=True)
+    process_quarantine_validation(_rl_ctx(learner, reward=-1.0))
+
+    assert len(learner.domain_ctx.synapses) == before
+    assert len(learner.domain_ctx.shadow_synapses) == 0
+    assert learner.domain_ctx.blacklisted_sources == [5]
+    assert learner.domain_ctx.metrics['quarantine_rejected'] == 4
+    print("✅ Blacklisted transfer rejected!")
+
 if __name__ == '__main__':
     test_social_learning_process_logic()
+    test_social_transfer_uses_live_tensor_weights()
+    test_quarantined_transfer_promoted_on_validation()
+    test_blacklisted_transfer_never_reaches_connectome()
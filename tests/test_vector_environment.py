@@ -0,0 +1,150 @@
+"""
+Test Vector Environment
+=======================
+VectorGridWorld (E env độc lập, auto-reset) == E GridWorld chạy riêng, và
+coordinator vector mode chạy E×A agents mỗi tick qua VectorEnvironmentAdapter.
+"""
+import sys
+import random
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('.')
+
+import numpy as np
+
+from environment import GridWorld, VectorGridWorld
+from src.adapters.environment_adapter import VectorEnvironmentAdapter
+from src.coordination.multi_agent_coordinator import MultiAgentCoordinator
+
+ACTIONS = ['up', 'down', 'left', 'right', 'up-left', 'up-right', 'down-left', 'down-right']
+
+
+def _settings(goal, max_steps=30, walls=()):
+    return {
+        'log_level': 'error',
+        'environment_config': {
+            'grid_size': 6, 'num_agents': 2, 'max_steps_per_episode': max_steps,
+            'start_positions': [[0, 0], [5, 0]], 'goal_pos': list(goal),
+            'walls': [list(w) for w in walls],
+            'logical_switches': [{'id': 'A', 'pos': [2, 2]}],
+            'dynamic_walls': [{'id': 'g', 'pos': [[3, 3], [3, 4]]}],
+            'dynamic_wall_rules': [{'id': 'g', 'type': 'toggle', 'inputs': ['A']}],
+        }
+    }
+
+
+LAYOUTS = [_settings((5, 5)), _settings((0, 2), max_steps=12), _settings((4, 1), walls=[(1, 1), (2, 1)])]
+
+
+def test_vector_env_matches_independent_envs():
+    print("=" * 60)
+    print("Test: VectorGridWorld == independent GridWorlds")
+    print("=" * 60)
+
+    venv = VectorGridWorld(LAYOUTS)
+    singles = [GridWorld(s) for s in LAYOUTS]
+    assert venv.num_agents == 6 and venv.locate(4) == (2, 0)
+
+    venv.reset()
+    for env in singles:
+        env.reset()
+    rng = random.Random(3)
+    episodes = np.zeros(3, dtype=int)
+    for tick in range(80):
+        venv.new_step()
+        for env in singles:
+            env.new_step()
+        expected = np.concatenate([env.get_sensor_vectors()[:2] for env in singles])
+        assert np.array_equal(venv.get_sensor_vectors(), expected)
+
+        for g in range(venv.num_agents):
+            e, a = venv.locate(g)
+            action = rng.choice(ACTIONS)
+            assert venv.perform_action(g, action) == singles[e].perform_action(a, action)
+            assert np.array_equal(venv.get_sensor_vector(g), singles[e].get_sensor_vector(a))
+
+        finished = venv.advance()
+        for e, env in enumerate(singles):
+            env.current_step += 1
+            if env.is_done():
+                assert e in finished
+                assert venv.last_episode_steps[e] == env.current_step
+                env.reset()
+                episodes[e] += 1
+        assert not venv.dones().any()  # Auto-reset
+
+    assert np.array_equal(venv.episode_counts, episodes)
+    assert episodes[1] >= 6  # max_steps=12 → nhiều episode trong 80 ticks
+    print(f"  Episodes per env: {episodes.tolist()}")
+    print("✅ Vector env verified!")
+
+
+def test_vector_adapter_reports_env_done():
+    venv = VectorGridWorld.from_settings(_settings((0, 1)), num_envs=2)
+    adapter = VectorEnvironmentAdapter(venv)
+    adapter.reset()
+    _, reward, done, _ = adapter.step(0, 'right')  # Env 0, agent 0 tới goal
+    assert done and reward > 5.0
+    assert not adapter.step(2, 'down')[2]  # Env 1 chưa xong
+    assert venv.episode_success[0, 0] and not venv.episode_success[1].any()
+    print("✅ Vector adapter verified!")
+
+
+class _ScriptedAgent:
+    """Agent giả: action theo script, ghi nhận reset/learn (không cần Theus Core)."""
+
+    def __init__(self, agent_id):
+        self.agent_id = agent_id
+        self.resets = 0
+        self.snn_ctx = types.SimpleNamespace(domain_ctx=types.SimpleNamespace(metrics={}))
+        self.episode_metrics = {}
+
+    def reset(self, observation, full_reset=False):
+        self.resets += 1
+        self.episode_metrics = {'total_reward': 0.0, 'success': False, 'steps_to_goal': None}
+
+    def step(self, env_adapter):
+        env_adapter.get_observation(self.agent_id)  # Perception qua adapter (id toàn cục)
+        return 3 if self.agent_id % 2 == 0 else 0  # right / up
+
+    def observe_reward_and_learn(self, reward, next_obs):
+        self.episode_metrics['total_reward'] += reward
+
+
+def test_coordinator_vector_mode():
+    print("=" * 60)
+    print("Test: Coordinator vector mode (E×A agents per tick)")
+    print("=" * 60)
+
+    venv = VectorGridWorld(LAYOUTS)
+    coordinator = MultiAgentCoordinator.__new__(MultiAgentCoordinator)
+    coordinator.num_agents = venv.num_agents
+    coordinator.agents = [_ScriptedAgent(g) for g in range(venv.num_agents)]
+    coordinator.global_ctx = types.SimpleNamespace(max_steps=30, log_level='error')
+    coordinator._executor = ThreadPoolExecutor(max_workers=2)
+    coordinator._batched_inference = None
+    coordinator._population_kernel = None
+    coordinator._process_workers = 0
+    coordinator._shm_allocator = None
+    coordinator.population_performance = []
+    coordinator.episode_count = 0
+
+    metrics = coordinator.run_episode(venv, VectorEnvironmentAdapter(venv))
+
+    # Env 1 (goal (0,2), agent 0 đi sang phải) xong sớm và được auto-reset
+    assert metrics['num_envs'] == 3 and len(metrics['agent_rewards']) == 6
+    assert metrics['env_success_rate'][1] == 0.5
+    assert metrics['env_episodes_completed'] >= 3
+    assert coordinator.agents[2].resets > coordinator.agents[0].resets
+    assert coordinator.population_performance == [metrics['avg_reward']]
+    coordinator._executor.shutdown()
+    print(f"  ticks={metrics['env_ticks']} episodes={metrics['env_episodes_completed']} "
+          f"success={metrics['env_success_rate']}")
+    print("✅ Coordinator vector mode verified!")
+
+
+if __name__ == '__main__':
+    test_vector_env_matches_independent_envs()
+    test_vector_adapter_reports_env_done()
+    test_coordinator_vector_mode()
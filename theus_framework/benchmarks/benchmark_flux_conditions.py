@@ -0,0 +1,80 @@
+"""
+THEUS v3.4 FLUX CONDITION BENCHMARK
+===================================
+1. WorkflowEngine condition throughput: a `while` loop over a no-op process
+   (conditions are compiled once at load, not re-parsed per iteration).
+2. TheusEngine.execute_workflow with a large domain: the condition context
+   only mirrors the keys the conditions reference (no full domain copy).
+
+Goal: per-iteration cost should not grow with the size of the domain.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+from theus_core import WorkflowEngine
+from theus.engine import TheusEngine
+from theus.contracts import process
+
+ITERATIONS = int(os.environ.get("THEUS_BENCH_ITERS", 2000))
+DOMAIN_SIZES = [10, 1_000, 10_000]
+
+LOOP_YAML = """
+steps:
+  - flux: while
+    condition: "domain['i'] < domain['n'] and domain['i'] % 7 != 100"
+    do:
+      - process: tick
+"""
+
+
+def bench_condition_eval():
+    engine = WorkflowEngine(LOOP_YAML, ITERATIONS * 4, False)
+    ctx = {"domain": {"i": 0, "n": ITERATIONS}}
+
+    def executor(name):
+        ctx["domain"]["i"] += 1
+
+    start = time.perf_counter()
+    engine.execute(ctx, executor)
+    elapsed = time.perf_counter() - start
+    print(f"Condition eval: {ITERATIONS / elapsed:,.0f} iterations/s "
+          f"({elapsed / ITERATIONS * 1e6:.1f} us/iter)")
+
+
+@process(inputs=["domain.i"], outputs=["domain.i"])
+def tick(ctx):
+    ctx.domain.i = ctx.domain.i + 1
+
+
+def bench_execute_workflow(domain_size, iterations):
+    domain = {"i": 0, "n": iterations}
+    domain.update({f"payload_{k}": k for k in range(domain_size)})
+    engine = TheusEngine({"domain": domain}, strict_guards=True)
+    engine.register(tick)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+        f.write(LOOP_YAML)
+        yaml_path = f.name
+    try:
+        start = time.perf_counter()
+        asyncio.run(engine.execute_workflow(yaml_path, max_ops=iterations * 4))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.unlink(yaml_path)
+    return elapsed / iterations * 1e3
+
+
+if __name__ == "__main__":
+    bench_condition_eval()
+    print(f"{'domain size':>12} | {'ms / iteration':>15}")
+    print("-" * 31)
+    for size in DOMAIN_SIZES:
+        ms = bench_execute_workflow(size, iterations=200)
+        print(f"{size:>12} | {ms:>15.3f}")
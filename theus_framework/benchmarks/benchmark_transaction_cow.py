@@ -0,0 +1,92 @@
+"""
+THEUS v3.4 TRANSACTION SNAPSHOT BENCHMARK
+=========================================
+Transaction open + read + commit latency vs state size:
+1. snapshot_mode="deepcopy" (legacy: every accessed zone is deep-copied)
+2. snapshot_mode="cow" (structural sharing: only declared outputs are copied)
+
+Two processes per mode:
+- reader: reads one field, writes nothing (outputs=[])
+- writer: increments domain.counter next to a large untouched payload
+
+Goal: reader latency should stay flat as the state grows in "cow" mode.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+import pathlib
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+from theus.engine import TheusEngine
+from theus.contracts import process
+from theus.context import BaseSystemContext, BaseDomainContext, BaseGlobalContext
+
+SIZES = [1_000, 10_000, 100_000]
+ITERATIONS = int(os.environ.get("THEUS_BENCH_ITERS", 50))
+
+
+@dataclass
+class BenchDomain(BaseDomainContext):
+    counter: int = 0
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BenchSystem(BaseSystemContext):
+    domain: BenchDomain = field(default_factory=BenchDomain)
+    global_ctx: BaseGlobalContext = field(default_factory=BaseGlobalContext)
+
+
+@process(inputs=["domain.counter"], outputs=[])
+def reader(ctx):
+    return ctx.domain.counter
+
+
+@process(inputs=["domain.counter"], outputs=["domain.counter"])
+def writer(ctx):
+    ctx.domain.counter = ctx.domain.counter + 1
+    return None
+
+
+def make_engine(size, mode):
+    payload = {f"k{i}": {"v": i, "tags": [i, i + 1]} for i in range(size)}
+    ctx = BenchSystem(domain=BenchDomain(payload=payload))
+    engine = TheusEngine(ctx, strict_guards=True, snapshot_mode=mode)
+    engine.register(reader)
+    engine.register(writer)
+    return engine
+
+
+async def time_process(engine, func):
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        await engine.execute(func)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    print(f"{'size':>8} | {'mode':>8} | {'reader (ms)':>12} | {'writer (ms)':>12}")
+    print("-" * 50)
+    for size in SIZES:
+        results = {}
+        for mode in ("deepcopy", "cow"):
+            engine = make_engine(size, mode)
+            r_ms = await time_process(engine, reader)
+            w_ms = await time_process(engine, writer)
+            assert engine.state.data["domain"]["counter"] == ITERATIONS
+            results[mode] = (r_ms, w_ms)
+            print(f"{size:>8} | {mode:>8} | {r_ms:>12.3f} | {w_ms:>12.3f}")
+        speedup = results["deepcopy"][0] / max(results["cow"][0], 1e-9)
+        print(f"{'':>8} | {'':>8} | reader speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
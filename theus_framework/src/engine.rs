@@ -119,6 +119,9 @@ impl TheusEngine {
             path_to_shadow: Arc::new(Mutex::new(std::collections::HashMap::new())),
             full_path_map: Arc::new(Mutex::new(std::collections::HashMap::new())),
             shadows_inferred: Arc::new(Mutex::new(false)),
+            write_scope: Arc::new(Mutex::new(None)),
+            partial_shadows: Arc::new(Mutex::new(std::collections::HashSet::new())),
+            shared_objects: Arc::new(Mutex::new(std::collections::HashSet::new())),
         })
 
     }
@@ -376,6 +379,58 @@ pub struct Transaction {
     pub path_to_shadow: Arc<Mutex<std::collections::HashMap<String, PyObject>>>, // root -> shadow (for legacy commit)
     pub full_path_map: Arc<Mutex<std::collections::HashMap<String, PyObject>>>, // full_path -> shadow (for diff merging)
     pub shadows_inferred: Arc<Mutex<bool>>, // [v3.3] Prevent double-inference hangs
+    // [v3.4 CoW] Structural-sharing snapshot mode
+    pub write_scope: Arc<Mutex<Option<Vec<String>>>>, // None = deepcopy every accessed path
+    pub partial_shadows: Arc<Mutex<std::collections::HashSet<usize>>>, // shallow copies (ancestors of write scope)
+    pub shared_objects: Arc<Mutex<std::collections::HashSet<usize>>>, // committed objects handed out read-only
+}
+
+/// [v3.4 CoW] How a path relates to the running process's write scope.
+#[derive(PartialEq, Eq, Clone, Copy, Debug)]
+enum ScopeRelation {
+    /// Not writable: share the committed object (read-only, no copy)
+    Outside,
+    /// Strict ancestor of a writable path: shallow copy, children shadowed lazily
+    Ancestor,
+    /// Writable (or under a writable path): private deep copy
+    Inside,
+}
+
+/// [v3.4 CoW] Normalize a contract/access path: `domain_ctx`/`global_ctx` aliases
+/// and `a[b]` index syntax become the dotted canonical form (`domain.a.b`).
+fn normalize_scope_path(path: &str) -> String {
+    let p = path.replace('[', ".").replace(']', "");
+    for (alias, canonical) in [("domain_ctx", "domain"), ("global_ctx", "global")] {
+        if p == alias {
+            return canonical.to_string();
+        }
+        if let Some(rest) = p.strip_prefix(alias) {
+            if rest.starts_with('.') {
+                return format!("{}{}", canonical, rest);
+            }
+        }
+    }
+    p
+}
+
+fn scope_relation(scope: &[String], path: &str) -> ScopeRelation {
+    let p = normalize_scope_path(path);
+    let mut relation = ScopeRelation::Outside;
+    for rule in scope {
+        // NOTE: Wildcard rules ("domain.*") are widened to their literal prefix.
+        // Conservative: more paths get copied, never fewer.
+        let base = match rule.find('*') {
+            Some(idx) => rule[..idx].trim_end_matches('.'),
+            None => rule.as_str(),
+        };
+        if base.is_empty() || p == base || p.starts_with(&format!("{}.", base)) {
+            return ScopeRelation::Inside;
+        }
+        if base.starts_with(&format!("{}.", p)) {
+            relation = ScopeRelation::Ancestor;
+        }
+    }
+    relation
 }
 
 
@@ -405,6 +460,9 @@ impl Transaction {
             path_to_shadow: Arc::new(Mutex::new(std::collections::HashMap::new())),
             full_path_map: Arc::new(Mutex::new(std::collections::HashMap::new())),
             shadows_inferred: Arc::new(Mutex::new(false)),
+            write_scope: Arc::new(Mutex::new(None)),
+            partial_shadows: Arc::new(Mutex::new(std::collections::HashSet::new())),
+            shared_objects: Arc::new(Mutex::new(std::collections::HashSet::new())),
         })
 
     }
@@ -470,6 +528,42 @@ impl Transaction {
         Ok(())
     }
     
+    /// [v3.4 CoW] Restrict isolation copies to the paths a process may write
+    /// (its `outputs` contract). Paths outside the scope are shared with the
+    /// committed state and handed out read-only; ancestors of writable paths
+    /// are shallow-copied. `None` restores the legacy deepcopy-everything mode.
+    #[pyo3(signature = (paths=None))]
+    pub fn set_write_scope(&self, paths: Option<Vec<String>>) -> PyResult<()> {
+        let normalized: Option<Vec<String>> = paths.map(|ps| ps.iter().map(|p| normalize_scope_path(p)).collect());
+        *self.write_scope.lock().unwrap() = normalized;
+        Ok(())
+    }
+
+    #[getter]
+    fn get_write_scope(&self) -> Option<Vec<String>> {
+        self.write_scope.lock().unwrap().clone()
+    }
+
+    /// [v3.4 CoW] Drop the write scope (e.g. on Admin elevation): subsequent
+    /// accesses are deep-copied again, including previously shared objects.
+    pub fn clear_write_scope(&self) {
+        *self.write_scope.lock().unwrap() = None;
+    }
+
+    /// [v3.4 CoW] Classify an object returned by `get_shadow`:
+    /// 0 = private copy (or untracked), 1 = partial (shallow) shadow,
+    /// 2 = shared committed object (must stay read-only).
+    pub fn shadow_kind(&self, py: Python, obj: PyObject) -> u8 {
+        let ptr = obj.bind(py).as_ptr() as usize;
+        if self.shared_objects.lock().unwrap().contains(&ptr) {
+            return 2;
+        }
+        if self.partial_shadows.lock().unwrap().contains(&ptr) {
+            return 1;
+        }
+        0
+    }
+
     /// Get shadow updates keyed by root path (e.g., 'domain' -> shadow_dict)
     /// This extracts all modified root-level objects for committing to State.
     fn get_shadow_updates(&self, py: Python) -> PyResult<PyObject> {
@@ -715,12 +809,30 @@ impl Transaction {
     pub fn get_shadow(&self, py: Python, val: PyObject, path: Option<String>) -> PyResult<PyObject> {
         let id = val.bind(py).as_ptr() as usize;
 
+        // [v3.4 CoW] Classify path against the write scope (None = legacy deepcopy)
+        let relation = {
+            let scope = self.write_scope.lock().unwrap();
+            match (scope.as_ref(), path.as_ref()) {
+                (Some(rules), Some(p)) => scope_relation(rules, p),
+                _ => ScopeRelation::Inside,
+            }
+        };
+
         let mut cache = self.shadow_cache.lock().unwrap();
         
-        if let Some((orig, _shadow)) = cache.get(&id) {
-             // NOTE: [v3.3.1 FIX] Return `orig` (the deepcopy). User mutations MUST go to
-             // the deepcopy so infer_shadow_deltas can detect them by comparing orig vs current.
-             return Ok(orig.clone_ref(py));
+        let cached = cache.get(&id).map(|(orig, _shadow)| orig.clone_ref(py));
+        if let Some(orig) = cached {
+             // [v3.4 CoW] A shared object whose path became writable (scope cleared
+             // by Admin elevation) is upgraded to a private copy below.
+             let upgrade = relation != ScopeRelation::Outside
+                 && self.shared_objects.lock().unwrap().contains(&id);
+             if !upgrade {
+                 // NOTE: [v3.3.1 FIX] Return `orig` (the deepcopy). User mutations MUST go to
+                 // the deepcopy so infer_shadow_deltas can detect them by comparing orig vs current.
+                 return Ok(orig);
+             }
+             self.shared_objects.lock().unwrap().remove(&id);
+             cache.remove(&id);
         }
 
         // Heavy Zone Check (Skip copy if configured)
@@ -731,11 +843,20 @@ impl Transaction {
             }
         }
 
-        // Deep Copy
+        // [v3.4 CoW] Not writable by this process: share the committed object.
+        // O(1) — callers wrap it read-only (see shadow_kind), so no copy is needed.
+        if relation == ScopeRelation::Outside {
+            cache.insert(id, (val.clone_ref(py), val.clone_ref(py)));
+            self.shared_objects.lock().unwrap().insert(id);
+            return Ok(val);
+        }
+
+        // Deep Copy (Ancestor: shallow copy — children are shadowed on access)
         // NOTE: [v3.3.2 FIX] Fail-fast on deepcopy failure instead of silently returning
         // the original object. Silent fallback breaks transaction isolation.
         let copy_mod = py.import("copy")?;
-        let shadow = match copy_mod.call_method1("deepcopy", (&val,)) { 
+        let copy_fn = if relation == ScopeRelation::Ancestor { "copy" } else { "deepcopy" };
+        let shadow = match copy_mod.call_method1(copy_fn, (&val,)) { 
             Ok(s) => s.unbind(),
             Err(e) => {
                  let type_name = val.bind(py).get_type().name().map(|n| n.to_string()).unwrap_or_else(|_| "unknown".to_string());
@@ -745,6 +866,9 @@ impl Transaction {
                  ));
             }
         };
+        if relation == ScopeRelation::Ancestor {
+            self.partial_shadows.lock().unwrap().insert(shadow.bind(py).as_ptr() as usize);
+        }
         
         // Disable Legacy Lock Manager on Shadow
         let _ = shadow.bind(py).setattr("_lock_manager", py.None());
@@ -1,6 +1,7 @@
 use pyo3::prelude::*;
 use pyo3::types::PyDict;
 use serde_yaml::Value;
+use std::collections::HashMap;
 use std::sync::Mutex;
 
 // ============================================================================
@@ -164,6 +165,54 @@ pub enum FSMState {
     Failed = 4,
 }
 
+// ============================================================================
+// Condition Compilation (v3.4)
+// ============================================================================
+
+/// Collect every `while`/`if` condition string in the AST (depth-first).
+fn collect_conditions(steps: &[FluxStep], out: &mut Vec<String>) {
+    for step in steps {
+        match step {
+            FluxStep::Process { .. } => {}
+            FluxStep::While { condition, do_steps } => {
+                out.push(condition.clone());
+                collect_conditions(do_steps, out);
+            }
+            FluxStep::If { condition, then_steps, else_steps } => {
+                out.push(condition.clone());
+                collect_conditions(then_steps, out);
+                collect_conditions(else_steps, out);
+            }
+            FluxStep::Run { steps: sub_steps } => collect_conditions(sub_steps, out),
+        }
+    }
+}
+
+/// Compile a condition to a Python code object (`compile(expr, ..., "eval")`).
+fn compile_condition(py: Python, expr: &str) -> PyResult<PyObject> {
+    let py_builtins = py.import_bound("builtins")?;
+    let code = py_builtins.getattr("compile")?.call1((expr, "<flux-condition>", "eval"))?;
+    Ok(code.unbind())
+}
+
+/// Restricted globals template: only safe builtins are reachable from conditions.
+fn restricted_globals(py: Python) -> PyResult<Py<PyDict>> {
+    let builtins = PyDict::new_bound(py);
+    
+    // Allow only safe functions
+    let py_builtins = py.import_bound("builtins")?;
+    for name in ["len", "int", "float", "str", "bool", "abs", "min", "max", "sum"] {
+        builtins.set_item(name, py_builtins.getattr(name)?)?;
+    }
+    builtins.set_item("True", true)?;
+    builtins.set_item("False", false)?;
+    builtins.set_item("None", py.None())?;
+    
+    let globals = PyDict::new_bound(py);
+    globals.set_item("__builtins__", builtins)?;
+    Ok(globals.unbind())
+}
+
 // ============================================================================
 // WorkflowEngine (PyO3 Class)
 // ============================================================================
@@ -180,13 +229,19 @@ pub struct WorkflowEngine {
     state_history: Mutex<Vec<FSMState>>,
     // State change observers (Python callbacks)
     observers: Mutex<Vec<PyObject>>,
+    // [v3.4] Condition expr -> compiled code object (filled at load, lazily for graph nodes)
+    compiled_conditions: Mutex<HashMap<String, PyObject>>,
+    // [v3.4] Restricted globals template, copied per evaluation
+    condition_globals: Py<PyDict>,
+    // [v3.4] Cached builtins.eval (evaluates code objects)
+    eval_fn: PyObject,
 }
 
 #[pymethods]
 impl WorkflowEngine {
     #[new]
     #[pyo3(signature = (yaml_config, max_ops=10000, debug=false))]
-    fn new(yaml_config: String, max_ops: u32, debug: bool) -> PyResult<Self> {
+    fn new(py: Python, yaml_config: String, max_ops: u32, debug: bool) -> PyResult<Self> {
         let config: Value = serde_yaml::from_str(&yaml_config)
             .map_err(|e| pyo3::exceptions::PyValueError::new_err(format!("Invalid YAML: {}", e)))?;
         
@@ -198,7 +253,20 @@ impl WorkflowEngine {
             Vec::new()
         };
         
-
+        // [v3.4] Compile conditions once at load instead of re-parsing per evaluation.
+        // NOTE: Malformed expressions are left uncompiled so the SyntaxError still
+        // surfaces when (and only if) the condition is evaluated.
+        let mut conditions = Vec::new();
+        collect_conditions(&steps, &mut conditions);
+        let mut compiled = HashMap::new();
+        for expr in conditions {
+            if compiled.contains_key(&expr) {
+                continue;
+            }
+            if let Ok(code) = compile_condition(py, &expr) {
+                compiled.insert(expr, code);
+            }
+        }
         
         let initial_state = FSMState::Pending;
         let state_history = vec![initial_state];
@@ -211,9 +279,21 @@ impl WorkflowEngine {
             fsm_state: Mutex::new(initial_state), 
             state_history: Mutex::new(state_history),
             observers: Mutex::new(Vec::new()),
+            compiled_conditions: Mutex::new(compiled),
+            condition_globals: restricted_globals(py)?,
+            eval_fn: py.import_bound("builtins")?.getattr("eval")?.unbind(),
         })
     }
 
+    /// All `while`/`if` condition expressions of the workflow (load order).
+    /// Used by TheusEngine to build a context view with only the referenced keys.
+    #[getter]
+    fn conditions(&self) -> Vec<String> {
+        let mut out = Vec::new();
+        collect_conditions(&self.steps, &mut out);
+        out
+    }
+
     /// Get current FSM state.
     #[getter]
     fn fsm_state(&self) -> FSMState {
@@ -487,43 +567,30 @@ impl WorkflowEngine {
     
     /// Safely evaluate a condition expression using restricted builtins.
     fn eval_condition(&self, py: Python, expr: &str, locals: &Bound<'_, PyDict>) -> PyResult<bool> {
-        // Build restricted globals with safe builtins only
-        let builtins = PyDict::new_bound(py);
-        
-        // Allow only safe functions
-        let py_builtins = py.import_bound("builtins")?;
-        builtins.set_item("len", py_builtins.getattr("len")?)?;
-        builtins.set_item("int", py_builtins.getattr("int")?)?;
-        builtins.set_item("float", py_builtins.getattr("float")?)?;
-        builtins.set_item("str", py_builtins.getattr("str")?)?;
-        builtins.set_item("bool", py_builtins.getattr("bool")?)?;
-        builtins.set_item("abs", py_builtins.getattr("abs")?)?;
-        builtins.set_item("min", py_builtins.getattr("min")?)?;
-        builtins.set_item("max", py_builtins.getattr("max")?)?;
-        builtins.set_item("sum", py_builtins.getattr("sum")?)?;
-        builtins.set_item("True", true)?;
-        builtins.set_item("False", false)?;
-        builtins.set_item("None", py.None())?;
-        
-        let globals = PyDict::new_bound(py);
-        globals.set_item("__builtins__", builtins)?;
+        let code = self.compiled_code(py, expr)?;
         
-        // Merge locals (context) into globals for eval access
+        // Merge locals (context) into a copy of the restricted globals for eval access
         // This allows expressions like `domain.x < len(domain.items)`
-        for (k, v) in locals.iter() {
-            globals.set_item(k, v)?;
-        }
-        
-
+        let globals = self.condition_globals.bind(py).copy()?;
+        globals.update(locals.as_mapping())?;
         
-        let result = py.eval_bound(expr, Some(&globals), None)?;
+        let result = self.eval_fn.bind(py).call1((code, globals))?;
         let is_true = result.is_truthy()?;
         
-
-        
         Ok(is_true)
     }
 
+    /// [v3.4] Code object for `expr`: cached at load, compiled on first use otherwise
+    /// (graph `next` conditions). Compile errors propagate to the caller.
+    fn compiled_code(&self, py: Python, expr: &str) -> PyResult<PyObject> {
+        if let Some(code) = self.compiled_conditions.lock().unwrap().get(expr) {
+            return Ok(code.clone_ref(py));
+        }
+        let code = compile_condition(py, expr)?;
+        self.compiled_conditions.lock().unwrap().insert(expr.to_string(), code.clone_ref(py));
+        Ok(code)
+    }
+
     /// Transition to a new FSM state, record in history, and notify observers.
     fn transition_state(&self, py: Python, new_state: FSMState) -> PyResult<()> {
         let old_state = *self.fsm_state.lock().unwrap();
@@ -165,12 +165,14 @@ impl ContextGuard {
                  // Fixed: Get Shadow Copy for Dict too!
                  tx_bound.borrow_mut().get_shadow(py, val.clone_ref(py), Some(full_path.clone()))?
              };
+             // [v3.4 CoW] Shared (not copied) objects must never be mutated in place
+             let is_shared = tx.bind(py).borrow().shadow_kind(py, shadow.clone_ref(py)) == 2;
 
              let proxy = SupervisorProxy::new(
                  py,
                  shadow, 
                  full_path,
-                 !can_write, 
+                 !can_write || is_shared, 
                  if can_write { Some(tx.clone_ref(py).into_py(py)) } else { None },
                  true, // is_shadow (Explicitly created via get_shadow)
                  final_caps,
@@ -182,6 +184,7 @@ impl ContextGuard {
         if type_name == "list" {
              let tx_bound = tx.bind(py);
              let shadow = tx_bound.borrow_mut().get_shadow(py, val.clone_ref(py), Some(full_path.clone()))?;
+             let is_shared = tx_bound.borrow().shadow_kind(py, shadow.clone_ref(py)) == 2;
              
              // If final_caps implies Full Access, we CAN return raw list for compat?
              // But if we return raw list, we lose logging?
@@ -201,7 +204,7 @@ impl ContextGuard {
                  py,
                  shadow,
                  full_path,
-                 !can_write,
+                 !can_write || is_shared,
                  if can_write { Some(tx.clone_ref(py).into_py(py)) } else { None },
                  true,
                  final_caps,
@@ -221,12 +224,13 @@ impl ContextGuard {
              // Unwrapped proxy points to Original State (Arc). We need a Transaction Copy.
              let tx_bound = tx.bind(py);
              let shadow = tx_bound.borrow_mut().get_shadow(py, inner, Some(full_path.clone()))?; 
+             let is_shared = tx_bound.borrow().shadow_kind(py, shadow.clone_ref(py)) == 2;
              
              let proxy = SupervisorProxy::new(
                  py,
                  shadow, 
                  full_path.clone(),
-                 !can_write,
+                 !can_write || is_shared,
                  if can_write { Some(tx.clone_ref(py).into_py(py)) } else { None },
                  true, // is_shadow
                  final_caps,
@@ -510,7 +514,13 @@ impl ContextGuard {
 
     /// [RFC-001] Elevate this guard to Admin status for current thread.
     /// Used by AdminTransaction context manager.
-    fn _elevate(&mut self, enabled: bool) {
+    fn _elevate(&mut self, py: Python, enabled: bool) {
         self.is_admin = enabled;
+        // [v3.4 CoW] Admin may write anywhere → fall back to full snapshot copies
+        if enabled {
+            if let Some(ref tx) = self.tx {
+                tx.bind(py).borrow().clear_write_scope();
+            }
+        }
     }
 }
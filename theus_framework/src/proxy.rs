@@ -93,6 +93,14 @@ fn get_current_tx(py: Python) -> Option<PyObject> {
     }
 }
 
+/// [v3.4 CoW] Query Transaction.shadow_kind(obj): 0 = private copy, 1 = partial
+/// (shallow) shadow whose children are still shared, 2 = shared committed object.
+fn shadow_kind(py: Python, tx: &Bound<'_, PyAny>, obj: &PyObject) -> u8 {
+    tx.call_method1("shadow_kind", (obj.clone_ref(py),))
+        .and_then(|k| k.extract::<u8>())
+        .unwrap_or(0)
+}
+
 #[pymethods]
 impl SupervisorProxy {
     #[new]
@@ -242,19 +250,24 @@ impl SupervisorProxy {
             
             // [INC-013] Double Shadowing Logic
             let mut is_child_shadow = self.is_shadow;
+            // [v3.4 CoW] Child shared with committed state → read-only
+            let mut is_child_shared = false;
 
             // v3.1 CoW: Get Shadow (No Stitching)
             let val_shadow = if let Some(ref tx_obj) = tx_for_child {
                 let tx_bound = tx_obj.bind(py);
                 
-                if self.is_shadow {
+                if self.is_shadow && shadow_kind(py, tx_bound, &self.inner) == 0 {
                     // Parent is Shadow -> Child is mutable part of Shadow Tree. Skip CoW.
                     val.clone_ref(py)
                 } else {
+                    // NOTE: Partial (shallow) parents still share their children → CoW them
                     match tx_bound.call_method1("get_shadow", (val.clone_ref(py), Some(nested_path.clone()))) {
                         Ok(s) => {
                             is_child_shadow = true; // Result of get_shadow is always tracked
-                            s.unbind()
+                            let s = s.unbind();
+                            is_child_shared = shadow_kind(py, tx_bound, &s) == 2;
+                            s
                         },
                         Err(_) => val
                     }
@@ -274,7 +287,7 @@ impl SupervisorProxy {
             };
 
             // [RFC-001] Feature 6: Block Direct Context __dict__ Mutation (Attack Surface §10)
-            let is_read_only = self.read_only || name == "__dict__";
+            let is_read_only = self.read_only || name == "__dict__" || is_child_shared;
 
             Ok(SupervisorProxy::new(
                 py,
@@ -411,11 +424,12 @@ impl SupervisorProxy {
             let tx_for_child = get_current_tx(py);
             
             let mut is_child_shadow = self.is_shadow;
+            let mut is_child_shared = false;
 
             let val_shadow = if let Some(ref tx_obj) = tx_for_child {
                 let tx_bound = tx_obj.bind(py);
                 
-                if self.is_shadow {
+                if self.is_shadow && shadow_kind(py, tx_bound, &self.inner) == 0 {
                     // [FIX] Parent is Shadow -> Child is mutable part of Shadow Tree. 
                     // Use it directly to ensure mutations propagate to parent.
                     val.clone_ref(py)
@@ -424,7 +438,9 @@ impl SupervisorProxy {
                     match tx_bound.call_method1("get_shadow", (val.clone_ref(py), Some(nested_path.clone()))) {
                         Ok(s) => {
                             is_child_shadow = true;
-                            s.unbind()
+                            let s = s.unbind();
+                            is_child_shared = shadow_kind(py, tx_bound, &s) == 2;
+                            s
                         },
                         Err(e) => return Err(e)
                     }
@@ -447,7 +463,7 @@ impl SupervisorProxy {
                 py,
                 val_shadow,
                 nested_path,
-                self.read_only,
+                self.read_only || is_child_shared,
                 tx_for_child,
                 is_child_shadow,
                 child_caps,
@@ -982,18 +998,21 @@ impl SupervisorProxy {
             
             // [INC-013] Double Shadowing Logic
             let mut is_child_shadow = self.is_shadow;
+            let mut is_child_shared = false;
 
             // CoW: Get Shadow
             let val_shadow = if let Some(ref tx_obj) = tx_for_child {
                 let tx_bound = tx_obj.bind(py);
                 
-                if self.is_shadow {
+                if self.is_shadow && shadow_kind(py, tx_bound, &self.inner) == 0 {
                     val.clone_ref(py)
                 } else {
                     match tx_bound.call_method1("get_shadow", (val.clone_ref(py), Some(nested_path.clone()))) {
                         Ok(s) => {
                             is_child_shadow = true;
-                            s.unbind()
+                            let s = s.unbind();
+                            is_child_shared = shadow_kind(py, tx_bound, &s) == 2;
+                            s
                         },
                         Err(_) => val
                     }
@@ -1006,7 +1025,7 @@ impl SupervisorProxy {
                 py,
                 val_shadow,
                 nested_path,
-                self.read_only,
+                self.read_only || is_child_shared,
                 tx_for_child,
                 is_child_shadow,
                 self.capabilities, // Inherit
@@ -1021,6 +1040,18 @@ impl SupervisorProxy {
                      Ok(s) => s.unbind(),
                      Err(_) => val.clone_ref(py)
                  };
+                 // [v3.4 CoW] List shared with committed state → read-only proxy
+                 if shadow_kind(py, tx_obj.bind(py), &val_shadow) == 2 {
+                     return Ok(SupervisorProxy::new(
+                         py,
+                         val_shadow,
+                         nested_path,
+                         true,
+                         Some(tx_obj),
+                         true,
+                         self.capabilities,
+                     ).into_py(py));
+                 }
                  // Return Raw Shadow List (no Proxy wrapper)
                  return Ok(val_shadow.into_py(py));
              }
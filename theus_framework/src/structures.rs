@@ -713,6 +713,7 @@ impl ProcessContext {
                  let tx_opt = self.tx.as_ref().map(|t| t.clone_ref(py).into_py(py));
                  
                  let mut is_shadow = false;
+                 let mut is_shared = false;
                  // [v3.3 FIX] Core Memory Leak Fix: Root Zones MUST be Shadowed.
                  // If we don't shadow the root zone, SupervisorProxy assigning directly to `self.inner`
                  // modifies the global state before commit!
@@ -720,6 +721,11 @@ impl ProcessContext {
                      match tx_obj.bind(py).call_method1("get_shadow", (arc_val.clone_ref(py).into_py(py), Some("domain".to_string()))) {
                          Ok(s) => {
                              is_shadow = true;
+                             // [v3.4 CoW] Zone outside the write scope is shared → read-only
+                             is_shared = tx_obj.bind(py).call_method1("shadow_kind", (s.clone(),))
+                                 .and_then(|k| k.extract::<u8>())
+                                 .map(|k| k == 2)
+                                 .unwrap_or(false);
                              s.unbind()
                          },
                          Err(_) => arc_val.clone_ref(py).into_py(py)
@@ -732,7 +738,7 @@ impl ProcessContext {
                      py,
                      inner_val,
                      "domain".to_string(),
-                     tx_opt.is_none(), // read_only if no tx
+                     tx_opt.is_none() || is_shared, // read_only if no tx
                      tx_opt,
                      is_shadow,
                      CAP_READ | CAP_UPDATE | CAP_APPEND | CAP_DELETE,
@@ -752,11 +758,17 @@ impl ProcessContext {
                  let tx_opt = self.tx.as_ref().map(|t| t.clone_ref(py).into_py(py));
                  
                  let mut is_shadow = false;
+                 let mut is_shared = false;
                  // [v3.3 FIX] Core Memory Leak Fix: Root Zones MUST be Shadowed.
                  let inner_val = if let Some(ref tx_obj) = tx_opt {
                      match tx_obj.bind(py).call_method1("get_shadow", (arc_val.clone_ref(py).into_py(py), Some("global".to_string()))) {
                          Ok(s) => {
                              is_shadow = true;
+                             // [v3.4 CoW] Zone outside the write scope is shared → read-only
+                             is_shared = tx_obj.bind(py).call_method1("shadow_kind", (s.clone(),))
+                                 .and_then(|k| k.extract::<u8>())
+                                 .map(|k| k == 2)
+                                 .unwrap_or(false);
                              s.unbind()
                          },
                          Err(_) => arc_val.clone_ref(py).into_py(py)
@@ -769,7 +781,7 @@ impl ProcessContext {
                      py,
                      inner_val,
                      "global".to_string(),
-                     tx_opt.is_none(),
+                     tx_opt.is_none() || is_shared,
                      tx_opt,
                      is_shadow, 
                      CAP_READ | CAP_UPDATE | CAP_APPEND | CAP_DELETE,
@@ -0,0 +1,86 @@
+"""
+Compiled Contract Path Checks (v3.4)
+====================================
+CompiledContract (path trie + memoized decisions) must answer exactly like
+the pattern scan ContextGuard._is_allowed used before it.
+"""
+import fnmatch
+import itertools
+
+from theus.contracts import CompiledContract, compile_contract, process
+
+
+def _legacy_is_allowed(inputs, outputs, path, mode):
+    """Reference: the v3.2 per-access pattern scan."""
+    norm_path = path.replace("[", ".").replace("]", "")
+    if mode == "read":
+        all_patterns = set(inputs) | set(outputs)
+        if "*" in all_patterns:
+            return True
+        for pattern in all_patterns:
+            norm_pattern = pattern.replace("[", ".").replace("]", "")
+            if fnmatch.fnmatch(norm_path, norm_pattern):
+                return True
+            if norm_path.startswith(norm_pattern + "."):
+                return True
+            if norm_pattern.startswith(norm_path + "."):
+                return True
+        return False
+    if "*" in outputs:
+        return True
+    for pattern in outputs:
+        norm_pattern = pattern.replace("[", ".").replace("]", "")
+        if fnmatch.fnmatch(norm_path, norm_pattern):
+            return True
+        if norm_path.startswith(norm_pattern + "."):
+            return True
+    return False
+
+
+CONTRACTS = [
+    ([], []),
+    (["domain.data"], []),
+    (["domain.counter", "global.seed"], ["domain.counter"]),
+    (["domain.items[0]"], ["domain.nested.level1"]),
+    (["domain.agent_*"], ["domain.log_*", "domain.stats"]),
+    (["*"], []),
+    ([], ["*"]),
+    (["domain"], ["domain.data"]),
+]
+
+PATHS = [
+    "domain", "global", "domain.data", "domain.data.item_1", "domain.data[item_1]",
+    "domain.counter", "domain.counterx", "domain.items", "domain.items[0]",
+    "domain.items[0].name", "domain.nested", "domain.nested.level1.level2",
+    "domain.agent_7", "domain.agent_7.q", "domain.log_events", "domain.stats",
+    "global.seed", "global.other", "heavy_buffer", "",
+]
+
+
+def test_matches_legacy_pattern_scan():
+    for (inputs, outputs), path, mode in itertools.product(CONTRACTS, PATHS, ("read", "write")):
+        compiled = CompiledContract(inputs, outputs)
+        expected = _legacy_is_allowed(inputs, outputs, path, mode)
+        assert compiled.allows(path, mode) == expected, (inputs, outputs, path, mode)
+        # Memoized second lookup returns the same decision
+        assert compiled.allows(path, mode) == expected
+
+
+def test_lookup_returns_top_level_segment():
+    compiled = CompiledContract(["domain.data"], [])
+    assert compiled.lookup("domain.data[item_1]") == ("domain", True)
+    assert compiled.lookup("outbox", "write") == ("outbox", False)
+
+
+def test_contract_compiled_at_registration_is_shared():
+    @process(inputs=["domain.data"], outputs=["domain.data"])
+    def proc_a(ctx):
+        pass
+
+    @process(inputs=["domain.data"], outputs=["domain.data"])
+    def proc_b(ctx):
+        pass
+
+    compiled = proc_a._pop_contract.compiled
+    assert compiled is proc_b._pop_contract.compiled
+    assert compiled is compile_contract({"domain.data"}, {"domain.data"})
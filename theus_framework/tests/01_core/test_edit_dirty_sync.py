@@ -0,0 +1,108 @@
+"""
+engine.edit() Incremental Sync (v3.3)
+=====================================
+edit() pushes only the fields written inside the block (dirty paths) to the
+Rust Core, and skips the CAS entirely when nothing was written.
+"""
+from dataclasses import dataclass, field
+
+import pytest
+
+from theus.context import (
+    BaseDomainContext,
+    BaseGlobalContext,
+    BaseSystemContext,
+    DirtyTracker,
+)
+
+
+@dataclass
+class _Domain(BaseDomainContext):
+    counter: int = 0
+    name: str = "init"
+    items: list = field(default_factory=list)
+    heavy_buffer: object = None
+
+
+@dataclass
+class _Global(BaseGlobalContext):
+    seed: int = 42
+
+
+def _make_ctx():
+    return BaseSystemContext(global_ctx=_Global(), domain=_Domain())
+
+
+# ----------------------------------------------------------------------
+# DirtyTracker (pure Python)
+# ----------------------------------------------------------------------
+
+
+def test_tracker_records_only_written_fields():
+    ctx = _make_ctx()
+    tracker = DirtyTracker(ctx)
+    assert tracker.active and not tracker.nested
+
+    ctx.domain.counter = 7
+    ctx.domain.heavy_buffer = bytearray(8)  # HEAVY zone: never synced
+    tracker.stop()
+    ctx.domain.name = "after"  # written after stop(): not tracked
+
+    delta = tracker.delta()
+    assert delta["domain"] == {"counter": 7}
+    assert delta["domain_ctx"] is delta["domain"]
+    assert "global" not in delta
+
+
+def test_tracker_empty_block_and_nesting():
+    ctx = _make_ctx()
+    outer = DirtyTracker(ctx)
+    inner = DirtyTracker(ctx)
+    assert inner.nested and not inner.active
+
+    outer.stop()
+    assert not outer.dirty
+    assert outer.delta() == {}
+
+
+def test_tracker_mark_dirty_and_child_replacement():
+    ctx = _make_ctx()
+    tracker = DirtyTracker(ctx)
+    ctx.domain.items.append(1)
+    ctx.domain.mark_dirty("items")
+    ctx.global_ctx = _Global(seed=7)
+    tracker.stop()
+
+    delta = tracker.delta()
+    assert delta["domain"] == {"items": [1]}
+    assert delta["global"]["seed"] == 7
+
+
+# ----------------------------------------------------------------------
+# engine.edit() against the Rust Core
+# ----------------------------------------------------------------------
+
+
+def test_edit_pushes_delta_and_skips_noop():
+    pytest.importorskip("theus_core")
+    from theus.engine import TheusEngine
+
+    ctx = _make_ctx()
+    engine = TheusEngine(ctx)
+
+    with engine.edit() as c:
+        c.domain.counter = 5
+    assert engine.state.data["domain"]["counter"] == 5
+
+    # Untracked write (bypasses __setattr__) must not leak into the delta
+    object.__setattr__(ctx.domain, "name", "shadow")
+    with engine.edit() as c:
+        c.domain.counter = 6
+    assert engine.state.data["domain"]["counter"] == 6
+    assert engine.state.data["domain"]["name"] != "shadow"
+
+    # No writes → no CAS, version unchanged
+    version = engine.state.version
+    with engine.edit():
+        pass
+    assert engine.state.version == version
@@ -0,0 +1,62 @@
+"""
+Process Latency Histograms (v3.4)
+=================================
+LatencyHistogram buckets durations by log2(ns); ProcessProfiler keeps one
+histogram per process name and can run a single process under cProfile.
+"""
+import pytest
+
+from theus.profiling import LatencyHistogram, ProcessProfiler, merge_histograms
+
+
+def test_histogram_buckets_and_percentiles():
+    hist = LatencyHistogram()
+    for ns in [1_000] * 90 + [1_000_000] * 9 + [50_000_000]:
+        hist.record(ns)
+
+    assert hist.count == 100
+    assert hist.max_ns == 50_000_000
+    assert hist.counts[(1_000).bit_length()] == 90
+    # Percentiles report the bucket upper bound (within 2x of the sample)
+    assert 1_000 <= hist.percentile(50) < 2_000
+    assert 1_000_000 <= hist.percentile(99) < 2_000_000
+    assert hist.percentile(100) == 50_000_000
+
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["max_us"] == 50_000.0
+    assert summary["total_ms"] == pytest.approx((90_000 + 9_000_000 + 50_000_000) / 1e6)
+
+
+def test_histogram_overflow_merge_and_reset():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0)
+    b.record(1 << 60)  # overflow bucket
+    a.merge(b)
+    assert a.count == 2 and a.counts[0] == 1 and a.counts[-1] == 1
+    assert a.percentile(50) == 0
+    a.reset()
+    assert a.count == 0 and sum(a.counts) == 0 and a.percentile(99) == 0
+
+
+def test_profiler_records_calls_and_capture():
+    def busy(n):
+        return sum(range(n))
+
+    profiler = ProcessProfiler(capture="busy")
+    assert profiler.call("busy", busy, 1000) == sum(range(1000))
+    profiler.call("other", busy, 10)
+    with pytest.raises(ZeroDivisionError):
+        profiler.call("failing", lambda: 1 / 0)
+
+    snap = profiler.snapshot()
+    assert {name: s["count"] for name, s in snap.items()} == {"busy": 1, "other": 1, "failing": 1}
+    rows = profiler.capture_stats()
+    assert any("busy" in row["function"] for row in rows)
+
+    merged = merge_histograms([profiler, profiler])
+    assert merged["busy"].count == 2
+
+    assert profiler.snapshot(reset=True) == snap
+    assert profiler.snapshot() == {}
+    assert profiler.capture_stats() == []
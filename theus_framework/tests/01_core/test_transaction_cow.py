@@ -0,0 +1,78 @@
+"""
+Copy-on-Write Transaction Snapshots (v3.4)
+==========================================
+With snapshot_mode="cow" a process only gets private copies of the paths in
+its `outputs` contract; everything else is shared with committed state and
+handed out read-only.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import pytest
+
+pytest.importorskip("theus_core")
+
+from theus.context import BaseDomainContext, BaseGlobalContext, BaseSystemContext
+from theus.contracts import ContractViolationError, process
+from theus.engine import TheusEngine
+
+
+@dataclass
+class _Domain(BaseDomainContext):
+    counter: int = 0
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _System(BaseSystemContext):
+    domain: _Domain = field(default_factory=_Domain)
+    global_ctx: BaseGlobalContext = field(default_factory=BaseGlobalContext)
+
+
+@process(inputs=["domain.payload"], outputs=[])
+def _read_payload(ctx):
+    return ctx.domain.payload["a"]["v"]
+
+
+@process(inputs=["domain.counter"], outputs=["domain.counter"])
+def _bump_counter(ctx):
+    ctx.domain.counter = ctx.domain.counter + 1
+
+
+@process(inputs=["domain.payload"], outputs=[])
+def _mutate_shared(ctx):
+    ctx.domain.payload["a"]["v"] = 99
+
+
+def _engine():
+    ctx = _System(domain=_Domain(payload={"a": {"v": 1}, "b": {"v": 2}}))
+    engine = TheusEngine(ctx, strict_guards=True, snapshot_mode="cow")
+    for func in (_read_payload, _bump_counter, _mutate_shared):
+        engine.register(func)
+    return engine
+
+
+def test_reader_shares_and_writer_commits():
+    engine = _engine()
+    payload_before = engine.state.data["domain"]["payload"]
+
+    assert asyncio.run(engine.execute(_read_payload)) == 1
+    asyncio.run(engine.execute(_bump_counter))
+
+    data = engine.state.data["domain"]
+    assert data["counter"] == 1
+    assert data["payload"] == {"a": {"v": 1}, "b": {"v": 2}}
+    assert payload_before == data["payload"]
+
+
+def test_shared_object_is_read_only():
+    engine = _engine()
+    with pytest.raises((ContractViolationError, PermissionError)):
+        asyncio.run(engine.execute(_mutate_shared))
+    assert engine.state.data["domain"]["payload"]["a"]["v"] == 1
+
+
+def test_invalid_snapshot_mode():
+    with pytest.raises(ValueError):
+        TheusEngine(_System(), snapshot_mode="persistent")
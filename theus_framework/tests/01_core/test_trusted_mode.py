@@ -0,0 +1,112 @@
+"""
+Trusted Fast Mode (v3.4)
+========================
+run_trusted() calls a process directly on the raw context; only sampled
+invocations record writes and check them against the contract `outputs`.
+"""
+from dataclasses import dataclass
+
+import pytest
+
+pytest.importorskip("theus_core")
+
+from theus.context import BaseDomainContext, BaseGlobalContext, BaseSystemContext
+from theus.contracts import process
+from theus.engine import TheusEngine
+
+
+@dataclass
+class _Domain(BaseDomainContext):
+    counter: int = 0
+    secret: int = 0
+
+
+def _make_engine():
+    ctx = BaseSystemContext(global_ctx=BaseGlobalContext(), domain=_Domain())
+    engine = TheusEngine(ctx)
+    engine._audit = None  # violations surface as RuntimeWarning
+    return engine, ctx
+
+
+@process(inputs=["domain.counter"], outputs=["domain.counter"])
+def _bump(ctx):
+    ctx.domain.counter += 1
+
+
+@process(inputs=["domain.counter"], outputs=["domain.counter"])
+def _leak(ctx):
+    ctx.domain.counter += 1
+    ctx.domain.secret = 7
+
+
+@process(inputs=[], outputs=["domain_ctx.counter"])
+def _delta(ctx):
+    return {"counter": 1, "secret": 2}
+
+
+@process(inputs=[], outputs=["domain_ctx.counter", "domain_ctx.nested.secret"])
+def _nested_delta(ctx):
+    return {"counter": 1, "secret": 2}
+
+
+def _nested_route(key):
+    return "domain_ctx.nested.secret" if key == "secret" else f"domain_ctx.{key}"
+
+
+def test_untrusted_process_is_a_direct_call():
+    engine, ctx = _make_engine()
+    engine.run_trusted(_bump)
+    assert ctx.domain.counter == 1
+    assert engine.trusted_stats == {}
+
+
+def test_every_nth_invocation_is_audited():
+    engine, ctx = _make_engine()
+    engine.trust(_bump, every=3)
+    for _ in range(7):
+        engine.run_trusted(_bump)
+    assert ctx.domain.counter == 7
+    # Calls 1, 4, 7 are sampled
+    assert engine.trusted_stats["_bump"] == {"calls": 7, "audited": 3, "violations": 0}
+
+
+def test_undeclared_write_is_reported_on_sampled_calls_only():
+    engine, ctx = _make_engine()
+    engine.trust(_leak, every=2)
+    with pytest.warns(RuntimeWarning, match="secret"):
+        engine.run_trusted(_leak)
+    engine.run_trusted(_leak)  # not sampled: no check
+    assert ctx.domain.secret == 7
+    assert engine.trusted_stats["_leak"] == {"calls": 2, "audited": 1, "violations": 1}
+
+
+def test_returned_delta_keys_are_checked():
+    engine, _ = _make_engine()
+    engine.trust(_delta, every=1)
+    with pytest.warns(RuntimeWarning, match="domain_ctx.secret"):
+        assert engine.run_trusted(_delta) == {"counter": 1, "secret": 2}
+    assert engine.trusted_stats["_delta"]["violations"] == 1
+
+
+def test_rate_sampling_and_validation():
+    engine, _ = _make_engine()
+    engine.trust(_bump, rate=1.0)
+    engine.run_trusted(_bump)
+    engine.trust(_bump, rate=0.0)
+    engine.run_trusted(_bump)
+    assert engine.trusted_stats["_bump"]["audited"] == 1
+
+    with pytest.raises(ValueError):
+        engine.trust(_bump, every=-1)
+    with pytest.raises(ValueError):
+        engine.trust(_bump, rate=1.5)
+
+
+def test_delta_path_maps_bare_keys():
+    engine, _ = _make_engine()
+    engine.trust(_nested_delta, every=1)
+    engine.run_trusted(_nested_delta, delta_path=_nested_route)
+    assert engine.trusted_stats["_nested_delta"]["violations"] == 0
+    # Default routing: bare key -> domain_ctx.<key>
+    with pytest.warns(RuntimeWarning, match=r"\['domain_ctx.secret'\]"):
+        engine.run_trusted(_nested_delta)
@@ -0,0 +1,41 @@
+"""
+Flux condition context view (v3.4)
+==================================
+execute_workflow mirrors only the domain keys referenced by the workflow's
+conditions; any other use of `domain` falls back to the full domain copy.
+"""
+from theus.engine import _condition_domain_keys, _workflow_domain_keys
+
+
+def test_collects_subscript_attribute_and_get_keys():
+    conditions = [
+        "domain['sig_episode_counter'] < domain['sig_max_episodes']",
+        "domain.sig_sleep_step < 3 and domain.get('sig_flag', False)",
+        "signal.get('stop') != 'True'",
+        "domain['cfg']['depth'] > 1",
+    ]
+    assert _condition_domain_keys(conditions) == {
+        "sig_episode_counter", "sig_max_episodes", "sig_sleep_step", "sig_flag", "cfg",
+    }
+
+
+def test_no_conditions_needs_no_keys():
+    assert _condition_domain_keys([]) == set()
+    assert _condition_domain_keys(["True", "x > 5"]) == set()
+
+
+def test_dynamic_domain_use_needs_full_view():
+    assert _condition_domain_keys(["len(domain) > 0"]) is None
+    assert _condition_domain_keys(["domain[key] > 0"]) is None
+    assert _condition_domain_keys(["x >>"]) is None
+
+
+def test_engine_without_conditions_getter_needs_full_view():
+    class LegacyWorkflowEngine:
+        pass
+
+    class WorkflowEngine:
+        conditions = ["domain['sig_sleep_step'] < domain['sig_sleep_duration']"]
+
+    assert _workflow_domain_keys(LegacyWorkflowEngine()) is None
+    assert _workflow_domain_keys(WorkflowEngine()) == {"sig_sleep_step", "sig_sleep_duration"}
@@ -280,6 +280,21 @@ class LockedContextMixin:
         # 3. Perform Write
         super().__setattr__(name, value)
 
+        # 4. Dirty Tracking (engine.edit() incremental sync)
+        dirty = self.__dict__.get("_dirty_fields")
+        if dirty is not None:
+            dirty.add(name)
+
+    def mark_dirty(self, *names: str):
+        """
+        Flag fields as written inside `engine.edit()` without re-assigning them.
+        Needed for in-place mutation (e.g. `ctx.domain.items.append(x)`),
+        which the __setattr__ hook cannot observe.
+        """
+        dirty = self.__dict__.get("_dirty_fields")
+        if dirty is not None:
+            dirty.update(names)
+
     def get_zone(self, key: str) -> ContextZone:
         """
         Resolve the semantic zone of a key.
@@ -345,6 +360,117 @@ class LockedContextMixin:
                 setattr(self, k, v)
 
 
+_DEFAULT_EXCLUDE_ZONES = (
+    ContextZone.SIGNAL,
+    ContextZone.META,
+    ContextZone.HEAVY,
+    ContextZone.LOG,
+)
+
+# (payload keys, attribute aliases) of the child contexts synced by edit()
+_EDIT_CHILD_ZONES = (
+    (("domain", "domain_ctx"), ("domain", "domain_ctx")),
+    (("global", "global_ctx"), ("global_ctx", "global")),
+)
+
+
+class DirtyTracker:
+    """
+    Records which attributes are written on a SystemContext (and its
+    domain/global contexts) during `engine.edit()`, so only those paths are
+    pushed to the Rust Core instead of a full `to_dict()` snapshot.
+
+    States:
+        - nested: an outer edit() on the same context is already tracking;
+          this block contributes to the outer delta and must not sync.
+        - active: tracking installed; `delta()` returns the partial payload.
+        - neither: context is not trackable → caller falls back to full sync.
+    """
+
+    def __init__(self, ctx: Any):
+        self.nested = False
+        self.active = False
+        self._targets: List[tuple] = []  # [(obj, dirty set)]
+
+        attrs = getattr(ctx, "__dict__", None)
+        if not isinstance(ctx, LockedContextMixin) or attrs is None:
+            return
+        if attrs.get("_dirty_fields") is not None:
+            self.nested = True
+            return
+
+        children = []
+        for _, aliases in _EDIT_CHILD_ZONES:
+            for alias in aliases:
+                child = attrs.get(alias)
+                if child is None:
+                    continue
+                if not isinstance(child, LockedContextMixin):
+                    return  # Raw object: cannot observe writes → full sync
+                children.append(child)
+
+        self._ctx = ctx
+        for obj in [ctx] + children:
+            if obj.__dict__.get("_dirty_fields") is None:
+                dirty = set()
+                object.__setattr__(obj, "_dirty_fields", dirty)
+                self._targets.append((obj, dirty))
+        self.active = True
+
+    def stop(self):
+        """Uninstall tracking (dirty sets are kept for `delta()`)."""
+        for obj, _ in self._targets:
+            object.__setattr__(obj, "_dirty_fields", None)
+
+    @property
+    def dirty(self) -> bool:
+        return any(dirty for _, dirty in self._targets)
+
+    def written_paths(self) -> List[str]:
+        """Dotted paths of every attribute written (e.g. 'domain_ctx.x', 'global_ctx')."""
+        names = {id(obj): alias for _, aliases in _EDIT_CHILD_ZONES for alias in aliases
+                 for obj in [self._ctx.__dict__.get(alias)] if obj is not None}
+        paths = []
+        for obj, dirty in self._targets:
+            prefix = names.get(id(obj))
+            for name in dirty:
+                if name.startswith("_"):
+                    continue
+                paths.append(name if prefix is None else f"{prefix}.{name}")
+        return paths
+
+    def delta(self, exclude_zones: List[ContextZone] = None) -> Dict[str, Any]:
+        """
+        Partial update payload in the same shape as `BaseSystemContext.to_dict()`
+        (nested dicts are deep-merged by the Core). Empty dict if nothing changed.
+        """
+        if exclude_zones is None:
+            exclude_zones = _DEFAULT_EXCLUDE_ZONES
+        dirty_by_obj = {id(obj): dirty for obj, dirty in self._targets}
+        root_dirty = dirty_by_obj.get(id(self._ctx), set())
+
+        data = {}
+        for keys, aliases in _EDIT_CHILD_ZONES:
+            alias = next((a for a in aliases if getattr(self._ctx, a, None) is not None), None)
+            if alias is None:
+                continue
+            child = getattr(self._ctx, alias)
+            if root_dirty.intersection(aliases):
+                # Whole child context replaced → push it entirely
+                payload = child.to_dict(exclude_zones)
+            else:
+                payload = {}
+                for name in dirty_by_obj.get(id(child), ()):
+                    if name.startswith("_") or resolve_zone(name) in exclude_zones:
+                        continue
+                    v = child.__dict__.get(name)
+                    payload[name] = v.to_dict(exclude_zones) if hasattr(v, "to_dict") else v
+            if payload:
+                for key in keys:
+                    data[key] = payload
+        return data
+
+
 @dataclass
 class BaseGlobalContext(LockedContextMixin):
     """
@@ -1,6 +1,9 @@
 from typing import List, Optional, Callable, Dict
+import fnmatch
 import functools
 import inspect
+import os
+import re
 from enum import Enum
 
 try:
@@ -24,6 +27,113 @@ class SemanticType(str, Enum):
     GUIDE = "guide"
 
 
+def _normalize_path(path: str) -> str:
+    # NOTE: normcase keeps fnmatch's platform case rules for literal patterns
+    return os.path.normcase(path.replace("[", ".").replace("]", ""))
+
+
+class CompiledContract:
+    """
+    [v3.4] Contract inputs/outputs compiled into path tries.
+
+    Answers the same questions as ContextGuard._is_allowed (fnmatch match,
+    sub-path of a pattern, or parent of a pattern for read discovery) with a
+    segment walk instead of re-normalizing every pattern per access. Wildcard
+    patterns are kept as precompiled regexes. Decisions are memoized per path.
+    """
+
+    _TERMINAL = None  # Trie key marking "a pattern ends here" (never a path segment)
+    _MAX_DECISIONS = 4096
+
+    def __init__(self, inputs, outputs):
+        self.inputs = frozenset(inputs)
+        self.outputs = frozenset(outputs)
+        all_patterns = self.inputs | self.outputs
+        self._read_any = "*" in all_patterns
+        self._write_any = "*" in self.outputs
+        self._read_trie, self._read_globs = self._build(all_patterns)
+        self._write_trie, self._write_globs = self._build(self.outputs)
+        self._decisions: Dict[tuple, tuple] = {}
+
+    @classmethod
+    def _build(cls, patterns):
+        trie: Dict[str, dict] = {}
+        globs = []
+        for pattern in patterns:
+            norm = _normalize_path(pattern)
+            if not norm:
+                continue
+            if any(c in norm for c in "*?["):
+                globs.append((norm, re.compile(fnmatch.translate(norm)).match))
+                continue
+            node = trie
+            for segment in norm.split("."):
+                node = node.setdefault(segment, {})
+            node[cls._TERMINAL] = True
+        return trie, globs
+
+    @classmethod
+    def _walk(cls, trie, segments) -> tuple:
+        """(pattern is path or an ancestor of path, path is an ancestor of a pattern)"""
+        node = trie
+        for segment in segments:
+            if cls._TERMINAL in node:
+                return True, False
+            node = node.get(segment)
+            if node is None:
+                return False, False
+        return cls._TERMINAL in node, bool(node)
+
+    def _decide(self, norm_path: str, mode: str) -> bool:
+        segments = norm_path.split(".")
+        if mode == "read":
+            if self._read_any:
+                return True
+            covered, is_parent = self._walk(self._read_trie, segments)
+            if covered or is_parent:
+                return True
+            for norm, match in self._read_globs:
+                if match(norm_path) or norm_path.startswith(norm + ".") or norm.startswith(norm_path + "."):
+                    return True
+            return False
+
+        if self._write_any:
+            return True
+        if self._walk(self._write_trie, segments)[0]:
+            return True
+        for norm, match in self._write_globs:
+            if match(norm_path) or norm_path.startswith(norm + "."):
+                return True
+        return False
+
+    def lookup(self, path: str, mode: str = "read") -> tuple:
+        """(top-level segment, allowed) for `path`, memoized."""
+        key = (path, mode)
+        hit = self._decisions.get(key)
+        if hit is None:
+            norm_path = path.replace("[", ".").replace("]", "")
+            hit = (norm_path.split(".", 1)[0], self._decide(_normalize_path(path), mode))
+            if len(self._decisions) >= self._MAX_DECISIONS:
+                self._decisions.clear()
+            self._decisions[key] = hit
+        return hit
+
+    def allows(self, path: str, mode: str = "read") -> bool:
+        return self.lookup(path, mode)[1]
+
+
+_COMPILED_CONTRACTS: Dict[tuple, CompiledContract] = {}
+
+
+def compile_contract(inputs, outputs) -> CompiledContract:
+    """Flyweight: guards with the same (inputs, outputs) share one CompiledContract."""
+    key = (frozenset(inputs or ()), frozenset(outputs or ()))
+    compiled = _COMPILED_CONTRACTS.get(key)
+    if compiled is None:
+        compiled = _COMPILED_CONTRACTS[key] = CompiledContract(*key)
+    return compiled
+
+
 class ProcessContract:
     def __init__(
         self,
@@ -40,6 +150,8 @@ class ProcessContract:
         self.errors = errors or []
         self.side_effects = side_effects or []
         self.parallel = parallel
+        # [v3.4] Compile path checks once at registration (shared flyweight)
+        self.compiled = compile_contract(inputs, outputs)
 
 
 class AdminTransaction:
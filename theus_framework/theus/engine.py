@@ -1,6 +1,7 @@
 import os
 import sys
 import threading
+import time
 import dataclasses
 from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Union, Callable
@@ -22,7 +23,7 @@ except ImportError as e:
     print(f"WARNING: 'theus_core' not found. Reason: {e}")
     print("Running in Pure Python Fallback (Slower).")
 
-from theus.context import BaseSystemContext, TransactionError, NamespaceRegistry, NamespacePolicy
+from theus.context import BaseSystemContext, TransactionError, NamespaceRegistry, NamespacePolicy, DirtyTracker
 from theus.contracts import SemanticType, ContractViolationError
 from theus.guards import ContextGuard
 
@@ -36,6 +37,108 @@ SecurityViolationError = ContractViolationError
 # into data graph. SupervisorProxy stores is_mutable:bool, not Transaction ref.
 
 
+def _alias_paths(path):
+    """`path` plus its domain/domain_ctx, global/global_ctx alias (contracts use both)."""
+    root, sep, rest = path.partition(".")
+    alias = {"domain": "domain_ctx", "domain_ctx": "domain",
+             "global": "global_ctx", "global_ctx": "global"}.get(root)
+    return (path,) if alias is None else (path, alias + sep + rest)
+
+
+def _default_delta_path(key):
+    """Bare delta keys are routed to the domain context (pipeline `_apply_delta` style)."""
+    return key if "." in key or key in ("domain", "domain_ctx") else f"domain_ctx.{key}"
+
+
+def _audited_call(func, target, args, kwargs, delta_path=None):
+    """
+    [v3.4] Call a process while recording its writes (DirtyTracker) and the
+    keys of a returned delta; check them against the contract `outputs`.
+
+    Args:
+        delta_path: Maps a returned delta key to the context path it is
+            applied to (default: `_default_delta_path`).
+    Returns:
+        (result, violations) - violations is None when the process has no
+        contract or its writes are not observable (nested edit / raw objects).
+    """
+    tracker = DirtyTracker(target)
+    try:
+        result = func(target, *args, **kwargs)
+    finally:
+        tracker.stop()
+
+    contract = getattr(func, "_pop_contract", None)
+    if contract is None or not tracker.active:
+        return result, None
+
+    written = tracker.written_paths()
+    if isinstance(result, dict):
+        resolve = delta_path or _default_delta_path
+        written.extend(resolve(key) for key in result if isinstance(key, str))
+
+    compiled = contract.compiled
+    violations = sorted(
+        {path for path in written if not any(compiled.allows(p, "write") for p in _alias_paths(path))}
+    )
+    return result, violations
+
+
+def _condition_domain_keys(conditions):
+    """
+    [v3.4] Domain keys referenced by Flux conditions (`domain['k']`, `domain.k`,
+    `domain.get('k')`). Returns None when a condition uses `domain` in any other
+    way (e.g. `len(domain)`), meaning the full domain view is required.
+    """
+    import ast
+
+    keys = set()
+    for expr in conditions:
+        try:
+            tree = ast.parse(expr, mode="eval")
+        except SyntaxError:
+            return None
+
+        covered = set()
+        for node in ast.walk(tree):
+            target = key = None
+            if isinstance(node, ast.Subscript):
+                target, key = node.value, node.slice
+            elif isinstance(node, ast.Attribute) and node.attr != "get":
+                target, key = node.value, ast.Constant(node.attr)
+            elif (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "get"
+                and node.args
+            ):
+                target, key = node.func.value, node.args[0]
+                covered.add(id(node.func))
+
+            if isinstance(target, ast.Name) and target.id == "domain":
+                if not (isinstance(key, ast.Constant) and isinstance(key.value, str)):
+                    return None
+                keys.add(key.value)
+                covered.add(id(target))
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id == "domain" and id(node) not in covered:
+                return None
+    return keys
+
+
+def _workflow_domain_keys(wf_engine):
+    """
+    [v3.4] Domain keys for the workflow's condition view. None (full domain view)
+    when the Rust WorkflowEngine predates the `conditions` getter: an empty key set
+    there would evaluate every condition against an empty domain.
+    """
+    conditions = getattr(wf_engine, "conditions", None)
+    if conditions is None:
+        return None
+    return _condition_domain_keys(conditions)
+
+
 class TheusEngine:
     """
     Theus v3.0 Main Engine.
@@ -49,13 +152,26 @@ class TheusEngine:
         audit_recipe: Audit configuration (optional)
         write_timeout_ms: Transaction write timeout in milliseconds.
             Falls back to THEUS_WRITE_TIMEOUT_MS env var, then 300000ms (5 min).
+        snapshot_mode: Transaction isolation strategy (default: "deepcopy").
+            "cow" shares committed state with the process and only copies the
+            paths declared in its `outputs` contract (requires strict_guards).
     """
 
     def __init__(
         self, context=None, namespaces=None, strict_guards=True, strict_cas=False,
-        audit_recipe=None, write_timeout_ms=None
+        audit_recipe=None, write_timeout_ms=None, snapshot_mode="deepcopy"
     ):
+        if snapshot_mode not in ("deepcopy", "cow"):
+            raise ValueError(f"snapshot_mode must be 'deepcopy' or 'cow', got {snapshot_mode!r}")
         self._namespaces = NamespaceRegistry()
+        self._snapshot_mode = snapshot_mode  # v3.4: Copy-on-Write transaction snapshots
+        # [v3.4] Trusted fast mode: process name -> sampling policy / counters
+        self._trusted = {}
+        self._trusted_stats = {}
+        self._trusted_lock = threading.Lock()
+        import random
+        self._trusted_rng = random.Random(0)  # NOTE: Own RNG, never perturbs experiment seeds
+        self._profiler = None  # v3.4: ProcessProfiler (enable_profiling)
         self._strict_guards = strict_guards # Renamed from strict_mode
         self._strict_cas = strict_cas  # v3.0.4: CAS mode control
         self._audit = None
@@ -366,11 +482,22 @@ class TheusEngine:
         # Build context dict for condition evaluation
         ctx = {}
 
+        # [v3.4] Conditions are compiled once by the Rust engine; only the domain keys
+        # they reference are mirrored into the context (None = full domain copy).
+        domain_keys = _workflow_domain_keys(wf_engine)
+        last_version = [None]
+
         def _update_ctx():
             # Use raw Rust state data so that the Rust evaluator can natively parse strings
             # and traverse without needing Python Dataclass magic methods.
-            raw_data = self._core.state.data
-            signals = getattr(self.state, "signals", {})
+            state = self._core.state
+            ctx["signal"] = ctx["cmd"] = getattr(self.state, "signals", {})
+
+            # NOTE: Domain/global only change with a new state version
+            if state.version == last_version[0]:
+                return
+            last_version[0] = state.version
+            raw_data = state.data
             
             try:
                 domain = raw_data["domain"]
@@ -382,20 +509,26 @@ class TheusEngine:
             except KeyError:
                 glob = {}
 
+            if not isinstance(domain, dict):
+                domain = {}
+
             # Map flat keys to dictionaries before evaluation
-            if isinstance(domain, dict):
-                domain_copy = dict(domain)
+            if domain_keys is None:
+                domain_view = dict(domain)
+                for k, v in raw_data.items():
+                    if k.startswith("domain."):
+                        domain_view[k[7:]] = v
             else:
-                domain_copy = {}
-                
-            for k, v in raw_data.items():
-                if k.startswith("domain."):
-                    domain_copy[k[7:]] = v
+                domain_view = {}
+                for k in domain_keys:
+                    flat = "domain." + k
+                    if flat in raw_data:
+                        domain_view[k] = raw_data[flat]
+                    elif k in domain:
+                        domain_view[k] = domain[k]
                     
-            ctx["domain"] = domain_copy
+            ctx["domain"] = domain_view
             ctx["global"] = glob
-            ctx["signal"] = signals
-            ctx["cmd"] = signals
 
         _update_ctx()
 
@@ -419,6 +552,132 @@ class TheusEngine:
         """
         return self._run_process_sync(func_or_name, **kwargs)
 
+    # ------------------------------------------------------------------
+    # [v3.4] Trusted Fast Mode (Sampled Contract Audit)
+    # ------------------------------------------------------------------
+
+    def trust(self, func_or_name, every=None, rate=None):
+        """
+        Mark a registered process as trusted for `run_trusted()`.
+
+        Args:
+            every: Audit every N-th invocation (1 = always, 0/None = never).
+            rate: Audit each invocation with probability `rate` (0.0 - 1.0).
+        """
+        func = self._resolve_process(func_or_name)
+        if every is not None and every < 0:
+            raise ValueError(f"every must be >= 0, got {every}")
+        if rate is not None and not 0.0 <= rate <= 1.0:
+            raise ValueError(f"rate must be in [0, 1], got {rate}")
+        with self._trusted_lock:
+            self._trusted[func.__name__] = {"every": every or 0, "rate": rate or 0.0}
+            self._trusted_stats.setdefault(
+                func.__name__, {"calls": 0, "audited": 0, "violations": 0}
+            )
+
+    def run_trusted(self, func_or_name, *args, ctx=None, delta_path=None, **kwargs):
+        """
+        Run a process directly against the raw context (no guard proxies, no
+        shadows, no transaction) - near direct-call cost.
+
+        On sampled invocations (see `trust()`), writes made by the process are
+        recorded and checked against its contract `outputs`; violations are
+        reported through the AuditSystem (`log_fail` + ring-buffer message).
+        `delta_path(key)` maps keys of a returned delta to the context path the
+        caller applies them to (default: bare key -> `domain_ctx.<key>`).
+
+        NOTE: Results are NOT committed to the Rust Core; the caller owns the
+        context (same contract as calling the process function directly).
+        """
+        func = self._resolve_process(func_or_name)
+        target = self._context if ctx is None else ctx
+        name = func.__name__
+
+        if self._profiler is not None:
+            return self._profiler.call(name, self._run_trusted, func, name, target, delta_path, *args, **kwargs)
+        return self._run_trusted(func, name, target, delta_path, *args, **kwargs)
+
+    def _run_trusted(self, func, name, target, delta_path, /, *args, **kwargs):
+        policy = self._trusted.get(name)
+        if policy is None:
+            return func(target, *args, **kwargs)
+
+        with self._trusted_lock:
+            stats = self._trusted_stats[name]
+            stats["calls"] += 1
+            # NOTE: every=N audits calls 1, N+1, 2N+1, ... (first call always checked)
+            sampled = (policy["every"] and (stats["calls"] - 1) % policy["every"] == 0) or (
+                policy["rate"] and self._trusted_rng.random() < policy["rate"]
+            )
+        if not sampled:
+            return func(target, *args, **kwargs)
+        return self._run_audited(func, target, delta_path, *args, **kwargs)
+
+    @property
+    def trusted_stats(self):
+        """{process: {"calls", "audited", "violations"}} for trusted processes."""
+        with self._trusted_lock:
+            return {k: dict(v) for k, v in self._trusted_stats.items()}
+
+    # ------------------------------------------------------------------
+    # [v3.4] Process Latency Profiling
+    # ------------------------------------------------------------------
+
+    def enable_profiling(self, capture=None, profiler=None):
+        """
+        Record per-process call counts and latency histograms for `execute()`
+        and `run_trusted()`.
+
+        Args:
+            capture: Process name to additionally run under cProfile.
+            profiler: Existing ProcessProfiler to share (e.g. per agent).
+        Returns:
+            The active ProcessProfiler.
+        """
+        from theus.profiling import ProcessProfiler
+        self._profiler = profiler if profiler is not None else ProcessProfiler(capture=capture)
+        return self._profiler
+
+    def disable_profiling(self):
+        self._profiler = None
+
+    @property
+    def profiler(self):
+        """Active ProcessProfiler, or None when profiling is off."""
+        return self._profiler
+
+    def _resolve_process(self, func_or_name):
+        if isinstance(func_or_name, str):
+            func = self._registry.get(func_or_name)
+            if func is None:
+                raise ValueError(f"Process '{func_or_name}' not found in registry")
+            return func
+        return func_or_name
+
+    def _run_audited(self, func, target, delta_path, /, *args, **kwargs):
+        """Sampled invocation of a trusted process: record writes, check outputs."""
+        name = func.__name__
+        result, violations = _audited_call(func, target, args, kwargs, delta_path)
+        if violations is None:
+            return result
+
+        with self._trusted_lock:
+            stats = self._trusted_stats[name]
+            stats["audited"] += 1
+            stats["violations"] += len(violations)
+
+        if violations:
+            message = f"Trusted process '{name}' wrote undeclared outputs: {violations}"
+            if self._audit:
+                self._audit.log(name, message)
+                self._audit.log_fail(name)
+            else:
+                import warnings
+                warnings.warn(message, RuntimeWarning, stacklevel=3)
+        elif self._audit:
+            self._audit.log_success(name)
+        return result
+
     def _run_process_sync(self, name: str, **kwargs):
         """Run a process synchronously (blocking). Called by Rust Flux Engine."""
         import asyncio
@@ -661,11 +920,16 @@ class TheusEngine:
         max_retries = kwargs.pop("retries", 0)
         current_retries = 0
 
+        # [v3.4] Latency includes transaction setup, retries and commit
+        profiler = self._profiler
+        started_ns = time.perf_counter_ns() if profiler is not None else 0
+
         # [v3.3 FIX] Hoist Transaction to preserve Outbox across CAS retries
         # Long-running simulation processes often exceed 5s, bumping to 30s.
         while True:
-            # NOTE: Transaction.__init__ calls deepcopy on state.data for snapshot isolation.
-            # If state contains leaked Transaction refs (not picklable), deepcopy fails.
+            # NOTE: Transaction shadows are deep-copied lazily by get_shadow for snapshot
+            # isolation (only declared outputs in "cow" mode). If state contains leaked
+            # Transaction refs (not picklable), deepcopy fails.
             # We catch this and clean state before retrying.
             try:
                 _tx_ctx = theus_core.Transaction(self._core, write_timeout_ms=self._write_timeout_ms)
@@ -748,7 +1012,9 @@ class TheusEngine:
             
             # Successful COMMIT. Sync back to registry for legacy tests.
             self._sync_registry_from_core()
-            
+
+            if profiler is not None:
+                profiler.record(func.__name__, time.perf_counter_ns() - started_ns)
             return result
 
     async def _attempt_execute(self, func, tx, *args, **kwargs):
@@ -760,6 +1026,17 @@ class TheusEngine:
 
         contract = getattr(func, "_pop_contract", None)
 
+        # [v3.4] CoW Snapshot: only paths the process may write get private copies;
+        # everything else is shared with committed state (read-only, O(1) to open).
+        # NOTE: Requires strict_guards, otherwise undeclared writes would hit shared data.
+        if (
+            self._snapshot_mode == "cow"
+            and self._strict_guards
+            and contract is not None
+            and hasattr(tx, "set_write_scope")
+        ):
+            tx.set_write_scope(list(contract.outputs or []))
+
         # v3.0.2: Auto-Dispatch Parallel Processes
         # Transaction Management (v3.1 Explicit Lifecycle)
         # Transaction is now passed from execute() to preserve Outbox across retries.
@@ -1320,43 +1597,62 @@ class TheusEngine:
         Safe Zone for external mutation (v3.0.5 compliant).
         Yields the SystemContext for direct modification, then syncs to Rust Core.
 
+        [v3.3] Incremental Sync: attribute writes inside the block are tracked
+        (LockedContextMixin.__setattr__ hook) and only those paths are pushed
+        as a delta. A block that writes nothing is a no-op. In-place mutation
+        of containers must be flagged with `ctx.domain.mark_dirty("field")`.
+
         Usage:
             with engine.edit() as ctx:
                 ctx.domain.counter = 999
         """
-        # 1. Yield the Context (not self)
-        yield self._context
+        if not hasattr(self, "_core"):
+            yield self._context
+            return
+
+        # 1. Yield the Context (not self), recording written fields
+        tracker = DirtyTracker(self._context)
+        try:
+            yield self._context
+        finally:
+            tracker.stop()
+
+        if tracker.nested:
+            # Outer edit() block on the same context syncs the combined delta
+            return
+        if tracker.active and not tracker.dirty:
+            return
 
         # 2. Sync back to Rust Core (Blind Update with current version)
         # This emulates a forced 'Batch Transaction'
-        if hasattr(self, "_core"):
+        try:
+            current_ver = 0
             try:
-                # We only sync 'domain' and 'global' from context
-                # This is expensive (serialization) but safe for testing
-                current_ver = 0
-                try:
-                    current_ver = self.state.version
-                except:
-                    pass
-
-                # Construct update payload
-                # Note: self._context.to_dict() should return {'domain': ..., 'global': ...}
-                # But we need to check if to_dict exists
-                updates = {}
-                if hasattr(self._context, "to_dict"):
-                    updates = self._context.to_dict()
-                elif hasattr(self._context, "domain"):
-                    # Manual extraction for BaseSystemContext
-                    if hasattr(self._context.domain, "to_dict"):
-                        updates["domain"] = self._context.domain.to_dict()
-                    else:
-                        updates["domain"] = self._context.domain.__dict__
+                current_ver = self.state.version
+            except:
+                pass
+
+            # Construct update payload: dirty paths only, or full snapshot
+            # when the context cannot be tracked (non-Theus context classes)
+            updates = {}
+            if tracker.active:
+                updates = tracker.delta()
+                if not updates:
+                    return  # Only untracked zones (HEAVY/SIGNAL/...) changed
+            elif hasattr(self._context, "to_dict"):
+                updates = self._context.to_dict()
+            elif hasattr(self._context, "domain"):
+                # Manual extraction for BaseSystemContext
+                if hasattr(self._context.domain, "to_dict"):
+                    updates["domain"] = self._context.domain.to_dict()
+                else:
+                    updates["domain"] = self._context.domain.__dict__
 
-                # Force Push
-                self._core.compare_and_swap(current_ver, updates)
+            # Force Push
+            self._core.compare_and_swap(current_ver, updates)
 
-            except Exception as e:
-                print(f"WARNING: engine.edit() failed to sync to Rust Core: {e}")
+        except Exception as e:
+            print(f"WARNING: engine.edit() failed to sync to Rust Core: {e}")
 
     def execute_parallel(self, process_name, **kwargs):
         """
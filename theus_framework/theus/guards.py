@@ -27,6 +27,8 @@ except ImportError:
     _RustContextGuard = object
     _RustSupervisorProxy = type(None)
 
+from .contracts import compile_contract
+
 
 class _PrivateZoneReadAccess(Exception):
     """[RFC-001 Handbook §1.1] Sentinel raised by _check_zone_physics when a non-admin
@@ -35,6 +37,15 @@ class _PrivateZoneReadAccess(Exception):
     pass
 
 
+@functools.lru_cache(maxsize=4096)
+def _has_restricted_segment(path: str) -> bool:
+    """[v3.4] True if any segment of `path` is in the CONSTANT or PRIVATE zone."""
+    for segment in path.replace("[", ".").replace("]", "").split("."):
+        if segment.startswith("const_") or segment.startswith("internal_"):
+            return True
+    return False
+
+
 class ContextGuard:
     """
     Python wrapper for the Rust ContextGuard (v3.2 RFC-001).
@@ -190,6 +201,9 @@ class ContextGuard:
 
     def _check_zone_physics(self, path: str, mode: str) -> None:
         """[RFC-001 §5] Enforce Zone Physics at Python layer."""
+        # [v3.4] Fast path: most paths have no const_/internal_ segment
+        if not _has_restricted_segment(path):
+            return
         # Extract last segment for prefix check
         # path may be 'domain.const_config', 'domain.nested.const_value', etc.
         segments = path.replace("[", ".").replace("]", "").split(".")
@@ -227,8 +241,8 @@ class ContextGuard:
         
         NOTE: This only enforces restrictions on paths belonging to REGISTERED namespaces.
         System paths (outbox, policy_id, etc.) are always allowed through to the Rust guard.
+        [v3.4] Pattern matching is done by the CompiledContract (path trie, memoized per path).
         """
-        import fnmatch
         if self._local_is_admin: return True
         
         # Use getattr to avoid recursion in __getattr__
@@ -239,42 +253,24 @@ class ContextGuard:
         if inputs is None and mode == "read": return True
         if outputs is None and mode == "write": return True
         
+        compiled = self.__dict__.get("_compiled")
+        if compiled is None:
+            compiled = compile_contract(inputs, outputs)
+            object.__setattr__(self, "_compiled", compiled)
+        top_level, allowed = compiled.lookup(path, mode)
+        
         # [RFC-002 KEY INSIGHT] Only enforce isolation for paths that belong to a registered namespace.
         # If the top-level segment of the path is NOT a registered namespace, allow through.
         from .context import NamespaceRegistry
-        registry = NamespaceRegistry()
-        
-        norm_path = path.replace("[", ".").replace("]", "")
-        top_level = norm_path.split(".")[0]
-        
-        if top_level not in registry._namespaces:
+        if top_level not in NamespaceRegistry()._namespaces:
             # Not a registered namespace path → pass through freely to Rust guard.
             return True
         
         # --- PATH IS IN A REGISTERED NAMESPACE --- enforce whitelist ---
-        all_patterns = (inputs or set()) | (outputs or set())
-        
-        if mode == "read":
-            # READ DISCOVERY: allow if path matches any input OR any output sub-path
-            if "*" in all_patterns: return True
-            for pattern in all_patterns:
-                norm_pattern = pattern.replace("[", ".").replace("]", "")
-                if fnmatch.fnmatch(norm_path, norm_pattern): return True
-                # Allow parent-path discovery (ctx.domain is needed to write ctx.domain.key)
-                if norm_path.startswith(norm_pattern + "."): return True
-                if norm_pattern.startswith(norm_path + "."): return True
-            return False
-            
-        # WRITE MODE: strict check against outputs only
-        targets = outputs
-        if targets is None: return True
-        if "*" in targets: return True
-        for pattern in targets:
-            norm_pattern = pattern.replace("[", ".").replace("]", "")
-            if fnmatch.fnmatch(norm_path, norm_pattern): return True
-            # Allow sub-path writes (writing domain.key.sub when domain.key is declared)
-            if norm_path.startswith(norm_pattern + "."): return True
-        return False
+        # READ DISCOVERY: path matches any input/output, a sub-path of one, or a parent
+        # of one (ctx.domain is needed to write ctx.domain.key).
+        # WRITE MODE: path matches an output or a sub-path of one.
+        return allowed
 
     @property
     def is_admin(self) -> bool:
@@ -288,6 +284,7 @@ class ContextGuard:
     def _elevate(self, enabled: bool):
         """[RFC-001] Explicitly elevate/reset admin status on inner guard."""
         object.__setattr__(self, "_local_is_admin", enabled)
+        self._forget_children()
         
         # 1. Elevate the Rust heart (if it's a ContextGuard)
         if isinstance(self._inner, _RustContextGuard):
@@ -302,6 +299,15 @@ class ContextGuard:
         # because that triggers ContractViolationError if the proxy-path is not in outputs.
         # Instead, we use Parent-Level Overwrite in destructive methods (clear/pop/remove).
 
+    def _forget_children(self, name: Any = None):
+        """[v3.4] Drop cached child guards (all, or the one for `name`)."""
+        child_guards = self.__dict__.get("_child_guards")
+        if child_guards:
+            if name is None:
+                child_guards.clear()
+            else:
+                child_guards.pop(name, None)
+
     @property
     def transaction(self):
         return getattr(self, "_transaction", None)
@@ -340,6 +346,12 @@ class ContextGuard:
         if name in ("_inner", "_local_is_admin", "_log", "_elevate", "is_admin", "is_proxy", "_outbox", "_path_prefix", "_allowed_inputs", "_allowed_outputs", "_transaction", "_strict_guards", "_parent", "_name", "_target"):
             return object.__getattribute__(self, name)
 
+        # [v3.4] Child guard cache: repeated ctx.domain.x access in hot loops is a dict lookup.
+        # The access was already checked when the child was created; writes through this
+        # guard and admin elevation invalidate the cache.
+        child_guards = self.__dict__.get("_child_guards")
+        if child_guards is not None and name in child_guards:
+            return child_guards[name]
 
         full_path = name if self._path_prefix == "" else f"{self._path_prefix}.{name}"
         # [RFC-001 §5] Zone physics check first (const_/internal_)
@@ -497,7 +509,7 @@ class ContextGuard:
                 if sub_target is None and hasattr(self._target, "get"):
                     sub_target = self._target.get(name)
 
-            return ContextGuard(
+            child = ContextGuard(
                 target_obj=sub_target,
                 allowed_inputs=self._allowed_inputs,
                 allowed_outputs=self._allowed_outputs,
@@ -508,6 +520,13 @@ class ContextGuard:
                 parent=self,
                 name=name,
             )
+            # NOTE: Only proxy-backed children are cached; plain dict/list copies below
+            # propagate writes to the parent and are re-read each time.
+            if child_guards is None:
+                child_guards = {}
+                object.__setattr__(self, "_child_guards", child_guards)
+            child_guards[name] = child
+            return child
         # [Fix 2.3] Wrap plain dict/list trong ContextGuard để bảo toàn chain-of-custody.
         # Nếu val là plain dict/list (Rust trả về bản copy, không phải _RustContextGuard),
         # việc return raw sẽ khiến write đi vào copy tạm thời, không về engine.state.data.
@@ -703,6 +722,7 @@ class ContextGuard:
     def clear(self):
         """[RFC-001 §5] Check CONSTANT zone before clear (delete)."""
         self._check_zone_physics(self._path_prefix or "?", "delete")
+        self._forget_children()
         if hasattr(self._inner, "clear"):
             try:
                 return self._inner.clear()
@@ -724,6 +744,7 @@ class ContextGuard:
     def pop(self, *args, **kwargs):
         """[RFC-001 §5] Check CONSTANT zone before pop (delete)."""
         self._check_zone_physics(self._path_prefix or "?", "delete")
+        self._forget_children()
         if hasattr(self._inner, "pop"):
             try:
                 return self._inner.pop(*args, **kwargs)
@@ -745,6 +766,7 @@ class ContextGuard:
     def remove(self, *args, **kwargs):
         """[RFC-001 §5] Check CONSTANT zone before remove (delete)."""
         self._check_zone_physics(self._path_prefix or "?", "delete")
+        self._forget_children()
         if hasattr(self._inner, "remove"):
             try:
                 return self._inner.remove(*args, **kwargs)
@@ -762,6 +784,9 @@ class ContextGuard:
     def __setattr__(self, name: str, value: Any) -> None:
         if name in ("_inner", "_local_is_admin", "_log", "_outbox", "_path_prefix", "_allowed_inputs", "_allowed_outputs", "_transaction", "_strict_guards", "_parent", "_name", "_target"):
             object.__setattr__(self, name, value)
+            # [v3.4] Contract/target changed → compiled checks and child guards are stale
+            self.__dict__.pop("_compiled", None)
+            self._forget_children()
             return
 
         full_path = name if self._path_prefix == "" else f"{self._path_prefix}.{name}"
@@ -769,6 +794,7 @@ class ContextGuard:
         self._check_zone_physics(full_path, "write")
         if not self._is_allowed(full_path, "write"):
              raise PermissionError(f"Illegal Write: Path '{full_path}' is restricted by Process Contract.")
+        self._forget_children(name)
 
         # [INC-025 Fix] HEAVY Zone Shallow Unwrap:
         # For fields with 'heavy_' prefix (ContextZone.HEAVY), skip recursive deep unwrap.
@@ -807,6 +833,8 @@ class ContextGuard:
             self._check_zone_physics(full_path, "write")
         if isinstance(key, str) and not self._is_allowed(full_path, "write"):
              raise PermissionError(f"Illegal Write: Path '{full_path}' is restricted by Process Contract.")
+        if isinstance(key, str):
+            self._forget_children(key)
 
         # [INC-025 Fix] HEAVY Zone Shallow Unwrap (same as __setattr__):
         # Avoid O(N) recursion when assigning large NumPy/SHM objects to heavy_ fields.
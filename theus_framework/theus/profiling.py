@@ -0,0 +1,181 @@
+"""
+Process Latency Profiling (v3.4)
+================================
+Low-overhead per-process call counters and latency histograms.
+
+- `LatencyHistogram`: fixed log2 buckets over `perf_counter_ns` durations,
+  stored in a preallocated array (recording a sample allocates nothing).
+- `ProcessProfiler`: one histogram per process name, plus optional cProfile
+  capture for a single chosen process.
+"""
+import cProfile
+import pstats
+import time
+from array import array
+
+# Bucket b holds durations in [2^(b-1), 2^b) ns; the last bucket is the
+# overflow bucket (>= 2^46 ns ~ 19.5 hours).
+NUM_BUCKETS = 48
+
+
+class LatencyHistogram:
+    """Fixed-bucket (log2, nanoseconds) latency histogram."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * NUM_BUCKETS))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        bucket = ns.bit_length()
+        self.counts[bucket if bucket < NUM_BUCKETS else NUM_BUCKETS - 1] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        for bucket, n in enumerate(other.counts):
+            if n:
+                self.counts[bucket] += n
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def reset(self):
+        for bucket in range(NUM_BUCKETS):
+            self.counts[bucket] = 0
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def percentile(self, q):
+        """Upper bound (ns) of the bucket holding the q-th percentile (0-100)."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                # NOTE: Never report more than the observed maximum
+                return min(1 << bucket, self.max_ns) if bucket else 0
+        return self.max_ns
+
+    def summary(self):
+        """JSON-friendly summary (microseconds)."""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.count / 1e3, 2) if self.count else 0.0,
+            "p50_us": round(self.percentile(50) / 1e3, 2),
+            "p90_us": round(self.percentile(90) / 1e3, 2),
+            "p99_us": round(self.percentile(99) / 1e3, 2),
+            "max_us": round(self.max_ns / 1e3, 2),
+        }
+
+
+class ProcessProfiler:
+    """
+    Per-process latency histograms.
+
+    Args:
+        capture: Process name to run under cProfile (None = no capture).
+
+    NOTE: Not thread-safe by design. Use one profiler per engine/agent; each
+    agent step runs on a single worker thread at a time.
+    """
+
+    def __init__(self, capture=None):
+        self.histograms = {}
+        self.capture = capture
+        self._capture_profile = None
+        self._capturing = False
+
+    def record(self, name, ns):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = LatencyHistogram()
+        hist.record(ns)
+
+    def call(self, name, func, /, *args, **kwargs):
+        """Call `func(*args, **kwargs)` and record its latency under `name`."""
+        if name == self.capture and not self._capturing:
+            return self._call_captured(name, func, args, kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def _call_captured(self, name, func, args, kwargs):
+        if self._capture_profile is None:
+            self._capture_profile = cProfile.Profile()
+        self._capturing = True
+        start = time.perf_counter_ns()
+        self._capture_profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._capture_profile.disable()
+            self.record(name, time.perf_counter_ns() - start)
+            self._capturing = False
+
+    def snapshot(self, reset=False):
+        """{process: summary} for every process seen so far."""
+        result = {name: hist.summary() for name, hist in self.histograms.items() if hist.count}
+        if reset:
+            self.reset()
+        return result
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+        self._capture_profile = None
+
+    def capture_stats(self, limit=15):
+        """Top functions (by cumulative time) of the captured process, or []."""
+        return top_functions([self], limit)
+
+
+def merge_histograms(profilers):
+    """Merge the histograms of several profilers into {process: LatencyHistogram}."""
+    merged = {}
+    for profiler in profilers:
+        for name, hist in profiler.histograms.items():
+            if not hist.count:
+                continue
+            if name not in merged:
+                merged[name] = LatencyHistogram()
+            merged[name].merge(hist)
+    return merged
+
+
+def top_functions(profilers, limit=15):
+    """Combined cProfile capture of several profilers: top functions by cumtime."""
+    profiles = [p._capture_profile for p in profilers if p._capture_profile is not None]
+    if not profiles:
+        return []
+    try:
+        stats = pstats.Stats(profiles[0])
+    except TypeError:
+        # NOTE: Profile enabled but never collected anything
+        return []
+    for profile in profiles[1:]:
+        try:
+            stats.add(profile)
+        except TypeError:
+            pass
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{filename}:{line}({func})",
+            "ncalls": nc,
+            "tottime_ms": round(tt * 1e3, 3),
+            "cumtime_ms": round(ct * 1e3, 3),
+        }
+        for (filename, line, func), (_, nc, tt, ct, _) in rows
+    ]
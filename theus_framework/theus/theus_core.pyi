@@ -152,6 +152,7 @@ class Transaction:
     def __exit__(self, /, _exc_type=None, _exc_value=None, _traceback=None): ...
     def __init__(self, /, *args, **kwargs): ...
     def build_pending_from_deltas(self, /): ...
+    def clear_write_scope(self, /): ...
     def commit(self, /): ...
     def flush_outbox(self, /): ...
     def get_delta_log(self, /): ...
@@ -161,6 +162,8 @@ class Transaction:
     def is_known_shadow(self, /, obj): ...
     def log_delta(self, /, path, old_val=None, new_val=None): ...
     def log_internal(self, /, _path, _op, _new_val=None, _old_val=None, _obj_ref=None, _key=None): ...
+    def set_write_scope(self, /, paths=None): ...
+    def shadow_kind(self, /, obj): ...
     def update(self, /, data=None, heavy=None, signal=None): ...
 
 class WorkflowEngine: